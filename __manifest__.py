@@ -27,9 +27,11 @@
         'views/installment_views.xml',
         'views/installment_calculator_wizard_views.xml',
         'views/refund_wizard_views.xml',
+        'views/mass_action_views.xml',
 
         # 3. DATA - EN SON (model extend edildikten sonra)
         'data/payment_provider_data.xml',
+        'data/ir_cron_data.xml',
 
         # 4. TEMPLATES
         'views/templates.xml',
@@ -40,6 +42,8 @@
     'assets': {
         'web.assets_frontend': [
             'mews_pos/static/src/css/installment.css',
+            # Sürümlü BIN -> banka haritası (iki script de kullanır)
+            'mews_pos/static/src/js/bin_map.js',
             'mews_pos/static/src/js/installment_calculator.js',
             # Kart formu ve taksit JS’i
             'mews_pos/static/src/js/payment_installments.js',
@@ -2,6 +2,7 @@
 
 from odoo import http
 from odoo.http import request, Response
+import hmac
 import logging
 import json
 
@@ -25,7 +26,13 @@ class MewsPosController(http.Controller):
         Parametreler:
             amount: (opsiyonel) Tutar. Gelmezse sepetten alınır.
             bank_id: (opsiyonel) Banka ID'si. Varsa doğrudan o bankaya göre taksit döner.
-            bin_number: (opsiyonel) Kartın ilk 6 hanesi. Buna göre banka seçilebilir.
+            bin_number: (opsiyonel) Kartın ilk 6-8 hanesi. Banka bellek içi BIN indeksinden bulunur.
+
+        Taksitler aktif yapılandırmalar, kampanya oranları ve sepetteki
+        kategorilerin kısıtlamalarıyla derlenmiş oran tablosundan
+        (lib.installment_engine) hesaplanır; istek başına veritabanına
+        yalnızca tablo değişiklik özeti için gidilir.
+
         Dönen format:
             {
               "jsonrpc": "2.0",
@@ -55,7 +62,7 @@ class MewsPosController(http.Controller):
         """
 
         try:
-            _logger.info("Mews POS - get_payment_installments kwargs: %s", kwargs)
+            _logger.debug("Mews POS - get_payment_installments kwargs: %s", kwargs)
 
             # HTTP body'den JSON geldiyse onu da dikkate alalım (fetch ile POST için)
             if request.httprequest.method == 'POST':
@@ -70,18 +77,18 @@ class MewsPosController(http.Controller):
             # Tutar
             amount = float(kwargs.get('amount', 0.0) or 0.0)
             bank_id = kwargs.get('bank_id')
-            bin_number = (kwargs.get('bin_number') or '').strip()
+            bin_number = str(kwargs.get('bin_number') or '').strip()
 
-            _logger.info(
+            _logger.debug(
                 "Processing installments - Amount: %s, Bank ID: %s, BIN: %s",
                 amount, bank_id, bin_number,
             )
 
+            order = request.website.sale_get_order()
+
             # Eğer amount 0 ise sepetten al
-            if amount <= 0:
-                order = request.website.sale_get_order()
-                if order:
-                    amount = order.amount_total
+            if amount <= 0 and order:
+                amount = order.amount_total
 
             # Henüz sipariş / sepet yoksa
             if amount <= 0:
@@ -104,144 +111,36 @@ class MewsPosController(http.Controller):
             # ============================
             # 1) Banka tespiti
             # ============================
-            bank = None
+            bank_ids = None
 
             # a) bank_id ile doğrudan
             if bank_id:
                 try:
-                    bank = request.env['mews.pos.bank'].sudo().browse(int(bank_id))
-                    if not bank or not bank.exists():
-                        bank = None
-                except Exception:
-                    bank = None
-
-            # b) bank_id yoksa bin_number ile tespit
-            if not bank and bin_number and len(bin_number) >= 6:
-                # Örneğin bankalarda "bin_prefix" gibi bir alan olduğunu varsayıyoruz.
-                bank = (
-                    request.env['mews.pos.bank']
-                    .sudo()
-                    .search([('bin_prefix', '=', bin_number[:6])], limit=1)
-                )
+                    bank_ids = [int(bank_id)]
+                except (TypeError, ValueError):
+                    bank_ids = None
 
-            # c) Hâlâ banka yoksa: tüm bankalar üzerinden demo hesaplama
-            if not bank:
-                _logger.info("Mews POS - Bank not found, using demo banks")
+            # b) bank_id yoksa kartın BIN numarası ile tespit
+            if bank_ids is None and len(bin_number) >= 6:
+                entry = request.env['mews.pos.bin'].sudo().lookup(bin_number)
+                if entry:
+                    bank_ids = [entry.bank_id]
 
-                banks = [
-                    {
-                        'id': 1,
-                        'name': 'Yapı Kredi Bankası',
-                        'code': 'yapikredi',
-                    },
-                    {
-                        'id': 2,
-                        'name': 'İş Bankası',
-                        'code': 'isbank',
-                    },
-                ]
-            else:
-                banks = [{
-                    'id': bank.id,
-                    'name': bank.name,
-                    'code': bank.code or (bank.short_name if hasattr(bank, 'short_name') else ''),
-                }]
-
-            test_installments = []
+            # c) Hâlâ banka yoksa tüm aktif bankalar listelenir
 
             # ============================
-            # 2) Her banka için taksit hesaplama
+            # 2) Taksit motoru (derlenmiş oran tablosu)
             # ============================
-            for b in banks:
-                bank_id_val = b['id']
-                bank_name = b['name']
-                bank_code = b['code']
-
-                # İstersen burada gerçek modelden (installment_config_ids) okuyabilirsin.
-                # Şimdilik senin verdiğin sabit senaryoları kullanıyoruz.
-
-                if bank_id_val == 1:  # Yapı Kredi
-                    installments = [
-                        {
-                            'installment_count': 1,
-                            'installment_amount': round(amount, 2),
-                            'total_amount': round(amount, 2),
-                            'interest_rate': 0.0,
-                            'is_campaign': False,
-                        },
-                        {
-                            'installment_count': 2,
-                            'installment_amount': round(amount / 2, 2),
-                            'total_amount': round(amount, 2),
-                            'interest_rate': 0.0,
-                            'is_campaign': True,
-                        },
-                        {
-                            'installment_count': 3,
-                            'installment_amount': round(amount * 1.03 / 3, 2),
-                            'total_amount': round(amount * 1.03, 2),
-                            'interest_rate': 3.0,
-                            'is_campaign': True,
-                        },
-                        {
-                            'installment_count': 6,
-                            'installment_amount': round(amount * 1.06 / 6, 2),
-                            'total_amount': round(amount * 1.06, 2),
-                            'interest_rate': 6.0,
-                            'is_campaign': False,
-                        },
-                    ]
-                elif bank_id_val == 2:  # İş Bankası
-                    installments = [
-                        {
-                            'installment_count': 1,
-                            'installment_amount': round(amount, 2),
-                            'total_amount': round(amount, 2),
-                            'interest_rate': 0.0,
-                            'is_campaign': False,
-                        },
-                        {
-                            'installment_count': 2,
-                            'installment_amount': round(amount / 2, 2),
-                            'total_amount': round(amount, 2),
-                            'interest_rate': 0.0,
-                            'is_campaign': True,
-                        },
-                        {
-                            'installment_count': 4,
-                            'installment_amount': round(amount * 1.04 / 4, 2),
-                            'total_amount': round(amount * 1.04, 2),
-                            'interest_rate': 4.0,
-                            'is_campaign': False,
-                        },
-                    ]
-                else:
-                    # Diğer bankalar için sadece tek çekim örneği
-                    installments = [
-                        {
-                            'installment_count': 1,
-                            'installment_amount': round(amount, 2),
-                            'total_amount': round(amount, 2),
-                            'interest_rate': 0.0,
-                            'is_campaign': False,
-                        }
-                    ]
-
-                test_installments.append({
-                    'bank': {
-                        'id': bank_id_val,
-                        'name': bank_name,
-                        'code': bank_code,
-                    },
-                    'installments': installments,
-                })
+            category_ids, max_count = self._get_cart_installment_limits(order)
+            table = request.env['mews.pos.installment.config'].sudo().get_rate_table()
+            installments = table.quote(amount, bank_ids=bank_ids, category_ids=category_ids, max_count=max_count)
 
             response_data = {
                 'jsonrpc': '2.0',
                 'id': None,
                 'result': {
                     'success': True,
-                    'installments': test_installments,
+                    'installments': installments,
                     'amount': amount,
                     'message': 'Taksit seçenekleri başarıyla yüklendi',
                 },
@@ -261,6 +160,95 @@ class MewsPosController(http.Controller):
                 status=500,
             )
 
+    def _get_cart_installment_limits(self, order):
+        """
+        Sepetteki ürünlerin taksit sınırları
+
+        Returns:
+            tuple: (eCommerce kategori id'leri, üst taksit sayısı veya None)
+        """
+        if not order:
+            return (), None
+        products = order.order_line.product_id
+        if not all(products.mapped('installment_allowed')):
+            return (), 1
+        limits = [limit for limit in products.mapped('max_installment') if limit]
+        return tuple(products.public_categ_ids.ids), min(limits) if limits else None
+
+    @http.route(
+        '/mews_pos/bin_map',
+        type='http',
+        auth='public',
+        csrf=False,
+        methods=['GET'],
+    )
+    def bin_map_latest(self, **kwargs):
+        """Güncel sürümlü BIN haritasına yönlendirir (yönlendirme önbelleklenmez)."""
+        response = request.redirect(request.env['mews.pos.bin'].sudo().get_bin_map_url(), code=302, local=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    @http.route(
+        '/mews_pos/bin_map/<string:version>.json',
+        type='http',
+        auth='public',
+        csrf=False,
+        methods=['GET'],
+    )
+    def bin_map(self, version, **kwargs):
+        """
+        Sürümlü BIN -> banka haritası (lib.bin_index.encode_bin_map).
+
+        Sürüm içeriğin özeti olduğundan yanıt bir yıl, değişmez olarak
+        önbelleklenir; BIN veya banka değişince sayfalar yeni sürümün
+        URL'ini alır. Eski sürüm istenirse güncel sürüme yönlendirilir.
+        """
+        current, body, compressed = request.env['mews.pos.bin'].sudo()._get_bin_map()
+        if version != current:
+            response = request.redirect(f'/mews_pos/bin_map/{current}.json', code=302, local=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        etag = f'"{current}"'
+        headers = {
+            'Cache-Control': 'public, max-age=31536000, immutable',
+            'ETag': etag,
+            'Vary': 'Accept-Encoding',
+        }
+        if request.httprequest.headers.get('If-None-Match') == etag:
+            return Response(status=304, headers=headers)
+        if 'gzip' in request.httprequest.headers.get('Accept-Encoding', ''):
+            body = compressed
+            headers['Content-Encoding'] = 'gzip'
+        return Response(body, content_type='application/json; charset=utf-8', headers=headers)
+
+    @http.route(
+        '/mews_pos/metrics',
+        type='http',
+        auth='public',
+        csrf=False,
+        methods=['GET'],
+    )
+    def metrics(self, token=None, **kwargs):
+        """
+        Banka kuyruk ve callback ret metrikleri (Prometheus metin formatı).
+
+        Değerler isteği karşılayan worker'a aittir. Erişim için
+        'mews_pos.metrics_token' sistem parametresi tanımlı olmalı ve
+        ?token=... ile gönderilmelidir.
+        """
+        from odoo.addons.mews_pos.lib.concurrency_limiter import ConcurrencyLimiter
+        from odoo.addons.mews_pos.lib.callback_verifier import CallbackVerifier
+
+        expected = request.env['ir.config_parameter'].sudo().get_param('mews_pos.metrics_token')
+        if not expected or not hmac.compare_digest(str(token or ''), expected):
+            return Response('Not Found', status=404)
+
+        return Response(
+            ConcurrencyLimiter.export_metrics() + CallbackVerifier.export_metrics(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+
     @http.route(
         '/mews_pos/test_installments',
         type='http',
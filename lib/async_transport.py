@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+
+import ssl
+import json
+import time
+import asyncio
+import logging
+import weakref
+from urllib.parse import urlsplit, urlencode
+
+from requests.structures import CaseInsensitiveDict
+
+_logger = logging.getLogger(__name__)
+
+
+class AsyncTransportError(Exception):
+    """Asenkron HTTP isteği hatası"""
+
+
+class AsyncTimeoutError(AsyncTransportError):
+    """Asenkron HTTP isteği zaman aşımı"""
+
+
+class AsyncHTTPError(AsyncTransportError):
+    """Banka 4xx/5xx döndürdü"""
+
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class AsyncResponse:
+    """
+    requests.Response ile uyumlu asgari yanıt nesnesi
+
+    Gateway'lerin parse_*_response metotları yalnızca text, content,
+    status_code, headers ve json() kullandığı için aynen çalışır.
+    """
+
+    def __init__(self, url, status_code, reason, headers, content, delimited=True):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        # Gövde sonu bağlantı kapanmadan belirlendi mi (keep-alive için)
+        self.delimited = delimited
+
+    @property
+    def encoding(self):
+        content_type = self.headers.get('Content-Type', '')
+        for part in content_type.split(';')[1:]:
+            key, _, value = part.strip().partition('=')
+            if key.lower() == 'charset' and value:
+                return value.strip('"\'')
+        return 'utf-8'
+
+    @property
+    def text(self):
+        try:
+            return self.content.decode(self.encoding, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise AsyncHTTPError(f"{self.status_code} {self.reason}: {self.url}", response=self)
+
+
+class AsyncHttpTransport:
+    """
+    asyncio tabanlı, bağımlılıksız HTTP/1.1 istemcisi
+
+    Tek thread üzerinde yüzlerce banka çağrısını eş zamanlı yürütmek için
+    kullanılır. Her host için eş zamanlı bağlantı sayısı max_per_host (veya
+    isteğin max_connections değeri) ile sınırlanır; aynı host'a farklı
+    limitlerle gelen çağıranlar ayrı sayaç kullanır. Boş bağlantı beklemek
+    de isteğin süre sınırına dahildir. Transport event loop'a bağlıdır; for_loop() çalışan loop'un
+    paylaşımlı örneğini döndürür.
+
+    Bağlantılar host bazında keep-alive havuzunda tutulur; TCP/TLS el
+    sıkışması her istekte tekrarlanmaz. Boşta bekleyen bağlantı, sunucunun
+    Keep-Alive başlığındaki süreden (yoksa IDLE_TIMEOUT) önce bırakılır.
+    Kullanılmış bağlantıda istek yeniden gönderilmez; ödeme çağrıları
+    idempotent değildir.
+    """
+
+    DEFAULT_MAX_PER_HOST = 10
+    IDLE_TIMEOUT = 4.0
+    USER_AGENT = 'mews-pos-async/1.0'
+
+    _instances = weakref.WeakKeyDictionary()
+    _ssl_context = None
+
+    def __init__(self, max_per_host=None):
+        self.max_per_host = max_per_host or self.DEFAULT_MAX_PER_HOST
+        self._semaphores = {}
+        # host -> [(reader, writer, boşta kalabileceği son an), ...]
+        self._idle = {}
+        self.stats = {'opened': 0, 'reused': 0}
+
+    @classmethod
+    def for_loop(cls, loop=None):
+        """Çalışan event loop için paylaşımlı transport"""
+        loop = loop or asyncio.get_running_loop()
+        transport = cls._instances.get(loop)
+        if transport is None:
+            transport = cls()
+            cls._instances[loop] = transport
+        return transport
+
+    @classmethod
+    def get_ssl_context(cls):
+        """Process genelinde tek SSL context (CA yüklemesi bir kez yapılır)"""
+        if cls._ssl_context is None:
+            cls._ssl_context = ssl.create_default_context()
+        return cls._ssl_context
+
+    def _semaphore(self, host_key, limit=None):
+        """Host ve limit başına bağlantı sayacı (ilk çağıranın limiti diğerlerine dayatılmaz)"""
+        key = (host_key, limit or self.max_per_host)
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(key[1])
+            self._semaphores[key] = semaphore
+        return semaphore
+
+    @staticmethod
+    def _check_headers(headers):
+        """Başlık enjeksiyonunu engelle: CR/LF içeren ad veya değer reddedilir"""
+        for key, value in headers.items():
+            if any(char in f"{key}{value}" for char in '\r\n'):
+                raise AsyncTransportError(f"Geçersiz HTTP başlığı (CR/LF içeriyor): {key!r}")
+
+    @staticmethod
+    def _encode_body(data):
+        if data is None:
+            return b''
+        if isinstance(data, bytes):
+            return data
+        if isinstance(data, str):
+            return data.encode('utf-8')
+        return urlencode(data).encode('utf-8')
+
+    async def request(self, method, url, data=None, headers=None, timeout=30, max_connections=None):
+        """
+        HTTP isteği gönder
+
+        Args:
+            method (str): 'POST' veya 'GET'
+            url (str): Hedef URL
+            data (dict|str|bytes): POST gövdesi veya GET parametreleri
+            headers (dict): Ek başlıklar
+            timeout (float): Boş bağlantı bekleme + bağlantı + yanıt için
+                toplam süre (saniye)
+            max_connections (int): Host için eş zamanlı bağlantı limiti
+
+        Returns:
+            AsyncResponse: Yanıt
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise AsyncTransportError(f"Geçersiz URL: {url}")
+
+        headers = headers or {}
+        self._check_headers(headers)
+
+        host_key = f"{parts.scheme}://{parts.netloc.lower()}"
+        semaphore = self._semaphore(host_key, max_connections)
+        try:
+            return await asyncio.wait_for(
+                self._send(semaphore, method.upper(), parts, url, data, headers, host_key),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            raise AsyncTimeoutError(f"Zaman aşımı ({timeout} sn): {url}")
+        except (OSError, ssl.SSLError, asyncio.IncompleteReadError, ValueError) as e:
+            raise AsyncTransportError(str(e))
+
+    async def _send(self, semaphore, method, parts, url, data, headers, host_key):
+        """Host'ta bağlantı hakkı alıp isteği yürüt"""
+        async with semaphore:
+            return await self._exchange(method, parts, url, data, headers, host_key)
+
+    async def close(self):
+        """Havuzdaki boş bağlantıları kapat"""
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for _, writer, _ in connections:
+                await self._close_writer(writer)
+
+    @staticmethod
+    async def _close_writer(writer):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+    def _checkout(self, host_key):
+        """Havuzdan hâlâ açık ve süresi dolmamış bir bağlantı al"""
+        connections = self._idle.get(host_key)
+        now = time.monotonic()
+        while connections:
+            reader, writer, expires_at = connections.pop()
+            if expires_at > now and not reader.at_eof() and not writer.is_closing():
+                self.stats['reused'] += 1
+                return reader, writer
+            writer.close()
+        return None
+
+    def _checkin(self, host_key, reader, writer, idle_timeout):
+        connections = self._idle.setdefault(host_key, [])
+        if len(connections) >= self.max_per_host:
+            writer.close()
+            return
+        connections.append((reader, writer, time.monotonic() + idle_timeout))
+
+    @classmethod
+    def _reusable(cls, response, request_headers, version):
+        """
+        Yanıttan sonra bağlantı havuza dönebilir mi; dönebiliyorsa boşta
+        tutulma süresi, dönemiyorsa None
+        """
+        if request_headers.get('Connection', '').lower() == 'close':
+            return None
+        connection = response.headers.get('Connection', '').lower()
+        if connection == 'close' or (version != 'HTTP/1.1' and connection != 'keep-alive'):
+            return None
+        if not response.delimited:
+            return None
+
+        idle_timeout = cls.IDLE_TIMEOUT
+        for part in response.headers.get('Keep-Alive', '').split(','):
+            key, _, value = part.strip().partition('=')
+            if key.lower() == 'timeout' and value.strip().isdigit():
+                idle_timeout = min(idle_timeout, int(value) - 1)
+        return idle_timeout if idle_timeout > 0 else None
+
+    async def _exchange(self, method, parts, url, data, headers, host_key):
+        use_ssl = parts.scheme == 'https'
+        port = parts.port or (443 if use_ssl else 80)
+
+        path = parts.path or '/'
+        query = parts.query
+        body = b''
+        if method == 'GET':
+            if data:
+                extra = urlencode(data) if isinstance(data, dict) else str(data)
+                query = f"{query}&{extra}" if query else extra
+        else:
+            body = self._encode_body(data)
+        if query:
+            path = f"{path}?{query}"
+
+        request_headers = CaseInsensitiveDict({
+            'Host': parts.netloc,
+            'User-Agent': self.USER_AGENT,
+            'Accept': '*/*',
+            'Connection': 'keep-alive',
+        })
+        request_headers.update(headers)
+        if method != 'GET':
+            request_headers['Content-Length'] = str(len(body))
+
+        head = f"{method} {path} HTTP/1.1\r\n" + ''.join(
+            f"{key}: {value}\r\n" for key, value in request_headers.items()
+        ) + "\r\n"
+
+        connection = self._checkout(host_key)
+        if connection is None:
+            connection = await asyncio.open_connection(
+                parts.hostname,
+                port,
+                ssl=self.get_ssl_context() if use_ssl else None,
+                server_hostname=parts.hostname if use_ssl else None,
+            )
+            self.stats['opened'] += 1
+        reader, writer = connection
+
+        try:
+            writer.write(head.encode('latin-1') + body)
+            await writer.drain()
+            response, version = await self._read_response(reader, url, method)
+        except BaseException:
+            # Yarıda kalan (ör. zaman aşımıyla iptal edilen) bağlantı havuza dönmez
+            await self._close_writer(writer)
+            raise
+
+        idle_timeout = self._reusable(response, request_headers, version)
+        if idle_timeout is None:
+            await self._close_writer(writer)
+        else:
+            self._checkin(host_key, reader, writer, idle_timeout)
+        return response
+
+    async def _read_response(self, reader, url, method):
+        """Yanıtı oku; (AsyncResponse, HTTP sürümü) döndürür"""
+        status_line = (await reader.readline()).decode('latin-1').strip()
+        try:
+            version, status, *reason = status_line.split(' ', 2)
+            status_code = int(status)
+        except ValueError:
+            raise AsyncTransportError(f"Geçersiz HTTP yanıtı: {status_line[:100]}")
+
+        headers = CaseInsensitiveDict()
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            key, _, value = line.partition(':')
+            headers[key.strip()] = value.strip()
+
+        delimited = True
+        if method == 'HEAD' or status_code in (204, 304) or 100 <= status_code < 200:
+            content = b''
+        elif 'chunked' in headers.get('Transfer-Encoding', '').lower():
+            content = await self._read_chunked(reader)
+        elif 'Content-Length' in headers:
+            content = await reader.readexactly(int(headers['Content-Length']))
+        else:
+            content = await reader.read()
+            delimited = False
+
+        response = AsyncResponse(url, status_code, reason[0] if reason else '', headers, content, delimited)
+        return response, version
+
+    @staticmethod
+    async def _read_chunked(reader):
+        chunks = []
+        while True:
+            size_line = (await reader.readline()).split(b';', 1)[0].strip()
+            size = int(size_line or b'0', 16)
+            if size == 0:
+                # Trailer başlıklarını atla
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        return b''.join(chunks)
+
+
+async def gather_limited(coroutines, limit=50):
+    """Coroutine'leri en fazla `limit` eş zamanlı olacak şekilde çalıştır"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(_run(c) for c in coroutines), return_exceptions=True)
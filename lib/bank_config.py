@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Derlenmiş banka konfigürasyonu
+
+mews.pos.bank kaydı, write_date başına bir kez değişmez bir BankConfig
+nesnesine derlenir. Gateway'ler (`config['password']`, `config.get(...)`)
+ve PHP servisi (to_account_dict) aynı nesneyi kullanır; türetilmiş
+değerler (sıfırla doldurulmuş terminal no, Garanti security data, para
+birimi kodları) derleme anında bir kez hesaplanır.
+
+Önbellek worker başınadır ve (veritabanı, banka id) ile anahtarlanır.
+Kayıt değiştiğinde write_date değişir; diğer worker'lar eski
+konfigürasyonu bir sonraki erişimde kendiliğinden bırakır.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from .crypto_utils import CryptoUtils
+
+_logger = logging.getLogger(__name__)
+
+# ISO 4217 harf kodu -> sayısal kod
+CURRENCY_CODES = MappingProxyType({
+    'TRY': '949',
+    'USD': '840',
+    'EUR': '978',
+    'GBP': '826',
+})
+DEFAULT_CURRENCY_CODE = '949'
+
+ENVIRONMENTS = ('test', 'production')
+
+URL_FIELDS = ('payment_api_url', 'gateway_3d_url', 'gateway_3d_host_url')
+
+
+class BankConfigError(ValueError):
+    """Banka konfigürasyonu geçersiz"""
+
+    error_type = 'invalid_config'
+
+
+class BankConfig(Mapping):
+    """
+    Değişmez, __slots__ tabanlı banka konfigürasyonu
+
+    Salt okunur bir Mapping'dir; gateway'lerin sözlük erişimi
+    (`config['terminal_id']`, `config.get('environment')`) aynen çalışır.
+    """
+
+    # mews.pos.bank alanlarından gelen değerler
+    FIELDS = (
+        'bank_code', 'gateway_type', 'payment_model', 'environment',
+        'merchant_id', 'terminal_id', 'username', 'password', 'store_key', 'client_id',
+        'payment_api_url', 'gateway_3d_url', 'gateway_3d_host_url', 'max_connections',
+    )
+
+    # Derleme anında hesaplanan değerler
+    DERIVED = (
+        'bank_id', 'version', 'test_mode', 'terminal_id_padded',
+        'garanti_security_data', 'currency_codes',
+    )
+
+    __slots__ = FIELDS + DERIVED
+
+    _KEYS = frozenset(__slots__)
+
+    def __init__(self, values, bank_id=None, write_date=None):
+        """
+        Args:
+            values (dict): FIELDS anahtarlı ham değerler (Odoo'nun boş alan
+                değeri False, None olarak saklanır)
+            bank_id (int): Banka kaydı id'si
+            write_date: Kaydın write_date değeri; versiyonun parçasıdır
+
+        Raises:
+            BankConfigError: Zorunlu alan eksik veya değer geçersizse
+        """
+        set_value = object.__setattr__
+        for name in self.FIELDS:
+            value = values.get(name)
+            set_value(self, name, None if value is False else value)
+        set_value(self, 'max_connections', self.max_connections or 0)
+
+        self._validate()
+
+        terminal_id = str(self.terminal_id).zfill(9) if self.terminal_id else None
+        security_data = None
+        if terminal_id and self.password:
+            security_data = CryptoUtils.garanti_security_data(self.password, terminal_id)
+
+        set_value(self, 'bank_id', bank_id)
+        set_value(self, 'version', f"{write_date}:{self._fingerprint()}")
+        set_value(self, 'test_mode', self.environment == 'test')
+        set_value(self, 'terminal_id_padded', terminal_id)
+        set_value(self, 'garanti_security_data', security_data)
+        set_value(self, 'currency_codes', CURRENCY_CODES)
+
+    def _validate(self):
+        """Zorunlu alanları ve değer biçimlerini kontrol et"""
+        for name in ('bank_code', 'gateway_type'):
+            if not getattr(self, name):
+                raise BankConfigError(f"Banka konfigürasyonunda zorunlu alan eksik: {name}")
+        if self.environment not in ENVIRONMENTS:
+            raise BankConfigError(f"Geçersiz ortam: {self.environment}")
+        for name in URL_FIELDS:
+            url = getattr(self, name)
+            if url and not url.startswith(('https://', 'http://')):
+                raise BankConfigError(f"Geçersiz URL ({name}): {url}")
+        if not isinstance(self.max_connections, int) or self.max_connections < 0:
+            raise BankConfigError(f"Geçersiz bağlantı sayısı: {self.max_connections}")
+
+    def _fingerprint(self):
+        """Alan değerlerinin kısa özeti (aynı write_date içindeki değişiklikler için)"""
+        payload = '\x1f'.join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"BankConfig değiştirilemez: {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"BankConfig değiştirilemez: {name}")
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return f"<BankConfig {self.bank_code} {self.gateway_type} {self.version}>"
+
+    def currency_code(self, currency):
+        """Para biriminin sayısal kodu (bilinmiyorsa TRY)"""
+        return self.currency_codes.get(currency, DEFAULT_CURRENCY_CODE)
+
+    def to_account_dict(self):
+        """mews.pos.bank.get_account_config biçimi (PHP servisine gönderilen)"""
+        return {
+            'bank_code': self.bank_code,
+            'merchant_id': self.merchant_id,
+            'terminal_id': self.terminal_id,
+            'username': self.username,
+            'password': self.password,
+            'store_key': self.store_key,
+            'client_id': self.client_id,
+            'payment_model': self.payment_model,
+            'environment': self.environment,
+            'max_connections': self.max_connections,
+            'endpoints': {
+                'payment_api': self.payment_api_url,
+                'gateway_3d': self.gateway_3d_url,
+                'gateway_3d_host': self.gateway_3d_host_url,
+            }
+        }
+
+
+class BankConfigCache:
+    """Derlenmiş konfigürasyonlar için worker içi LRU önbellek"""
+
+    CACHE_SIZE = 256
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+    _stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    @classmethod
+    def get(cls, key, write_date, loader):
+        """
+        Konfigürasyonu döndür; yoksa veya write_date değiştiyse derle
+
+        Args:
+            key (tuple): (veritabanı adı, banka id)
+            write_date: Kaydın güncel write_date değeri
+            loader (callable): Ham alan değerlerini döndüren fonksiyon;
+                yalnızca derleme gerektiğinde çağrılır
+
+        Returns:
+            BankConfig: Derlenmiş konfigürasyon
+
+        Raises:
+            BankConfigError: Konfigürasyon geçersizse
+        """
+        with cls._lock:
+            entry = cls._cache.get(key)
+            if entry is not None and entry[0] == write_date:
+                cls._cache.move_to_end(key)
+                cls._stats['hits'] += 1
+                return entry[1]
+            cls._stats['misses'] += 1
+
+        config = BankConfig(loader(), bank_id=key[-1], write_date=write_date)
+        _logger.debug(f"Banka konfigürasyonu derlendi: {config!r}")
+
+        with cls._lock:
+            cls._cache[key] = (write_date, config)
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+                cls._stats['evictions'] += 1
+        return config
+
+    @classmethod
+    def invalidate(cls, keys=None):
+        """
+        Önbellekteki konfigürasyonları geçersiz kıl
+
+        Args:
+            keys (list): Sadece bu (veritabanı adı, banka id) anahtarları; None ise tümü
+        """
+        with cls._lock:
+            if keys is None:
+                removed = len(cls._cache)
+                cls._cache.clear()
+            else:
+                removed = 0
+                for key in keys:
+                    if cls._cache.pop(key, None) is not None:
+                        removed += 1
+            cls._stats['invalidations'] += removed
+
+    @classmethod
+    def stats(cls):
+        """Önbellek isabet/ıskalama sayaçları"""
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats['size'] = len(cls._cache)
+            return stats
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+Toplu BIN tablosu içe aktarımı
+
+Kart şemalarının ve BKM'nin yayımladığı BIN tabloları (CSV, JSON dizisi
+veya satır başına bir JSON nesnesi) akış halinde okunur, parçalar halinde
+doğrulanır ve PostgreSQL COPY ile geçici tabloya yazılır; upsert tek bir
+INSERT ... ON CONFLICT ile yapılır (mews.pos.bin.import_bins).
+
+Bu modül Odoo'dan bağımsızdır: satır okuma, normalizasyon, banka adı
+eşleme ve COPY parçalarının üretimi burada yapılır.
+"""
+
+import codecs
+import csv
+import io
+import json
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+from .bin_index import bin_range
+
+# Kaynak sütun adı (küçük harf, ayırıcılar '_') -> alan
+COLUMN_ALIASES = {
+    'bin': 'bin_number',
+    'bin_number': 'bin_number',
+    'bin_start': 'bin_number',
+    'bin_from': 'bin_number',
+    'prefix': 'bin_number',
+    'bin_end': 'bin_end',
+    'bin_to': 'bin_end',
+    'end': 'bin_end',
+    'issuer': 'issuer',
+    'issuer_name': 'issuer',
+    'bank': 'issuer',
+    'bank_name': 'issuer',
+    'banka': 'issuer',
+    'banka_adi': 'issuer',
+    'card_type': 'card_type',
+    'brand': 'card_type',
+    'scheme': 'card_type',
+    'network': 'card_type',
+    'kart_tipi': 'card_type',
+    'name': 'name',
+    'description': 'name',
+    'aciklama': 'name',
+    'product': 'name',
+}
+
+# Kaynaktaki kart şeması -> mews.pos.bin.card_type
+CARD_TYPES = {
+    'visa': 'visa',
+    'mastercard': 'mastercard',
+    'master': 'mastercard',
+    'mc': 'mastercard',
+    'maestro': 'mastercard',
+    'amex': 'amex',
+    'americanexpress': 'amex',
+    'discover': 'discover',
+    'troy': 'troy',
+}
+
+# Banka adı karşılaştırmasında yok sayılan ekler
+ISSUER_NOISE = frozenset(('bankasi', 'bank', 'banka', 'as', 'tas', 'ao', 'tao', 'inc', 'ltd'))
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_TURKISH = str.maketrans('ıİşŞğĞüÜöÖçÇ', 'iisSgGuUoOcC')
+
+FORMATS = ('csv', 'json', 'jsonl')
+
+# COPY parçası başına satır
+CHUNK_SIZE = 20000
+
+# Raporda tutulan en fazla hata satırı
+MAX_ERRORS = 200
+
+
+class BinImportError(ValueError):
+    """BIN dosyası okunamadı"""
+
+    error_type = 'invalid_bin_file'
+
+
+def detect_format(filename, head=b''):
+    """
+    Dosya biçimini uzantıdan, yoksa ilk baytlardan belirle
+
+    Returns:
+        str: 'csv', 'json' veya 'jsonl'
+    """
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in FORMATS:
+        return extension
+    if extension == 'ndjson':
+        return 'jsonl'
+    stripped = head.lstrip(codecs.BOM_UTF8).lstrip()
+    if stripped.startswith(b'['):
+        return 'json'
+    if stripped.startswith(b'{'):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_rows(stream, fmt):
+    """
+    Dosyayı satır satır oku
+
+    Args:
+        stream: İkili (bytes) dosya nesnesi
+        fmt (str): 'csv', 'json' veya 'jsonl'
+
+    Yields:
+        tuple: (satır no, {kaynak sütun: değer})
+
+    Raises:
+        BinImportError: Biçim bilinmiyor veya dosya bozuksa
+    """
+    if fmt not in FORMATS:
+        raise BinImportError(f"Bilinmeyen BIN dosyası biçimi: {fmt}")
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        if fmt == 'csv':
+            # Örnek, bölünmüş satır kalmasın diye satır sonuna kadar okunur
+            sample = text.read(8192) + text.readline()
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;|\t')
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.DictReader(_chain(sample, text), dialect=dialect)
+            for line, row in enumerate(reader, start=2):
+                yield line, row
+        elif fmt == 'json':
+            try:
+                rows = json.load(text)
+            except ValueError as e:
+                raise BinImportError(f"JSON okunamadı: {e}")
+            if isinstance(rows, dict):
+                rows = rows.get('bins') or rows.get('data') or []
+            for line, row in enumerate(rows, start=1):
+                yield line, row
+        else:
+            for line, raw in enumerate(text, start=1):
+                if raw.strip():
+                    try:
+                        yield line, json.loads(raw)
+                    except ValueError as e:
+                        yield line, {'__error__': f"JSON satırı okunamadı: {e}"}
+    finally:
+        text.detach()
+
+
+def _chain(sample, text):
+    """Sniffer için okunan örneği dosyanın geri kalanıyla birleştir"""
+    buffer = io.StringIO(sample)
+    yield from buffer
+    yield from text
+
+
+@lru_cache(maxsize=256)
+def _column(key):
+    """Kaynak sütun adının alanı (yoksa None)"""
+    return COLUMN_ALIASES.get(_NON_ALNUM.sub('_', str(key).translate(_TURKISH).lower()).strip('_'))
+
+
+def normalize_row(row):
+    """
+    Kaynak satırını doğrula ve alanlara çevir
+
+    Args:
+        row (dict): Kaynak sütun adı -> değer
+
+    Returns:
+        tuple: (bin_number, bin_end, issuer, card_type, name)
+
+    Raises:
+        ValueError: BIN geçersiz veya banka adı eksikse
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Satır bir nesne değil")
+    if '__error__' in row:
+        raise ValueError(row['__error__'])
+
+    values = {}
+    for key, value in row.items():
+        field = _column(key)
+        if field and value not in (None, ''):
+            values[field] = str(value).strip()
+
+    bin_number = values.get('bin_number', '').replace(' ', '')
+    bin_end = values.get('bin_end', '').replace(' ', '') or None
+    if bin_end == bin_number:
+        bin_end = None
+    bin_range(bin_number, bin_end)
+
+    issuer = values.get('issuer')
+    if not issuer:
+        raise ValueError(f"Banka adı eksik: {bin_number}")
+
+    scheme = _NON_ALNUM.sub('', values.get('card_type', '').lower())
+    card_type = CARD_TYPES.get(scheme, 'other' if scheme else None)
+    name = values.get('name') or f"{issuer} {bin_number}"
+    return bin_number, bin_end, issuer, card_type, name
+
+
+def normalize_issuer(name):
+    """Banka adını karşılaştırma anahtarına çevir ('T. Garanti Bankası A.Ş.' -> 'tgaranti')"""
+    text = unicodedata.normalize('NFKD', (name or '').translate(_TURKISH))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    words = [word for word in _NON_ALNUM.sub(' ', text.replace('.', '')).split() if word not in ISSUER_NOISE]
+    return ''.join(words)
+
+
+class IssuerMap:
+    """Kaynaktaki banka adlarını mews.pos.bank kayıtlarına eşler"""
+
+    def __init__(self, banks, aliases=None):
+        """
+        Args:
+            banks (list): {'id', 'name', 'code'} sözlükleri
+            aliases (dict): Ek eşlemeler {kaynak adı: banka id}
+        """
+        self._map = {}
+        for bank in banks:
+            for value in (bank.get('code'), bank.get('name')):
+                key = normalize_issuer(value)
+                if key:
+                    self._map.setdefault(key, bank['id'])
+        for alias, bank_id in (aliases or {}).items():
+            self._map[normalize_issuer(alias)] = bank_id
+        self._resolved = {}
+
+    def resolve(self, issuer):
+        """Banka id (eşleşmezse None)"""
+        try:
+            return self._resolved[issuer]
+        except KeyError:
+            key = normalize_issuer(issuer)
+            bank_id = self._map.get(key)
+            if bank_id is None and key:
+                # 'tgaranti' -> 'garanti' gibi önekli adlar: en uzun eşleşen anahtar
+                matches = [known for known in self._map if len(known) >= 4 and known in key]
+                if matches:
+                    bank_id = self._map[max(matches, key=len)]
+            self._resolved[issuer] = bank_id
+            return bank_id
+
+
+def stage_chunks(rows, issuers, report, chunk_size=CHUNK_SIZE):
+    """
+    Satırları doğrula ve COPY parçalarına böl
+
+    Geçersiz ve tekrarlanan satırlar rapora yazılır ve atlanır. Bankası
+    bulunamayan BIN'ler bank_id boş olarak aktarılır: upsert edilmez ama
+    tam yenilemede pasife alınmaz.
+
+    Args:
+        rows (iterable): read_rows çıktısı
+        issuers (IssuerMap): Banka eşlemesi
+        report (dict): new_report() sonucu; yerinde güncellenir
+        chunk_size (int): Parça başına satır
+
+    Yields:
+        io.StringIO: (bin_number, bin_end, bank_id, card_type, name) satırları;
+            COPY ... (FORMAT csv) biçiminde, boş alanlar NULL
+    """
+    seen = set()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for line, row in rows:
+        report['rows'] += 1
+        try:
+            bin_number, bin_end, issuer, card_type, name = normalize_row(row)
+        except ValueError as e:
+            report['invalid'] += 1
+            if len(report['errors']) < MAX_ERRORS:
+                report['errors'].append((line, str(e)))
+            continue
+        if bin_number in seen:
+            report['duplicates'] += 1
+            continue
+        seen.add(bin_number)
+        bank_id = issuers.resolve(issuer)
+        if bank_id is None:
+            report['unknown_issuers'][issuer] += 1
+        else:
+            report['staged'] += 1
+        writer.writerow((bin_number, bin_end, bank_id, card_type, name))
+        if len(seen) % chunk_size == 0:
+            buffer.seek(0)
+            yield buffer
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+    if buffer.tell():
+        buffer.seek(0)
+        yield buffer
+
+
+def new_report():
+    """İçe aktarım raporu"""
+    return {
+        'rows': 0,
+        'staged': 0,
+        'inserted': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'deactivated': 0,
+        'invalid': 0,
+        'duplicates': 0,
+        'unknown_issuers': Counter(),
+        'errors': [],
+        'seconds': 0.0,
+    }
+
+
+def format_report(report, max_items=10):
+    """Raporu okunabilir metne çevir"""
+    lines = [
+        f"Okunan satır: {report['rows']}",
+        f"Eklenen: {report['inserted']}, güncellenen: {report['updated']}, "
+        f"değişmeyen: {report['unchanged']}, pasife alınan: {report['deactivated']}",
+        f"Geçersiz: {report['invalid']}, tekrarlanan: {report['duplicates']}, "
+        f"bankası bulunamayan: {sum(report['unknown_issuers'].values())}",
+        f"Süre: {report['seconds']:.1f} sn",
+    ]
+    if report['unknown_issuers']:
+        lines.append('Eşleşmeyen bankalar:')
+        lines.extend(f"  {issuer}: {count}" for issuer, count in report['unknown_issuers'].most_common(max_items))
+    if report['errors']:
+        lines.append('Hatalar:')
+        lines.extend(f"  satır {line}: {message}" for line, message in report['errors'][:max_items])
+    return '\n'.join(lines)
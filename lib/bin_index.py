@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Bellek içi BIN indeksi
+
+mews.pos.bin kayıtları (6 veya 8 haneli BIN ya da BIN aralığı) 8 haneli
+tamsayı aralıklarına çevrilir ve çakışmayan, sıralı parçalara düzleştirilir.
+İç içe aralıklarda en dar (en özel) kayıt kazanır; 8 haneli bir BIN,
+içinde bulunduğu 6 haneli aralığı ezer. Sorgu, başlangıç dizisinde tek
+bir ikili aramadır (SQL yok, mikrosaniye düzeyi).
+
+    BinIndex.build([(bin_number, bin_end, bank_id, card_type), ...]).lookup('45467112')
+
+İndeks değişmezdir; worker başına mews.pos.bin._get_bin_index ormcache'i
+tarafından tutulur ve kayıt değişikliğinde registry önbellek sinyaliyle
+tüm worker'larda geçersiz kılınır. encode_bin_map aynı parçalardan
+tarayıcıya gönderilen sürümlü BIN -> banka haritasını üretir.
+"""
+
+import hashlib
+import heapq
+import json
+from array import array
+from bisect import bisect_right
+
+# İndeks anahtarı uzunluğu (8 haneli BIN)
+KEY_DIGITS = 8
+
+# Geçerli BIN uzunlukları
+BIN_LENGTHS = (6, 8)
+
+
+class BinEntry:
+    """Eşleşen BIN kaydı"""
+
+    __slots__ = ('bank_id', 'card_type', 'bin_number', 'bin_end')
+
+    def __init__(self, bank_id, card_type, bin_number, bin_end=None):
+        self.bank_id = bank_id
+        self.card_type = card_type
+        self.bin_number = bin_number
+        self.bin_end = bin_end
+
+    def __repr__(self):
+        bins = f"{self.bin_number}-{self.bin_end}" if self.bin_end else self.bin_number
+        return f"<BinEntry {bins} banka={self.bank_id} {self.card_type}>"
+
+
+def bin_range(bin_number, bin_end=None):
+    """
+    BIN veya BIN aralığının 8 haneli tamsayı aralığı
+
+    Args:
+        bin_number (str): 6 veya 8 haneli BIN (aralık başı)
+        bin_end (str): Aralık sonu (aynı uzunlukta); yoksa tek BIN
+
+    Returns:
+        tuple: (başlangıç, bitiş) dahil
+
+    Raises:
+        ValueError: BIN rakamlardan oluşmuyor, uzunluğu geçersiz veya aralık ters ise
+    """
+    bin_end = bin_end or bin_number
+    if (not bin_number.isdigit() or not bin_end.isdigit()
+            or len(bin_number) not in BIN_LENGTHS or len(bin_end) != len(bin_number)):
+        raise ValueError(f"Geçersiz BIN: {bin_number}-{bin_end}")
+    start = int(bin_number.ljust(KEY_DIGITS, '0'))
+    end = int(bin_end.ljust(KEY_DIGITS, '9'))
+    if end < start:
+        raise ValueError(f"BIN aralığı ters: {bin_number}-{bin_end}")
+    return start, end
+
+
+class BinIndex:
+    """Çakışmayan BIN parçalarının sıralı dizisi"""
+
+    __slots__ = ('_starts', '_ends', '_owners', '_entries')
+
+    def __init__(self, starts, ends, owners, entries):
+        self._starts = starts
+        self._ends = ends
+        self._owners = owners
+        self._entries = entries
+
+    @classmethod
+    def build(cls, rows):
+        """
+        Kayıtlardan indeks oluştur
+
+        Args:
+            rows (iterable): (bin_number, bin_end, bank_id, card_type) demetleri;
+                geçersiz BIN'ler atlanır
+
+        Returns:
+            BinIndex
+        """
+        entries = []
+        intervals = []
+        for bin_number, bin_end, bank_id, card_type in rows:
+            try:
+                start, end = bin_range(bin_number or '', bin_end or None)
+            except ValueError:
+                continue
+            intervals.append((start, end, len(entries)))
+            entries.append(BinEntry(bank_id, card_type or None, bin_number, bin_end or None))
+        intervals.sort()
+
+        # Sınır noktalarında süpürme: aktif aralıklardan en dar olan parçanın sahibidir
+        boundaries = sorted({point for start, end, _i in intervals for point in (start, end + 1)})
+        starts, ends, owners = array('q'), array('q'), array('l')
+        active = []
+        position = 0
+        for index, point in enumerate(boundaries[:-1]):
+            while position < len(intervals) and intervals[position][0] == point:
+                start, end, owner = intervals[position]
+                heapq.heappush(active, (end - start, owner, end))
+                position += 1
+            while active and active[0][2] < point:
+                heapq.heappop(active)
+            if not active:
+                continue
+            owner = active[0][1]
+            segment_end = boundaries[index + 1] - 1
+            if owners and owners[-1] == owner and ends[-1] == point - 1:
+                ends[-1] = segment_end
+            else:
+                starts.append(point)
+                ends.append(segment_end)
+                owners.append(owner)
+        return cls(starts, ends, owners, tuple(entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"<BinIndex {len(self._entries)} kayıt, {len(self._starts)} parça>"
+
+    def _segment(self, key):
+        position = bisect_right(self._starts, key) - 1
+        if position >= 0 and key <= self._ends[position]:
+            return position
+        return None
+
+    def lookup(self, card_number):
+        """
+        Kart numarasının (veya ilk hanelerinin) BIN kaydı
+
+        Args:
+            card_number (str): En az 6 hane; boşluk/tire yok sayılır
+
+        Returns:
+            BinEntry: 8 hane varsa en özel kayıt; 6-7 hanede yalnızca
+                olası tüm kayıtlar aynı bankaya aitse (aksi halde None)
+        """
+        digits = ''.join(char for char in str(card_number)[:KEY_DIGITS * 2] if char.isdigit())[:KEY_DIGITS]
+        if len(digits) < BIN_LENGTHS[0]:
+            return None
+        if len(digits) == KEY_DIGITS:
+            position = self._segment(int(digits))
+            return None if position is None else self._entries[self._owners[position]]
+
+        # Eksik haneler: [..000, ..999] aralığındaki parçalar tek bankaya aitse o banka
+        low = int(digits.ljust(KEY_DIGITS, '0'))
+        high = int(digits.ljust(KEY_DIGITS, '9'))
+        first = bisect_right(self._starts, low) - 1
+        if first < 0 or self._ends[first] < low:
+            first += 1
+        match = None
+        for position in range(first, len(self._starts)):
+            if self._starts[position] > high:
+                break
+            entry = self._entries[self._owners[position]]
+            if match is None:
+                match = entry
+            elif entry.bank_id != match.bank_id:
+                return None
+        return match
+
+    def lookup_bank(self, card_number):
+        """Kart numarasının banka id'si (bulunamazsa None)"""
+        entry = self.lookup(card_number)
+        return entry.bank_id if entry is not None else None
+
+    def bank_segments(self):
+        """
+        Bankaya göre birleştirilmiş parçalar
+
+        Aynı bankaya ait bitişik parçalar (ör. aynı bankanın 6 ve 8 haneli
+        BIN'leri) tek parçaya indirgenir.
+
+        Returns:
+            list: (başlangıç, bitiş, banka id) demetleri, sıralı
+        """
+        segments = []
+        for start, end, owner in zip(self._starts, self._ends, self._owners):
+            bank_id = self._entries[owner].bank_id
+            if segments and segments[-1][2] == bank_id and segments[-1][1] == start - 1:
+                segments[-1] = (segments[-1][0], end, bank_id)
+            else:
+                segments.append((start, end, bank_id))
+        return segments
+
+
+def encode_bin_map(index, banks):
+    """
+    Tarayıcı için sıkıştırılmış BIN -> banka haritası
+
+    Parçalar düz bir tamsayı dizisinde (önceki parçadan boşluk, uzunluk - 1,
+    banka sırası) üçlüleri olarak tutulur; böylece 100.000 kayıt birkaç yüz
+    KB'lık JSON'a sığar. Sürüm, içeriğin özetidir: içerik değişmedikçe URL
+    ve tarayıcı önbelleği geçerli kalır.
+
+        {"banks": [[id, ad, kod], ...], "segments": [boşluk, uzunluk - 1, banka, ...]}
+
+    Args:
+        index (BinIndex): BIN indeksi
+        banks (list): {'id', 'name', 'code'} sözlükleri; diğer bankaların
+            parçaları haritaya alınmaz
+
+    Returns:
+        tuple: (sürüm, JSON gövdesi bytes)
+    """
+    banks = sorted(banks, key=lambda bank: bank['id'])
+    positions = {bank['id']: position for position, bank in enumerate(banks)}
+    values = []
+    previous_end = -1
+    for start, end, bank_id in index.bank_segments():
+        position = positions.get(bank_id)
+        if position is None:
+            continue
+        values.extend((start - previous_end - 1, end - start, position))
+        previous_end = end
+    body = json.dumps({
+        'banks': [[bank['id'], bank['name'], bank['code']] for bank in banks],
+        'segments': values,
+    }, ensure_ascii=False, separators=(',', ':')).encode()
+    return hashlib.sha256(body).hexdigest()[:16], body
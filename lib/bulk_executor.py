@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+_logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Saniye başına `rate` istek, en fazla `burst` birikimli hak"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bir hak al; yoksa oluşana kadar bekle. Beklenen süreyi döndürür"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class BulkExecutor:
+    """
+    Banka bazlı sınırlarla toplu çağrı yürütücü
+
+    İşler sınırlı bir thread havuzunda çalışır. Her grup (banka) için
+    saniye başına istek (rate_limits) ve eş zamanlı iş sayısı
+    (group_parallelism) ayrı ayrı sınırlanır. İş fonksiyonları ORM'e
+    dokunmamalıdır; sonuçlar çağıran thread'e toplu döner.
+    """
+
+    def __init__(self, max_workers=8, rate_limits=None, group_parallelism=None):
+        """
+        Args:
+            max_workers (int): Toplam thread sayısı
+            rate_limits (dict): {grup: saniye başına istek}
+            group_parallelism (dict|int): {grup: eş zamanlı iş} veya tüm gruplar için tek değer
+        """
+        self.max_workers = max(1, int(max_workers or 1))
+        self._buckets = {
+            group: TokenBucket(rate)
+            for group, rate in (rate_limits or {}).items() if rate and rate > 0
+        }
+        self._group_parallelism = group_parallelism
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, group):
+        limit = self._group_parallelism
+        if isinstance(limit, dict):
+            limit = limit.get(group)
+        if not limit or limit <= 0:
+            return None
+        with self._lock:
+            semaphore = self._semaphores.get(group)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(int(limit))
+                self._semaphores[group] = semaphore
+            return semaphore
+
+    @staticmethod
+    def _interleave(jobs):
+        """İşleri gruplar arasında sırayla dağıt (tek banka havuzu tıkamasın)"""
+        queues = OrderedDict()
+        for job in jobs:
+            queues.setdefault(job[1], deque()).append(job)
+        while queues:
+            for group in list(queues):
+                queue = queues[group]
+                yield queue.popleft()
+                if not queue:
+                    del queues[group]
+
+    def _run_job(self, group, func, args):
+        semaphore = self._semaphore(group)
+        if semaphore:
+            semaphore.acquire()
+        try:
+            bucket = self._buckets.get(group)
+            if bucket:
+                bucket.acquire()
+            return True, func(*args)
+        except Exception as e:
+            return False, e
+        finally:
+            if semaphore:
+                semaphore.release()
+
+    def run(self, jobs, on_result=None):
+        """
+        İşleri çalıştır
+
+        Args:
+            jobs (iterable): (anahtar, grup, fonksiyon, argümanlar) demetleri
+            on_result (callable): Her iş bittiğinde (anahtar, başarılı, sonuç)
+                ile çağrılır. Çağıran thread'de çalıştığı için ORM
+                kullanılabilir (ör. ilerleme kaydı).
+
+        Returns:
+            dict: {anahtar: (başarılı, sonuç veya exception)}
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='mews_pos_bulk') as pool:
+            futures = {
+                pool.submit(self._run_job, group, func, tuple(args)): key
+                for key, group, func, args in self._interleave(jobs)
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                ok, value = future.result()
+                results[key] = (ok, value)
+                if on_result:
+                    try:
+                        on_result(key, ok, value)
+                    except Exception as e:
+                        _logger.error(f"Toplu iş sonuç bildirimi hatası: {key} ({str(e)})")
+        return results
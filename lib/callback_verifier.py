@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+3D callback imza doğrulaması
+
+Bankaların 3D dönüşünde gönderdiği HASH/HASHPARAMSVAL imzası, callback
+işlenmeden (gateway oluşturma, işlem kaydı okuma, loglama) önce store key
+ile doğrulanır. Gateway sınıfı hangi şemayı kullandığını
+`callback_hash_scheme` ile bildirir:
+
+    hashparams  HASHPARAMS'ta adı geçen alanların değerleri birleştirilir
+                (HASHPARAMSVAL ile aynı olmalı); HASH = base64(SHA1(değerler +
+                store key)) veya büyük harf hex SHA512 (Garanti, InterPos, eski EST)
+    est         EST V3: HASHPARAMS varsa hashparams, yoksa 'ver3'; tüm alanlar
+                anahtara göre (büyük/küçük harf duyarsız, doğal sıralama)
+                dizilir, '\\' ve '|' kaçırılıp '|' ile birleştirilir, sona store
+                key eklenir; HASH = base64(SHA512(...))
+    payfor      ResponseHash = base64(SHA1(MerchantID, OrderId, AuthCode,
+                ProcReturnCode, 3DStatus, ResponseRnd, UserCode + store key))
+    akbank      hashParams'ta '+' ile ayrılan alanların değerleri birleştirilir;
+                hash = base64(HMAC-SHA512(değerler, store key))
+    unsigned    Bilinçli muafiyet: callback imzasızdır ama sonucu banka
+                servisi çözer/doğrular (PosNet, Kuveyt). Callback geçer ama
+                loglanır ve banka bazında sayılır.
+    inquiry     Callback imzasızdır ve sonucu bankaya sorulmadan kesinleşir
+                (Tosla, PayFlex 3D Pay). Callback geçer; onay bildiriyorsa
+                process_3d_callback bankaya durum sorgusu yapar ve sonuç
+                `confirm` ile teyit edilir. Banka onaylamazsa callback
+                'unconfirmed' nedeniyle reddedilir.
+
+Şema bildirmeyen (None) gateway'lerin callback'leri reddedilir.
+
+İmza doğrulandıktan sonra imzalı sipariş numarası (ve imzalanmışsa tutar)
+işlenen işlemle karşılaştırılır; başka bir sipariş için imzalanmış geçerli
+bir callback'in bu işleme uygulanması 'order_mismatch' ile reddedilir.
+Reddedilen callback'ler banka ve neden bazında sayılır.
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+import re
+import threading
+from collections import Counter
+
+from .crypto_utils import CryptoUtils
+
+_logger = logging.getLogger(__name__)
+
+# ver3 hash'ine dahil edilmeyen alanlar (küçük harf)
+VER3_EXCLUDED = frozenset(('hash', 'encoding', 'countdown'))
+
+# PayFor 3D dönüş imzasındaki alanlar (sırasıyla)
+PAYFOR_HASH_FIELDS = ('MerchantID', 'OrderId', 'AuthCode', 'ProcReturnCode', '3DStatus', 'ResponseRnd', 'UserCode')
+
+# İmzasız callback muafiyeti (gateway sınıfında callback_hash_scheme = UNSIGNED)
+UNSIGNED = 'unsigned'
+
+# Onayı banka durum sorgusuyla teyit edilen imzasız callback (callback_hash_scheme = INQUIRY)
+INQUIRY = 'inquiry'
+
+# İmzalı tutar ile işlem tutarı arasındaki yuvarlama toleransı (1 kuruş)
+AMOUNT_TOLERANCE = 0.015
+
+_DIGITS = re.compile(r'(\d+)')
+
+
+class CallbackSignatureError(Exception):
+    """3D callback imzası doğrulanamadı"""
+
+    error_type = 'invalid_signature'
+
+    def __init__(self, reason, message=None):
+        self.reason = reason
+        super().__init__(message or f"3D callback imzası geçersiz ({reason})")
+
+
+def _field(data, name):
+    """Alanı büyük/küçük harf duyarsız bul (Garanti küçük, EST büyük harf gönderir)"""
+    value = data.get(name)
+    if value is None:
+        value = data.get(name.lower())
+    return value
+
+
+def _matches(expected, received):
+    """Sabit zamanlı karşılaştırma"""
+    return hmac.compare_digest(expected.encode('utf-8'), str(received).encode('utf-8'))
+
+
+def _natural_key(key):
+    """PHP natcasesort karşılığı: büyük/küçük harf duyarsız, sayılar sayısal"""
+    return [int(part) if part.isdigit() else part for part in _DIGITS.split(key.lower())]
+
+
+def _escape_ver3(value):
+    return str(value).replace('\\', '\\\\').replace('|', '\\|')
+
+
+def _verify_hashparams(store_key, data):
+    received = _field(data, 'HASH')
+    hash_params = _field(data, 'HASHPARAMS')
+    if not received or not hash_params:
+        raise CallbackSignatureError('missing_signature')
+
+    values = ''.join(str(data.get(name) or '') for name in hash_params.split(':') if name)
+    if not _matches(values, _field(data, 'HASHPARAMSVAL') or ''):
+        raise CallbackSignatureError('params_mismatch')
+
+    payload = (values + store_key).encode('utf-8')
+    if len(received) == 128:
+        expected = hashlib.sha512(payload).hexdigest().upper()
+    else:
+        expected = base64.b64encode(hashlib.sha1(payload).digest()).decode('ascii')
+    if not _matches(expected, received):
+        raise CallbackSignatureError('hash_mismatch')
+    return [name for name in hash_params.split(':') if name]
+
+
+def _verify_est(store_key, data):
+    if _field(data, 'HASHPARAMS'):
+        return _verify_hashparams(store_key, data)
+
+    received = _field(data, 'HASH')
+    if not received:
+        raise CallbackSignatureError('missing_signature')
+
+    values = [
+        _escape_ver3(data[key]) for key in sorted(data, key=_natural_key)
+        if key.lower() not in VER3_EXCLUDED
+    ]
+    values.append(CryptoUtils.derived_key('est_ver3_store_key', (store_key,), _escape_ver3))
+    digest = hashlib.sha512('|'.join(values).encode('utf-8')).digest()
+    if not _matches(base64.b64encode(digest).decode('ascii'), received):
+        raise CallbackSignatureError('hash_mismatch')
+    return [key for key in data if key.lower() not in VER3_EXCLUDED]
+
+
+def _verify_payfor(store_key, data):
+    received = data.get('ResponseHash')
+    if not received:
+        raise CallbackSignatureError('missing_signature')
+
+    values = ''.join(str(data.get(name) or '') for name in PAYFOR_HASH_FIELDS)
+    digest = hashlib.sha1((values + store_key).encode('utf-8')).digest()
+    if not _matches(base64.b64encode(digest).decode('ascii'), received):
+        raise CallbackSignatureError('hash_mismatch')
+    return list(PAYFOR_HASH_FIELDS)
+
+
+def _verify_akbank(store_key, data):
+    received = data.get('hash')
+    hash_params = data.get('hashParams')
+    if not received or not hash_params:
+        raise CallbackSignatureError('missing_signature')
+
+    names = [name for name in hash_params.split('+') if name]
+    values = ''.join(str(data.get(name) or '') for name in names)
+    digest = hmac.new(store_key.encode('utf-8'), values.encode('utf-8'), hashlib.sha512).digest()
+    if not _matches(base64.b64encode(digest).decode('ascii'), received):
+        raise CallbackSignatureError('hash_mismatch')
+    return names
+
+
+SCHEMES = {
+    'hashparams': _verify_hashparams,
+    'est': _verify_est,
+    'payfor': _verify_payfor,
+    'akbank': _verify_akbank,
+}
+
+
+def _signed_value(data, signed, names):
+    """İmzaya dahil ilk alanın değeri (alan adları büyük/küçük harf duyarsız)"""
+    signed = {name.lower() for name in signed}
+    for key, value in data.items():
+        if key.lower() in signed and key.lower() in names:
+            return value
+    return None
+
+
+def _check_order(data, signed, order_id, amount, order_fields, amount_field):
+    """İmzalı sipariş numarası ve tutar işlemle aynı mı"""
+    received = _signed_value(data, signed, {name.lower() for name in order_fields})
+    if received is None:
+        raise CallbackSignatureError('order_unsigned', "3D callback'te imzalı sipariş numarası yok")
+    if not _matches(str(order_id), received):
+        raise CallbackSignatureError('order_mismatch', "3D callback başka bir siparişe ait")
+
+    if amount is None or not amount_field:
+        return
+    name, minor_units = amount_field
+    received = _signed_value(data, signed, {name.lower()})
+    if received in (None, ''):
+        return
+    try:
+        value = float(str(received).replace(',', '.'))
+    except ValueError:
+        raise CallbackSignatureError('order_mismatch', "3D callback tutarı okunamadı")
+    if minor_units:
+        value /= 100.0
+    if abs(value - amount) > AMOUNT_TOLERANCE:
+        raise CallbackSignatureError('order_mismatch', "3D callback tutarı işlem tutarıyla uyuşmuyor")
+
+
+class CallbackVerifier:
+    """Callback imza doğrulayıcı ve banka bazlı ret sayaçları (worker içi)"""
+
+    _rejections = Counter()
+    _unverified = Counter()
+    _lock = threading.Lock()
+
+    @classmethod
+    def verify(cls, scheme, config, data, key=None, order_id=None, amount=None,
+               order_fields=(), amount_field=None):
+        """
+        Callback imzasını ve imzalı siparişi doğrula
+
+        Args:
+            scheme (str): Gateway'in callback_hash_scheme değeri
+            config: Banka konfigürasyonu (store_key okunur)
+            data (dict): Bankanın POST ettiği alanlar
+            key (tuple): Sayaç anahtarı, ör. (veritabanı adı, banka id)
+            order_id (str): İşlenen işlemin bankaya gönderilen sipariş numarası;
+                verilirse imzalı sipariş numarasıyla karşılaştırılır
+            amount (float): İşlem tutarı; imzalanmışsa karşılaştırılır
+            order_fields (tuple): Callback'te sipariş numarası alanları
+            amount_field (tuple): (tutar alanı, kuruş cinsinden mi) veya None
+
+        Returns:
+            bool: İmza doğrulandıysa True, gateway imzasız muafiyetteyse veya
+                sonucu durum sorgusuyla teyit ediliyorsa (INQUIRY) False
+
+        Raises:
+            CallbackSignatureError: Şema yoksa, imza eksik/geçersizse veya
+                callback başka bir siparişe aitse (sayaç artırılır)
+        """
+        if scheme == UNSIGNED:
+            cls.record_unverified(key)
+            _logger.warning(f"İmzasız 3D callback kabul edildi (banka servisi doğrular): {key}")
+            return False
+        if scheme == INQUIRY:
+            return False
+        try:
+            if scheme not in SCHEMES:
+                raise CallbackSignatureError('no_scheme', "Gateway için 3D callback imza şeması tanımlı değil")
+            store_key = config.get('store_key')
+            if not store_key:
+                raise CallbackSignatureError('missing_store_key', "Store key tanımlı değil; callback doğrulanamıyor")
+            signed = SCHEMES[scheme](store_key, data)
+            if order_id is not None:
+                _check_order(data, signed, order_id, amount, order_fields, amount_field)
+        except CallbackSignatureError as e:
+            cls.record_rejection(key, e.reason)
+            raise
+        return True
+
+    @classmethod
+    def confirm(cls, result, status, key=None):
+        """
+        İmzasız callback'in onayını banka durum sorgusuyla teyit et (INQUIRY)
+
+        Args:
+            result (dict): parse_3d_response sonucu
+            status (dict): Aynı sipariş için parse_status_response sonucu
+            key (tuple): Sayaç anahtarı, ör. (veritabanı adı, banka id)
+
+        Returns:
+            dict: Banka işlemi onaylı gösteriyorsa onay kodu ve referansları
+                banka yanıtından alınmış sonuç; göstermiyorsa onaysız sonuç
+                (ret 'unconfirmed' nedeniyle sayılır)
+        """
+        if not result.get('approved'):
+            return result
+        if status.get('status') == 'approved':
+            confirmed = dict(result)
+            for name in ('auth_code', 'host_ref_num'):
+                if status.get(name):
+                    confirmed[name] = status[name]
+            return confirmed
+
+        cls.record_rejection(key, 'unconfirmed')
+        _logger.warning(f"3D callback onayı banka sorgusuyla teyit edilemedi: {key} ({status.get('status')})")
+        return dict(
+            result,
+            approved=False,
+            md_status='0',
+            error_code='unconfirmed',
+            error_message="3D callback onayı banka sorgusuyla doğrulanamadı",
+        )
+
+    @classmethod
+    def record_unverified(cls, key):
+        key = key if isinstance(key, tuple) else (key,)
+        with cls._lock:
+            cls._unverified[key] += 1
+
+    @classmethod
+    def unverified(cls, key=None):
+        """İmzasız kabul edilen callback sayıları"""
+        with cls._lock:
+            if key is None:
+                return dict(cls._unverified)
+            key = key if isinstance(key, tuple) else (key,)
+            return cls._unverified.get(key, 0)
+
+    @classmethod
+    def record_rejection(cls, key, reason):
+        key = key if isinstance(key, tuple) else (key,)
+        with cls._lock:
+            cls._rejections[key + (reason,)] += 1
+
+    @classmethod
+    def rejections(cls, key=None):
+        """
+        Ret sayıları
+
+        Returns:
+            dict: key verilirse {neden: sayı}, yoksa {(anahtar..., neden): sayı}
+        """
+        with cls._lock:
+            if key is None:
+                return dict(cls._rejections)
+            key = key if isinstance(key, tuple) else (key,)
+            return {
+                counter_key[-1]: count for counter_key, count in cls._rejections.items()
+                if counter_key[:-1] == key
+            }
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._rejections.clear()
+            cls._unverified.clear()
+
+    @classmethod
+    def export_metrics(cls):
+        """Ret sayaçlarını Prometheus metin formatında döndür"""
+        lines = [
+            '# HELP mews_pos_callback_rejections_total İmza doğrulamasından geçemeyen 3D callback\'ler',
+            '# TYPE mews_pos_callback_rejections_total counter',
+        ]
+        with cls._lock:
+            items = sorted(cls._rejections.items(), key=lambda item: tuple(map(str, item[0])))
+        for counter_key, count in items:
+            labels = f'db="{counter_key[0]}",bank="{counter_key[-2]}",reason="{counter_key[-1]}"'
+            lines.append(f'mews_pos_callback_rejections_total{{{labels}}} {count}')
+
+        lines += [
+            '# HELP mews_pos_callback_unverified_total İmza şeması olmadığı için doğrulanmadan kabul edilen 3D callback\'ler',
+            '# TYPE mews_pos_callback_unverified_total counter',
+        ]
+        with cls._lock:
+            items = sorted(cls._unverified.items(), key=lambda item: tuple(map(str, item[0])))
+        for counter_key, count in items:
+            lines.append(f'mews_pos_callback_unverified_total{{db="{counter_key[0]}",bank="{counter_key[-1]}"}} {count}')
+        return '\n'.join(lines) + '\n'
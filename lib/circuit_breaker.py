@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import logging
+from collections import deque
+
+_logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Devre kesici açık - banka çağrısı yapılmadan hemen reddedildi"""
+
+    error_type = 'circuit_open'
+
+
+class CircuitBreaker:
+    """
+    Banka bazlı devre kesici (closed / open / half_open)
+
+    - closed: İstekler geçer; son `window` saniyedeki hata oranı (yavaş
+      çağrılar dahil) `error_rate_threshold` yüzdesini aşarsa devre açılır.
+    - open: İstekler bankaya gitmeden CircuitOpenError ile reddedilir.
+      `open_duration` saniye sonra half_open'a geçilir.
+    - half_open: `half_open_max_calls` deneme isteğine izin verilir; başarılı
+      olursa devre kapanır, hata olursa tekrar açılır.
+
+    Durum değişiklikleri `state_store` ile dışarı (ör. veritabanı) yazılır ve
+    diğer worker'ların durumu `sync` ile içeri alınır. Depoya yazma kilit
+    dışında yapılır.
+
+    before_request'in döndürdüğü deneme hakkı, çağrı nasıl biterse bitsin
+    release(probe) ile geri verilmelidir (bkz. BaseGateway._call_slot).
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    DEFAULTS = {
+        'error_rate_threshold': 50.0,
+        'latency_threshold': 10.0,
+        'min_requests': 10,
+        'window': 60,
+        'open_duration': 30,
+        'half_open_max_calls': 1,
+    }
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, key, state_store=None, **settings):
+        self.key = key
+        self.state_store = state_store
+        self.settings = dict(self.DEFAULTS)
+        self.configure(**settings)
+
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.version = 0
+        self._calls = deque()
+        self._half_open_calls = 0
+        # Her durum değişikliğinde artar; eski durumda alınmış deneme hakları
+        # yeni durumun sayacından düşülmez
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key, state_store=None, **settings):
+        """Anahtar (ör. (db, banka id)) için paylaşımlı devre kesiciyi döndür"""
+        with cls._registry_lock:
+            breaker = cls._registry.get(key)
+            if breaker is None:
+                breaker = cls(key, state_store=state_store, **settings)
+                cls._registry[key] = breaker
+                return breaker
+        breaker.configure(**settings)
+        if state_store is not None:
+            breaker.state_store = state_store
+        return breaker
+
+    def configure(self, **settings):
+        """Eşik ayarlarını güncelle (None/0 değerler varsayılanı korur)"""
+        for name, value in settings.items():
+            if name not in self.DEFAULTS:
+                raise ValueError(f"Bilinmeyen devre kesici ayarı: {name}")
+            if value:
+                self.settings[name] = value
+
+    # ------------------------------------------------------------------
+    # Transport kancaları
+    # ------------------------------------------------------------------
+
+    def before_request(self):
+        """
+        İstek öncesi kontrol; devre açıksa CircuitOpenError fırlatır
+
+        Returns:
+            Yarı açık durumda alınan deneme hakkı (release() için); yoksa None
+        """
+        change = probe = None
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.time() - (self.opened_at or 0) < self.settings['open_duration']:
+                    raise CircuitOpenError(
+                        "Banka servisi geçici olarak devre dışı (devre kesici açık)"
+                    )
+                change = self._transition(self.HALF_OPEN)
+
+            if self.state == self.HALF_OPEN:
+                if self._half_open_calls >= self.settings['half_open_max_calls']:
+                    raise CircuitOpenError(
+                        "Banka servisi deneniyor, lütfen kısa süre sonra tekrar deneyin"
+                    )
+                self._half_open_calls += 1
+                probe = self._generation
+
+        self._persist(change)
+        return probe
+
+    def record_success(self, latency):
+        """Başarılı çağrıyı kaydet (eşiği aşan gecikme hata sayılır)"""
+        if latency > self.settings['latency_threshold']:
+            self.record_failure(latency)
+            return
+
+        with self._lock:
+            if self.state != self.HALF_OPEN:
+                self._add_call(True)
+                return
+            change = self._transition(self.CLOSED)
+        self._persist(change)
+
+    def record_failure(self, latency=None):
+        """Hatalı (veya yavaş) çağrıyı kaydet"""
+        with self._lock:
+            change = self._evaluate_failure()
+        self._persist(change)
+
+    def _evaluate_failure(self):
+        """Hatayı pencereye ekle; gerekirse devreyi aç (kilit altında çağrılır)"""
+        if self.state == self.HALF_OPEN:
+            return self._transition(self.OPEN)
+        if self.state == self.OPEN:
+            return None
+
+        self._add_call(False)
+        total = len(self._calls)
+        if total < self.settings['min_requests']:
+            return None
+        failures = sum(1 for _, ok in self._calls if not ok)
+        if failures * 100.0 / total >= self.settings['error_rate_threshold']:
+            _logger.warning(
+                f"Devre kesici açıldı: {self.key} ({failures}/{total} hatalı çağrı)"
+            )
+            return self._transition(self.OPEN)
+        return None
+
+    def release(self, probe):
+        """
+        before_request'in verdiği deneme hakkını geri ver
+
+        Çağrının sonucu kaydedilip durum değiştiyse (ya da başka worker'ın
+        durumu alındıysa) hak zaten düşmüştür; bir şey yapılmaz.
+        """
+        if probe is None:
+            return
+        with self._lock:
+            if probe == self._generation and self._half_open_calls:
+                self._half_open_calls -= 1
+
+    # ------------------------------------------------------------------
+    # Durum yönetimi
+    # ------------------------------------------------------------------
+
+    def sync(self, state, opened_at, version):
+        """Başka worker'ın yazdığı daha yeni durumu içeri al"""
+        if not state or (version or 0) <= self.version:
+            return
+        with self._lock:
+            if (version or 0) <= self.version:
+                return
+            self.state = state
+            self.opened_at = opened_at
+            self.version = version
+            self._calls.clear()
+            self._half_open_calls = 0
+            self._generation += 1
+
+    def reset(self):
+        """Devreyi manuel olarak kapat"""
+        with self._lock:
+            change = self._transition(self.CLOSED)
+        self._persist(change)
+
+    def snapshot(self):
+        """Anlık durum ve pencere istatistikleri"""
+        with self._lock:
+            self._trim(time.time())
+            total = len(self._calls)
+            failures = sum(1 for _, ok in self._calls if not ok)
+            return {
+                'state': self.state,
+                'opened_at': self.opened_at,
+                'calls': total,
+                'failures': failures,
+                'error_rate': round(failures * 100.0 / total, 2) if total else 0.0,
+            }
+
+    def _add_call(self, ok):
+        now = time.time()
+        self._calls.append((now, ok))
+        self._trim(now)
+
+    def _trim(self, now):
+        limit = now - self.settings['window']
+        while self._calls and self._calls[0][0] < limit:
+            self._calls.popleft()
+
+    def _transition(self, state):
+        """
+        Durumu değiştir (kilit altında çağrılır)
+
+        Returns:
+            tuple: Depoya yazılacak (durum, açılma zamanı); _persist ile kilit dışında yazılır
+        """
+        self.state = state
+        self.opened_at = time.time() if state == self.OPEN else None
+        self._calls.clear()
+        self._half_open_calls = 0
+        self._generation += 1
+        return state, self.opened_at
+
+    def _persist(self, change):
+        """Durum değişikliğini paylaşımlı depoya yaz (kilit dışında çağrılır)"""
+        if change is None or self.state_store is None:
+            return
+        state, opened_at = change
+        try:
+            version = self.state_store(self.key, state, opened_at)
+        except Exception as e:
+            _logger.error(f"Devre kesici durumu kaydedilemedi: {self.key} ({str(e)})")
+            return
+        if version:
+            with self._lock:
+                self.version = max(self.version, version)
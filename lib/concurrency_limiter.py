@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+
+import time
+import uuid
+import asyncio
+import bisect
+import threading
+import logging
+from contextlib import contextmanager
+
+_logger = logging.getLogger(__name__)
+
+
+class QueueTimeoutError(Exception):
+    """Banka için boş slot kuyruk bekleme süresi içinde bulunamadı"""
+
+    error_type = 'queue_timeout'
+
+
+class LeaseSlotStore:
+    """
+    Süreli kira (lease) satırlarıyla worker'lar arası slot deposu
+
+    Her banka için max_in_flight adet slot satırı vardır (mews_pos_bank_slot;
+    bkz. mews.pos.bank.init). Bir çağrı süresi dolmuş ya da boş bir satırı
+    tek bir UPDATE ... RETURNING ile kiralar ve çağrı bitince bırakır. Kira
+    alma/bırakma kısa, hemen commit edilen ayrı transaction'larda yapılır;
+    banka çağrısı boyunca veritabanı bağlantısı tutulmaz. Worker çökerse
+    kira `lease` saniye sonra kendiliğinden düşer.
+    """
+
+    DEFAULT_LEASE = 120.0
+
+    def __init__(self, cursor_factory, lock_id, lease=None):
+        self.cursor_factory = cursor_factory
+        self.lock_id = lock_id
+        self.lease = lease or self.DEFAULT_LEASE
+        self._prepared = 0
+
+    def _execute(self, query, params):
+        """Sorguyu READ COMMITTED, kısa bir transaction'da çalıştırıp commit et"""
+        cr = self.cursor_factory()
+        try:
+            # Eş zamanlı kiralamalarda REPEATABLE READ serileştirme hatası vermesin
+            cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            cr.execute(query, params)
+            row = cr.fetchone() if cr.description else None
+            cr.commit()
+            return row
+        finally:
+            cr.close()
+
+    def try_acquire(self, limit):
+        """Boş slot kirala: (slot, sahip) veya None"""
+        if self._prepared < limit:
+            self._execute("""
+                INSERT INTO mews_pos_bank_slot (lock_id, slot)
+                SELECT %s, s FROM generate_series(0, %s - 1) AS s
+                ON CONFLICT DO NOTHING
+            """, (self.lock_id, limit))
+            self._prepared = limit
+
+        holder = uuid.uuid4().hex
+        row = self._execute("""
+            UPDATE mews_pos_bank_slot
+               SET holder = %s,
+                   expires_at = now() + make_interval(secs => %s)
+             WHERE (lock_id, slot) = (
+                    SELECT lock_id, slot
+                      FROM mews_pos_bank_slot
+                     WHERE lock_id = %s AND slot < %s
+                       AND (expires_at IS NULL OR expires_at < now())
+                     ORDER BY slot
+                     LIMIT 1
+                       FOR UPDATE SKIP LOCKED)
+         RETURNING slot
+        """, (holder, self.lease, self.lock_id, limit))
+        if row is None:
+            return None
+        return row[0], holder
+
+    def release(self, token):
+        slot, holder = token
+        self._execute("""
+            UPDATE mews_pos_bank_slot
+               SET holder = NULL, expires_at = NULL
+             WHERE lock_id = %s AND slot = %s AND holder = %s
+        """, (self.lock_id, slot, holder))
+
+
+class ConcurrencyLimiter:
+    """
+    Banka bazlı eş zamanlı istek limiti ve bekleme kuyruğu
+
+    En fazla `max_in_flight` çağrı aynı anda bankaya gider; fazlası en
+    fazla `queue_timeout` saniye kuyrukta bekler, süre dolarsa
+    QueueTimeoutError fırlatılır. slot_store verilirse limit tüm
+    worker'lar için ortak uygulanır (bkz. LeaseSlotStore).
+    Kuyruk derinliği ve bekleme süreleri stats()/export_metrics() ile okunur.
+    """
+
+    DEFAULTS = {
+        'max_in_flight': 10,
+        'queue_timeout': 5.0,
+    }
+
+    POLL_INTERVAL = 0.02
+    MAX_POLL_INTERVAL = 0.2
+    WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, key, slot_store=None, **settings):
+        self.key = key
+        self.slot_store = slot_store
+        self.settings = dict(self.DEFAULTS)
+        self.configure(**settings)
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._wait_sum = 0.0
+        self._wait_max = 0.0
+        self._wait_buckets = [0] * (len(self.WAIT_BUCKETS) + 1)
+
+    @classmethod
+    def get(cls, key, slot_store=None, **settings):
+        """Anahtar (ör. (db, banka id)) için paylaşımlı limiti döndür"""
+        with cls._registry_lock:
+            limiter = cls._registry.get(key)
+            if limiter is None:
+                limiter = cls(key, slot_store=slot_store, **settings)
+                cls._registry[key] = limiter
+                return limiter
+        limiter.configure(**settings)
+        if slot_store is not None:
+            limiter.use_slot_store(slot_store)
+        return limiter
+
+    def use_slot_store(self, slot_store):
+        """Slot deposunu ata; aynı kilide ait mevcut depo korunur (hazırlanmış slot satırları için)"""
+        current = self.slot_store
+        if (current is not None and type(current) is type(slot_store)
+                and getattr(current, 'lock_id', None) == getattr(slot_store, 'lock_id', None)):
+            if hasattr(slot_store, 'lease'):
+                current.lease = slot_store.lease
+            return
+        self.slot_store = slot_store
+
+    def configure(self, **settings):
+        """Limit ayarlarını güncelle (None/0 değerler varsayılanı korur)"""
+        for name, value in settings.items():
+            if name not in self.DEFAULTS:
+                raise ValueError(f"Bilinmeyen limit ayarı: {name}")
+            if value:
+                self.settings[name] = value
+
+    @property
+    def queue_timeout(self):
+        return self.settings['queue_timeout']
+
+    # ------------------------------------------------------------------
+    # Slot alma / bırakma
+    # ------------------------------------------------------------------
+
+    def acquire(self, timeout=None):
+        """
+        Slot al (gerekirse kuyrukta bekle)
+
+        Args:
+            timeout (float): En fazla bekleme süresi; verilmezse queue_timeout
+
+        Returns:
+            object: release() için verilecek slot
+
+        Raises:
+            QueueTimeoutError: Süre içinde slot bulunamazsa
+        """
+        timeout = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+        expires_at = started + timeout
+        interval = self.POLL_INTERVAL
+        queued = False
+        try:
+            while True:
+                with self._cond:
+                    while self._in_flight >= self.settings['max_in_flight']:
+                        remaining = expires_at - time.monotonic()
+                        if remaining <= 0:
+                            raise self._timeout_error(timeout)
+                        queued = queued or self._enter_queue()
+                        self._cond.wait(remaining)
+                    self._in_flight += 1
+
+                token = self._try_shared()
+                if token is not None:
+                    self._record_wait(time.monotonic() - started)
+                    return token
+
+                # Diğer worker'lar tüm slotları kullanıyor; yerel hakkı bırak ve bekle
+                self._release_local()
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    raise self._timeout_error(timeout)
+                queued = queued or self._enter_queue()
+                time.sleep(min(interval, remaining))
+                interval = min(interval * 2, self.MAX_POLL_INTERVAL)
+        finally:
+            if queued:
+                self._leave_queue()
+
+    async def async_acquire(self, timeout=None):
+        """acquire() karşılığı; event loop'u bloklamadan bekler"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+        expires_at = started + timeout
+        interval = self.POLL_INTERVAL
+        queued = False
+        try:
+            while True:
+                token = None
+                with self._cond:
+                    acquired = self._in_flight < self.settings['max_in_flight']
+                    if acquired:
+                        self._in_flight += 1
+                if acquired:
+                    token = self._try_shared()
+                    if token is None:
+                        self._release_local()
+                if token is not None:
+                    self._record_wait(time.monotonic() - started)
+                    return token
+
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    raise self._timeout_error(timeout)
+                queued = queued or self._enter_queue()
+                await asyncio.sleep(min(interval, remaining))
+                interval = min(interval * 2, self.MAX_POLL_INTERVAL)
+        finally:
+            if queued:
+                self._leave_queue()
+
+    def release(self, token):
+        """acquire() ile alınan slotu bırak"""
+        if token is not True and self.slot_store is not None:
+            try:
+                self.slot_store.release(token)
+            except Exception as e:
+                _logger.error(f"Banka slotu bırakılamadı: {self.key} ({str(e)})")
+        self._release_local()
+
+    @contextmanager
+    def slot(self, timeout=None):
+        """with bloğu boyunca slot tut"""
+        token = self.acquire(timeout)
+        try:
+            yield token
+        finally:
+            self.release(token)
+
+    def _try_shared(self):
+        """Worker'lar arası slot al; depo yoksa ya da erişilemezse yerel limit yeterli"""
+        if self.slot_store is None:
+            return True
+        try:
+            return self.slot_store.try_acquire(self.settings['max_in_flight'])
+        except Exception as e:
+            _logger.warning(f"Paylaşımlı banka slotu alınamadı, yerel limit kullanılıyor: {self.key} ({str(e)})")
+            return True
+
+    def _release_local(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    # ------------------------------------------------------------------
+    # Metrikler
+    # ------------------------------------------------------------------
+
+    def _enter_queue(self):
+        with self._cond:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+        return True
+
+    def _leave_queue(self):
+        with self._cond:
+            self._waiting -= 1
+
+    def _record_wait(self, waited):
+        with self._cond:
+            self._acquired += 1
+            self._wait_sum += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._wait_buckets[bisect.bisect_left(self.WAIT_BUCKETS, waited)] += 1
+
+    def _timeout_error(self, timeout):
+        with self._cond:
+            self._timeouts += 1
+        _logger.warning(f"Banka kuyruğunda bekleme süresi doldu: {self.key} ({timeout:.2f} sn)")
+        return QueueTimeoutError(
+            f"Banka yoğun, {timeout:.1f} sn içinde boş bağlantı bulunamadı"
+        )
+
+    def stats(self):
+        """Bu worker'daki anlık kuyruk ve bekleme istatistikleri"""
+        with self._cond:
+            return {
+                'max_in_flight': self.settings['max_in_flight'],
+                'in_flight': self._in_flight,
+                'queue_depth': self._waiting,
+                'max_queue_depth': self._max_waiting,
+                'acquired': self._acquired,
+                'timeouts': self._timeouts,
+                'wait_sum': round(self._wait_sum, 6),
+                'wait_max': round(self._wait_max, 6),
+                'wait_avg': round(self._wait_sum / self._acquired, 6) if self._acquired else 0.0,
+                'wait_buckets': list(self._wait_buckets),
+            }
+
+    @classmethod
+    def export_metrics(cls):
+        """Tüm limitlerin metriklerini Prometheus metin formatında döndür"""
+        lines = [
+            '# HELP mews_pos_bank_in_flight Bankaya giden eş zamanlı istek sayısı',
+            '# TYPE mews_pos_bank_in_flight gauge',
+            '# HELP mews_pos_bank_queue_depth Slot bekleyen istek sayısı',
+            '# TYPE mews_pos_bank_queue_depth gauge',
+            '# HELP mews_pos_bank_queue_timeouts_total Kuyruk süresi dolan istekler',
+            '# TYPE mews_pos_bank_queue_timeouts_total counter',
+            '# HELP mews_pos_bank_queue_wait_seconds Slot bekleme süresi',
+            '# TYPE mews_pos_bank_queue_wait_seconds histogram',
+        ]
+        with cls._registry_lock:
+            limiters = list(cls._registry.values())
+
+        for limiter in limiters:
+            stats = limiter.stats()
+            key = limiter.key if isinstance(limiter.key, tuple) else (limiter.key,)
+            labels = f'db="{key[0]}",bank="{key[-1]}"'
+            lines.append(f'mews_pos_bank_in_flight{{{labels}}} {stats["in_flight"]}')
+            lines.append(f'mews_pos_bank_queue_depth{{{labels}}} {stats["queue_depth"]}')
+            lines.append(f'mews_pos_bank_queue_timeouts_total{{{labels}}} {stats["timeouts"]}')
+
+            cumulative = 0
+            for bound, count in zip(cls.WAIT_BUCKETS, stats['wait_buckets']):
+                cumulative += count
+                lines.append(f'mews_pos_bank_queue_wait_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'mews_pos_bank_queue_wait_seconds_bucket{{{labels},le="+Inf"}} {stats["acquired"]}')
+            lines.append(f'mews_pos_bank_queue_wait_seconds_sum{{{labels}}} {stats["wait_sum"]}')
+            lines.append(f'mews_pos_bank_queue_wait_seconds_count{{{labels}}} {stats["acquired"]}')
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import hmac
+import base64
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+
+class CryptoUtils:
+    """Kriptografik işlemler için yardımcı sınıf"""
+
+    # Kimlik bilgilerinden türetilen değerler (worker içi). Dolunca en eski
+    # kayıt düşer; banka kaydı değiştiğinde invalidate_key_cache ile temizlenir.
+    KEY_CACHE_SIZE = 1024
+    _key_cache = {}
+    _key_cache_lock = threading.Lock()
+
+    @staticmethod
+    def _cache_put(key, value):
+        cache = CryptoUtils._key_cache
+        with CryptoUtils._key_cache_lock:
+            cache[key] = value
+            while len(cache) > CryptoUtils.KEY_CACHE_SIZE:
+                del cache[next(iter(cache))]
+        return value
+
+    @staticmethod
+    def derived_key(kind, parts, compute):
+        """
+        Kimlik bilgilerinden türetilen değeri (ör. Garanti SecurityData) önbellekten döndür
+
+        Args:
+            kind (str): Türetme adı
+            parts (tuple): Türetmede kullanılan kimlik bilgileri
+            compute (callable): compute(*parts) ile değeri hesaplayan fonksiyon
+
+        Returns:
+            Hesaplanmış değer
+        """
+        key = (kind,) + tuple(parts)
+        value = CryptoUtils._key_cache.get(key)
+        if value is None:
+            value = CryptoUtils._cache_put(key, compute(*parts))
+        return value
+
+    @staticmethod
+    def invalidate_key_cache():
+        """Türetilmiş değer önbelleğini temizle (kimlik bilgisi değişince)"""
+        with CryptoUtils._key_cache_lock:
+            CryptoUtils._key_cache.clear()
+
+    @staticmethod
+    def garanti_security_data(password, terminal_id):
+        """
+        Garanti SecurityData = SHA1(şifre + 9 haneli terminal no), büyük harf
+
+        Kimlik bilgisi başına bir kez hesaplanır.
+        """
+        return CryptoUtils.derived_key(
+            'garanti_security_data', (password, str(terminal_id).zfill(9)),
+            lambda secret, terminal: CryptoUtils.sha1_hash(secret + terminal).upper(),
+        )
+
+    @staticmethod
+    def sha1_hash(data):
+        """SHA1 hash oluştur"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.sha1(data).hexdigest()
+
+    @staticmethod
+    def sha256_hash(data):
+        """SHA256 hash oluştur"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def sha512_hash(data):
+        """SHA512 hash oluştur"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.sha512(data).hexdigest()
+
+    @staticmethod
+    def md5_hash(data):
+        """MD5 hash oluştur"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.md5(data).hexdigest()
+
+    @staticmethod
+    def hmac_sha256(key, data):
+        """HMAC-SHA256 oluştur"""
+        if isinstance(key, str):
+            key = key.encode('utf-8')
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hmac.new(key, data, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def base64_encode(data):
+        """Base64 encode"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return base64.b64encode(data).decode('utf-8')
+
+    @staticmethod
+    def base64_decode(data):
+        """Base64 decode"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return base64.b64decode(data).decode('utf-8')
+
+    @staticmethod
+    def create_3d_hash_estpos(client_id, order_id, amount, ok_url, fail_url, trans_type, 
+                               installment, rnd, store_key, hash_algorithm='sha512'):
+        """
+        EstPos için 3D hash oluştur
+        HashData = HASH(clientId + orderId + amount + okUrl + failUrl + 
+                        transType + installment + rnd + storeKey)
+        """
+        hash_str = (
+            f"{client_id}{order_id}{amount}{ok_url}{fail_url}"
+            f"{trans_type}{installment}{rnd}{store_key}"
+        )
+        
+        if hash_algorithm == 'sha512':
+            return CryptoUtils.sha512_hash(hash_str)
+        elif hash_algorithm == 'sha256':
+            return CryptoUtils.sha256_hash(hash_str)
+        elif hash_algorithm == 'sha1':
+            return CryptoUtils.sha1_hash(hash_str)
+        else:
+            return CryptoUtils.sha512_hash(hash_str)
+
+    @staticmethod
+    def create_3d_hash_garanti(terminal_id, order_id, amount, success_url, fail_url, 
+                                trans_type, installment, store_key, security_data):
+        """
+        Garanti POS için 3D hash oluştur
+        SecurityData = SHA1(TerminalID + OrderID + Amount + SuccessURL + 
+                            FailURL + Type + Installment + StoreKey + SecurityData)
+        """
+        hash_str = (
+            f"{terminal_id}{order_id}{amount}{success_url}{fail_url}"
+            f"{trans_type}{installment}{store_key}{security_data}"
+        )
+        
+        return CryptoUtils.sha1_hash(hash_str).upper()
+
+    @staticmethod
+    def create_3d_hash_posnet(merchant_id, terminal_id, card_number, amount, 
+                               currency, merchant_pack, store_key):
+        """
+        PosNet için 3D hash oluştur
+        """
+        hash_str = f"{merchant_id};{terminal_id};{card_number};{amount};{currency};{merchant_pack};{store_key}"
+        return CryptoUtils.sha256_hash(hash_str).upper()
+
+    @staticmethod
+    def create_3d_hash_payfor(merchant_id, terminal_id, total_amount, 
+                               order_id, success_url, fail_url, rnd, store_key):
+        """
+        PayFor için 3D hash oluştur
+        """
+        hash_str = (
+            f"{merchant_id}{terminal_id}{total_amount}{order_id}"
+            f"{success_url}{fail_url}{rnd}{store_key}"
+        )
+        return CryptoUtils.sha512_hash(hash_str).upper()
+
+    @staticmethod
+    def create_hash_akbank(merchant_id, terminal_id, order_id, amount, currency,
+                           installment, store_key):
+        """
+        Akbank POS için hash oluştur
+        """
+        hash_str = f"{merchant_id}{terminal_id}{order_id}{amount}{currency}{installment}{store_key}"
+        return CryptoUtils.sha256_hash(hash_str)
+
+    @staticmethod
+    def encrypt_3des(key, data):
+        """3DES şifreleme"""
+        # cryptography yalnızca 3DES kullanan gateway'lerde ilk çağrıda yüklenir
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        from cryptography.hazmat.backends import default_backend
+        from cryptography.hazmat.primitives import padding
+
+        if isinstance(key, str):
+            key = key.encode('utf-8')
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        
+        # Padding ekle
+        padder = padding.PKCS7(64).padder()
+        padded_data = padder.update(data) + padder.finalize()
+        
+        # 3DES şifreleme
+        cipher = Cipher(
+            algorithms.TripleDES(key[: 24]),
+            modes.ECB(),
+            backend=default_backend()
+        )
+        encryptor = cipher.encryptor()
+        encrypted = encryptor.update(padded_data) + encryptor.finalize()
+        
+        return base64.b64encode(encrypted).decode('utf-8')
+
+    @staticmethod
+    def decrypt_3des(key, encrypted_data):
+        """3DES şifre çözme"""
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        from cryptography.hazmat.backends import default_backend
+        from cryptography.hazmat.primitives import padding
+
+        if isinstance(key, str):
+            key = key.encode('utf-8')
+        
+        encrypted_bytes = base64.b64decode(encrypted_data)
+        
+        cipher = Cipher(
+            algorithms.TripleDES(key[: 24]),
+            modes.ECB(),
+            backend=default_backend()
+        )
+        decryptor = cipher.decryptor()
+        decrypted_padded = decryptor.update(encrypted_bytes) + decryptor.finalize()
+        
+        # Padding kaldır
+        unpadder = padding.PKCS7(64).unpadder()
+        decrypted = unpadder.update(decrypted_padded) + unpadder.finalize()
+        
+        return decrypted.decode('utf-8')
\ No newline at end of file
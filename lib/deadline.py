@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import time
+import contextvars
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar('mews_pos_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """İstek için ayrılan toplam süre bütçesi tükendi"""
+
+    error_type = 'deadline_exceeded'
+
+
+class Deadline:
+    """
+    İstek kapsamlı süre bütçesi
+
+    Controller veya servis toplam bütçeyi scope() ile belirler; gateway
+    HTTP çağrıları sabit timeout yerine kalan süreyi kullanır. Bütçe
+    contextvars ile taşındığı için thread'ler ve asyncio task'leri
+    arasında karışmaz (asyncio.to_thread bağlamı kopyalar).
+    """
+
+    # Bu süreden az kalmışsa banka çağrısı hiç başlatılmaz
+    MIN_REMAINING = 0.05
+
+    __slots__ = ('budget', 'expires_at')
+
+    def __init__(self, budget):
+        self.budget = float(budget)
+        self.expires_at = time.monotonic() + self.budget
+
+    def remaining(self):
+        """Kalan süre (saniye, negatif olmaz)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() < self.MIN_REMAINING
+
+    def timeout_for(self, timeout=None):
+        """
+        Tek bir çağrı için kullanılacak timeout
+
+        Args:
+            timeout (float): Çağrının kendi üst sınırı (ör. gateway.timeout)
+
+        Returns:
+            float: min(timeout, kalan süre)
+
+        Raises:
+            DeadlineExceeded: Bütçe tükenmişse
+        """
+        remaining = self.remaining()
+        if remaining < self.MIN_REMAINING:
+            raise DeadlineExceeded(
+                f"İşlem süre bütçesi ({self.budget:g} sn) tükendi"
+            )
+        return min(timeout, remaining) if timeout else remaining
+
+    @staticmethod
+    def current():
+        """Aktif bütçe (yoksa None)"""
+        return _current.get()
+
+    @classmethod
+    def remaining_timeout(cls, timeout):
+        """Aktif bütçe varsa kırpılmış timeout, yoksa verilen timeout"""
+        deadline = _current.get()
+        if deadline is None:
+            return timeout
+        return deadline.timeout_for(timeout)
+
+    @classmethod
+    @contextmanager
+    def scope(cls, budget):
+        """
+        Blok için süre bütçesi belirle
+
+        İç içe kullanımda dıştaki bütçe aşılmaz (kalan süreler içinden
+        küçük olanı geçerlidir). budget boşsa mevcut bütçe aynen kalır.
+        """
+        outer = _current.get()
+        if not budget or budget <= 0:
+            yield outer
+            return
+
+        deadline = cls(budget)
+        if outer is not None and outer.expires_at < deadline.expires_at:
+            deadline = outer
+
+        token = _current.set(deadline)
+        try:
+            yield deadline
+        finally:
+            _current.reset(token)
@@ -1,13 +1,37 @@
 # -*- coding: utf-8 -*-
+"""
+Gateway modülleri ilk kullanımda yüklenir
 
-from . import base_gateway
-from . import estpos_gateway
-from . import garanti_gateway
-from . import posnet_gateway
-from . import payfor_gateway
-from . import kuveyt_gateway
-from . import payflex_gateway
-from . import interpos_gateway
-from . import akbank_gateway
-from . import tosla_gateway
-from . import gateway_factory
\ No newline at end of file
+Eklenti yüklenirken hiçbir gateway (ve zeep, cryptography gibi
+bağımlılıkları) içe aktarılmaz; GatewayFactory sınıfı ilk istekte
+kayıt defterinden (registry.GatewayRegistry) yükler. `gateways.estpos_gateway` gibi alt modül erişimleri de
+geriye dönük uyumluluk için talep anında içe aktarılır.
+"""
+
+import importlib
+
+_SUBMODULES = frozenset((
+    'base_gateway',
+    'estpos_gateway',
+    'garanti_gateway',
+    'posnet_gateway',
+    'payfor_gateway',
+    'kuveyt_gateway',
+    'payflex_gateway',
+    'interpos_gateway',
+    'akbank_gateway',
+    'tosla_gateway',
+    'gateway_factory',
+    'registry',
+    'result',
+))
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
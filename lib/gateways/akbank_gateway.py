@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from .base_gateway import BaseGateway
+from .result import GatewayRequest
+from .registry import register_gateway
 from ..crypto_utils import CryptoUtils
 import logging
 import json
@@ -8,9 +10,14 @@ import json
 _logger = logging.getLogger(__name__)
 
 
+@register_gateway('akbank_pos')
 class AkbankGateway(BaseGateway):
     """Akbank POS Gateway (Yeni API)"""
 
+    callback_hash_scheme = 'akbank'
+    callback_order_fields = ('orderId',)
+    callback_amount_field = ('amount', False)
+
     def prepare_3d_request(self, order, card):
         """3D Secure isteği hazırla"""
         config = self.config
@@ -114,14 +121,14 @@ class AkbankGateway(BaseGateway):
             'secureOption': 'NonSecure',
         }
 
-        return {
-            'url': config['payment_api_url'],
-            'data': json.dumps(data),
-            'headers': {
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=json.dumps(data),
+            headers={
                 'Content-Type': 'application/json',
                 'Authorization': f"Bearer {config.get('client_id', '')}",
             }
-        }
+        )
 
     def parse_payment_response(self, response):
         """Ödeme yanıtını parse et"""
@@ -173,14 +180,14 @@ class AkbankGateway(BaseGateway):
             'hash': hash_data,
         }
 
-        return {
-            'url': config['payment_api_url'],
-            'data': json.dumps(data),
-            'headers': {
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=json.dumps(data),
+            headers={
                 'Content-Type': 'application/json',
                 'Authorization': f"Bearer {config.get('client_id', '')}",
             }
-        }
+        )
 
     def prepare_refund_request(self, order, amount=None):
         """İade isteği hazırla"""
@@ -209,11 +216,11 @@ class AkbankGateway(BaseGateway):
             'hash': hash_data,
         }
 
-        return {
-            'url': config['payment_api_url'],
-            'data': json.dumps(data),
-            'headers': {
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=json.dumps(data),
+            headers={
                 'Content-Type': 'application/json',
                 'Authorization': f"Bearer {config.get('client_id', '')}",
             }
-        }
\ No newline at end of file
+        )
\ No newline at end of file
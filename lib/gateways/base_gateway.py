@@ -1,8 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import time
 import requests
 import logging
 from abc import ABC, abstractmethod
+from contextlib import contextmanager, asynccontextmanager
+from ..bank_config import CURRENCY_CODES, DEFAULT_CURRENCY_CODE
+from .result import GatewayResult
+from ..session_pool import SessionPool
+from ..async_transport import AsyncHttpTransport, AsyncTimeoutError, AsyncTransportError
+from ..circuit_breaker import CircuitOpenError
+from ..deadline import Deadline, DeadlineExceeded
+from ..concurrency_limiter import QueueTimeoutError
 
 _logger = logging.getLogger(__name__)
 
@@ -10,6 +19,31 @@ _logger = logging.getLogger(__name__)
 class BaseGateway(ABC):
     """Tüm gateway'ler için base sınıf"""
 
+    # prepare_*/parse_* içinde senkron ağ çağrısı yapan gateway'ler (OOS, SOAP)
+    # asenkron serviste event loop'u bloklamamak için thread'de çalıştırılır
+    blocking_io = False
+
+    # Servis tarafından banka bazında atanan devre kesici (lib.circuit_breaker)
+    circuit_breaker = None
+
+    # Servis tarafından banka bazında atanan eş zamanlılık limiti (lib.concurrency_limiter)
+    concurrency_limiter = None
+
+    # prepare_3d_request'in uyguladığı 3D modeli: '3d' (provizyonu işyeri alır)
+    # veya '3d_pay' (provizyonu banka alır)
+    three_d_models = ('3d',)
+
+    # 3D callback imza şeması (lib.callback_verifier.SCHEMES), sonucu bankaya
+    # sorulan gateway'ler için lib.callback_verifier.INQUIRY (durum sorgusu
+    # gerekir) veya sonucu banka servisi çözen gateway'ler için bilinçli
+    # muafiyet lib.callback_verifier.UNSIGNED; None ise callback reddedilir
+    callback_hash_scheme = None
+
+    # 3D callback'te imzalı sipariş numarası alanları ve (tutar alanı, kuruş
+    # cinsinden mi); imza doğrulandıktan sonra işlemle karşılaştırılır
+    callback_order_fields = ()
+    callback_amount_field = None
+
     def __init__(self, config):
         self.config = config
         self.timeout = 30
@@ -44,26 +78,192 @@ class BaseGateway(ABC):
             if headers is None:
                 headers = {'Content-Type': 'application/x-www-form-urlencoded'}
 
-            if method == 'POST':
-                response = requests.post(url, data=data, headers=headers, timeout=self.timeout)
-            else:
-                response = requests.get(url, params=data, headers=headers, timeout=self.timeout)
+            with self._call_slot() as timeout:
+                started = time.monotonic()
+
+                session = self.get_session(url)
 
-            response.raise_for_status()
+                if method == 'POST':
+                    response = session.post(url, data=data, headers=headers, timeout=timeout)
+                else:
+                    response = session.get(url, params=data, headers=headers, timeout=timeout)
+
+                response.raise_for_status()
+
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_success(time.monotonic() - started)
             
             _logger.info(f"Gateway yanıtı: {response.status_code}")
             _logger.debug(f"Response: {response.text[: 500]}")
 
             return response
 
+        except CircuitOpenError:
+            _logger.warning(f"Gateway isteği reddedildi (devre kesici): {url}")
+            raise
+
+        except QueueTimeoutError:
+            _logger.warning(f"Gateway isteği reddedildi (banka kuyruğu dolu): {url}")
+            raise
+
+        except DeadlineExceeded:
+            _logger.warning(f"Gateway isteği gönderilmedi (süre bütçesi tükendi): {url}")
+            raise
+
         except requests.exceptions.Timeout:
             _logger.error("Gateway timeout")
+            self._handle_timeout(started, timeout)
             raise Exception("İstek zaman aşımına uğradı")
 
         except requests.exceptions.RequestException as e:
             _logger.error(f"Gateway isteği hatası: {str(e)}")
+            self._record_failure(started)
+            raise Exception(f"İstek hatası: {str(e)}")
+
+    async def async_make_request(self, url, data, headers=None, method='POST'):
+        """HTTP isteğini asyncio üzerinden gönder (make_request'in asenkron karşılığı)"""
+        try:
+            _logger.info(f"Gateway isteği (async): {url}")
+            _logger.debug(f"Request data: {data}")
+
+            if headers is None:
+                headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+            async with self._async_call_slot() as timeout:
+                started = time.monotonic()
+
+                transport = AsyncHttpTransport.for_loop()
+                response = await transport.request(
+                    method, url, data=data, headers=headers, timeout=timeout,
+                    max_connections=self.config.get('max_connections') or None,
+                )
+                response.raise_for_status()
+
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_success(time.monotonic() - started)
+
+            _logger.info(f"Gateway yanıtı (async): {response.status_code}")
+            _logger.debug(f"Response: {response.text[: 500]}")
+
+            return response
+
+        except CircuitOpenError:
+            _logger.warning(f"Gateway isteği reddedildi (devre kesici): {url}")
+            raise
+
+        except QueueTimeoutError:
+            _logger.warning(f"Gateway isteği reddedildi (banka kuyruğu dolu): {url}")
+            raise
+
+        except DeadlineExceeded:
+            _logger.warning(f"Gateway isteği gönderilmedi (süre bütçesi tükendi): {url}")
+            raise
+
+        except AsyncTimeoutError:
+            _logger.error("Gateway timeout")
+            self._handle_timeout(started, timeout)
+            raise Exception("İstek zaman aşımına uğradı")
+
+        except AsyncTransportError as e:
+            _logger.error(f"Gateway isteği hatası: {str(e)}")
+            self._record_failure(started)
             raise Exception(f"İstek hatası: {str(e)}")
 
+    @contextmanager
+    def _call_slot(self):
+        """
+        Banka çağrısı öncesi korumalar: süre bütçesi, devre kesici ve
+        eş zamanlılık limiti. Blok boyunca banka slotu tutulur; blok
+        çağrıya verilecek timeout değerini alır. Slot ve yarı açık devre
+        deneme hakkı, hata türünden bağımsız olarak blok sonunda bırakılır.
+        """
+        limiter = self.concurrency_limiter
+        probe = self._before_call()
+        slot = None
+        try:
+            try:
+                if limiter:
+                    slot = limiter.acquire(Deadline.remaining_timeout(limiter.queue_timeout))
+            except QueueTimeoutError as e:
+                self._queue_timeout(e)
+            # Kuyrukta geçen süre bütçeden düşülür
+            yield Deadline.remaining_timeout(self.timeout)
+        finally:
+            self._after_call(limiter, slot, probe)
+
+    @asynccontextmanager
+    async def _async_call_slot(self):
+        """_call_slot() karşılığı; kuyrukta event loop bloklanmadan beklenir"""
+        limiter = self.concurrency_limiter
+        probe = self._before_call()
+        slot = None
+        try:
+            try:
+                if limiter:
+                    slot = await limiter.async_acquire(Deadline.remaining_timeout(limiter.queue_timeout))
+            except QueueTimeoutError as e:
+                self._queue_timeout(e)
+            yield Deadline.remaining_timeout(self.timeout)
+        finally:
+            self._after_call(limiter, slot, probe)
+
+    def _before_call(self):
+        """
+        Bütçe tükenmişse ya da devre açıksa çağrıyı hiç başlatma
+
+        Returns:
+            Devre kesicinin yarı açık deneme hakkı (bkz. CircuitBreaker.before_request)
+        """
+        Deadline.remaining_timeout(self.timeout)
+        if self.circuit_breaker:
+            return self.circuit_breaker.before_request()
+        return None
+
+    def _after_call(self, limiter, slot, probe):
+        """Çağrı nasıl biterse bitsin banka slotunu ve devre deneme hakkını geri ver"""
+        try:
+            if slot is not None:
+                limiter.release(slot)
+        finally:
+            if self.circuit_breaker:
+                self.circuit_breaker.release(probe)
+
+    def _queue_timeout(self, error):
+        """Banka kuyruğunda beklerken zaman aşımı; bütçe tükendiyse bütçe hatası say"""
+        deadline = Deadline.current()
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(
+                f"İşlem süre bütçesi banka kuyruğunda beklerken tükendi ({deadline.budget:g} sn)"
+            ) from error
+        raise error
+
+    def _record_failure(self, started):
+        """Başarısız banka çağrısını devre kesiciye bildir"""
+        if self.circuit_breaker:
+            self.circuit_breaker.record_failure(time.monotonic() - started)
+
+    def _handle_timeout(self, started, timeout):
+        """
+        Zaman aşımını sınıflandır
+
+        Timeout süre bütçesi nedeniyle kısaltılmışsa banka hatası sayılmaz;
+        DeadlineExceeded fırlatılır. Aksi halde devre kesiciye hata yazılır.
+        """
+        if timeout < self.timeout and Deadline.current() is not None:
+            raise DeadlineExceeded(
+                f"İşlem süre bütçesi banka yanıtı beklenirken tükendi ({timeout:.2f} sn)"
+            )
+        self._record_failure(started)
+
+    @classmethod
+    def wsdl_url_for(cls, config):
+        """SOAP gateway'lerinin konfigürasyondaki WSDL adresi (önceden derleme için); yoksa None"""
+        return None
+
+    def get_session(self, url):
+        """Banka host'u için paylaşımlı keep-alive oturumu al"""
+        return SessionPool.get_session(url, pool_maxsize=self.config.get('max_connections') or None)
+
     def format_amount(self, amount, include_decimal=True):
         """Tutarı gateway formatına çevir"""
         if include_decimal:
@@ -79,32 +279,11 @@ class BaseGateway(ABC):
 
     def map_currency(self, currency):
         """Para birimi kodunu map et"""
-        currency_map = {
-            'TRY': '949',
-            'USD': '840',
-            'EUR': '978',
-            'GBP':  '826',
-        }
-        return currency_map.get(currency, '949')
+        return CURRENCY_CODES.get(currency, DEFAULT_CURRENCY_CODE)
 
     def normalize_response(self, raw_response):
-        """Yanıtı standart formata çevir"""
-        return {
-            'success': raw_response.get('approved', False),
-            'status':  'approved' if raw_response.get('approved') else 'declined',
-            'order_id':  raw_response.get('order_id'),
-            'transaction_id': raw_response.get('transaction_id'),
-            'auth_code': raw_response.get('auth_code'),
-            'host_ref_num': raw_response.get('host_ref_num'),
-            'rrn': raw_response.get('rrn'),
-            'error_code': raw_response.get('error_code'),
-            'error_message': raw_response.get('error_message'),
-            'md_status': raw_response.get('md_status'),
-            'eci':  raw_response.get('eci'),
-            'cavv': raw_response.get('cavv'),
-            'xid': raw_response.get('xid'),
-            'raw_response': raw_response,
-        }
+        """Parse edilmiş yanıtı GatewayResult'a çevir (bkz. result.GatewayResult)"""
+        return GatewayResult.from_response(raw_response)
 
     def prepare_cancel_request(self, order):
         """İptal isteği hazırla"""
@@ -116,4 +295,46 @@ class BaseGateway(ABC):
 
     def prepare_status_request(self, order):
         """Durum sorgulama isteği hazırla"""
-        raise NotImplementedError("Bu gateway durum sorgulama desteklemiyor")
\ No newline at end of file
+        raise NotImplementedError("Bu gateway durum sorgulama desteklemiyor")
+
+    # Durum sorgusunda "kayıt yok" anlamına gelen banka mesajları
+    NOT_FOUND_MARKERS = ('no record', 'not found', 'bulunamad')
+
+    def parse_status_response(self, response):
+        """
+        Durum sorgulama yanıtını parse et
+
+        Returns:
+            dict: 'status' anahtarı approved / declined / cancelled /
+                refunded / not_found / unknown değerlerinden biridir;
+                varsa auth_code, host_ref_num, error_message eklenir.
+        """
+        raise NotImplementedError("Bu gateway durum sorgulama desteklemiyor")
+
+    def supports(self, operation):
+        """Gateway'in prepare_<operation>_request metodunu uygulayıp uygulamadığı"""
+        return type(self)._implements(operation)
+
+    @classmethod
+    def _implements(cls, operation):
+        method = f'prepare_{operation}_request'
+        return getattr(cls, method, None) is not getattr(BaseGateway, method, None)
+
+    @classmethod
+    def get_capabilities(cls):
+        """
+        Sınıfın yetenekleri (bkz. registry.CAPABILITIES)
+
+        3D modelleri three_d_models'ten, diğerleri uygulanan prepare_*
+        metotlarından türetilir.
+        """
+        capabilities = set(cls.three_d_models) | {'non_secure'}
+        capabilities.update(operation for operation in ('cancel', 'refund', 'status') if cls._implements(operation))
+        return frozenset(capabilities)
+
+    def _status_from_error(self, message):
+        """Başarısız durum sorgusunu not_found / unknown olarak sınıflandır"""
+        message = (message or '').lower()
+        if any(marker in message for marker in self.NOT_FOUND_MARKERS):
+            return 'not_found'
+        return 'unknown'
\ No newline at end of file
@@ -2,20 +2,58 @@
 
 import random
 import logging
+from .base_gateway import BaseGateway
+from .result import GatewayRequest
+from .registry import register_gateway
 
 _logger = logging.getLogger(__name__)
 
 
-class EstPosGateway:
+@register_gateway('estv3_pos', 'estpos', 'param_pos')
+class EstPosGateway(BaseGateway):
     """EstPos/EstV3Pos Gateway (Akbank, İşbank, TEB, Şekerbank, Finansbank)"""
 
+    three_d_models = ('3d_pay',)
+    callback_hash_scheme = 'est'
+    callback_order_fields = ('oid',)
+    callback_amount_field = ('amount', True)
+
+    # ORDERSTATUS sorgusundaki TRANS_STAT -> işlem durumu
+    ORDER_STATUS_MAP = {
+        'A': 'approved',
+        'C': 'approved',
+        'S': 'approved',
+        'PN-AUTH': 'approved',
+        'V': 'cancelled',
+        'CNCL': 'cancelled',
+        'R': 'refunded',
+        'D': 'declined',
+        'ERR': 'declined',
+    }
+
+    # CC5Response alanları (alan -> gövdeye göre yol)
+    PAYMENT_RESPONSE_FIELDS = {
+        'OrderId': 'OrderId',
+        'ProcReturnCode': 'ProcReturnCode',
+        'Response': 'Response',
+        'AuthCode': 'AuthCode',
+        'HostRefNum': 'HostRefNum',
+        'ErrCode': 'ErrCode',
+        'ErrMsg': 'ErrMsg',
+    }
+
+    STATUS_RESPONSE_FIELDS = dict(
+        PAYMENT_RESPONSE_FIELDS,
+        TRANS_STAT='Extra/TRANS_STAT',
+        AUTH_CODE='Extra/AUTH_CODE',
+        HOST_REF_NUM='Extra/HOST_REF_NUM',
+    )
+
     def __init__(self, config):
         from odoo.addons.mews_pos.lib.crypto_utils import CryptoUtils
         from odoo.addons.mews_pos.lib.xml_utils import XmlUtils
         
-        self.config = config
-        self.timeout = 30
-        self.test_mode = config.get('environment') == 'test'
+        super().__init__(config)
         self.CryptoUtils = CryptoUtils
         self.XmlUtils = XmlUtils
 
@@ -107,21 +145,19 @@ class EstPosGateway:
             'Cvv2Val': card['cvv'],
         }
 
-        xml_string = self.XmlUtils.dict_to_xml({'CC5Request': xml_data}, root_name='CC5Request')
+        xml_string = self.XmlUtils.render({'CC5Request': xml_data}, root_name='CC5Request')
 
-        return {
-            'url':  config['payment_api_url'],
-            'data': {'DATA': xml_string},
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
+        return GatewayRequest(
+            url= config['payment_api_url'],
+            data={'DATA': xml_string},
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
 
     def parse_payment_response(self, response):
         """Ödeme yanıtını parse et"""
-        xml_response = response.text
-        parsed = self.XmlUtils.xml_to_dict(xml_response)
+        data = self.XmlUtils.extract(response, 'CC5Response', self.PAYMENT_RESPONSE_FIELDS)
         
-        if 'CC5Response' in parsed: 
-            data = parsed['CC5Response']
+        if data:
             proc_return_code = data.get('ProcReturnCode', '')
             approved = proc_return_code == '00'
             
@@ -150,13 +186,13 @@ class EstPosGateway:
             'OrderId': order['id'],
         }
 
-        xml_string = self.XmlUtils.dict_to_xml({'CC5Request': xml_data}, root_name='CC5Request')
+        xml_string = self.XmlUtils.render({'CC5Request': xml_data}, root_name='CC5Request')
 
-        return {
-            'url': config['payment_api_url'],
-            'data': {'DATA': xml_string},
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data={'DATA': xml_string},
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
 
     def prepare_refund_request(self, order, amount=None):
         """İade isteği hazırla"""
@@ -173,39 +209,53 @@ class EstPosGateway:
             'Currency': self.map_currency(order.get('currency', 'TRY')),
         }
 
-        xml_string = self.XmlUtils.dict_to_xml({'CC5Request': xml_data}, root_name='CC5Request')
+        xml_string = self.XmlUtils.render({'CC5Request': xml_data}, root_name='CC5Request')
 
-        return {
-            'url': config['payment_api_url'],
-            'data': {'DATA': xml_string},
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data={'DATA': xml_string},
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
+
+    def prepare_status_request(self, order):
+        """Durum sorgulama (ORDERSTATUS) isteği hazırla"""
+        config = self.config
+
+        xml_data = {
+            'Name': config['username'],
+            'Password': config['password'],
+            'ClientId': config['client_id'],
+            'OrderId': order['id'],
+            'Extra': {'ORDERSTATUS': 'QUERY'},
         }
 
-    def make_request(self, url, data, headers=None, method='POST'):
-        """HTTP isteği gönder"""
-        import requests
-        
-        try:
-            _logger.info(f"Gateway isteği:  {url}")
-            
-            if headers is None:
-                headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        xml_string = self.XmlUtils.render(xml_data, root_name='CC5Request')
 
-            if method == 'POST':
-                response = requests.post(url, data=data, headers=headers, timeout=self.timeout)
-            else:
-                response = requests.get(url, params=data, headers=headers, timeout=self.timeout)
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data={'DATA': xml_string},
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
 
-            response.raise_for_status()
-            return response
+    def parse_status_response(self, response):
+        """Durum sorgulama yanıtını parse et"""
+        data = self.XmlUtils.extract(response, 'CC5Response', self.STATUS_RESPONSE_FIELDS)
 
-        except requests.exceptions.Timeout:
-            _logger.error("Gateway timeout")
-            raise Exception("İstek zaman aşımına uğradı")
+        proc_return_code = data.get('ProcReturnCode', '')
+        if proc_return_code == '00':
+            status = self.ORDER_STATUS_MAP.get(data.get('TRANS_STAT', ''), 'unknown')
+        else:
+            status = self._status_from_error(data.get('ErrMsg'))
 
-        except requests.exceptions.RequestException as e:
-            _logger.error(f"Gateway isteği hatası: {str(e)}")
-            raise Exception(f"İstek hatası: {str(e)}")
+        return {
+            'status': status,
+            'order_id': data.get('OrderId'),
+            'auth_code': data.get('AUTH_CODE') or data.get('AuthCode'),
+            'host_ref_num': data.get('HOST_REF_NUM') or data.get('HostRefNum'),
+            'proc_return_code': proc_return_code,
+            'error_code': data.get('ErrCode'),
+            'error_message': data.get('ErrMsg'),
+        }
 
     def format_amount(self, amount, include_decimal=True):
         """Tutarı gateway formatına çevir"""
@@ -217,32 +267,3 @@ class EstPosGateway:
     def format_installment(self, installment):
         """Taksit sayısını formata çevir"""
         return str(installment) if installment > 1 else ''
-
-    def map_currency(self, currency):
-        """Para birimi kodunu map et"""
-        currency_map = {
-            'TRY': '949',
-            'USD': '840',
-            'EUR': '978',
-            'GBP': '826',
-        }
-        return currency_map.get(currency, '949')
-
-    def normalize_response(self, raw_response):
-        """Yanıtı standart formata çevir"""
-        return {
-            'success': raw_response.get('approved', False),
-            'status': 'approved' if raw_response.get('approved') else 'declined',
-            'order_id':  raw_response.get('order_id'),
-            'transaction_id': raw_response.get('transaction_id'),
-            'auth_code': raw_response.get('auth_code'),
-            'host_ref_num': raw_response.get('host_ref_num'),
-            'rrn': raw_response.get('rrn'),
-            'error_code': raw_response.get('error_code'),
-            'error_message': raw_response.get('error_message'),
-            'md_status': raw_response.get('md_status'),
-            'eci': raw_response.get('eci'),
-            'cavv': raw_response.get('cavv'),
-            'xid':  raw_response.get('xid'),
-            'raw_response': raw_response,
-        }
\ No newline at end of file
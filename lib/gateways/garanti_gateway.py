@@ -1,28 +1,54 @@
 # -*- coding: utf-8 -*-
 
 from .base_gateway import BaseGateway
-from .crypto_utils import CryptoUtils
-from .xml_utils import XmlUtils
+from .result import GatewayRequest
+from .registry import register_gateway
+from ..crypto_utils import CryptoUtils
+from ..xml_utils import XmlUtils
 import logging
 
 _logger = logging.getLogger(__name__)
 
 
+@register_gateway('garanti_pos')
 class GarantiGateway(BaseGateway):
     """Garanti BBVA POS Gateway"""
 
+    three_d_models = ('3d_pay',)
+    callback_hash_scheme = 'hashparams'
+    callback_order_fields = ('oid', 'orderid')
+    callback_amount_field = ('txnamount', True)
+
+    # GVPSResponse alanları (alan -> gövdeye göre yol)
+    PAYMENT_RESPONSE_FIELDS = {
+        'order_id': 'Order/OrderID',
+        'response_code': 'Transaction/Response/Code',
+        'response_message': 'Transaction/Response/Message',
+        'auth_code': 'Transaction/AuthCode',
+        'retref_num': 'Transaction/RetrefNum',
+        'rrn': 'Transaction/RRN',
+    }
+
+    def _terminal_id(self):
+        """9 haneye sıfırla tamamlanmış terminal no (derlenmiş konfigürasyonda hazırdır)"""
+        return self.config.get('terminal_id_padded') or str(self.config['terminal_id']).zfill(9)
+
+    def _security_data(self):
+        """SecurityData: SHA1(şifre + terminal no), derlenmiş konfigürasyonda hazırdır"""
+        return self.config.get('garanti_security_data') or CryptoUtils.garanti_security_data(
+            self.config['password'], self._terminal_id()
+        )
+
     def prepare_3d_request(self, order, card):
         """3D Secure form verisi hazırla"""
         config = self.config
         
         # Security Data oluştur (password hash)
-        security_data = CryptoUtils.sha1_hash(
-            config['password'] + str(config['terminal_id']).zfill(9)
-        ).upper()
+        security_data = self._security_data()
         
         # Hash oluştur
         hash_data = CryptoUtils.create_3d_hash_garanti(
-            terminal_id=str(config['terminal_id']).zfill(9),
+            terminal_id=self._terminal_id(),
             order_id=order['id'],
             amount=self.format_amount(order['amount']),
             success_url=order['success_url'],
@@ -40,7 +66,7 @@ class GarantiGateway(BaseGateway):
             'terminalprovuserid': config['username'],
             'terminaluserid': config['username'],
             'terminalmerchantid': config['merchant_id'],
-            'terminalid': str(config['terminal_id']).zfill(9),
+            'terminalid': self._terminal_id(),
             'txntype': 'sales',
             'txnamount': self.format_amount(order['amount']),
             'txncurrencycode': self.map_currency(order.get('currency', 'TRY')),
@@ -101,13 +127,11 @@ class GarantiGateway(BaseGateway):
         config = self.config
         
         # Security Data
-        security_data = CryptoUtils.sha1_hash(
-            config['password'] + str(config['terminal_id']).zfill(9)
-        ).upper()
+        security_data = self._security_data()
         
         # Hash Data
         hash_str = (
-            f"{order['id']}{str(config['terminal_id']).zfill(9)}"
+            f"{order['id']}{self._terminal_id()}"
             f"{card['number']}{self.format_amount(order['amount'])}{security_data}"
         )
         hash_data = CryptoUtils.sha1_hash(hash_str).upper()
@@ -118,7 +142,7 @@ class GarantiGateway(BaseGateway):
             'Terminal': {
                 'ProvUserID': config['username'],
                 'UserID': config['username'],
-                'ID': str(config['terminal_id']).zfill(9),
+                'ID': self._terminal_id(),
                 'MerchantID': config['merchant_id'],
             },
             'Customer': {
@@ -146,35 +170,31 @@ class GarantiGateway(BaseGateway):
             },
         }
 
-        xml_string = XmlUtils.dict_to_xml({'GVPSRequest': xml_data}, root_name='GVPSRequest')
+        xml_string = XmlUtils.render({'GVPSRequest': xml_data}, root_name='GVPSRequest')
 
-        return {
-            'url': config['payment_api_url'],
-            'data': xml_string,
-            'headers': {'Content-Type': 'application/xml'}
-        }
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=xml_string,
+            headers={'Content-Type': 'application/xml'}
+        )
 
     def parse_payment_response(self, response):
         """Ödeme yanıtını parse et"""
-        xml_response = response.text
-        parsed = XmlUtils.xml_to_dict(xml_response)
+        data = XmlUtils.extract(response, 'GVPSResponse', self.PAYMENT_RESPONSE_FIELDS)
         
-        if 'GVPSResponse' in parsed:
-            data = parsed['GVPSResponse']
-            transaction = data.get('Transaction', {})
-            
-            response_code = transaction.get('Response', {}).get('Code', '')
+        if data:
+            response_code = data.get('response_code', '')
             approved = response_code == '00'
             
             return {
                 'approved': approved,
-                'order_id': data.get('Order', {}).get('OrderID'),
-                'auth_code': transaction.get('AuthCode'),
-                'host_ref_num': transaction.get('RetrefNum'),
-                'rrn': transaction.get('RRN'),
+                'order_id': data.get('order_id'),
+                'auth_code': data.get('auth_code'),
+                'host_ref_num': data.get('retref_num'),
+                'rrn': data.get('rrn'),
                 'error_code': response_code,
-                'error_message': transaction.get('Response', {}).get('Message'),
-                'proc_return_code': transaction.get('RetrefNum'),
+                'error_message': data.get('response_message'),
+                'proc_return_code': data.get('retref_num'),
             }
         
         return {'approved': False, 'error_message': 'Geçersiz yanıt formatı'}
@@ -182,10 +202,6 @@ class GarantiGateway(BaseGateway):
     def prepare_cancel_request(self, order):
         """İptal isteği hazırla"""
         config = self.config
-        
-        security_data = CryptoUtils.sha1_hash(
-            config['password'] + str(config['terminal_id']).zfill(9)
-        ).upper()
 
         xml_data = {
             'Mode': 'PROD' if not self.test_mode else 'TEST',
@@ -193,7 +209,7 @@ class GarantiGateway(BaseGateway):
             'Terminal': {
                 'ProvUserID': config['username'],
                 'UserID':  config['username'],
-                'ID': str(config['terminal_id']).zfill(9),
+                'ID': self._terminal_id(),
                 'MerchantID': config['merchant_id'],
             },
             'Customer': {
@@ -211,22 +227,18 @@ class GarantiGateway(BaseGateway):
             },
         }
 
-        xml_string = XmlUtils.dict_to_xml({'GVPSRequest': xml_data}, root_name='GVPSRequest')
+        xml_string = XmlUtils.render({'GVPSRequest': xml_data}, root_name='GVPSRequest')
 
-        return {
-            'url': config['payment_api_url'],
-            'data': xml_string,
-            'headers': {'Content-Type':  'application/xml'}
-        }
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=xml_string,
+            headers={'Content-Type':  'application/xml'}
+        )
 
     def prepare_refund_request(self, order, amount=None):
         """İade isteği hazırla"""
         config = self.config
         refund_amount = amount if amount else order['amount']
-        
-        security_data = CryptoUtils.sha1_hash(
-            config['password'] + str(config['terminal_id']).zfill(9)
-        ).upper()
 
         xml_data = {
             'Mode': 'PROD' if not self.test_mode else 'TEST',
@@ -234,7 +246,7 @@ class GarantiGateway(BaseGateway):
             'Terminal': {
                 'ProvUserID':  config['username'],
                 'UserID': config['username'],
-                'ID': str(config['terminal_id']).zfill(9),
+                'ID': self._terminal_id(),
                 'MerchantID': config['merchant_id'],
             },
             'Customer': {
@@ -252,10 +264,10 @@ class GarantiGateway(BaseGateway):
             },
         }
 
-        xml_string = XmlUtils.dict_to_xml({'GVPSRequest': xml_data}, root_name='GVPSRequest')
+        xml_string = XmlUtils.render({'GVPSRequest': xml_data}, root_name='GVPSRequest')
 
-        return {
-            'url': config['payment_api_url'],
-            'data': xml_string,
-            'headers': {'Content-Type': 'application/xml'}
-        }
\ No newline at end of file
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=xml_string,
+            headers={'Content-Type': 'application/xml'}
+        )
\ No newline at end of file
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import threading
+from collections import OrderedDict
+
+from .registry import GatewayRegistry
 
 _logger = logging.getLogger(__name__)
 
@@ -8,62 +12,137 @@ _logger = logging.getLogger(__name__)
 class GatewayFactory:
     """Gateway factory sınıfı - Doğru gateway'i oluşturur"""
     
-    GATEWAY_MAP = {
-        'akbank_pos': 'odoo.addons.mews_pos.lib.gateways.akbank_gateway.AkbankGateway',
-        'estv3_pos': 'odoo.addons.mews_pos.lib.gateways.estpos_gateway.EstPosGateway',
-        'estpos':  'odoo.addons.mews_pos.lib.gateways.estpos_gateway.EstPosGateway',
-        'garanti_pos': 'odoo.addons.mews_pos.lib.gateways.garanti_gateway.GarantiGateway',
-        'posnet': 'odoo.addons.mews_pos.lib.gateways.posnet_gateway.PosNetGateway',
-        'posnet_v1': 'odoo.addons.mews_pos.lib.gateways.posnet_gateway.PosNetGateway',
-        'payfor':  'odoo.addons.mews_pos.lib.gateways.payfor_gateway.PayForGateway',
-        'payflex_mpi': 'odoo.addons.mews_pos.lib.gateways.payflex_gateway.PayFlexGateway',
-        'payflex_common': 'odoo.addons.mews_pos.lib.gateways.payflex_gateway.PayFlexGateway',
-        'interpos': 'odoo.addons.mews_pos.lib.gateways.interpos_gateway.InterPosGateway',
-        'kuveyt_pos': 'odoo.addons.mews_pos.lib.gateways.kuveyt_gateway.KuveytPosGateway',
-        'tosla':  'odoo.addons.mews_pos.lib.gateways.tosla_gateway.ToslaGateway',
-        'param_pos': 'odoo.addons.mews_pos.lib.gateways.estpos_gateway.EstPosGateway',
-        'vakif_katilim': 'odoo.addons.mews_pos.lib.gateways.payflex_gateway.PayFlexGateway',
-    }
-    
+    # Hazır gateway instance'ları için LRU önbellek (worker başına)
+    CACHE_SIZE = 64
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
     @staticmethod
-    def create(gateway_type, config):
+    def create(gateway_type, config, cache_key=None, setup=None):
         """
         Gateway oluştur
         
+        Önbellekteki instance'lar thread'ler arasında paylaşılır; çağrı
+        başına değiştirilmemelidir. Banka bazlı bağımlılıklar (devre kesici,
+        eş zamanlılık limiti) `setup` ile yalnızca oluşturma anında atanır.
+
         Args:
             gateway_type (str): Gateway tipi
             config (dict): Gateway konfigürasyonu
+            cache_key (tuple): (veritabanı adı, banka id, konfigürasyon versiyonu).
+                Verilirse hazır instance önbellekten döner, yoksa oluşturulup saklanır.
+            setup (callable): Yeni instance önbelleğe girmeden önce bir kez çağrılır
             
         Returns:
             BaseGateway: İlgili gateway instance
         """
-        gateway_class_path = GatewayFactory.GATEWAY_MAP.get(gateway_type)
-        
-        if not gateway_class_path:
-            _logger.error(f"Desteklenmeyen gateway tipi: {gateway_type}")
-            raise ValueError(f"Desteklenmeyen gateway tipi:  {gateway_type}")
-        
-        # Dynamic import
-        module_path, class_name = gateway_class_path.rsplit('.', 1)
-        
-        try:
-            import importlib
-            module = importlib.import_module(module_path)
-            gateway_class = getattr(module, class_name)
-            
-            _logger.info(f"Gateway oluşturuluyor: {gateway_type}")
-            return gateway_class(config)
-            
-        except (ImportError, AttributeError) as e:
-            _logger.error(f"Gateway yüklenirken hata: {str(e)}")
-            raise ValueError(f"Gateway yüklenemedi: {gateway_type}")
+        if cache_key is None:
+            gateway = GatewayFactory._build(gateway_type, config)
+            if setup is not None:
+                setup(gateway)
+            return gateway
+
+        key = (gateway_type,) + tuple(cache_key)
+        cache = GatewayFactory._cache
+
+        with GatewayFactory._cache_lock:
+            gateway = cache.get(key)
+            if gateway is not None:
+                cache.move_to_end(key)
+                GatewayFactory._cache_stats['hits'] += 1
+                return gateway
+            GatewayFactory._cache_stats['misses'] += 1
+
+        # Oluşturma (ör. Kuveyt WSDL indirme) kilit dışında yapılır
+        gateway = GatewayFactory._build(gateway_type, config)
+        if setup is not None:
+            setup(gateway)
+
+        with GatewayFactory._cache_lock:
+            # Aynı anda oluşturan başka bir thread önce sakladıysa onunki kullanılır
+            existing = cache.get(key)
+            if existing is not None:
+                cache.move_to_end(key)
+                return existing
+            cache[key] = gateway
+            cache.move_to_end(key)
+            while len(cache) > GatewayFactory.CACHE_SIZE:
+                cache.popitem(last=False)
+                GatewayFactory._cache_stats['evictions'] += 1
+
+        return gateway
+
+    @staticmethod
+    def _build(gateway_type, config):
+        """Gateway sınıfını yükle ve yeni instance oluştur"""
+        gateway_class = GatewayFactory.load_class(gateway_type)
+        _logger.info(f"Gateway oluşturuluyor: {gateway_type}")
+        return gateway_class(config)
+
+    @staticmethod
+    def load_class(gateway_type):
+        """
+        Gateway sınıfını döndür; modülü (ve bağımlılıklarını) ilk çağrıda yükle
+
+        Args:
+            gateway_type (str): Gateway tipi
+
+        Returns:
+            type: BaseGateway alt sınıfı
+        """
+        return GatewayRegistry.get(gateway_type)
+
+    @staticmethod
+    def loaded_gateways():
+        """Bu worker'da yüklenmiş gateway tipleri"""
+        return GatewayRegistry.loaded()
+
+    @staticmethod
+    def capabilities(gateway_type):
+        """Gateway tipinin yetenekleri (bkz. registry.CAPABILITIES)"""
+        return GatewayRegistry.capabilities(gateway_type)
     
+    @staticmethod
+    def invalidate(bank_ids=None, dbname=None):
+        """
+        Önbellekteki gateway'leri geçersiz kıl
+
+        Args:
+            bank_ids (list): Sadece bu bankalara ait instance'lar; None ise tümü
+            dbname (str): Sadece bu veritabanının bankaları; None ise tüm veritabanları
+        """
+        with GatewayFactory._cache_lock:
+            if bank_ids is None and dbname is None:
+                removed = len(GatewayFactory._cache)
+                GatewayFactory._cache.clear()
+            else:
+                bank_ids = None if bank_ids is None else set(bank_ids)
+                keys = [
+                    key for key in GatewayFactory._cache
+                    if (dbname is None or key[1] == dbname) and (bank_ids is None or key[2] in bank_ids)
+                ]
+                for key in keys:
+                    del GatewayFactory._cache[key]
+                removed = len(keys)
+            GatewayFactory._cache_stats['invalidations'] += removed
+
+    @staticmethod
+    def cache_stats():
+        """Önbellek isabet/ıskalama sayaçları"""
+        with GatewayFactory._cache_lock:
+            stats = dict(GatewayFactory._cache_stats)
+            stats['size'] = len(GatewayFactory._cache)
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+            return stats
+
     @staticmethod
     def get_supported_gateways():
         """Desteklenen gateway listesini döndür"""
-        return list(GatewayFactory.GATEWAY_MAP.keys())
+        return GatewayRegistry.types()
     
     @staticmethod
     def is_supported(gateway_type):
         """Gateway'in desteklenip desteklenmediğini kontrol et"""
-        return gateway_type in GatewayFactory.GATEWAY_MAP
\ No newline at end of file
+        return GatewayRegistry.is_registered(gateway_type)
\ No newline at end of file
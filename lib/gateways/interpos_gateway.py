@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from .base_gateway import BaseGateway
+from .result import GatewayRequest
+from .registry import register_gateway
 from ..crypto_utils import CryptoUtils
 import logging
 import json
@@ -8,9 +10,15 @@ import json
 _logger = logging.getLogger(__name__)
 
 
+@register_gateway('interpos')
 class InterPosGateway(BaseGateway):
     """Denizbank InterPOS Gateway"""
 
+    three_d_models = ('3d_pay',)
+    callback_hash_scheme = 'hashparams'
+    callback_order_fields = ('OrderId',)
+    callback_amount_field = ('PurchAmount', False)
+
     def prepare_3d_request(self, order, card):
         """3D Secure form verisi hazırla"""
         config = self.config
@@ -94,11 +102,11 @@ class InterPosGateway(BaseGateway):
             'MOTO': '0',
         }
 
-        return {
-            'url': config['payment_api_url'],
-            'data': data,
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
 
     def parse_payment_response(self, response):
         """Ödeme yanıtını parse et"""
@@ -140,11 +148,11 @@ class InterPosGateway(BaseGateway):
             'TransId': order.get('transaction_id', ''),
         }
 
-        return {
-            'url': config['payment_api_url'],
-            'data': data,
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
 
     def prepare_refund_request(self, order, amount=None):
         """İade isteği hazırla"""
@@ -164,8 +172,8 @@ class InterPosGateway(BaseGateway):
             'TransId': order.get('transaction_id', ''),
         }
 
-        return {
-            'url': config['payment_api_url'],
-            'data':  data,
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
\ No newline at end of file
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data= data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
\ No newline at end of file
@@ -1,27 +1,47 @@
 # -*- coding: utf-8 -*-
 
 from .base_gateway import BaseGateway
+from .registry import register_gateway
+from ..callback_verifier import UNSIGNED
 from ..crypto_utils import CryptoUtils
+from ..soap_client import SoapClientFactory
 import logging
-from zeep import Client
-from zeep.transports import Transport
-from requests import Session
 
 _logger = logging.getLogger(__name__)
 
 
+@register_gateway('kuveyt_pos')
 class KuveytPosGateway(BaseGateway):
     """Kuveyt Türk POS Gateway (SOAP - Zeep kullanarak)"""
 
+    # SOAP çağrıları prepare/parse içinde senkron yapılır
+    blocking_io = True
+
+    # Callback imzasızdır; sonuç MD ile GetResult servisinden alınır
+    callback_hash_scheme = UNSIGNED
+
+    DEFAULT_WSDL_URL = 'https://boatest.kuveytturk.com.tr/boa.virtualpos.services/Home/ThreeDModelProvisionGate?wsdl'
+
     def __init__(self, config):
         super().__init__(config)
-        self.wsdl_url = config.get('wsdl_url', 'https://boatest.kuveytturk.com.tr/boa.virtualpos.services/Home/ThreeDModelProvisionGate?wsdl')
-        
-        # Zeep client oluştur
-        session = Session()
-        session.verify = True
-        transport = Transport(session=session, timeout=self.timeout)
-        self.client = Client(self.wsdl_url, transport=transport)
+        self.wsdl_url = self.wsdl_url_for(config)
+
+    @classmethod
+    def wsdl_url_for(cls, config):
+        """Bankanın servis adresinden (payment_api_url) WSDL adresi; yoksa test ortamı"""
+        url = config.get('wsdl_url') or config.get('payment_api_url') or cls.DEFAULT_WSDL_URL
+        if '?' not in url:
+            url += '?wsdl'
+        return url
+
+    @property
+    def client(self):
+        """Worker genelinde paylaşılan, disk önbellekli WSDL'den derlenmiş zeep client"""
+        return SoapClientFactory.get_client(
+            self.wsdl_url,
+            session=self.get_session(self.wsdl_url),
+            timeout=self.timeout,
+        )
 
     def prepare_3d_request(self, order, card):
         """3D Secure isteği hazırla"""
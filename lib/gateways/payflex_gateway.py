@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
 from .base_gateway import BaseGateway
+from .result import GatewayRequest
+from .registry import register_gateway
+from ..callback_verifier import INQUIRY
 from ..crypto_utils import CryptoUtils
 from ..xml_utils import XmlUtils
 import logging
@@ -8,9 +11,27 @@ import logging
 _logger = logging.getLogger(__name__)
 
 
+@register_gateway('payflex_mpi', 'payflex_common', 'vakif_katilim')
 class PayFlexGateway(BaseGateway):
     """Ziraat & Vakıfbank PayFlex Gateway"""
 
+    three_d_models = ('3d_pay',)
+
+    # MPI dönüşünde imza alanı yoktur; onay durum sorgusuyla teyit edilir
+    callback_hash_scheme = INQUIRY
+
+    # PayforResponse alanları (alan -> gövdeye göre yol)
+    PAYMENT_RESPONSE_FIELDS = {
+        'OrderId': 'OrderId',
+        'ResultCode': 'ResultCode',
+        'ResultDetail': 'ResultDetail',
+        'ResponseCode': 'ResponseCode',
+        'ErrorMessage': 'ErrorMessage',
+        'AuthCode': 'AuthCode',
+        'HostRefNum': 'HostRefNum',
+        'Rrn': 'Rrn',
+    }
+
     def prepare_3d_request(self, order, card):
         """3D Secure form verisi hazırla"""
         config = self.config
@@ -102,21 +123,19 @@ class PayFlexGateway(BaseGateway):
             'HashData': hash_data,
         }
 
-        xml_string = XmlUtils.dict_to_xml({'PayforRequest': xml_data}, root_name='PayforRequest')
+        xml_string = XmlUtils.render({'PayforRequest': xml_data}, root_name='PayforRequest')
 
-        return {
-            'url': config['payment_api_url'],
-            'data': xml_string,
-            'headers':  {'Content-Type': 'application/xml'}
-        }
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=xml_string,
+            headers= {'Content-Type': 'application/xml'}
+        )
 
     def parse_payment_response(self, response):
         """Ödeme yanıtını parse et"""
-        xml_response = response.text
-        parsed = XmlUtils.xml_to_dict(xml_response)
+        data = XmlUtils.extract(response, 'PayforResponse', self.PAYMENT_RESPONSE_FIELDS)
         
-        if 'PayforResponse' in parsed:
-            data = parsed['PayforResponse']
+        if data:
             result_code = data.get('ResultCode', '')
             response_code = data.get('ResponseCode', '')
             
@@ -142,6 +161,46 @@ class PayFlexGateway(BaseGateway):
         hash_str = f"{merchant_id}{terminal_id}{order_id}{amount:.2f}{password}"
         return CryptoUtils.sha256_hash(hash_str).upper()
 
+    def prepare_status_request(self, order):
+        """Durum sorgulama (OrderInquiry) isteği hazırla"""
+        config = self.config
+
+        hash_data = self._create_hash(
+            merchant_id=config['merchant_id'],
+            terminal_id=config['terminal_id'],
+            order_id=order['id'],
+            amount=order['amount'],
+            password=config['password']
+        )
+
+        xml_data = {
+            'MerchantId': config['merchant_id'],
+            'TerminalNo': config['terminal_id'],
+            'OrderId': order['id'],
+            'TxnType': 'OrderInquiry',
+            'HashData': hash_data,
+        }
+
+        xml_string = XmlUtils.render({'PayforRequest': xml_data}, root_name='PayforRequest')
+
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=xml_string,
+            headers={'Content-Type': 'application/xml'}
+        )
+
+    def parse_status_response(self, response):
+        """Durum sorgulama yanıtını parse et"""
+        result = self.parse_payment_response(response)
+
+        if result['approved']:
+            status = 'approved'
+        else:
+            status = self._status_from_error(result.get('error_message'))
+
+        result['status'] = status
+        return result
+
     def prepare_cancel_request(self, order):
         """İptal isteği hazırla"""
         config = self.config
@@ -163,13 +222,13 @@ class PayFlexGateway(BaseGateway):
             'HashData': hash_data,
         }
 
-        xml_string = XmlUtils.dict_to_xml({'PayforRequest': xml_data}, root_name='PayforRequest')
+        xml_string = XmlUtils.render({'PayforRequest': xml_data}, root_name='PayforRequest')
 
-        return {
-            'url':  config['payment_api_url'],
-            'data': xml_string,
-            'headers': {'Content-Type': 'application/xml'}
-        }
+        return GatewayRequest(
+            url= config['payment_api_url'],
+            data=xml_string,
+            headers={'Content-Type': 'application/xml'}
+        )
 
     def prepare_refund_request(self, order, amount=None):
         """İade isteği hazırla"""
@@ -195,10 +254,10 @@ class PayFlexGateway(BaseGateway):
             'HashData': hash_data,
         }
 
-        xml_string = XmlUtils.dict_to_xml({'PayforRequest': xml_data}, root_name='PayforRequest')
+        xml_string = XmlUtils.render({'PayforRequest': xml_data}, root_name='PayforRequest')
 
-        return {
-            'url': config['payment_api_url'],
-            'data': xml_string,
-            'headers': {'Content-Type': 'application/xml'}
-        }
\ No newline at end of file
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=xml_string,
+            headers={'Content-Type': 'application/xml'}
+        )
\ No newline at end of file
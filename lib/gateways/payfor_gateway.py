@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from .base_gateway import BaseGateway
+from .result import GatewayRequest
+from .registry import register_gateway
 from ..crypto_utils import CryptoUtils
 import logging
 import random
@@ -8,9 +10,14 @@ import random
 _logger = logging.getLogger(__name__)
 
 
+@register_gateway('payfor')
 class PayForGateway(BaseGateway):
     """QNB Finansbank PayFor Gateway"""
 
+    three_d_models = ('3d_pay',)
+    callback_hash_scheme = 'payfor'
+    callback_order_fields = ('OrderId',)
+
     def prepare_3d_request(self, order, card):
         """3D Secure form verisi hazırla"""
         config = self.config
@@ -102,11 +109,11 @@ class PayForGateway(BaseGateway):
             'TotalAmount': self.format_amount(order['amount']),
         }
 
-        return {
-            'url': config['payment_api_url'],
-            'data': data,
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
 
     def parse_payment_response(self, response):
         """Ödeme yanıtını parse et"""
@@ -147,11 +154,11 @@ class PayForGateway(BaseGateway):
             'OrgOrderId': order['id'],
         }
 
-        return {
-            'url': config['payment_api_url'],
-            'data': data,
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
 
     def prepare_refund_request(self, order, amount=None):
         """İade isteği hazırla"""
@@ -171,8 +178,42 @@ class PayForGateway(BaseGateway):
             'OrgOrderId': order['id'],
         }
 
-        return {
-            'url': config['payment_api_url'],
-            'data': data,
-            'headers':  {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
\ No newline at end of file
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=data,
+            headers= {'Content-Type': 'application/x-www-form-urlencoded'}
+        )
+
+    def prepare_status_request(self, order):
+        """Durum sorgulama (OrderInquiry) isteği hazırla"""
+        config = self.config
+
+        data = {
+            'MbrId': '5',
+            'MerchantID': config['merchant_id'],
+            'UserCode': config['username'],
+            'UserPass': config['password'],
+            'OrgOrderId': order['id'],
+            'SecureType': 'Inquiry',
+            'TxnType': 'OrderInquiry',
+            'Currency': self.map_currency(order.get('currency', 'TRY')),
+            'Lang': 'TR',
+        }
+
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
+
+    def parse_status_response(self, response):
+        """Durum sorgulama yanıtını parse et"""
+        result = self.parse_payment_response(response)
+
+        if result['approved']:
+            status = 'approved'
+        else:
+            status = self._status_from_error(result.get('error_message'))
+
+        result['status'] = status
+        return result
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
 from .base_gateway import BaseGateway
+from .result import GatewayRequest
+from .registry import register_gateway
+from ..callback_verifier import UNSIGNED
 from ..crypto_utils import CryptoUtils
 from ..xml_utils import XmlUtils
 import logging
@@ -9,9 +12,45 @@ import base64
 _logger = logging.getLogger(__name__)
 
 
+@register_gateway('posnet', 'posnet_v1')
 class PosNetGateway(BaseGateway):
     """YapıKredi PosNet Gateway"""
 
+    # OOS ve provizyon çağrıları prepare/parse içinde senkron yapılır
+    blocking_io = True
+
+    # Callback paketleri (MerchantPacket/BankPacket/Sign) banka servisinde
+    # oosResolveMerchantData ile çözülüp doğrulanır
+    callback_hash_scheme = UNSIGNED
+
+    # posnetResponse alanları (alan -> gövdeye göre yol)
+    OOS_RESPONSE_FIELDS = {
+        'approved': 'approved',
+        'respCode': 'respCode',
+        'respText': 'respText',
+        'data1': 'oosRequestDataResponse/data1',
+        'data2': 'oosRequestDataResponse/data2',
+        'sign': 'oosRequestDataResponse/sign',
+    }
+
+    RESOLVE_RESPONSE_FIELDS = {
+        'approved': 'approved',
+        'respCode': 'respCode',
+        'respText': 'respText',
+        'xid': 'oosResolveMerchantDataResponse/xid',
+        'authCode': 'oosResolveMerchantDataResponse/authCode',
+        'hostlogkey': 'oosResolveMerchantDataResponse/hostlogkey',
+    }
+
+    PAYMENT_RESPONSE_FIELDS = {
+        'approved': 'approved',
+        'respCode': 'respCode',
+        'respText': 'respText',
+        'orderId': 'orderId',
+        'authCode': 'authCode',
+        'hostlogkey': 'hostlogkey',
+    }
+
     def prepare_3d_request(self, order, card):
         """3D Secure isteği hazırla"""
         config = self.config
@@ -34,7 +73,7 @@ class PosNetGateway(BaseGateway):
             }
         }
 
-        xml_string = XmlUtils.dict_to_xml({'posnetRequest': xml_request}, root_name='posnetRequest')
+        xml_string = XmlUtils.render({'posnetRequest': xml_request}, root_name='posnetRequest')
 
         # OOS request gönder
         try:
@@ -44,19 +83,18 @@ class PosNetGateway(BaseGateway):
                 headers={'Content-Type': 'application/x-www-form-urlencoded'}
             )
             
-            parsed_response = XmlUtils.xml_to_dict(response.text)
+            oos_response = XmlUtils.extract(response, 'posnetResponse', self.OOS_RESPONSE_FIELDS)
             
-            if 'posnetResponse' in parsed_response:
-                oos_response = parsed_response['posnetResponse']
+            if oos_response:
                 
                 if oos_response.get('approved') == '1':
                     # 3D form data hazırla
                     form_data = {
                         'mid': config['merchant_id'],
                         'posnetID': config['client_id'],
-                        'posnetData': oos_response.get('oosRequestDataResponse', {}).get('data1'),
-                        'posnetData2': oos_response.get('oosRequestDataResponse', {}).get('data2'),
-                        'digest': oos_response.get('oosRequestDataResponse', {}).get('sign'),
+                        'posnetData': oos_response.get('data1'),
+                        'posnetData2': oos_response.get('data2'),
+                        'digest': oos_response.get('sign'),
                         'merchantReturnURL': order['success_url'],
                         'lang': order.get('lang', 'tr'),
                         'url': '',
@@ -98,7 +136,7 @@ class PosNetGateway(BaseGateway):
             }
         }
 
-        xml_string = XmlUtils.dict_to_xml({'posnetRequest': xml_request}, root_name='posnetRequest')
+        xml_string = XmlUtils.render({'posnetRequest': xml_request}, root_name='posnetRequest')
 
         try:
             response = self.make_request(
@@ -107,17 +145,16 @@ class PosNetGateway(BaseGateway):
                 headers={'Content-Type': 'application/x-www-form-urlencoded'}
             )
             
-            parsed = XmlUtils.xml_to_dict(response.text)
+            data = XmlUtils.extract(response, 'posnetResponse', self.RESOLVE_RESPONSE_FIELDS)
             
-            if 'posnetResponse' in parsed:
-                data = parsed['posnetResponse']
+            if data:
                 approved = data.get('approved') == '1'
                 
                 return {
                     'approved':  approved,
-                    'order_id': data.get('oosResolveMerchantDataResponse', {}).get('xid'),
-                    'auth_code': data.get('oosResolveMerchantDataResponse', {}).get('authCode'),
-                    'host_ref_num': data.get('oosResolveMerchantDataResponse', {}).get('hostlogkey'),
+                    'order_id': data.get('xid'),
+                    'auth_code': data.get('authCode'),
+                    'host_ref_num': data.get('hostlogkey'),
                     'error_code': data.get('respCode'),
                     'error_message': data.get('respText'),
                     'md_status': '1' if approved else '0',
@@ -150,26 +187,24 @@ class PosNetGateway(BaseGateway):
             }
         }
 
-        xml_string = XmlUtils.dict_to_xml({'posnetRequest': xml_request}, root_name='posnetRequest')
+        xml_string = XmlUtils.render({'posnetRequest': xml_request}, root_name='posnetRequest')
 
-        return {
-            'url':  config['payment_api_url'],
-            'data': {'xmldata': xml_string},
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
+        return GatewayRequest(
+            url= config['payment_api_url'],
+            data={'xmldata': xml_string},
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
 
     def parse_payment_response(self, response):
         """Ödeme yanıtını parse et"""
-        xml_response = response.text
-        parsed = XmlUtils.xml_to_dict(xml_response)
+        data = XmlUtils.extract(response, 'posnetResponse', self.PAYMENT_RESPONSE_FIELDS)
         
-        if 'posnetResponse' in parsed:
-            data = parsed['posnetResponse']
+        if data:
             approved = data.get('approved') == '1'
             
             return {
                 'approved': approved,
-                'order_id': order.get('id'),
+                'order_id': data.get('orderId'),
                 'auth_code': data.get('authCode'),
                 'host_ref_num': data.get('hostlogkey'),
                 'error_code': data.get('respCode'),
@@ -180,8 +215,12 @@ class PosNetGateway(BaseGateway):
 
     def _create_mac(self, config):
         """MAC oluştur (PosNet için)"""
-        mac_str = f"{config['client_id']};{config['terminal_id']}"
-        return CryptoUtils.base64_encode(CryptoUtils.sha256_hash(mac_str))
+        return CryptoUtils.derived_key(
+            'posnet_mac', (config['client_id'], config['terminal_id']),
+            lambda client_id, terminal_id: CryptoUtils.base64_encode(
+                CryptoUtils.sha256_hash(f"{client_id};{terminal_id}")
+            ),
+        )
 
     def prepare_cancel_request(self, order):
         """İptal isteği hazırla"""
@@ -197,13 +236,13 @@ class PosNetGateway(BaseGateway):
             }
         }
 
-        xml_string = XmlUtils.dict_to_xml({'posnetRequest':  xml_request}, root_name='posnetRequest')
+        xml_string = XmlUtils.render({'posnetRequest':  xml_request}, root_name='posnetRequest')
 
-        return {
-            'url': config['payment_api_url'],
-            'data': {'xmldata': xml_string},
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data={'xmldata': xml_string},
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
 
     def prepare_refund_request(self, order, amount=None):
         """İade isteği hazırla"""
@@ -220,10 +259,10 @@ class PosNetGateway(BaseGateway):
             }
         }
 
-        xml_string = XmlUtils.dict_to_xml({'posnetRequest':  xml_request}, root_name='posnetRequest')
+        xml_string = XmlUtils.render({'posnetRequest':  xml_request}, root_name='posnetRequest')
 
-        return {
-            'url': config['payment_api_url'],
-            'data': {'xmldata': xml_string},
-            'headers': {'Content-Type': 'application/x-www-form-urlencoded'}
-        }
\ No newline at end of file
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data={'xmldata': xml_string},
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
\ No newline at end of file
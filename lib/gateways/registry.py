@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Gateway kayıt defteri
+
+Gateway sınıfları `@register_gateway('tip', ...)` dekoratörüyle kayıt
+olur. Eklentiyle gelen gateway'ler BUILTIN_GATEWAYS'te yalnızca modül
+ve etiketle bildirilir; modül ilk kullanımda içe aktarılır ve sınıf
+kendi dekoratörüyle kaydolur. Üçüncü parti bankalar iki yolla eklenir:
+
+- Başka bir Odoo eklentisinde sınıfı `register_gateway` ile süslemek
+- `mews_pos.gateways` grubunda setuptools entry point tanımlamak
+  (ad = gateway tipi, değer = 'paket.modul:Sinif')
+
+Entry point'ler süreç başına bir kez çözülür; sınıflar önbelleğe alınır.
+"""
+
+import importlib
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'mews_pos.gateways'
+
+# Gateway yetenekleri; mews.pos.bank.payment_model değerleriyle ortak olanlar aynı addadır
+CAPABILITIES = ('3d', '3d_pay', 'non_secure', 'cancel', 'refund', 'status')
+
+# (gateway tipi, modül, etiket) - sıra seçim listesindeki sıradır; etiketi None
+# olan tipler yalnızca geriye dönük uyumluluk için kabul edilir, listede görünmez
+BUILTIN_GATEWAYS = (
+    ('akbank_pos', '.akbank_gateway', 'Akbank POS'),
+    ('estv3_pos', '.estpos_gateway', 'EST V3 POS (Payten/Asseco)'),
+    ('estpos', '.estpos_gateway', None),
+    ('garanti_pos', '.garanti_gateway', 'Garanti POS'),
+    ('posnet', '.posnet_gateway', 'PosNet (YapıKredi)'),
+    ('posnet_v1', '.posnet_gateway', 'PosNet V1 (Albaraka)'),
+    ('payfor', '.payfor_gateway', 'PayFor (Finansbank)'),
+    ('payflex_mpi', '.payflex_gateway', 'PayFlex MPI (Ziraat/Vakıfbank)'),
+    ('payflex_common', '.payflex_gateway', 'PayFlex Common Payment'),
+    ('interpos', '.interpos_gateway', 'InterPos (Denizbank)'),
+    ('kuveyt_pos', '.kuveyt_gateway', 'Kuveyt POS'),
+    ('vakif_katilim', '.payflex_gateway', 'Vakıf Katılım POS'),
+    ('tosla', '.tosla_gateway', 'Tosla'),
+    ('param_pos', '.estpos_gateway', 'ParamPos'),
+)
+
+
+class GatewaySpec:
+    """Kayıt defterindeki tek gateway tipi"""
+
+    __slots__ = ('gateway_type', 'label', 'module', 'entry_point', 'gateway_class', 'capabilities')
+
+    def __init__(self, gateway_type, label=None, module=None, entry_point=None):
+        self.gateway_type = gateway_type
+        self.label = label
+        self.module = module
+        self.entry_point = entry_point
+        self.gateway_class = None
+        self.capabilities = None
+
+
+class GatewayRegistry:
+    """Süreç genelinde gateway tipi -> sınıf kaydı"""
+
+    _specs = {}
+    _lock = threading.RLock()
+    _entry_points_loaded = False
+
+    @classmethod
+    def declare(cls, gateway_type, module, label=None):
+        """Modülü ilk kullanımda yüklenecek gateway tipini bildir"""
+        with cls._lock:
+            spec = cls._specs.get(gateway_type)
+            if spec is None:
+                cls._specs[gateway_type] = GatewaySpec(gateway_type, label, module=module)
+            elif spec.gateway_class is None:
+                spec.module = module
+                spec.label = label
+
+    @classmethod
+    def register(cls, *gateway_types, label=None, capabilities=None):
+        """
+        Gateway sınıfını bir veya daha fazla tip için kaydeden dekoratör
+
+        Args:
+            gateway_types (str): Gateway tipleri
+            label (str): Seçim listesinde görünecek ad (bildirilmişse o kullanılır)
+            capabilities (iterable): Yetenekler; verilmezse sınıftan türetilir
+                (bkz. BaseGateway.get_capabilities)
+        """
+        if not gateway_types:
+            raise ValueError("En az bir gateway tipi verilmeli")
+        if capabilities is not None:
+            unknown = set(capabilities) - set(CAPABILITIES)
+            if unknown:
+                raise ValueError(f"Bilinmeyen yetenek: {', '.join(sorted(unknown))}")
+            capabilities = frozenset(capabilities)
+
+        def decorator(gateway_class):
+            with cls._lock:
+                for gateway_type in gateway_types:
+                    spec = cls._specs.get(gateway_type)
+                    if spec is None:
+                        spec = cls._specs[gateway_type] = GatewaySpec(gateway_type, label or gateway_type)
+                    elif spec.gateway_class not in (None, gateway_class):
+                        raise ValueError(
+                            f"Gateway tipi zaten kayıtlı: {gateway_type} ({spec.gateway_class.__name__})"
+                        )
+                    spec.gateway_class = gateway_class
+                    spec.capabilities = capabilities
+            return gateway_class
+
+        return decorator
+
+    @classmethod
+    def _resolve_entry_points(cls):
+        """mews_pos.gateways entry point'lerini bir kez bildir"""
+        if cls._entry_points_loaded:
+            return
+        with cls._lock:
+            if cls._entry_points_loaded:
+                return
+            try:
+                from importlib.metadata import entry_points
+                found = entry_points(group=ENTRY_POINT_GROUP)
+            except Exception as e:
+                _logger.warning(f"Gateway entry point'leri okunamadı: {str(e)}")
+                found = ()
+            for entry_point in found:
+                if entry_point.name not in cls._specs:
+                    cls._specs[entry_point.name] = GatewaySpec(
+                        entry_point.name, entry_point.name, entry_point=entry_point
+                    )
+            cls._entry_points_loaded = True
+
+    @classmethod
+    def spec(cls, gateway_type):
+        """Tipin kaydı; bilinmiyorsa ValueError"""
+        spec = cls._specs.get(gateway_type)
+        if spec is None:
+            cls._resolve_entry_points()
+            spec = cls._specs.get(gateway_type)
+        if spec is None:
+            _logger.error(f"Desteklenmeyen gateway tipi: {gateway_type}")
+            raise ValueError(f"Desteklenmeyen gateway tipi:  {gateway_type}")
+        return spec
+
+    @classmethod
+    def get(cls, gateway_type):
+        """
+        Gateway sınıfını döndür; gerekirse modülünü yükle
+
+        Returns:
+            type: BaseGateway alt sınıfı
+        """
+        spec = cls.spec(gateway_type)
+        gateway_class = spec.gateway_class
+        if gateway_class is not None:
+            return gateway_class
+
+        try:
+            if spec.entry_point is not None:
+                loaded = spec.entry_point.load()
+                if spec.gateway_class is None:
+                    cls.register(gateway_type)(loaded)
+            else:
+                importlib.import_module(spec.module, __package__)
+        except ImportError as e:
+            _logger.error(f"Gateway yüklenirken hata: {str(e)}")
+            raise ValueError(f"Gateway yüklenemedi: {gateway_type}")
+
+        if spec.gateway_class is None:
+            _logger.error(f"Gateway modülü tipi kaydetmedi: {gateway_type} ({spec.module})")
+            raise ValueError(f"Gateway yüklenemedi: {gateway_type}")
+        _logger.debug(f"Gateway yüklendi: {gateway_type} -> {spec.gateway_class.__name__}")
+        return spec.gateway_class
+
+    @classmethod
+    def capabilities(cls, gateway_type):
+        """Tipin yetenekleri (frozenset); sınıf gerekirse yüklenir"""
+        gateway_class = cls.get(gateway_type)
+        spec = cls._specs[gateway_type]
+        if spec.capabilities is None:
+            spec.capabilities = frozenset(gateway_class.get_capabilities())
+        return spec.capabilities
+
+    @classmethod
+    def supports(cls, gateway_type, capability):
+        return capability in cls.capabilities(gateway_type)
+
+    @classmethod
+    def types(cls):
+        """Kayıtlı tüm gateway tipleri (bildirim sırasıyla)"""
+        cls._resolve_entry_points()
+        return list(cls._specs)
+
+    @classmethod
+    def is_registered(cls, gateway_type):
+        cls._resolve_entry_points()
+        return gateway_type in cls._specs
+
+    @classmethod
+    def selection(cls):
+        """mews.pos.bank.gateway_type seçim listesi: [(tip, etiket)]"""
+        cls._resolve_entry_points()
+        return [(spec.gateway_type, spec.label) for spec in cls._specs.values() if spec.label]
+
+    @classmethod
+    def loaded(cls):
+        """Bu süreçte sınıfı yüklenmiş tipler"""
+        return sorted(name for name, spec in cls._specs.items() if spec.gateway_class is not None)
+
+
+register_gateway = GatewayRegistry.register
+
+for _gateway_type, _module, _label in BUILTIN_GATEWAYS:
+    GatewayRegistry.declare(_gateway_type, _module, _label)
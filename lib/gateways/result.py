@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Gateway istek ve sonuç tipleri
+
+Gateway'ler prepare_*_request'ten GatewayRequest döndürür; servis
+parse edilmiş banka yanıtını normalize_response ile GatewayResult'a
+çevirir. İkisi de __slots__ tabanlıdır ve eski sözlük biçimiyle uyumlu
+salt okunur Mapping arayüzü sunar (`request['url']`,
+`result.get('approved')`).
+
+GatewayResult ham yanıtı (parse sözlüğü) yalnızca referans olarak taşır;
+JSON'a çevrilmesi ilk to_json() çağrısına kadar ertelenir ve sonuç
+önbelleğe alınır. İşlem kayıtlarına yazılan response_data tek dumps()
+çağrısıyla üretilir.
+"""
+
+import json
+from collections.abc import Mapping
+
+
+def _json_default(value):
+    """JSON'a çevrilemeyen değerler (SOAP nesneleri, Decimal) metin olarak yazılır"""
+    if isinstance(value, GatewayResult):
+        return value.as_dict()
+    return str(value)
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+
+class GatewayRequest(Mapping):
+    """Bankaya gönderilecek HTTP isteği"""
+
+    __slots__ = ('url', 'data', 'headers', 'method')
+
+    def __init__(self, url, data, headers=None, method='POST'):
+        self.url = url
+        self.data = data
+        self.headers = headers
+        self.method = method
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return f"<GatewayRequest {self.method} {self.url}>"
+
+
+class GatewayResult(Mapping):
+    """
+    Normalize edilmiş gateway sonucu
+
+    Anahtarlar normalize_response'un eski sözlüğüyle aynıdır (FIELDS ve
+    'raw_response'). Bu anahtarlarda olmayan değerler ham yanıttan okunur;
+    'approved' success'in karşılığıdır. Böylece parse sözlüğünü bekleyen
+    çağıranlar (`result.get('approved')`, `result.get('proc_return_code')`)
+    değişmeden çalışır.
+    """
+
+    FIELDS = (
+        'success', 'status', 'order_id', 'transaction_id', 'auth_code',
+        'host_ref_num', 'rrn', 'error_code', 'error_message',
+        'md_status', 'eci', 'cavv', 'xid',
+    )
+
+    KEYS = FIELDS + ('raw_response',)
+
+    __slots__ = FIELDS + ('raw', '_raw_json')
+
+    _FIELD_SET = frozenset(FIELDS)
+
+    def __init__(self, success=False, order_id=None, transaction_id=None, auth_code=None,
+                 host_ref_num=None, rrn=None, error_code=None, error_message=None,
+                 md_status=None, eci=None, cavv=None, xid=None, raw=None):
+        self.success = bool(success)
+        self.status = 'approved' if success else 'declined'
+        self.order_id = order_id
+        self.transaction_id = transaction_id
+        self.auth_code = auth_code
+        self.host_ref_num = host_ref_num
+        self.rrn = rrn
+        self.error_code = error_code
+        self.error_message = error_message
+        self.md_status = md_status
+        self.eci = eci
+        self.cavv = cavv
+        self.xid = xid
+        self.raw = raw if raw is not None else {}
+        self._raw_json = None
+
+    @classmethod
+    def from_response(cls, raw_response):
+        """
+        Gateway'in parse_*_response sözlüğünden sonuç oluştur
+
+        Args:
+            raw_response (dict): 'approved' ve standart alanları içeren parse sonucu
+
+        Returns:
+            GatewayResult: Ham yanıt kopyalanmadan referans olarak saklanır
+        """
+        if isinstance(raw_response, cls):
+            return raw_response
+        get = raw_response.get
+        return cls(
+            success=get('approved', False),
+            order_id=get('order_id'),
+            transaction_id=get('transaction_id'),
+            auth_code=get('auth_code'),
+            host_ref_num=get('host_ref_num'),
+            rrn=get('rrn'),
+            error_code=get('error_code'),
+            error_message=get('error_message'),
+            md_status=get('md_status'),
+            eci=get('eci'),
+            cavv=get('cavv'),
+            xid=get('xid'),
+            raw=raw_response,
+        )
+
+    @property
+    def approved(self):
+        return self.success
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        if key == 'raw_response':
+            return self.raw
+        if key == 'approved':
+            return self.success
+        return self.raw[key]
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __repr__(self):
+        return f"<GatewayResult {self.status} order={self.order_id} code={self.error_code}>"
+
+    def as_dict(self):
+        """Eski normalize_response sözlüğü"""
+        values = {name: getattr(self, name) for name in self.FIELDS}
+        values['raw_response'] = self.raw
+        return values
+
+    def raw_json(self):
+        """Ham yanıtın JSON metni (ilk çağrıda üretilir ve saklanır)"""
+        if self._raw_json is None:
+            self._raw_json = _dumps(self.raw)
+        return self._raw_json
+
+    def to_json(self):
+        """Sonucun JSON metni (response_data alanına yazılan biçim)"""
+        fields = _dumps({name: getattr(self, name) for name in self.FIELDS})
+        return f'{fields[:-1]}, "raw_response": {self.raw_json()}}}'
+
+
+def dumps(value):
+    """
+    Servis sonucunu response_data için JSON'a çevir
+
+    Args:
+        value: GatewayResult, {'success': ..., 'data': GatewayResult} zarfı
+            veya JSON'a çevrilebilir herhangi bir değer
+
+    Returns:
+        str: JSON metni; GatewayResult'ın ham yanıtı bir kez serileştirilir
+    """
+    if isinstance(value, GatewayResult):
+        return value.to_json()
+    data = value.get('data') if isinstance(value, dict) else None
+    if not isinstance(data, GatewayResult):
+        return _dumps(value)
+    rest = {key: item for key, item in value.items() if key != 'data'}
+    if not rest:
+        return f'{{"data": {data.to_json()}}}'
+    return f'{_dumps(rest)[:-1]}, "data": {data.to_json()}}}'
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
 from .base_gateway import BaseGateway
+from .result import GatewayRequest
+from .registry import register_gateway
+from ..callback_verifier import INQUIRY
 from ..crypto_utils import CryptoUtils
 import logging
 import json
@@ -9,9 +12,15 @@ import random
 _logger = logging.getLogger(__name__)
 
 
+@register_gateway('tosla')
 class ToslaGateway(BaseGateway):
     """Tosla (Eski AKÖde) POS Gateway"""
 
+    three_d_models = ('3d_pay',)
+
+    # 3D dönüş imzası desteklenmiyor; onay durum sorgusuyla teyit edilir
+    callback_hash_scheme = INQUIRY
+
     def prepare_3d_request(self, order, card):
         """3D Secure isteği hazırla"""
         config = self.config
@@ -107,13 +116,13 @@ class ToslaGateway(BaseGateway):
         )
         data['Hash'] = CryptoUtils.sha256_hash(hash_str).upper()
 
-        return {
-            'url': config['payment_api_url'],
-            'data': json.dumps(data),
-            'headers': {
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=json.dumps(data),
+            headers={
                 'Content-Type': 'application/json',
             }
-        }
+        )
 
     def parse_payment_response(self, response):
         """Ödeme yanıtını parse et"""
@@ -141,6 +150,45 @@ class ToslaGateway(BaseGateway):
             'transaction_id': response_data.get('TransactionId'),
         }
 
+    def prepare_status_request(self, order):
+        """Durum sorgulama (Inquiry) isteği hazırla"""
+        config = self.config
+
+        data = {
+            'ApiVersion': '1.0.0',
+            'MerchantId': config['merchant_id'],
+            'TerminalId': config['terminal_id'],
+            'OrderId': order['id'],
+            'TransactionType': 'Inquiry',
+        }
+
+        # Hash oluştur
+        hash_str = (
+            f"{config['merchant_id']}{config['terminal_id']}"
+            f"{order['id']}{config['store_key']}"
+        )
+        data['Hash'] = CryptoUtils.sha256_hash(hash_str).upper()
+
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=json.dumps(data),
+            headers={
+                'Content-Type': 'application/json',
+            }
+        )
+
+    def parse_status_response(self, response):
+        """Durum sorgulama yanıtını parse et"""
+        result = self.parse_payment_response(response)
+
+        if result['approved']:
+            status = 'approved'
+        else:
+            status = self._status_from_error(result.get('error_message'))
+
+        result['status'] = status
+        return result
+
     def prepare_cancel_request(self, order):
         """İptal isteği hazırla"""
         config = self.config
@@ -161,13 +209,13 @@ class ToslaGateway(BaseGateway):
         )
         data['Hash'] = CryptoUtils.sha256_hash(hash_str).upper()
 
-        return {
-            'url': config['payment_api_url'],
-            'data': json.dumps(data),
-            'headers': {
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=json.dumps(data),
+            headers={
                 'Content-Type': 'application/json',
             }
-        }
+        )
 
     def prepare_refund_request(self, order, amount=None):
         """İade isteği hazırla"""
@@ -193,10 +241,10 @@ class ToslaGateway(BaseGateway):
         )
         data['Hash'] = CryptoUtils.sha256_hash(hash_str).upper()
 
-        return {
-            'url': config['payment_api_url'],
-            'data': json.dumps(data),
-            'headers': {
+        return GatewayRequest(
+            url=config['payment_api_url'],
+            data=json.dumps(data),
+            headers={
                 'Content-Type': 'application/json',
             }
-        }
\ No newline at end of file
+        )
\ No newline at end of file
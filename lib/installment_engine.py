@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Taksit motoru
+
+Aktif taksit yapılandırmaları, kampanya oranları ve kategori
+kısıtlamaları bir RateTable nesnesine derlenir:
+
+    - Her banka için taksit sayısına göre sıralı satırlar; kampanya
+      penceresi derleme günü için çözülmüş etkin oran ve (1 + oran / 100)
+      çarpanı önceden hesaplanır
+    - (banka, taksit sayısı) -> (oran, kampanya mı) etkin oran tablosu
+    - Her kategori kısıtlaması izin verilen taksit sayıları kümesine
+      (min..max, engellenenler hariç) çevrilir
+
+Sorgu (quote, rate, installment) veritabanına dokunmaz ve tarih
+hesaplamaz; yalnızca sözlük okuma, çarpma ve yuvarlama yapar. Bu sayede
+kart numarası yazılırken her tuş vuruşunda, ürün ve sipariş
+hesaplamalarında kayıt başına çağrılabilir.
+
+Tablo worker başına önbelleğe alınır (RateTableCache). Anahtar veritabanı
+adı, versiyon tablo değişiklik özetidir. Tablo, derlendiği günden bir
+sonraki kampanya başlangıç/bitiş gününe kadar (valid_until) geçerlidir;
+kayıtlar değişince veya kampanya sınırı geçilince bir sonraki sorguda
+yeniden derlenir.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+_logger = logging.getLogger(__name__)
+
+# Tek çekim; yapılandırmadan bağımsız olarak her bankada sunulur
+SINGLE_PAYMENT = 1
+
+
+def effective_rate(config, today):
+    """
+    Yapılandırmanın verilen gündeki etkin faiz oranı
+
+    Args:
+        config (dict): interest_rate, campaign_* alanları
+        today (date): Gün
+
+    Returns:
+        tuple: (oran, kampanya oranı mı)
+    """
+    start, end = config.get('campaign_start_date'), config.get('campaign_end_date')
+    if config.get('campaign_active') and start and end and start <= today <= end:
+        return config.get('campaign_rate') or 0.0, True
+    return config.get('interest_rate') or 0.0, False
+
+
+def next_boundary(config, today):
+    """
+    Yapılandırmanın etkin oranının today'den sonra ilk değiştiği gün
+
+    Returns:
+        date: Kampanya başlangıcı veya bitişinin ertesi günü; değişmiyorsa None
+    """
+    start, end = config.get('campaign_start_date'), config.get('campaign_end_date')
+    if not (config.get('campaign_active') and start and end):
+        return None
+    if today < start:
+        return start
+    if today <= end:
+        return end + timedelta(days=1)
+    return None
+
+
+def installment_row(amount, count, rate, factor, campaign):
+    """mews.pos.installment.config.calculate_installment biçiminde taksit satırı"""
+    total = amount * factor if rate > 0 else amount
+    return {
+        'installment_count': count,
+        'installment_amount': round(total / count, 2),
+        'total_amount': round(total, 2),
+        'interest_rate': rate,
+        'original_amount': amount,
+        'interest_amount': round(total - amount, 2),
+        'is_campaign': campaign,
+    }
+
+
+def parse_blocked(value):
+    """Virgülle ayrılmış engellenen taksit sayıları (hatalıysa boş)"""
+    if not value:
+        return frozenset()
+    try:
+        return frozenset(int(part.strip()) for part in value.split(','))
+    except ValueError:
+        return frozenset()
+
+
+class BankRates:
+    """Tek bankanın derlenmiş oran satırları ve kategori kısıtlamaları"""
+
+    __slots__ = ('bank_id', 'name', 'code', 'rows', 'restrictions')
+
+    def __init__(self, bank_id, name, code):
+        self.bank_id = bank_id
+        self.name = name
+        self.code = code
+        # (taksit sayısı, minimum tutar, oran, çarpan, kampanya mı)
+        self.rows = ()
+        # {kategori id: izin verilen taksit sayıları}
+        self.restrictions = {}
+
+    def allowed_counts(self, category_ids):
+        """
+        Kategorilerin birlikte izin verdiği taksit sayıları
+
+        Returns:
+            frozenset: Kısıtlama yoksa None
+        """
+        allowed = None
+        restrictions = self.restrictions
+        for category_id in category_ids:
+            counts = restrictions.get(category_id)
+            if counts is not None:
+                allowed = counts if allowed is None else allowed & counts
+        return allowed
+
+
+class RateTable:
+    """Derlenmiş, salt okunur taksit oran tablosu"""
+
+    def __init__(self, banks, configs, restrictions, today, version=None):
+        """
+        Args:
+            banks (list): Gösterim sırasındaki aktif bankalar ({'id', 'name', 'code'})
+            configs (list): Aktif taksit yapılandırmaları (bank_id, installment_count,
+                interest_rate, min_amount, campaign_* alanları)
+            restrictions (list): Kategori kısıtlamaları (bank_id, category_id,
+                installment_allowed, min_installment, max_installment, blocked_installments)
+            today (date): Kampanya pencerelerinin çözüldüğü gün
+            version: Tablonun versiyonu (önbellek anahtarı)
+        """
+        self.today = today
+        self.version = version
+        self.banks = tuple(BankRates(bank['id'], bank['name'], bank['code']) for bank in banks)
+        self._by_id = {bank.bank_id: bank for bank in self.banks}
+        # {(banka id, taksit sayısı): (taksit sayısı, minimum tutar, oran, çarpan, kampanya mı)}
+        self._rows = {}
+
+        rows = {}
+        boundaries = []
+        for config in configs:
+            if config['bank_id'] not in self._by_id:
+                continue
+            rate, campaign = effective_rate(config, today)
+            row = (config['installment_count'], config.get('min_amount') or 0.0, rate, 1 + rate / 100, campaign)
+            rows.setdefault(config['bank_id'], []).append(row)
+            self._rows[(config['bank_id'], config['installment_count'])] = row
+            boundary = next_boundary(config, today)
+            if boundary is not None:
+                boundaries.append(boundary)
+        for bank_id, bank_rows in rows.items():
+            self._by_id[bank_id].rows = tuple(sorted(bank_rows))
+        # Bir sonraki kampanya başlangıç/bitiş günü (hariç); yoksa süresiz
+        self.valid_until = min(boundaries, default=None)
+
+        for restriction in restrictions:
+            bank = self._by_id.get(restriction['bank_id'])
+            if bank is None:
+                continue
+            if restriction.get('installment_allowed', True):
+                counts = frozenset(range(
+                    restriction.get('min_installment') or 0, (restriction.get('max_installment') or 0) + 1,
+                )) - parse_blocked(restriction.get('blocked_installments'))
+            else:
+                counts = frozenset()
+            bank.restrictions[restriction['category_id']] = counts
+
+    def __repr__(self):
+        return f"<RateTable {len(self.banks)} banka {self.today}..{self.valid_until or ''}>"
+
+    def is_current(self, version, today):
+        """Tablo bu versiyon ve gün için geçerli mi (kampanya sınırı geçilmediyse)"""
+        if self.version != version or today < self.today:
+            return False
+        return self.valid_until is None or today < self.valid_until
+
+    def rate(self, bank_id, count):
+        """
+        Etkin faiz oranı
+
+        Returns:
+            tuple: (oran, kampanya oranı mı); yapılandırma tabloda yoksa None
+        """
+        row = self._rows.get((bank_id, count))
+        return None if row is None else (row[2], row[4])
+
+    def installment(self, bank_id, count, amount):
+        """
+        Tek yapılandırmanın taksit satırı (minimum tutar uygulanmaz)
+
+        Returns:
+            dict: calculate_installment biçiminde; yapılandırma tabloda yoksa None
+        """
+        row = self._rows.get((bank_id, count))
+        if row is None:
+            return None
+        return installment_row(amount, count, row[2], row[3], row[4])
+
+    def installments(self, bank_id, amount, max_count=None, allowed=None):
+        """
+        Bankanın tutara uygun taksit satırları (tek çekim hariç)
+
+        Args:
+            bank_id (int): Banka
+            amount (float): Tutar
+            max_count (int): Üst taksit sayısı
+            allowed (frozenset): İzin verilen taksit sayıları; None ise hepsi
+
+        Returns:
+            list: calculate_installment biçiminde, taksit sayısına göre sıralı
+        """
+        bank = self._by_id.get(bank_id)
+        if bank is None:
+            return []
+        installments = []
+        for count, min_amount, rate, factor, campaign in bank.rows:
+            if max_count is not None and count > max_count:
+                break
+            if min_amount > amount or (allowed is not None and count not in allowed):
+                continue
+            installments.append(installment_row(amount, count, rate, factor, campaign))
+        return installments
+
+    def quote(self, amount, bank_ids=None, category_ids=(), max_count=None):
+        """
+        Tutar için bankaların taksit seçeneklerini hesapla
+
+        Args:
+            amount (float): Tutar
+            bank_ids (list): Sadece bu bankalar; None ise tüm aktif bankalar
+            category_ids (list): Sepetteki eCommerce kategorileri
+            max_count (int): Ürünlerden gelen üst sınır (1 = yalnızca tek çekim)
+
+        Returns:
+            list: [{'bank': {'id', 'name', 'code'}, 'installments': [...]}];
+                satırlar mews.pos.installment.config.calculate_installment biçimindedir
+        """
+        if bank_ids is None:
+            banks = self.banks
+        else:
+            banks = [self._by_id[bank_id] for bank_id in bank_ids if bank_id in self._by_id]
+
+        single = round(amount, 2)
+        results = []
+        for bank in banks:
+            allowed = bank.allowed_counts(category_ids) if category_ids else None
+            installments = [{
+                'installment_count': SINGLE_PAYMENT,
+                'installment_amount': single,
+                'total_amount': single,
+                'interest_rate': 0.0,
+                'original_amount': amount,
+                'interest_amount': 0.0,
+                'is_campaign': False,
+            }]
+            installments += self.installments(bank.bank_id, amount, max_count=max_count, allowed=allowed)
+            results.append({
+                'bank': {'id': bank.bank_id, 'name': bank.name, 'code': bank.code},
+                'installments': installments,
+            })
+        return results
+
+
+class RateTableCache:
+    """Derlenmiş oran tabloları için worker içi önbellek"""
+
+    CACHE_SIZE = 16
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+    _stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    @classmethod
+    def get(cls, key, version, loader, today=None):
+        """
+        Tabloyu döndür; yoksa, versiyon değiştiyse veya kampanya sınırı geçildiyse derle
+
+        Args:
+            key: Veritabanı adı
+            version: Güncel versiyon (değişiklik özeti)
+            loader (callable): RateTable döndüren fonksiyon; yalnızca
+                derleme gerektiğinde çağrılır
+            today (date): Gün; verilirse tablonun geçerlilik aralığı kontrol edilir
+
+        Returns:
+            RateTable: Derlenmiş tablo
+        """
+        with cls._lock:
+            entry = cls._cache.get(key)
+            if entry is not None and (entry.version == version if today is None else entry.is_current(version, today)):
+                cls._cache.move_to_end(key)
+                cls._stats['hits'] += 1
+                return entry
+            cls._stats['misses'] += 1
+
+        table = loader()
+        _logger.debug(f"Taksit oran tablosu derlendi: {table!r}")
+
+        with cls._lock:
+            cls._cache[key] = table
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+                cls._stats['evictions'] += 1
+        return table
+
+    @classmethod
+    def invalidate(cls, keys=None):
+        """
+        Önbellekteki tabloları geçersiz kıl
+
+        Args:
+            keys (list): Sadece bu veritabanları; None ise tümü
+        """
+        with cls._lock:
+            if keys is None:
+                removed = len(cls._cache)
+                cls._cache.clear()
+            else:
+                removed = 0
+                for key in keys:
+                    if cls._cache.pop(key, None) is not None:
+                        removed += 1
+            cls._stats['invalidations'] += removed
+
+    @classmethod
+    def stats(cls):
+        """Önbellek isabet/ıskalama sayaçları"""
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats['size'] = len(cls._cache)
+            return stats
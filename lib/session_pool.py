@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import logging
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+
+class _RejectCookiesPolicy(DefaultCookiePolicy):
+    """Hiçbir çerezi saklamayan / göndermeyen çerez politikası"""
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+class SessionPool:
+    """
+    Banka host'u bazında paylaşımlı HTTP oturum kayıt defteri
+
+    Her banka host'u için process genelinde tek bir requests.Session tutulur.
+    Böylece TCP bağlantıları keep-alive ile açık kalır ve TLS el sıkışması
+    her ödeme/iptal/iade isteğinde tekrarlanmaz; havuzdaki bağlantı yeniden
+    kullanıldığında TLS oturumu da yeniden kullanılmış olur.
+
+    Ayarlar:
+        pool_connections: Adapter başına tutulacak bağlantı havuzu sayısı
+        pool_maxsize: Host başına havuzda tutulacak azami bağlantı sayısı
+        pool_block: True ise pool_maxsize aşıldığında yeni bağlantı açılmaz,
+                    boşalan bağlantı beklenir (banka bazlı sert bağlantı sınırı)
+        keep_alive: False ise her istekten sonra bağlantı kapatılır
+
+    Oturumlar aynı host'u kullanan tüm işyerleri arasında paylaşıldığından
+    çerez saklamaz; bir işyerinin oturum çerezi başka işyerinin isteğine
+    eklenmez.
+
+    get_session çağrılarında verilen havuz boyutları host için yalnızca
+    büyütülür: aynı bankayı farklı limitlerle kullanan işyerleri adapter'ı
+    sürekli yeniden kurdurmaz, en büyük limit geçerli olur.
+    """
+
+    DEFAULTS = {
+        'pool_connections': 2,
+        'pool_maxsize': 10,
+        'pool_block': False,
+        'keep_alive': True,
+    }
+
+    # get_session ile verildiğinde en büyük değeri geçerli olan ayarlar
+    GROW_ONLY = ('pool_connections', 'pool_maxsize')
+
+    _lock = threading.RLock()
+    _sessions = {}
+    _session_options = {}
+    _host_options = {}
+    _defaults = dict(DEFAULTS)
+    _pid = os.getpid()
+
+    @staticmethod
+    def host_key(url):
+        """URL'den havuz anahtarını (scheme://host:port) üret"""
+        parts = urlsplit(url or '')
+        return f"{(parts.scheme or 'https').lower()}://{(parts.netloc or '').lower()}"
+
+    @classmethod
+    def configure(cls, host=None, **options):
+        """
+        Havuz ayarlarını güncelle
+
+        Args:
+            host (str): Sadece bu host (veya URL) için ayar; None ise varsayılanlar
+            **options: pool_connections, pool_maxsize, pool_block, keep_alive
+        """
+        unknown = set(options) - set(cls.DEFAULTS)
+        if unknown:
+            raise ValueError(f"Bilinmeyen havuz ayarı: {', '.join(sorted(unknown))}")
+
+        with cls._lock:
+            if host:
+                cls._host_options.setdefault(cls.host_key(host), {}).update(options)
+            else:
+                cls._defaults.update(options)
+
+    @classmethod
+    def get_session(cls, url, **options):
+        """
+        Host için paylaşımlı oturumu döndür (yoksa oluştur)
+
+        Args:
+            url (str): İstek URL'si
+            **options: Bu host için geçerli olacak havuz ayarları (ör. banka
+                       kaydındaki bağlantı limiti). None değerler yok sayılır.
+
+        Returns:
+            requests.Session: Host'a ait keep-alive oturum
+        """
+        key = cls.host_key(url)
+        options = {k: v for k, v in options.items() if v is not None}
+
+        with cls._lock:
+            cls._reset_after_fork()
+
+            # Çağrıda verilen ayarlar host'a kalıcı yazılır; ayarsız çağrılar
+            # (ör. aynı host'u kullanan entegrasyon sınıfları) bunları ezmez,
+            # daha küçük havuz isteyen çağrılar da küçültmez.
+            if options:
+                host_options = cls._host_options.setdefault(key, {})
+                for name, value in options.items():
+                    if name in cls.GROW_ONLY and host_options.get(name):
+                        value = max(value, host_options[name])
+                    host_options[name] = value
+
+            effective = dict(cls._defaults)
+            effective.update(cls._host_options.get(key, {}))
+
+            session = cls._sessions.get(key)
+            if session is not None and cls._session_options.get(key) == effective:
+                return session
+
+            if session is None:
+                session = requests.Session()
+                session.cookies.set_policy(_RejectCookiesPolicy())
+                cls._sessions[key] = session
+                _logger.info(f"HTTP oturumu oluşturuldu: {key} (maxsize={effective['pool_maxsize']})")
+            else:
+                _logger.info(f"HTTP oturum ayarları güncellendi: {key} (maxsize={effective['pool_maxsize']})")
+
+            cls._apply_options(session, key, effective)
+            cls._session_options[key] = effective
+            return session
+
+    @classmethod
+    def _apply_options(cls, session, key, options):
+        """Oturuma adapter ve keep-alive ayarlarını uygula"""
+        adapter = HTTPAdapter(
+            pool_connections=options['pool_connections'],
+            pool_maxsize=options['pool_maxsize'],
+            pool_block=options['pool_block'],
+            max_retries=0,
+        )
+        # Önceki adapter'daki açık bağlantılar başka thread'lerce kullanılıyor
+        # olabilir; kapatmıyoruz, referans kalmayınca kendiliğinden kapanır.
+        session.mount(key + '/', adapter)
+        session.headers['Connection'] = 'keep-alive' if options['keep_alive'] else 'close'
+
+    @classmethod
+    def _reset_after_fork(cls):
+        """Fork sonrası üst process'ten kalan soketleri paylaşmamak için sıfırla"""
+        pid = os.getpid()
+        if pid != cls._pid:
+            cls._sessions = {}
+            cls._session_options = {}
+            cls._pid = pid
+
+    @classmethod
+    def close_all(cls):
+        """Tüm oturumları kapat"""
+        with cls._lock:
+            for session in cls._sessions.values():
+                try:
+                    session.close()
+                except Exception as e:
+                    _logger.warning(f"HTTP oturumu kapatılamadı: {str(e)}")
+            cls._sessions = {}
+            cls._session_options = {}
+
+    @classmethod
+    def stats(cls):
+        """Açık oturumlar ve ayarları"""
+        with cls._lock:
+            return {key: dict(opts) for key, opts in cls._session_options.items()}
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import functools
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def _caching_transport_class():
+    """
+    WSDL/XSD dokümanlarını disk önbelleğinden yükleyen zeep transport'u
+
+    zeep yalnızca ilk SOAP client derlenirken yüklenir; SOAP kullanmayan
+    worker'lar (cron, longpolling) bu maliyeti ödemez.
+    """
+    from zeep.transports import Transport
+
+    class _CachingTransport(Transport):
+
+        def __init__(self, factory, **kwargs):
+            self._factory = factory
+            super().__init__(**kwargs)
+
+        def load(self, url):
+            """Dokümanı önbellek -> paket içi kopya -> ağ sırasıyla yükle"""
+            if not url or not url.startswith(('http://', 'https://')):
+                return super().load(url)
+
+            factory = self._factory
+            cached, age = factory.read_cached(url)
+            if cached is not None and (factory.offline or age < factory.ttl):
+                return cached
+
+            bundled = factory.read_bundled(url)
+            if factory.offline:
+                if bundled is not None:
+                    return bundled
+                raise IOError(f"Çevrimdışı modda WSDL bulunamadı: {url}")
+
+            try:
+                content = super().load(url)
+            except Exception as e:
+                # Banka WSDL sunucusu erişilemezse eski kopyayla devam et
+                fallback = cached if cached is not None else bundled
+                if fallback is None:
+                    raise
+                _logger.warning(f"WSDL indirilemedi, önbellekteki kopya kullanılıyor: {url} ({str(e)})")
+                return fallback
+
+            factory.write_cached(url, content)
+            return content
+
+    return _CachingTransport
+
+
+class SoapClientFactory:
+    """
+    SOAP gateway'leri için zeep client fabrikası
+
+    - WSDL/XSD dokümanları disk üzerinde (cache_dir) TTL ile saklanır; worker
+      yeniden başladığında ağdan tekrar indirilmez.
+    - offline=True iken ağa hiç çıkılmaz; önbellek (TTL yok sayılarak) ve
+      modülle birlikte gelen bundle_dir kullanılır. bundle_dir içindeki
+      manifest.json URL'leri paket içi dosyalara eşler.
+    - Derlenmiş client'lar worker başına bellekte tutulur.
+    """
+
+    DEFAULT_TTL = 24 * 60 * 60
+    DEFAULT_BUNDLE_DIR = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'wsdl'
+    )
+    MANIFEST = 'manifest.json'
+
+    cache_dir = os.path.join(tempfile.gettempdir(), 'mews_pos_wsdl')
+    bundle_dir = DEFAULT_BUNDLE_DIR
+    ttl = DEFAULT_TTL
+    offline = False
+
+    _clients = {}
+    _lock = threading.Lock()
+    _build_locks = {}
+    _manifests = {}
+
+    @classmethod
+    def configure(cls, cache_dir=None, ttl=None, offline=None, bundle_dir=None):
+        """Önbellek ayarlarını güncelle"""
+        if cache_dir:
+            cls.cache_dir = cache_dir
+        if ttl is not None:
+            cls.ttl = int(ttl)
+        if offline is not None:
+            cls.offline = bool(offline)
+        if bundle_dir:
+            cls.bundle_dir = bundle_dir
+
+    @staticmethod
+    def cache_filename(url):
+        """URL için önbellek dosya adı"""
+        return hashlib.sha1(url.encode('utf-8')).hexdigest() + '.xml'
+
+    @classmethod
+    def read_cached(cls, url):
+        """Disk önbelleğinden oku: (içerik, yaş saniye) veya (None, None)"""
+        path = os.path.join(cls.cache_dir, cls.cache_filename(url))
+        try:
+            with open(path, 'rb') as fh:
+                content = fh.read()
+            return content, time.time() - os.path.getmtime(path)
+        except OSError:
+            return None, None
+
+    @classmethod
+    def bundled_manifest(cls):
+        """Paket içi kopyaların URL -> dosya (bundle_dir'e göre) eşlemesi"""
+        bundle_dir = cls.bundle_dir
+        manifest = cls._manifests.get(bundle_dir)
+        if manifest is None:
+            try:
+                with open(os.path.join(bundle_dir, cls.MANIFEST), encoding='utf-8') as fh:
+                    manifest = json.load(fh)
+            except OSError:
+                manifest = {}
+            except ValueError as e:
+                _logger.error(f"WSDL manifest okunamadı: {bundle_dir} ({str(e)})")
+                manifest = {}
+            cls._manifests[bundle_dir] = manifest
+        return manifest
+
+    @classmethod
+    def read_bundled(cls, url):
+        """Modülle gelen WSDL/XSD kopyasını oku (bkz. bundled_manifest)"""
+        if not cls.bundle_dir:
+            return None
+        filename = cls.bundled_manifest().get(url)
+        if not filename:
+            return None
+        path = os.path.join(cls.bundle_dir, filename)
+        try:
+            with open(path, 'rb') as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    @classmethod
+    def write_cached(cls, url, content):
+        """Dokümanı atomik olarak disk önbelleğine yaz"""
+        try:
+            os.makedirs(cls.cache_dir, exist_ok=True)
+            path = os.path.join(cls.cache_dir, cls.cache_filename(url))
+            fd, tmp_path = tempfile.mkstemp(dir=cls.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            _logger.warning(f"WSDL önbelleğe yazılamadı: {url} ({str(e)})")
+
+    @classmethod
+    def get_client(cls, wsdl_url, session=None, timeout=30):
+        """
+        WSDL için derlenmiş zeep client'ı döndür
+
+        Args:
+            wsdl_url (str): WSDL adresi
+            session (requests.Session): Paylaşımlı HTTP oturumu
+            timeout (int): WSDL yükleme ve servis çağrı zaman aşımı
+
+        Returns:
+            zeep.Client: Worker içinde paylaşılan client
+        """
+        key = (wsdl_url, timeout)
+        client = cls._clients.get(key)
+        if client is not None:
+            return client
+
+        with cls._lock:
+            build_lock = cls._build_locks.setdefault(key, threading.Lock())
+
+        # Aynı WSDL'i aynı anda birden fazla thread derlemesin
+        with build_lock:
+            client = cls._clients.get(key)
+            if client is None:
+                from zeep import Client
+
+                started = time.monotonic()
+                transport = _caching_transport_class()(
+                    cls, session=session, timeout=timeout, operation_timeout=timeout
+                )
+                client = Client(wsdl_url, transport=transport)
+                cls._clients[key] = client
+                _logger.info(
+                    f"SOAP client derlendi: {wsdl_url} ({(time.monotonic() - started) * 1000:.0f} ms)"
+                )
+        return client
+
+    @classmethod
+    def preload(cls, wsdl_urls, session_getter=None, timeout=30):
+        """
+        Verilen WSDL'ler için client'ları önceden derle
+
+        Ana dokümanı disk önbelleğinde ya da paket içinde bulunmayan WSDL'ler
+        atlanır; böylece worker açılışında banka sunucusu beklenmez.
+        """
+        loaded = []
+        for url in wsdl_urls:
+            if not url or (cls.read_cached(url)[0] is None and cls.read_bundled(url) is None):
+                continue
+            try:
+                session = session_getter(url) if session_getter else None
+                cls.get_client(url, session=session, timeout=timeout)
+                loaded.append(url)
+            except Exception as e:
+                _logger.warning(f"SOAP client önceden derlenemedi: {url} ({str(e)})")
+        return loaded
+
+    @classmethod
+    def clear(cls):
+        """Bellekteki client'ları temizle"""
+        with cls._lock:
+            cls._clients = {}
+            cls._build_locks = {}
@@ -1,10 +1,408 @@
 # -*- coding: utf-8 -*-
 
 from lxml import etree
+import re
+import threading
 import logging
 
 _logger = logging.getLogger(__name__)
 
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+
+# Banka yanıtı için üst sınır; bakım sayfaları ve hatalı yanıtlar DOM kurulmadan reddedilir
+MAX_RESPONSE_SIZE = 1024 * 1024
+
+# XML kabul edilen içerik tipleri; text/plain ve text/html gövdesi XML ise kabul edilir
+# (bazı bankalar XML yanıtı bu tiplerle döndürür)
+XML_CONTENT_TYPES = frozenset(('application/xml', 'text/xml', 'application/soap+xml'))
+LENIENT_CONTENT_TYPES = frozenset(('text/plain', 'text/html', 'application/octet-stream'))
+
+# lxml'in metin içinde kabul etmediği karakterler
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+class XmlResponseError(Exception):
+    """Banka yanıtı XML olarak işlenemedi"""
+
+    error_type = 'invalid_response'
+
+
+class XmlResponseTooLarge(XmlResponseError):
+    """Yanıt boyutu üst sınırı aşıyor"""
+
+    error_type = 'response_too_large'
+
+
+class XmlContentTypeError(XmlResponseError):
+    """Yanıt XML değil (JSON, HTML bakım sayfası vb.)"""
+
+    error_type = 'unexpected_content_type'
+
+
+class XmlMalformedError(XmlResponseError):
+    """Yanıt bozuk XML veya izin verilmeyen yapı (DTD) içeriyor"""
+
+    error_type = 'malformed_xml'
+
+
+class SafeXmlParser:
+    """
+    Banka yanıtları için sertleştirilmiş, paylaşılan XML ayrıştırıcı
+
+    lxml ayrıştırıcıları thread'ler arasında paylaşılamadığı için her
+    worker thread'i tek bir ayrıştırıcı oluşturup yeniden kullanır:
+    entity çözümleme, DTD yükleme ve ağ erişimi kapalıdır. Ayrıştırma
+    öncesi içerik tipi, boyut ve gövdenin ilk baytları kontrol edilir;
+    XML olmayan yanıtlar DOM kurulmadan tipli hata ile reddedilir.
+    """
+
+    _local = threading.local()
+
+    @classmethod
+    def parser(cls):
+        """Bu thread'in ayrıştırıcısı"""
+        parser = getattr(cls._local, 'parser', None)
+        if parser is None:
+            parser = etree.XMLParser(
+                resolve_entities=False,
+                no_network=True,
+                load_dtd=False,
+                dtd_validation=False,
+                huge_tree=False,
+                remove_comments=True,
+                remove_pis=True,
+            )
+            cls._local.parser = parser
+        return parser
+
+    @staticmethod
+    def check(content, content_type=None, max_size=None):
+        """
+        Gövdeyi ayrıştırmadan önce doğrula
+
+        Args:
+            content (bytes): Yanıt gövdesi
+            content_type (str): Content-Type başlığı
+            max_size (int): Bayt sınırı (varsayılan MAX_RESPONSE_SIZE)
+
+        Raises:
+            XmlResponseTooLarge, XmlContentTypeError, XmlMalformedError
+        """
+        limit = max_size or MAX_RESPONSE_SIZE
+        if len(content) > limit:
+            raise XmlResponseTooLarge(f"Yanıt çok büyük: {len(content)} bayt (sınır {limit})")
+
+        if content_type:
+            mime = content_type.split(';', 1)[0].strip().lower()
+            if mime and mime not in XML_CONTENT_TYPES and mime not in LENIENT_CONTENT_TYPES \
+                    and not mime.endswith('+xml'):
+                raise XmlContentTypeError(f"XML olmayan yanıt: {mime}")
+
+        head = content[:512].lstrip(b'\xef\xbb\xbf \t\r\n')
+        if not head:
+            raise XmlMalformedError("Boş yanıt")
+        if head[:1] != b'<':
+            raise XmlContentTypeError("XML olmayan yanıt gövdesi")
+        lowered = head.lower()
+        if b'<!doctype html' in lowered or lowered.startswith((b'<html>', b'<html ')):
+            raise XmlContentTypeError("HTML yanıt (bakım/hata sayfası)")
+        if b'<!doctype' in lowered:
+            raise XmlMalformedError("DTD içeren yanıt kabul edilmez")
+
+    @classmethod
+    def parse(cls, source, content_type=None, max_size=None):
+        """
+        Yanıtı doğrulayıp ayrıştır
+
+        Args:
+            source (bytes|str): Yanıt gövdesi
+            content_type (str): Content-Type başlığı
+            max_size (int): Bayt sınırı
+
+        Returns:
+            lxml.etree._Element: Kök eleman
+
+        Raises:
+            XmlResponseError: Tipli alt sınıflarıyla
+        """
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        elif not isinstance(source, bytes):
+            raise XmlMalformedError(f"Geçersiz yanıt tipi: {type(source).__name__}")
+        cls.check(source, content_type, max_size)
+        try:
+            root = etree.fromstring(source, cls.parser())
+        except (etree.XMLSyntaxError, ValueError) as e:
+            raise XmlMalformedError(f"XML parse hatası: {e}") from None
+        if root is None:
+            raise XmlMalformedError("Boş yanıt")
+        return root
+
+    @classmethod
+    def parse_response(cls, response, max_size=None):
+        """
+        HTTP yanıtını doğrulayıp ayrıştır
+
+        Content-Length sınırı aşıyorsa gövdeye bakılmaz. Ham baytlar
+        ayrıştırılır; XML bildirimi olmadan UTF-8 dışı kodlanmış
+        yanıtlar için çözülmüş metne düşülür.
+        """
+        headers = getattr(response, 'headers', None) or {}
+        content_type = headers.get('Content-Type') if hasattr(headers, 'get') else None
+        if not isinstance(content_type, str):
+            content_type = None
+
+        limit = max_size or MAX_RESPONSE_SIZE
+        length = headers.get('Content-Length') if hasattr(headers, 'get') else None
+        if isinstance(length, str) and length.isdigit() and int(length) > limit:
+            raise XmlResponseTooLarge(f"Yanıt çok büyük: {length} bayt (sınır {limit})")
+
+        content = getattr(response, 'content', None)
+        if isinstance(content, bytes):
+            try:
+                return cls.parse(content, content_type, max_size)
+            except XmlMalformedError:
+                text = response.text
+                if not isinstance(text, str) or text.encode('utf-8') == content:
+                    raise
+            return cls.parse(text, content_type, max_size)
+        return cls.parse(response.text, content_type, max_size)
+
+
+def _escape_text(value):
+    """Eleman metnini lxml ile aynı kurallarla kaçışla"""
+    if value is None:
+        return ''
+    text = value if type(value) is str else str(value)
+    if _INVALID_XML_CHARS.search(text):
+        raise ValueError('All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters')
+    if '&' in text:
+        text = text.replace('&', '&amp;')
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    if '\r' in text:
+        text = text.replace('\r', '&#13;')
+    return text
+
+
+class XmlTemplate:
+    """
+    Mesaj şekline göre bir kez derlenen XML serileştirici
+
+    Şekil, iç içe dict'in anahtar sırası ve hangi anahtarların alt dict
+    olduğudur. Derleme sırasında etiketler sabit metin parçalarına
+    dönüştürülür ve değerleri doğrudan okuyan bir render fonksiyonu
+    üretilir; her çağrıda yalnızca değerler kaçışlanıp tek seferde
+    birleştirilir. Çıktı dict_to_xml ile aynı yapıdadır; pretty=True
+    ile bayt bayt aynıdır.
+    """
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+    CACHE_SIZE = 256
+
+    def __init__(self, root_name, shape, pretty=False):
+        self.root_name = root_name
+        self.shape = shape
+        self.pretty = pretty
+        self._render = self._compile(root_name, shape, pretty)
+
+    @staticmethod
+    def shape_of(data):
+        """dict'in şeklini çıkar; liste içeren (değişken uzunluklu) veriler için None"""
+        if not isinstance(data, dict):
+            return None if isinstance(data, list) else ()
+        shape = []
+        for key, value in data.items():
+            if isinstance(value, dict):
+                child = XmlTemplate.shape_of(value)
+                if child is None:
+                    return None
+                shape.append((key, child))
+            elif isinstance(value, list):
+                return None
+            else:
+                shape.append((key, None))
+        return tuple(shape)
+
+    @classmethod
+    def for_data(cls, data, root_name, pretty=False):
+        """Verinin şekline uygun derlenmiş şablonu döndür; derlenemiyorsa None"""
+        if not isinstance(data, dict):
+            return None
+        shape = cls.shape_of(data)
+        if shape is None:
+            return None
+        key = (root_name, shape, pretty)
+        template = cls._cache.get(key)
+        if template is None:
+            template = cls(root_name, shape, pretty)
+            with cls._cache_lock:
+                if len(cls._cache) >= cls.CACHE_SIZE:
+                    cls._cache.clear()
+                cls._cache[key] = template
+        return template
+
+    def render(self, data):
+        """Şablonu doldur ve XML metnini döndür"""
+        return self._render(data, _escape_text)
+
+    def render_bytes(self, data):
+        """render() çıktısını UTF-8 olarak döndür"""
+        return self._render(data, _escape_text).encode('utf-8')
+
+    @staticmethod
+    def _compile(root_name, shape, pretty):
+        """Şekil için render(data, esc) fonksiyonunun kaynağını üretip derle"""
+        parts = [XML_DECLARATION]
+        lines = []
+        counter = [0]
+
+        def tag(name):
+            # Etiket adı lxml kurallarıyla doğrulanır (geçersizse ValueError)
+            etree.Element(name)
+            return name
+
+        def emit(name, child_shape, var, depth):
+            indent = '  ' * depth if pretty else ''
+            newline = '\n' if pretty else ''
+            name = tag(name)
+            if not child_shape:
+                parts.append(f"{indent}<{name}/>{newline}")
+                return
+            parts.append(f"{indent}<{name}>{newline}")
+            for key, sub_shape in child_shape:
+                access = f"{var}[{key!r}]"
+                if sub_shape is None:
+                    parts.append(f"{'  ' * (depth + 1) if pretty else ''}<{tag(key)}>")
+                    parts.append(('value', access))
+                    parts.append(f"</{key}>{newline}")
+                else:
+                    counter[0] += 1
+                    child_var = f"v{counter[0]}"
+                    lines.append(f"    {child_var} = {access}")
+                    emit(key, sub_shape, child_var, depth + 1)
+            parts.append(f"{indent}</{name}>{newline}")
+
+        emit(root_name, shape, 'data', 0)
+
+        if not pretty and parts[-1].endswith('\n'):
+            parts[-1] = parts[-1][:-1]
+
+        # Ardışık sabit parçaları birleştir
+        pieces = []
+        for part in parts:
+            if isinstance(part, str) and pieces and isinstance(pieces[-1], str):
+                pieces[-1] += part
+            else:
+                pieces.append(part)
+
+        items = ', '.join(
+            repr(piece) if isinstance(piece, str) else f"esc({piece[1]})" for piece in pieces
+        )
+        source = 'def render(data, esc):\n' + '\n'.join(lines + [f"    return ''.join(({items},))"]) + '\n'
+        namespace = {}
+        exec(compile(source, f'<XmlTemplate {root_name}>', 'exec'), namespace)
+        return namespace['render']
+
+
+class XmlExtractor:
+    """
+    Banka yanıtından yalnızca gereken alanları okuyan derlenmiş çıkarıcı
+
+    Alanlar {alan adı: yol} olarak tanımlanır; yol yanıt gövdesine göre
+    'Transaction/Response/Code' biçimindedir. Tanım bir kez etiket
+    ağacına derlenir ve önbelleğe alınır; ayrıştırılan yanıtta yalnızca
+    bu ağaçtaki dallara inilir. Yanıt baytları doğrudan ayrıştırılır,
+    genel dict ağacı kurulmaz.
+    """
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+    CACHE_SIZE = 128
+
+    def __init__(self, root_name, fields):
+        self.root_name = root_name
+        self.paths = self._compile(fields)
+
+    @staticmethod
+    def _compile(fields):
+        """{alan: 'A/B/C'} tanımını {'A': {'B': {'C': alan}}} ağacına çevir"""
+        tree = {}
+        for name, path in fields.items():
+            steps = path.split('/')
+            node = tree
+            for step in steps:
+                # Etiket adı lxml kurallarıyla doğrulanır (geçersizse ValueError)
+                etree.Element(step)
+            for step in steps[:-1]:
+                node = node.setdefault(step, {})
+                if not isinstance(node, dict):
+                    raise ValueError(f"Çakışan alan yolu: {path}")
+            if steps[-1] in node:
+                raise ValueError(f"Çakışan alan yolu: {path}")
+            node[steps[-1]] = name
+        return tree
+
+    @classmethod
+    def for_spec(cls, root_name, fields):
+        """Tanım için derlenmiş çıkarıcıyı döndür"""
+        key = (root_name, tuple(fields.items()))
+        extractor = cls._cache.get(key)
+        if extractor is None:
+            extractor = cls(root_name, fields)
+            with cls._cache_lock:
+                if len(cls._cache) >= cls.CACHE_SIZE:
+                    cls._cache.clear()
+                cls._cache[key] = extractor
+        return extractor
+
+    def extract(self, source, content_type=None):
+        """
+        XML'den alanları çıkar
+
+        Args:
+            source (bytes|str): Yanıt gövdesi
+            content_type (str): Content-Type başlığı
+
+        Returns:
+            dict: Bulunan alanlar (metin kırpılmış, boş eleman '')
+
+        Raises:
+            XmlResponseError: Yanıt XML olarak işlenemedi (bkz. SafeXmlParser)
+        """
+        return self._extract(SafeXmlParser.parse(source, content_type))
+
+    def extract_response(self, response):
+        """HTTP yanıtından alanları çıkar (bkz. SafeXmlParser.parse_response)"""
+        return self._extract(SafeXmlParser.parse_response(response))
+
+    def _extract(self, root):
+        # Kökü tekrar saran yanıtlar (<R><R>...</R></R>) da kabul edilir
+        body = root.find(self.root_name)
+        if body is None:
+            body = root
+
+        result = {}
+        self._walk(body, self.paths, result)
+        return result
+
+    @staticmethod
+    def _walk(element, paths, result):
+        """Yalnızca tanımlı dallara inerek alan değerlerini topla"""
+        for child in element:
+            target = paths.get(child.tag)
+            if target is None:
+                continue
+            if type(target) is str:
+                if target not in result:
+                    text = child.text
+                    result[target] = text.strip() if text else ''
+            else:
+                XmlExtractor._walk(child, target, result)
+
 
 class XmlUtils:
     """XML işleme yardımcı sınıfı"""
@@ -16,6 +414,31 @@ class XmlUtils:
         XmlUtils._build_xml(root, data)
         return etree.tostring(root, encoding='utf-8', xml_declaration=True, pretty_print=True).decode('utf-8')
 
+    @staticmethod
+    def render(data, root_name='root', pretty=False):
+        """
+        Dictionary'yi derlenmiş şablonla XML'e çevir (varsayılan kompakt)
+
+        Aynı şekildeki mesajlar için şablon bir kez derlenir (bkz.
+        XmlTemplate). Liste içeren veriler dict_to_xml ile işlenir.
+
+        Args:
+            data (dict): İç içe dict
+            root_name (str): Kök eleman adı
+            pretty (bool): dict_to_xml gibi girintili çıktı
+
+        Returns:
+            str: XML metni
+        """
+        template = XmlTemplate.for_data(data, root_name, pretty)
+        if template is None:
+            xml = XmlUtils.dict_to_xml(data, root_name=root_name)
+            if pretty:
+                return xml
+            root = etree.fromstring(xml.encode('utf-8'), etree.XMLParser(remove_blank_text=True))
+            return etree.tostring(root, encoding='utf-8', xml_declaration=True).decode('utf-8')
+        return template.render(data)
+
     @staticmethod
     def _build_xml(parent, data):
         """Recursive XML oluşturucu"""
@@ -34,16 +457,42 @@ class XmlUtils:
         else:
             parent.text = str(data) if data is not None else ''
 
+    @staticmethod
+    def parse(source, content_type=None, max_size=None):
+        """Banka yanıtını sertleştirilmiş ayrıştırıcıyla parse et (bkz. SafeXmlParser.parse)"""
+        return SafeXmlParser.parse(source, content_type, max_size)
+
     @staticmethod
     def xml_to_dict(xml_string):
-        """XML'i dictionary'ye çevir"""
+        """XML'i dictionary'ye çevir; işlenemeyen yanıt için boş dict"""
         try:
-            root = etree.fromstring(xml_string.encode('utf-8'))
+            root = SafeXmlParser.parse(xml_string)
             return XmlUtils._parse_xml_element(root)
-        except Exception as e:
-            _logger.error(f"XML parse hatası: {str(e)}")
+        except XmlResponseError as e:
+            _logger.error(f"XML parse hatası ({e.error_type}): {str(e)}")
             return {}
 
+    @staticmethod
+    def extract(response, root_name, fields):
+        """
+        Yanıttan tanımlı alanları çıkar (bkz. XmlExtractor)
+
+        Args:
+            response: requests.Response benzeri nesne, bytes veya str
+            root_name (str): Yanıt kök elemanı
+            fields (dict): {alan adı: gövdeye göre yol}
+
+        Returns:
+            dict: Bulunan alanlar
+
+        Raises:
+            XmlResponseError: Yanıt XML olarak işlenemedi (bkz. SafeXmlParser)
+        """
+        extractor = XmlExtractor.for_spec(root_name, fields)
+        if isinstance(response, (bytes, str)):
+            return extractor.extract(response)
+        return extractor.extract_response(response)
+
     @staticmethod
     def _parse_xml_element(element):
         """XML element'ini parse et"""
@@ -95,7 +544,7 @@ class XmlUtils:
     def parse_soap_response(xml_string):
         """SOAP response'u parse et"""
         try: 
-            root = etree.fromstring(xml_string.encode('utf-8'))
+            root = SafeXmlParser.parse(xml_string)
             
             # SOAP Body'yi bul
             namespaces = {
@@ -113,6 +562,6 @@ class XmlUtils:
                     return XmlUtils._parse_xml_element(child)
             
             return XmlUtils._parse_xml_element(root)
-        except Exception as e:
-            _logger.error(f"SOAP response parse hatası: {str(e)}")
+        except XmlResponseError as e:
+            _logger.error(f"SOAP response parse hatası ({e.error_type}): {str(e)}")
             return {}
\ No newline at end of file
@@ -7,10 +7,14 @@ from . import payment_provider
 from . import mews_pos_bank
 from . import mews_pos_installment_config
 from . import mews_pos_category_restriction
+from . import mews_pos_bin
 from . import mews_pos_transaction
 from . import product_public_category
 from . import product_template
 from . import sale_order
 from . import mews_pos_report
 from . import installment_calculator_wizard
-from . import refund_wizard
\ No newline at end of file
+from . import refund_wizard
+from . import mews_pos_mass_action
+from . import mass_action_wizard
+from . import bin_import_wizard
@@ -7,12 +7,12 @@ from datetime import datetime
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
-from zeep import Client
-from zeep.transports import Transport
 from lxml import etree
 import xml.etree.ElementTree as ET
 from urllib.parse import urlencode
 import uuid
+from odoo.addons.mews_pos.lib.session_pool import SessionPool
+from odoo.addons.mews_pos.lib.soap_client import SoapClientFactory
 
 _logger = logging.getLogger(__name__)
 
@@ -47,10 +47,12 @@ class BankIntegrationBase:
         }
         
         try:
+            session = SessionPool.get_session(url)
+
             if method == 'POST':
-                response = requests.post(url, data=data, headers=headers, timeout=30)
+                response = session.post(url, data=data, headers=headers, timeout=30)
             else:
-                response = requests.get(url, params=data, headers=headers, timeout=30)
+                response = session.get(url, params=data, headers=headers, timeout=30)
             
             return response
         except Exception as e:
@@ -214,8 +216,9 @@ class YapiKrediIntegration(BankIntegrationBase):
     </extra>
 </PosnetRequest>"""
         
-        # SOAP isteği
-        client = Client(self.config.get('gateway_url'))
+        # SOAP isteği (derlenmiş client worker içinde yeniden kullanılır)
+        gateway_url = self.config.get('gateway_url')
+        client = SoapClientFactory.get_client(gateway_url, session=SessionPool.get_session(gateway_url))
         
         try:
             response = client.service.BankAuthRequest(xml_data)
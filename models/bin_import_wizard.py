@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import io
+
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+
+class MewsPosBinImportWizard(models.TransientModel):
+    """BIN tablosu içe aktarım sihirbazı"""
+    _name = 'mews.pos.bin.import.wizard'
+    _description = 'Mews POS BIN İçe Aktarım Sihirbazı'
+
+    file = fields.Binary(string='Dosya', attachment=False)
+    filename = fields.Char(string='Dosya Adı')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('json', 'JSON'),
+        ('jsonl', 'JSON Lines'),
+    ], string='Biçim', help='Boşsa dosya adından belirlenir')
+    full_refresh = fields.Boolean(
+        string='Tam Yenileme',
+        help='Dosyada bulunmayan aktif BIN kayıtları pasife alınır',
+    )
+    dry_run = fields.Boolean(string='Deneme', help='Kayıtlara yazmadan yalnızca farkları raporla')
+    state = fields.Selection([('draft', 'Taslak'), ('done', 'Tamamlandı')], default='draft')
+    result = fields.Text(string='Sonuç', readonly=True)
+
+    def action_import(self):
+        """Dosyayı içe aktar ve raporu göster"""
+        self.ensure_one()
+        from odoo.addons.mews_pos.lib.bin_import import BinImportError, format_report
+
+        if not self.file:
+            raise UserError(_('Lütfen bir BIN dosyası seçiniz!'))
+
+        stream = io.BytesIO(base64.b64decode(self.file))
+        try:
+            report = self.env['mews.pos.bin'].import_bins(
+                stream,
+                fmt=self.file_format or None,
+                filename=self.filename,
+                full_refresh=self.full_refresh,
+                dry_run=self.dry_run,
+            )
+        except (BinImportError, UnicodeDecodeError) as e:
+            raise UserError(_('BIN dosyası okunamadı: %s') % e)
+
+        self.write({'state': 'done', 'result': format_report(report), 'file': False})
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('BIN İçe Aktarımı'),
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
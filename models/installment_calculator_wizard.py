@@ -22,13 +22,12 @@ class InstallmentCalculatorWizard(models.TransientModel):
 
             html = '<div class="table-responsive">'
             banks = wizard.bank_id if wizard.bank_id else self.env['mews.pos.bank'].search([('active', '=', True)])
+            table = self.env['mews.pos.installment.config'].sudo().get_rate_table()
             
             for bank in banks: 
-                configs = bank.installment_config_ids.filtered(
-                    lambda c: c.active and c.min_amount <= wizard.amount
-                )
+                installments = table.installments(bank.id, wizard.amount)
                 
-                if not configs:
+                if not installments:
                     continue
 
                 max_installment = 36
@@ -61,11 +60,10 @@ class InstallmentCalculatorWizard(models.TransientModel):
                             </tr>
                 '''
 
-                for config in configs.sorted(key=lambda c: c.installment_count):
-                    if config.installment_count > max_installment:
+                for result in installments:
+                    if result['installment_count'] > max_installment:
                         continue
                         
-                    result = config.calculate_installment(wizard.amount)
                     campaign_badge = '<span class="badge bg-success ms-1">Kampanya</span>' if result['is_campaign'] else ''
                     
                     html += f'''
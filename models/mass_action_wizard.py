@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _, Command
+from odoo.exceptions import UserError
+
+
+class MewsPosMassActionWizard(models.TransientModel):
+    """Toplu iptal/iade sihirbazı"""
+    _name = 'mews.pos.mass.action.wizard'
+    _description = 'Mews POS Toplu İptal/İade Sihirbazı'
+
+    operation = fields.Selection([
+        ('cancel', 'İptal'),
+        ('refund', 'İade (kalan tutarın tamamı)'),
+    ], string='İşlem Tipi', required=True, default='refund')
+    transaction_ids = fields.Many2many(
+        'mews.pos.transaction',
+        string='İşlemler',
+        default=lambda self: self.env.context.get('active_ids', []),
+    )
+    parallelism = fields.Integer(string='Banka Başına Paralellik', default=4)
+    notes = fields.Text(string='Notlar')
+
+    eligible_count = fields.Integer(string='İşlenecek', compute='_compute_counts')
+    skipped_count = fields.Integer(string='Atlanacak', compute='_compute_counts')
+    total_amount = fields.Float(string='Toplam Tutar', digits=(12, 2), compute='_compute_counts')
+
+    @api.depends('operation', 'transaction_ids')
+    def _compute_counts(self):
+        for wizard in self:
+            eligible = wizard._eligible_transactions()
+            wizard.eligible_count = len(eligible)
+            wizard.skipped_count = len(wizard.transaction_ids) - len(eligible)
+            wizard.total_amount = sum(wizard._line_amount(t) for t in eligible)
+
+    def _eligible_transactions(self):
+        """Seçilen işlemlerden işleme uygun olanlar"""
+        self.ensure_one()
+        if self.operation == 'cancel':
+            return self.transaction_ids.filtered(lambda t: t.state == 'success')
+        return self.transaction_ids.filtered(
+            lambda t: t.state in ('success', 'partial_refund') and self._line_amount(t) > 0
+        )
+
+    def _line_amount(self, transaction):
+        if self.operation == 'cancel':
+            return transaction.total_amount
+        return round(transaction.total_amount - transaction.refunded_amount, 2)
+
+    def action_confirm(self):
+        """Toplu işi oluştur ve arka planda başlat"""
+        self.ensure_one()
+        if not self.transaction_ids:
+            raise UserError(_('Lütfen en az bir işlem seçiniz!'))
+
+        eligible = self._eligible_transactions()
+
+        # Açık başka bir toplu işte bekleyen işlemler tekrar gönderilmez
+        busy = self.env['mews.pos.mass.action.line'].search([
+            ('transaction_id', 'in', eligible.ids),
+            ('state', 'in', ('queued', 'running')),
+        ]).transaction_id
+
+        line_values = []
+        for transaction in self.transaction_ids:
+            values = {
+                'transaction_id': transaction.id,
+                'amount': self._line_amount(transaction),
+            }
+            if transaction in busy:
+                values.update(state='skipped', error_message=_('Başka bir toplu işlemde bekliyor'))
+            elif transaction not in eligible:
+                values.update(state='skipped', error_message=_('İşlem durumu uygun değil'))
+            line_values.append(Command.create(values))
+
+        action = self.env['mews.pos.mass.action'].create({
+            'name': _('Toplu %(operation)s - %(count)s işlem') % {
+                'operation': dict(self._fields['operation'].selection)[self.operation],
+                'count': len(self.transaction_ids),
+            },
+            'operation': self.operation,
+            'parallelism': self.parallelism,
+            'notes': self.notes,
+            'line_ids': line_values,
+        })
+        action.action_start()
+
+        return {
+            'type': 'ir.actions.act_window',
+            'name': action.name,
+            'res_model': 'mews.pos.mass.action',
+            'res_id': action.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
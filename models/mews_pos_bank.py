@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+import os
+import calendar
+import logging
+from datetime import datetime, timezone
+from odoo import models, fields, api, _, tools
 from odoo.exceptions import ValidationError
 
+_logger = logging.getLogger(__name__)
+
 
 class MewsPosBank(models.Model):
     """Banka tanımlamaları ve POS yapılandırması"""
@@ -15,21 +21,9 @@ class MewsPosBank(models.Model):
     sequence = fields.Integer(string='Sıra', default=10)
     active = fields.Boolean(string='Aktif', default=True)
     
-    gateway_type = fields.Selection([
-        ('akbank_pos', 'Akbank POS'),
-        ('estv3_pos', 'EST V3 POS (Payten/Asseco)'),
-        ('garanti_pos', 'Garanti POS'),
-        ('posnet', 'PosNet (YapıKredi)'),
-        ('posnet_v1', 'PosNet V1 (Albaraka)'),
-        ('payfor', 'PayFor (Finansbank)'),
-        ('payflex_mpi', 'PayFlex MPI (Ziraat/Vakıfbank)'),
-        ('payflex_common', 'PayFlex Common Payment'),
-        ('interpos', 'InterPos (Denizbank)'),
-        ('kuveyt_pos', 'Kuveyt POS'),
-        ('vakif_katilim', 'Vakıf Katılım POS'),
-        ('tosla', 'Tosla'),
-        ('param_pos', 'ParamPos'),
-    ], string='Gateway Tipi', required=True)
+    gateway_type = fields.Selection(
+        selection='_selection_gateway_type', string='Gateway Tipi', required=True
+    )
     
     payment_model = fields.Selection([
         ('3d_secure', '3D Secure'),
@@ -48,6 +42,67 @@ class MewsPosBank(models.Model):
     payment_api_url = fields.Char(string='Payment API URL')
     gateway_3d_url = fields.Char(string='3D Gateway URL')
     gateway_3d_host_url = fields.Char(string='3D Host Gateway URL')
+
+    max_connections = fields.Integer(
+        string='Maks. Bağlantı',
+        default=10,
+        help='Banka host\'una açık tutulacak azami keep-alive bağlantı sayısı'
+    )
+    
+    max_in_flight = fields.Integer(
+        string='Eş Zamanlı İstek Limiti',
+        default=0,
+        help='Tüm worker\'larda bu bankaya aynı anda gidebilecek en fazla istek. '
+             'Fazlası kuyrukta bekler. 0 = limitsiz'
+    )
+    queue_timeout = fields.Float(
+        string='Kuyruk Bekleme Süresi (sn)',
+        default=5.0,
+        help='Limit doluyken bir isteğin boş slot için bekleyeceği en uzun süre'
+    )
+    status_rate_limit = fields.Float(
+        string='Durum Sorgu Limiti (istek/sn)',
+        default=5.0,
+        help='Toplu mutabakatta bu bankaya saniyede gönderilecek en fazla durum sorgusu. 0 = limitsiz'
+    )
+    request_budget = fields.Float(
+        string='İşlem Süre Bütçesi (sn)',
+        default=45.0,
+        help='Tek bir ödeme/iptal/iade işlemindeki tüm banka çağrıları için toplam süre. '
+             'Her çağrı yalnızca kalan süreyi kullanır. 0 = sınırsız'
+    )
+
+    # Devre kesici (circuit breaker) ayarları
+    breaker_error_rate = fields.Float(
+        string='Hata Oranı Eşiği (%)',
+        default=50.0,
+        help='Ölçüm penceresindeki hatalı/yavaş çağrı oranı bu değeri aşarsa devre açılır'
+    )
+    breaker_latency_threshold = fields.Float(
+        string='Gecikme Eşiği (sn)',
+        default=10.0,
+        help='Bu süreden uzun süren banka yanıtları hata sayılır'
+    )
+    breaker_min_requests = fields.Integer(
+        string='Min. İstek Sayısı',
+        default=10,
+        help='Hata oranı hesaplanmadan önce pencerede olması gereken istek sayısı'
+    )
+    breaker_window = fields.Integer(string='Ölçüm Penceresi (sn)', default=60)
+    breaker_open_duration = fields.Integer(
+        string='Açık Kalma Süresi (sn)',
+        default=30,
+        help='Devre açıldıktan sonra deneme isteğine izin verilene kadar geçen süre'
+    )
+
+    # Devre kesici durumu - worker'lar arasında SQL ile paylaşılır
+    breaker_state = fields.Selection([
+        ('closed', 'Kapalı (Normal)'),
+        ('open', 'Açık (İstekler Reddediliyor)'),
+        ('half_open', 'Yarı Açık (Deneniyor)'),
+    ], string='Devre Durumu', default='closed', readonly=True, copy=False)
+    breaker_opened_at = fields.Datetime(string='Devre Açılma Zamanı', readonly=True, copy=False)
+    breaker_version = fields.Integer(string='Devre Durum Versiyonu', default=0, readonly=True, copy=False)
     
     environment = fields.Selection([
         ('test', 'Test Ortamı'),
@@ -72,21 +127,217 @@ class MewsPosBank(models.Model):
         ('code_unique', 'unique(code)', 'Banka kodu benzersiz olmalıdır!')
     ]
 
-    def get_account_config(self):
-        """Python için hesap yapılandırmasını döndür"""
+    def init(self):
+        # Worker'lar arası eş zamanlılık slotları (lib.concurrency_limiter.LeaseSlotStore)
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS mews_pos_bank_slot (
+                lock_id integer NOT NULL,
+                slot integer NOT NULL,
+                holder varchar,
+                expires_at timestamp with time zone,
+                PRIMARY KEY (lock_id, slot)
+            )
+        """)
+
+    @api.model
+    def _selection_gateway_type(self):
+        """Gateway tipleri kayıt defterinden (eklenti ve üçüncü parti gateway'ler)"""
+        from odoo.addons.mews_pos.lib.gateways.registry import GatewayRegistry
+        return GatewayRegistry.selection()
+
+    def _register_hook(self):
+        """Worker açılışında SOAP WSDL önbelleğini yapılandır"""
+        super()._register_hook()
+        self._configure_soap_cache()
+
+    @api.model
+    def _configure_soap_cache(self):
+        """WSDL disk önbelleği ayarlarını sistem parametrelerinden uygula"""
+        from odoo.addons.mews_pos.lib.soap_client import SoapClientFactory
+        from odoo.addons.mews_pos.lib.session_pool import SessionPool
+
+        params = self.env['ir.config_parameter'].sudo()
+        SoapClientFactory.configure(
+            cache_dir=os.path.join(tools.config['data_dir'], 'mews_pos', 'wsdl'),
+            ttl=int(params.get_param('mews_pos.wsdl_cache_ttl', SoapClientFactory.DEFAULT_TTL)),
+            offline=params.get_param('mews_pos.wsdl_offline', 'False') in ('1', 'True', 'true'),
+        )
+
+        # İsteğe bağlı: aktif bankaların WSDL'lerinden client'ları önceden derle
+        if params.get_param('mews_pos.wsdl_preload', 'False') in ('1', 'True', 'true'):
+            loaded = SoapClientFactory.preload(
+                self.sudo().search([('active', '=', True)])._get_wsdl_urls(),
+                session_getter=SessionPool.get_session,
+            )
+            _logger.info(f"Önceden derlenen SOAP client sayısı: {len(loaded)}")
+
+    def _get_wsdl_urls(self):
+        """SOAP kullanan bankaların WSDL adresleri (banka servis adresinden türetilir)"""
+        from odoo.addons.mews_pos.lib.gateways.registry import GatewayRegistry
+        from odoo.addons.mews_pos.lib.bank_config import BankConfigError
+
+        urls = []
+        for bank in self:
+            if not GatewayRegistry.is_registered(bank.gateway_type):
+                continue
+            try:
+                url = GatewayRegistry.get(bank.gateway_type).wsdl_url_for(bank.get_compiled_config())
+            except BankConfigError as e:
+                _logger.warning(f"WSDL adresi alınamadı: {bank.name} ({str(e)})")
+                continue
+            if url and url not in urls:
+                urls.append(url)
+        return urls
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._invalidate_gateway_cache()
+        if {'active', 'name', 'code'} & set(vals):
+            # BIN indeksi yalnızca aktif bankaları içerir; tarayıcı haritası ad ve kodu da taşır
+            # (mews.pos.bin._get_bin_index, _get_bin_map)
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        bank_ids = self.ids
+        res = super().unlink()
+        self.browse(bank_ids)._invalidate_gateway_cache()
+        self.env.registry.clear_cache()
+        return res
+
+    def _invalidate_gateway_cache(self):
+        """Bu worker'daki gateway, derlenmiş konfigürasyon, türetilmiş anahtar ve taksit tablosu önbelleklerini geçersiz kıl"""
+        from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+        from odoo.addons.mews_pos.lib.bank_config import BankConfigCache
+        from odoo.addons.mews_pos.lib.crypto_utils import CryptoUtils
+
+        GatewayFactory.invalidate(self.ids, dbname=self.env.cr.dbname)
+        BankConfigCache.invalidate([(self.env.cr.dbname, bank_id) for bank_id in self.ids])
+        CryptoUtils.invalidate_key_cache()
+        self.env['mews.pos.installment.config']._invalidate_rate_table()
+
+    def _get_concurrency_limiter(self):
+        """Bankaya ait eş zamanlılık limitini döndür (limit tanımlı değilse None)"""
+        self.ensure_one()
+        if self.max_in_flight <= 0:
+            return None
+
+        from odoo.addons.mews_pos.lib.concurrency_limiter import ConcurrencyLimiter, LeaseSlotStore
+
+        # Kira, işlem süre bütçesi dolmadan düşmesin
+        lease = self.request_budget + 30 if self.request_budget > 0 else None
+        return ConcurrencyLimiter.get(
+            (self.env.cr.dbname, self.id),
+            slot_store=LeaseSlotStore(self.env.registry.cursor, self.id, lease=lease),
+            max_in_flight=self.max_in_flight,
+            queue_timeout=self.queue_timeout,
+        )
+
+    def _get_circuit_breaker(self):
+        """Bankaya ait (worker içi) devre kesiciyi veritabanındaki durumla eşitleyip döndür"""
+        self.ensure_one()
+        from odoo.addons.mews_pos.lib.circuit_breaker import CircuitBreaker
+
+        breaker = CircuitBreaker.get(
+            (self.env.cr.dbname, self.id),
+            state_store=self._breaker_state_store(),
+            error_rate_threshold=self.breaker_error_rate,
+            latency_threshold=self.breaker_latency_threshold,
+            min_requests=self.breaker_min_requests,
+            window=self.breaker_window,
+            open_duration=self.breaker_open_duration,
+        )
+        opened_at = self.breaker_opened_at
+        breaker.sync(
+            self.breaker_state,
+            calendar.timegm(opened_at.timetuple()) if opened_at else None,
+            self.breaker_version,
+        )
+        return breaker
+
+    def _breaker_state_store(self):
+        """
+        Devre kesici durum değişikliklerini ayrı bir cursor ile yazan fonksiyon
+
+        Ödeme isteğinin transaction'ı geri alınsa bile durum diğer worker'lara
+        yansır. write_date değişmediği için gateway önbelleği de bozulmaz.
+        """
+        registry = self.env.registry
+        bank_id = self.id
+
+        def store(key, state, opened_at):
+            with registry.cursor() as cr:
+                cr.execute("SET LOCAL lock_timeout = '2s'")
+                cr.execute("""
+                    UPDATE mews_pos_bank
+                       SET breaker_state = %s,
+                           breaker_opened_at = %s,
+                           breaker_version = COALESCE(breaker_version, 0) + 1
+                     WHERE id = %s
+                 RETURNING breaker_version
+                """, (state, datetime.fromtimestamp(opened_at, timezone.utc).replace(tzinfo=None) if opened_at else None, bank_id))
+                row = cr.fetchone()
+            return row[0] if row else None
+
+        return store
+
+    def action_reset_circuit_breaker(self):
+        """Devre kesiciyi manuel olarak kapat"""
+        from odoo.addons.mews_pos.lib.circuit_breaker import CircuitBreaker
+
+        if not self:
+            return
+        self.env.cr.execute("""
+            UPDATE mews_pos_bank
+               SET breaker_state = 'closed',
+                   breaker_opened_at = NULL,
+                   breaker_version = COALESCE(breaker_version, 0) + 1
+             WHERE id IN %s
+         RETURNING id, breaker_version
+        """, (tuple(self.ids),))
+        for bank_id, version in self.env.cr.fetchall():
+            CircuitBreaker.get((self.env.cr.dbname, bank_id)).sync('closed', None, version)
+        self.invalidate_recordset(['breaker_state', 'breaker_opened_at', 'breaker_version'])
+
+    def get_compiled_config(self):
+        """
+        Derlenmiş, değişmez banka konfigürasyonu (bkz. lib.bank_config)
+
+        write_date başına bir kez derlenir ve worker içinde tüm gateway'ler
+        ile servisler tarafından paylaşılır.
+
+        Returns:
+            BankConfig: Gateway'lere verilen konfigürasyon
+
+        Raises:
+            BankConfigError: Konfigürasyon geçersizse
+        """
+        self.ensure_one()
+        from odoo.addons.mews_pos.lib.bank_config import BankConfigCache
+
+        return BankConfigCache.get(
+            (self.env.cr.dbname, self.id), self.write_date, self._get_config_values
+        )
+
+    def _get_config_values(self):
+        """Konfigürasyon derlemesi için ham alan değerleri"""
         return {
             'bank_code': self.code,
+            'gateway_type': self.gateway_type,
+            'payment_model': self.payment_model,
+            'environment': self.environment,
             'merchant_id': self.merchant_id,
-            'terminal_id':  self.terminal_id,
+            'terminal_id': self.terminal_id,
             'username': self.username,
             'password': self.password,
             'store_key': self.store_key,
             'client_id': self.client_id,
-            'payment_model': self.payment_model,
-            'environment': self.environment,
-            'endpoints': {
-                'payment_api': self.payment_api_url,
-                'gateway_3d': self.gateway_3d_url,
-                'gateway_3d_host':  self.gateway_3d_host_url,
-            }
-        }
\ No newline at end of file
+            'payment_api_url': self.payment_api_url,
+            'gateway_3d_url': self.gateway_3d_url,
+            'gateway_3d_host_url': self.gateway_3d_host_url,
+            'max_connections': self.max_connections,
+        }
+
+    def get_account_config(self):
+        """Python için hesap yapılandırmasını döndür"""
+        return self.get_compiled_config().to_account_dict()
@@ -1,13 +1,27 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+import gzip
+import logging
+import time
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# Geçici tablodaki satır, mevcut kayıttan farklı mı
+_ROW_CHANGED = """
+    (b.bin_end, b.bank_id, b.card_type, b.name, b.active)
+        IS DISTINCT FROM (i.bin_end, i.bank_id, i.card_type, i.name, true)
+"""
 
 class MewsPosBin(models.Model):
     _name = 'mews.pos.bin'
     _description = 'Kart BIN Numaraları'
     _order = 'bin_number'
-    
+
     name = fields.Char(string='Açıklama', required=True)
-    bin_number = fields.Char(string='BIN Numarası', size=6, required=True)
+    bin_number = fields.Char(string='BIN Numarası', size=8, required=True, help='6 veya 8 haneli BIN (aralık başı)')
+    bin_end = fields.Char(string='Aralık Sonu', size=8, help='BIN aralığı için son BIN (aynı uzunlukta); boşsa tek BIN')
     bank_id = fields.Many2one('mews.pos.bank', string='Banka', required=True)
     card_type = fields.Selection([
         ('visa', 'Visa'),
@@ -18,7 +32,238 @@ class MewsPosBin(models.Model):
         ('other', 'Diğer')
     ], string='Kart Türü')
     active = fields.Boolean(string='Aktif', default=True)
-    
-    _sql_constraints = [
-        ('bin_number_unique', 'unique(bin_number)', 'Bu BIN numarası zaten kayıtlı!'),
-    ]
\ No newline at end of file
+
+    # import_bins'teki INSERT ... ON CONFLICT (bin_number) bu indekse dayanır
+    _bin_number_unique = models.Constraint(
+        'unique(bin_number)',
+        'Bu BIN numarası zaten kayıtlı!',
+    )
+
+    @api.constrains('bin_number', 'bin_end')
+    def _check_bin_number(self):
+        from odoo.addons.mews_pos.lib.bin_index import bin_range
+
+        for record in self:
+            try:
+                bin_range(record.bin_number or '', record.bin_end or None)
+            except ValueError:
+                raise ValidationError(_(
+                    'BIN 6 veya 8 haneli olmalı; aralık sonu aynı uzunlukta ve başlangıçtan küçük olmamalıdır: %s'
+                ) % record.bin_number)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @api.model
+    @tools.ormcache()
+    def _get_bin_index(self):
+        """
+        Aktif bankalara ait aktif BIN kayıtlarının bellek içi indeksi
+
+        Worker başına bir kez oluşturulur; create/write/unlink registry
+        önbelleğini temizler ve diğer worker'lar sinyalle geçersiz kılar.
+        """
+        from odoo.addons.mews_pos.lib.bin_index import BinIndex
+
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT b.bin_number, b.bin_end, b.bank_id, b.card_type
+              FROM mews_pos_bin b
+              JOIN mews_pos_bank bank ON bank.id = b.bank_id
+             WHERE b.active AND bank.active
+        """)
+        return BinIndex.build(self.env.cr.fetchall())
+
+    @api.model
+    @tools.ormcache()
+    def _get_bin_map(self):
+        """
+        Tarayıcıya gönderilen sürümlü BIN -> banka haritası
+
+        BIN indeksiyle aynı önbellekte tutulur ve onunla birlikte
+        geçersiz kılınır (BIN veya banka adı/kodu/aktifliği değişince).
+
+        Returns:
+            tuple: (sürüm, JSON gövdesi, gzip'li JSON gövdesi)
+        """
+        from odoo.addons.mews_pos.lib.bin_index import encode_bin_map
+
+        banks = self.env['mews.pos.bank'].search_read([], ['name', 'code'])
+        version, body = encode_bin_map(self._get_bin_index(), banks)
+        return version, body, gzip.compress(body, mtime=0)
+
+    @api.model
+    def get_bin_map_url(self):
+        """Güncel BIN haritasının sürümlü URL'i (uzun süre önbelleklenebilir)"""
+        return f"/mews_pos/bin_map/{self._get_bin_map()[0]}.json"
+
+    @api.model
+    def lookup(self, card_number):
+        """
+        Kart numarasının BIN kaydı (SQL sorgusu olmadan)
+
+        Args:
+            card_number (str): Kart numarası veya ilk 6-8 hanesi
+
+        Returns:
+            lib.bin_index.BinEntry: Bulunamazsa None
+        """
+        return self._get_bin_index().lookup(card_number)
+
+    # ------------------------------------------------------------------
+    # Toplu içe aktarım
+    # ------------------------------------------------------------------
+
+    @api.model
+    def import_bins(self, stream, fmt=None, filename=None, full_refresh=False, dry_run=False, chunk_size=None):
+        """
+        BIN tablosunu dosyadan toplu içe aktar
+
+        Satırlar akış halinde okunup parçalar halinde doğrulanır, COPY ile
+        geçici tabloya yazılır ve tek bir INSERT ... ON CONFLICT ile upsert
+        edilir; yalnızca değişen kayıtlar güncellenir. Banka adları
+        mews.pos.bank adı ve koduyla eşlenir.
+
+        Args:
+            stream: İkili dosya nesnesi
+            fmt (str): 'csv', 'json' veya 'jsonl'; boşsa dosyadan belirlenir
+            filename (str): Biçim tespiti için dosya adı
+            full_refresh (bool): Dosyada olmayan aktif BIN'leri pasife al
+            dry_run (bool): Yazmadan yalnızca farkları raporla
+            chunk_size (int): COPY parçası başına satır
+
+        Returns:
+            dict: lib.bin_import.new_report() biçiminde rapor
+
+        Raises:
+            lib.bin_import.BinImportError: Dosya okunamazsa
+        """
+        from odoo.addons.mews_pos.lib.bin_import import (
+            CHUNK_SIZE, IssuerMap, detect_format, new_report, read_rows, stage_chunks,
+        )
+
+        started = time.monotonic()
+        report = new_report()
+        if fmt is None:
+            head = stream.read(64)
+            stream.seek(0)
+            fmt = detect_format(filename, head)
+
+        banks = self.env['mews.pos.bank'].with_context(active_test=False).search_read([], ['name', 'code'])
+        issuers = IssuerMap(banks)
+
+        self.flush_model()
+        cr = self.env.cr
+        cr.execute("""
+            DROP TABLE IF EXISTS mews_pos_bin_import;
+            CREATE TEMP TABLE mews_pos_bin_import (
+                bin_number varchar PRIMARY KEY,
+                bin_end varchar,
+                bank_id integer,
+                card_type varchar,
+                name varchar
+            ) ON COMMIT DROP
+        """)
+        rows = read_rows(stream, fmt)
+        for chunk in stage_chunks(rows, issuers, report, chunk_size or CHUNK_SIZE):
+            cr.copy_expert(
+                'COPY mews_pos_bin_import (bin_number, bin_end, bank_id, card_type, name) FROM STDIN WITH (FORMAT csv)',
+                chunk,
+            )
+        cr.execute('ANALYZE mews_pos_bin_import')
+
+        if dry_run:
+            cr.execute(f"""
+                SELECT count(*) FILTER (WHERE b.id IS NULL),
+                       count(*) FILTER (WHERE b.id IS NOT NULL AND {_ROW_CHANGED})
+                  FROM mews_pos_bin_import i
+                  LEFT JOIN mews_pos_bin b ON b.bin_number = i.bin_number
+                 WHERE i.bank_id IS NOT NULL
+            """)
+            report['inserted'], report['updated'] = cr.fetchone()
+        else:
+            cr.execute(f"""
+                WITH upserted AS (
+                    INSERT INTO mews_pos_bin AS b
+                           (bin_number, bin_end, bank_id, card_type, name, active,
+                            create_uid, write_uid, create_date, write_date)
+                    SELECT i.bin_number, i.bin_end, i.bank_id, i.card_type, i.name, true,
+                           %(uid)s, %(uid)s, now() at time zone 'UTC', now() at time zone 'UTC'
+                      FROM mews_pos_bin_import i
+                     WHERE i.bank_id IS NOT NULL
+                    ON CONFLICT (bin_number) DO UPDATE
+                       SET bin_end = EXCLUDED.bin_end,
+                           bank_id = EXCLUDED.bank_id,
+                           card_type = EXCLUDED.card_type,
+                           name = EXCLUDED.name,
+                           active = true,
+                           write_uid = EXCLUDED.write_uid,
+                           write_date = EXCLUDED.write_date
+                     WHERE (b.bin_end, b.bank_id, b.card_type, b.name, b.active)
+                           IS DISTINCT FROM (EXCLUDED.bin_end, EXCLUDED.bank_id, EXCLUDED.card_type, EXCLUDED.name, true)
+                    RETURNING (xmax = 0) AS inserted
+                )
+                SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted)
+                  FROM upserted
+            """, {'uid': self.env.uid})
+            report['inserted'], report['updated'] = cr.fetchone()
+        report['unchanged'] = report['staged'] - report['inserted'] - report['updated']
+
+        # Boş veya tamamen geçersiz bir dosya tüm tabloyu pasife almasın
+        if full_refresh and report['staged']:
+            missing = """
+                  FROM mews_pos_bin b
+                 WHERE b.active
+                   AND NOT EXISTS (SELECT 1 FROM mews_pos_bin_import i WHERE i.bin_number = b.bin_number)
+            """
+            if dry_run:
+                cr.execute('SELECT count(*)' + missing)
+                report['deactivated'] = cr.fetchone()[0]
+            else:
+                cr.execute(
+                    "UPDATE mews_pos_bin SET active = false, write_uid = %s, write_date = now() at time zone 'UTC'"
+                    " WHERE id IN (SELECT b.id" + missing + ")",
+                    (self.env.uid,),
+                )
+                report['deactivated'] = cr.rowcount
+        cr.execute('DROP TABLE mews_pos_bin_import')
+
+        if not dry_run and (report['inserted'] or report['updated'] or report['deactivated']):
+            self.invalidate_model()
+            self.env.registry.clear_cache()
+
+        report['seconds'] = time.monotonic() - started
+        _logger.info(
+            f"BIN içe aktarımı{' (deneme)' if dry_run else ''}: {report['rows']} satır, "
+            f"{report['inserted']} eklendi, {report['updated']} güncellendi, "
+            f"{report['deactivated']} pasife alındı, {report['invalid']} geçersiz, "
+            f"{sum(report['unknown_issuers'].values())} bankası bulunamadı ({report['seconds']:.1f} sn)"
+        )
+        return report
+
+    @api.model
+    def _cron_import_bins(self):
+        """mews_pos.bin_import_path parametresindeki BIN dosyasını tam yenileme olarak içe aktar"""
+        params = self.env['ir.config_parameter'].sudo()
+        path = params.get_param('mews_pos.bin_import_path')
+        if not path:
+            return
+        full_refresh = params.get_param('mews_pos.bin_import_full_refresh', 'True') in ('1', 'True', 'true')
+        try:
+            with open(path, 'rb') as stream:
+                self.import_bins(stream, filename=path, full_refresh=full_refresh)
+        except (OSError, ValueError) as e:
+            _logger.error(f"BIN dosyası açılamadı: {path}: {e}")
@@ -56,6 +56,22 @@ class MewsPosCategoryRestriction(models.Model):
          'Her banka-kategori kombinasyonu benzersiz olmalıdır!')
     ]
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['mews.pos.installment.config']._invalidate_rate_table()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env['mews.pos.installment.config']._invalidate_rate_table()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['mews.pos.installment.config']._invalidate_rate_table()
+        return res
+
     @api.constrains('max_installment', 'min_installment')
     def _check_installment_range(self):
         for record in self:
@@ -1,8 +1,19 @@
 # -*- coding: utf-8 -*-
 
+import logging
+from datetime import timedelta
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
+_logger = logging.getLogger(__name__)
+
+# İşlem (cursor) başına tablo değişiklik özeti önbelleği anahtarı
+_FINGERPRINT_KEY = 'mews_pos.rate_table_fingerprint'
+
+# Kampanya sınırlarında görevin artırdığı sistem parametresi (değişiklik özetine dahil)
+_EPOCH_PARAM = 'mews_pos.rate_table_epoch'
+
 
 class MewsPosInstallmentConfig(models.Model):
     """Banka bazlı taksit yapılandırması"""
@@ -61,39 +72,147 @@ class MewsPosInstallmentConfig(models.Model):
          'Her banka için taksit sayısı benzersiz olmalıdır!')
     ]
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._invalidate_rate_table()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._invalidate_rate_table()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._invalidate_rate_table()
+        return res
+
+    @api.model
+    def _invalidate_rate_table(self):
+        """Bu worker'daki derlenmiş taksit oran tablosunu geçersiz kıl"""
+        from odoo.addons.mews_pos.lib.installment_engine import RateTableCache
+
+        self.env.cr.cache.pop(_FINGERPRINT_KEY, None)
+        RateTableCache.invalidate([self.env.cr.dbname])
+
+    @api.model
+    def get_rate_table(self):
+        """
+        Derlenmiş taksit oran tablosu (lib.installment_engine.RateTable)
+
+        Tablo worker içinde kayıt değişiklik özeti başına bir kez derlenir
+        ve bir sonraki kampanya başlangıç/bitiş gününe kadar kullanılır;
+        diğer worker'lardaki değişiklikler özet sorgusuyla fark edilir.
+        Özet işlem başına bir kez sorgulanır.
+        """
+        from odoo.addons.mews_pos.lib.installment_engine import RateTableCache
+
+        today = fields.Date.today()
+        version = self._get_rate_table_fingerprint()
+        return RateTableCache.get(
+            self.env.cr.dbname, version, lambda: self._build_rate_table(today, version), today=today,
+        )
+
+    @api.model
+    def _get_rate_table_fingerprint(self):
+        """Banka, taksit ve kısıtlama tablolarının kayıt sayısı ve son değişiklik zamanı; kampanya sınırı sayacı"""
+        fingerprint = self.env.cr.cache.get(_FINGERPRINT_KEY)
+        if fingerprint is None:
+            # Yalnızca özetin okuduğu tablolardaki bekleyen yazmalar
+            for model in ('mews.pos.bank', 'mews.pos.installment.config', 'mews.pos.category.restriction'):
+                self.env[model].flush_model()
+            self.env.cr.execute("""
+                SELECT (SELECT count(*) || ':' || COALESCE(max(write_date)::text, '') FROM mews_pos_bank),
+                       (SELECT count(*) || ':' || COALESCE(max(write_date)::text, '') FROM mews_pos_installment_config),
+                       (SELECT count(*) || ':' || COALESCE(max(write_date)::text, '') FROM mews_pos_category_restriction),
+                       (SELECT value FROM ir_config_parameter WHERE key = %s)
+            """, (_EPOCH_PARAM,))
+            fingerprint = self.env.cr.cache[_FINGERPRINT_KEY] = self.env.cr.fetchone()
+        return fingerprint
+
+    @api.model
+    def _cron_refresh_rate_table(self):
+        """
+        Kampanya başlangıç/bitiş günlerinde tüm worker'ların oran tablosunu yenile
+
+        Worker'lar tablonun geçerlilik sonunu (valid_until) kendileri de
+        kontrol eder; görev sınır gününde değişiklik özetini değiştirerek
+        tüm worker'ların aynı anda yeni kampanya durumuna geçmesini sağlar.
+        """
+        today = fields.Date.today()
+        changed = self.search_count([
+            ('campaign_active', '=', True),
+            '|',
+            ('campaign_start_date', '=', today),
+            ('campaign_end_date', '=', today - timedelta(days=1)),
+        ])
+        if not changed:
+            return
+        self.env['ir.config_parameter'].sudo().set_param(_EPOCH_PARAM, fields.Date.to_string(today))
+        self._invalidate_rate_table()
+        _logger.info(f"Kampanya dönemi değişti, taksit oran tabloları yenilenecek: {changed} yapılandırma")
+
+    @api.model
+    def _build_rate_table(self, today, version):
+        from odoo.addons.mews_pos.lib.installment_engine import RateTable
+
+        banks = self.env['mews.pos.bank'].sudo().search_read(
+            [('active', '=', True)], ['name', 'code'], order='sequence, name'
+        )
+        bank_ids = [bank['id'] for bank in banks]
+        configs = self.sudo().search_read([('active', '=', True), ('bank_id', 'in', bank_ids)], [
+            'bank_id', 'installment_count', 'interest_rate', 'min_amount',
+            'campaign_active', 'campaign_rate', 'campaign_start_date', 'campaign_end_date',
+        ])
+        restrictions = self.env['mews.pos.category.restriction'].sudo().search_read([('bank_id', 'in', bank_ids)], [
+            'bank_id', 'category_id', 'installment_allowed',
+            'min_installment', 'max_installment', 'blocked_installments',
+        ])
+        for record in configs + restrictions:
+            record['bank_id'] = record['bank_id'][0]
+        for record in restrictions:
+            record['category_id'] = record['category_id'][0]
+        return RateTable(banks, configs, restrictions, today, version=version)
+
     @api.constrains('installment_count')
     def _check_installment_count(self):
         for record in self:
             if record.installment_count < 2 or record.installment_count > 36:
                 raise ValidationError(_('Taksit sayısı 2 ile 36 arasında olmalıdır!'))
 
-    def get_effective_rate(self):
+    def _get_rate(self):
+        """
+        Etkin oran ve kampanya durumu
+
+        Kayıtlı, aktif bankaya ait aktif yapılandırmalar bellekteki oran
+        tablosundan okunur; diğerleri (pasif veya kaydedilmemiş) alanlardan
+        hesaplanır.
+
+        Returns:
+            tuple: (oran, kampanya oranı mı)
+        """
         self.ensure_one()
-        today = fields.Date.today()
-        if (self.campaign_active and 
-            self.campaign_start_date and 
-            self.campaign_end_date and
-            self.campaign_start_date <= today <= self.campaign_end_date):
-            return self.campaign_rate
-        return self.interest_rate
+        if self.id:
+            found = self.get_rate_table().rate(self.bank_id.id, self.installment_count)
+            if found is not None:
+                return found
+
+        from odoo.addons.mews_pos.lib.installment_engine import effective_rate
+
+        return effective_rate({
+            'interest_rate': self.interest_rate,
+            'campaign_active': self.campaign_active,
+            'campaign_rate': self.campaign_rate,
+            'campaign_start_date': self.campaign_start_date,
+            'campaign_end_date': self.campaign_end_date,
+        }, fields.Date.today())
+
+    def get_effective_rate(self):
+        return self._get_rate()[0]
 
     def calculate_installment(self, amount):
-        self.ensure_one()
-        rate = self.get_effective_rate()
-        
-        if rate > 0:
-            total_amount = amount * (1 + rate / 100)
-        else:
-            total_amount = amount
-            
-        installment_amount = total_amount / self.installment_count
-        
-        return {
-            'installment_count': self.installment_count,
-            'installment_amount':  round(installment_amount, 2),
-            'total_amount': round(total_amount, 2),
-            'interest_rate': rate,
-            'original_amount': amount,
-            'interest_amount': round(total_amount - amount, 2),
-            'is_campaign': self.campaign_active and rate == self.campaign_rate,
-        }
\ No newline at end of file
+        from odoo.addons.mews_pos.lib.installment_engine import installment_row
+
+        rate, campaign = self._get_rate()
+        return installment_row(amount, self.installment_count, rate, 1 + rate / 100, campaign)
\ No newline at end of file
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from collections import defaultdict
+from markupsafe import Markup, escape
+import time
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class MewsPosMassAction(models.Model):
+    """Toplu iptal/iade işi"""
+    _name = 'mews.pos.mass.action'
+    _description = 'Mews POS Toplu İptal/İade'
+    _order = 'create_date desc'
+
+    name = fields.Char(string='Ad', required=True, default=lambda self: _('Toplu İşlem'))
+    operation = fields.Selection([
+        ('cancel', 'İptal'),
+        ('refund', 'İade'),
+    ], string='İşlem Tipi', required=True, readonly=True)
+    state = fields.Selection([
+        ('queued', 'Sırada'),
+        ('running', 'Çalışıyor'),
+        ('done', 'Tamamlandı'),
+        ('stopped', 'Durduruldu'),
+    ], string='Durum', default='queued', required=True, readonly=True)
+
+    parallelism = fields.Integer(
+        string='Banka Başına Paralellik',
+        default=4,
+        help='Her bankaya aynı anda gönderilecek en fazla istek'
+    )
+    max_workers = fields.Integer(string='Toplam Thread', default=16)
+    batch_size = fields.Integer(
+        string='Parti Boyutu',
+        default=200,
+        help='İlerleme her partiden sonra kaydedilir'
+    )
+    notes = fields.Text(string='Notlar')
+
+    line_ids = fields.One2many('mews.pos.mass.action.line', 'action_id', string='Satırlar')
+    started_at = fields.Datetime(string='Başlama', readonly=True)
+    finished_at = fields.Datetime(string='Bitiş', readonly=True)
+
+    total_count = fields.Integer(string='Toplam', compute='_compute_progress')
+    done_count = fields.Integer(string='Başarılı', compute='_compute_progress')
+    failed_count = fields.Integer(string='Başarısız', compute='_compute_progress')
+    uncertain_count = fields.Integer(string='Belirsiz', compute='_compute_progress')
+    remaining_count = fields.Integer(string='Kalan', compute='_compute_progress')
+    progress = fields.Float(string='İlerleme (%)', compute='_compute_progress')
+    summary_html = fields.Html(string='Özet Rapor', compute='_compute_summary_html', sanitize=False)
+
+    @api.depends('line_ids.state')
+    def _compute_progress(self):
+        counts = defaultdict(lambda: defaultdict(int))
+        if self.ids:
+            groups = self.env['mews.pos.mass.action.line']._read_group(
+                [('action_id', 'in', self.ids)], ['action_id', 'state'], ['__count'],
+            )
+            for action, state, count in groups:
+                counts[action.id][state] = count
+
+        for action in self:
+            by_state = counts[action.id]
+            total = sum(by_state.values())
+            remaining = by_state['queued'] + by_state['running']
+            action.total_count = total
+            action.done_count = by_state['done']
+            action.failed_count = by_state['failed']
+            action.uncertain_count = by_state['uncertain']
+            action.remaining_count = remaining
+            action.progress = round((total - remaining) * 100.0 / total, 2) if total else 0.0
+
+    @api.depends('line_ids.state', 'line_ids.amount')
+    def _compute_summary_html(self):
+        Line = self.env['mews.pos.mass.action.line']
+        state_labels = dict(Line._fields['state'].selection)
+        columns = ['done', 'failed', 'uncertain', 'skipped', 'queued']
+
+        for action in self:
+            rows = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+            if action.id:
+                groups = Line._read_group(
+                    [('action_id', '=', action.id)],
+                    ['bank_id', 'state'],
+                    ['__count', 'amount:sum'],
+                )
+                for bank, state, count, amount in groups:
+                    rows[bank.display_name or '-'][state] = [count, amount or 0.0]
+
+            if not rows:
+                action.summary_html = False
+                continue
+
+            head = ''.join(f'<th class="text-end">{escape(state_labels[c])}</th>' for c in columns)
+            body = []
+            for bank_name in sorted(rows):
+                cells = ''.join(
+                    f'<td class="text-end">{rows[bank_name][c][0]}'
+                    f'<br/><small>{rows[bank_name][c][1]:,.2f}</small></td>'
+                    for c in columns
+                )
+                body.append(f'<tr><td>{escape(bank_name)}</td>{cells}</tr>')
+
+            action.summary_html = Markup(
+                '<table class="table table-sm o_mews_pos_mass_summary">'
+                f'<thead><tr><th>{escape(_("Banka"))}</th>{head}</tr></thead>'
+                f'<tbody>{"".join(body)}</tbody></table>'
+            )
+
+    def action_start(self):
+        """İşi sıraya al ve arka plan görevini tetikle"""
+        self.filtered(lambda a: a.state == 'stopped').write({'state': 'queued'})
+        self.env.ref('mews_pos.ir_cron_mews_pos_mass_actions')._trigger()
+        return True
+
+    def action_stop(self):
+        """Kalan satırları işlemeyi durdur (gönderilmiş istekler etkilenmez)"""
+        self.filtered(lambda a: a.state in ('queued', 'running')).write({'state': 'stopped'})
+        return True
+
+    def action_retry_failed(self):
+        """Başarısız ve belirsiz satırları tekrar sıraya al"""
+        lines = self.line_ids.filtered(lambda l: l.state in ('failed', 'uncertain'))
+        if not lines:
+            raise UserError(_('Tekrar denenecek satır yok.'))
+        lines.write({'state': 'queued', 'error_message': False})
+        self.write({'state': 'queued', 'finished_at': False})
+        return self.action_start()
+
+    # ------------------------------------------------------------------
+    # Çalıştırma
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _cron_process_mass_actions(self, auto_commit=True):
+        """Sıradaki toplu işleri işle; yarıda kalan işleri kaldığı yerden sürdür"""
+        time_limit = float(
+            self.env['ir.config_parameter'].sudo().get_param('mews_pos.mass_action_time_limit', 600)
+        )
+        started = time.monotonic()
+
+        # Görev kendisiyle eş zamanlı çalışmadığından bu noktada 'running'
+        # kalmış satırlar önceki çalıştırmanın yarıda kaldığını gösterir
+        self._mark_interrupted_lines()
+
+        for action in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            finished = action._process(auto_commit=auto_commit, deadline=started + time_limit)
+            if not finished:
+                # Süre doldu; kalanlar için görevi hemen tekrar tetikle
+                self.env.ref('mews_pos.ir_cron_mews_pos_mass_actions')._trigger()
+                break
+
+    @api.model
+    def _mark_interrupted_lines(self):
+        """Bankaya gönderilmiş olabilecek satırları tekrar göndermek yerine belirsiz işaretle"""
+        lines = self.env['mews.pos.mass.action.line'].search([('state', '=', 'running')])
+        if lines:
+            _logger.warning(f"Yarıda kalan toplu işlem satırları belirsiz olarak işaretlendi: {len(lines)}")
+            lines.write({
+                'state': 'uncertain',
+                'error_message': _('İşlem sırasında worker durdu; banka tarafındaki sonuç kontrol edilmeli.'),
+            })
+
+    def _process(self, auto_commit=True, deadline=None):
+        """
+        Satırları partiler halinde işle
+
+        Returns:
+            bool: İş tamamlandıysa True, süre dolduysa False
+        """
+        from odoo.addons.mews_pos.lib.bulk_executor import BulkExecutor
+
+        self.ensure_one()
+        Line = self.env['mews.pos.mass.action.line']
+        if self.state == 'queued':
+            self.write({'state': 'running', 'started_at': self.started_at or fields.Datetime.now()})
+
+        executor = BulkExecutor(max_workers=self.max_workers, group_parallelism=self.parallelism)
+
+        while True:
+            self.invalidate_recordset(['state'])
+            if self.state != 'running':
+                return True
+
+            lines = Line.search([('action_id', '=', self.id), ('state', '=', 'queued')],
+                                order='id', limit=max(1, self.batch_size))
+            if not lines:
+                self.write({'state': 'done', 'finished_at': fields.Datetime.now()})
+                if auto_commit:
+                    self.env.cr.commit()
+                return True
+
+            lines._run_batch(executor, auto_commit=auto_commit)
+            if auto_commit:
+                self.env.cr.commit()
+
+            if deadline and time.monotonic() > deadline:
+                return False
+
+
+class MewsPosMassActionLine(models.Model):
+    """Toplu iptal/iade satırı"""
+    _name = 'mews.pos.mass.action.line'
+    _description = 'Mews POS Toplu İşlem Satırı'
+    _order = 'id'
+
+    action_id = fields.Many2one('mews.pos.mass.action', string='Toplu İşlem', required=True, ondelete='cascade', index=True)
+    transaction_id = fields.Many2one('mews.pos.transaction', string='İşlem', required=True, ondelete='cascade')
+    bank_id = fields.Many2one(related='transaction_id.bank_id', store=True, string='Banka')
+    amount = fields.Float(string='Tutar', digits=(12, 2))
+    state = fields.Selection([
+        ('queued', 'Sırada'),
+        ('running', 'Gönderiliyor'),
+        ('done', 'Başarılı'),
+        ('failed', 'Başarısız'),
+        ('uncertain', 'Belirsiz'),
+        ('skipped', 'Atlandı'),
+    ], string='Durum', default='queued', required=True, index=True)
+    refund_id = fields.Many2one('mews.pos.refund', string='İade Kaydı', readonly=True)
+    error_message = fields.Text(string='Hata Mesajı')
+    processed_at = fields.Datetime(string='İşlem Tarihi')
+
+    _transaction_unique = models.Constraint(
+        'UNIQUE(action_id, transaction_id)',
+        'Bir işlem aynı toplu işlemde yalnızca bir kez yer alabilir!',
+    )
+
+    def _run_batch(self, executor, auto_commit=True):
+        """Partiyi bankalara eş zamanlı gönder ve sonuçları toplu yaz"""
+        from odoo.addons.mews_pos.services.payment_gateway_service import PaymentGatewayService
+
+        operation = self.action_id.operation
+        service = PaymentGatewayService(self.env)
+
+        # Gönderim öncesi durum kalıcı yazılır; çökme sonrası tekrar gönderim olmaz
+        lines = self._revalidate(operation)
+        lines.write({'state': 'running'})
+        if operation == 'refund':
+            lines._create_refunds()
+        if auto_commit:
+            self.env.cr.commit()
+
+        jobs = []
+        results = {}
+        for line in lines:
+            try:
+                if operation == 'refund':
+                    call = service.prepare_refund_call(line.transaction_id, line.amount)
+                else:
+                    call = service.prepare_cancel_call(line.transaction_id)
+            except Exception as e:
+                results[line.id] = (False, e)
+                continue
+            jobs.append((line.id, line.bank_id.id, call, ()))
+
+        results.update(executor.run(jobs))
+        lines._apply_results(results)
+
+    def _revalidate(self, operation):
+        """
+        Gönderimden hemen önce işlemleri kilitle ve uygunluğu yeniden doğrula
+
+        Sihirbazdan sonra işlem iptal/iade edilmiş, başka bir toplu işte
+        gönderilmekte ya da kalan iade tutarı beklemedeki iadelerle azalmış
+        olabilir; bu satırlar atlanır. Kilit, 'running' durumu ve bekleyen
+        iade kayıtları commit edilene kadar tutulur.
+
+        Returns:
+            Gönderilecek satırlar
+        """
+        transactions = self.transaction_id
+        if not transactions:
+            return self
+        Refund = self.env['mews.pos.refund']
+        self.env['mews.pos.transaction'].flush_model(['state', 'refunded_amount'])
+        Refund.flush_model(['transaction_id', 'amount', 'state'])
+        self.flush_model(['transaction_id', 'state'])
+        self.env.cr.execute(
+            "SELECT id FROM mews_pos_transaction WHERE id IN %s ORDER BY id FOR UPDATE",
+            [tuple(transactions.ids)],
+        )
+        transactions.invalidate_recordset(['state', 'refunded_amount'])
+
+        busy = self.search([
+            ('transaction_id', 'in', transactions.ids),
+            ('state', '=', 'running'),
+            ('id', 'not in', self.ids),
+        ]).transaction_id
+        pending = {}
+        if operation == 'refund':
+            groups = Refund._read_group([
+                ('transaction_id', 'in', transactions.ids),
+                ('state', '=', 'pending'),
+                ('id', 'not in', self.refund_id.ids),
+            ], ['transaction_id'], ['amount:sum'])
+            pending = {transaction.id: amount or 0.0 for transaction, amount in groups}
+
+        skipped = defaultdict(lambda: self.browse())
+        for line in self:
+            transaction = line.transaction_id
+            if transaction in busy:
+                skipped[_('Başka bir toplu işlemde gönderiliyor')] |= line
+            elif operation == 'cancel' and transaction.state != 'success':
+                skipped[_('İşlem durumu uygun değil')] |= line
+            elif operation == 'refund' and transaction.state not in ('success', 'partial_refund'):
+                skipped[_('İşlem durumu uygun değil')] |= line
+            elif operation == 'refund' and line.amount > (
+                transaction.total_amount - transaction.refunded_amount - pending.get(transaction.id, 0.0) + 0.005
+            ):
+                skipped[_('Kalan iade tutarı satır tutarından az')] |= line
+
+        now = fields.Datetime.now()
+        for message, lines in skipped.items():
+            lines.write({'state': 'skipped', 'processed_at': now, 'error_message': message})
+        return self.filtered(lambda l: l.state != 'skipped')
+
+    def _create_refunds(self):
+        """Satırlar için bekleyen iade kayıtlarını tek create ile oluştur"""
+        lines = self.filtered(lambda l: not l.refund_id)
+        notes = lines.action_id[:1].notes
+        refunds = self.env['mews.pos.refund'].create([{
+            'transaction_id': line.transaction_id.id,
+            'amount': line.amount,
+            'notes': notes,
+            'state': 'pending',
+        } for line in lines])
+        for line, refund in zip(lines, refunds):
+            line.refund_id = refund
+
+    def _apply_results(self, results):
+        """Banka yanıtlarını satır, iade ve işlem kayıtlarına toplu yaz"""
+        now = fields.Datetime.now()
+        succeeded = self.browse()
+        failed = defaultdict(lambda: self.browse())
+        responses = {}
+        for line in self:
+            ok, value = results.get(line.id, (False, Exception(_('Sonuç alınamadı'))))
+            if ok and value.get('approved'):
+                succeeded |= line
+            else:
+                message = str(value) if not ok else (value.get('error_message') or _('Banka işlemi reddetti'))
+                failed[message] |= line
+            responses[line.id] = value if ok else {'error': str(value)}
+
+        succeeded.write({'state': 'done', 'processed_at': now, 'error_message': False})
+        for message, lines in failed.items():
+            lines.write({'state': 'failed', 'processed_at': now, 'error_message': message})
+
+        if self.action_id[:1].operation == 'refund':
+            self._apply_refund_results(succeeded, failed, responses, now)
+        elif succeeded:
+            succeeded.transaction_id.write({'state': 'cancelled', 'cancelled_at': now})
+
+    def _apply_refund_results(self, succeeded, failed, responses, now):
+        from odoo.addons.mews_pos.lib.gateways.result import dumps
+
+        for message, lines in failed.items():
+            lines.refund_id.write({'state': 'failed', 'error_message': message})
+
+        if not succeeded:
+            return
+
+        # Başarılı iadelerin referans ve yanıtları satır başına farklıdır; tek sorguda yazılır
+        Refund = self.env['mews.pos.refund']
+        Refund.flush_model()
+        self.env.cr.execute(f"""
+            UPDATE mews_pos_refund AS r
+               SET state = 'success',
+                   refund_ref = v.refund_ref,
+                   response_data = v.response_data,
+                   processed_at = %s,
+                   write_uid = %s,
+                   write_date = (now() AT TIME ZONE 'UTC')
+              FROM (VALUES {', '.join(['(%s::int, %s, %s)'] * len(succeeded))}) AS v(id, refund_ref, response_data)
+             WHERE r.id = v.id
+        """, [now, self.env.uid] + [
+            value for line in succeeded for value in (
+                line.refund_id.id, responses[line.id].get('host_ref_num'), dumps(responses[line.id]),
+            )
+        ])
+        Refund.invalidate_model(['state', 'refund_ref', 'response_data', 'processed_at', 'write_uid', 'write_date'])
+
+        # İade tutarları ve durum tek sorguda güncellenir
+        self.env.flush_all()
+        self.env.cr.execute(f"""
+            UPDATE mews_pos_transaction AS t
+               SET refunded_amount = COALESCE(t.refunded_amount, 0) + v.amount,
+                   state = CASE
+                       WHEN COALESCE(t.refunded_amount, 0) + v.amount >= t.total_amount - 0.005
+                       THEN 'refunded' ELSE 'partial_refund'
+                   END
+              FROM (VALUES {', '.join(['(%s::int, %s::numeric)'] * len(succeeded))}) AS v(id, amount)
+             WHERE t.id = v.id
+        """, [value for line in succeeded for value in (line.transaction_id.id, line.amount)])
+        self.env['mews.pos.transaction'].invalidate_model(['refunded_amount', 'state'])
@@ -2,7 +2,9 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
-import json
+from collections import defaultdict
+from datetime import timedelta
+import time
 import uuid
 import logging
 
@@ -93,6 +95,21 @@ class MewsPosTransaction(models.Model):
     processed_at = fields.Datetime(string='İşlem Tarihi')
     cancelled_at = fields.Datetime(string='İptal Tarihi')
 
+    reconcile_attempts = fields.Integer(string='Mutabakat Denemesi', default=0, readonly=True, copy=False)
+    last_reconciled_at = fields.Datetime(string='Son Mutabakat', readonly=True, copy=False)
+
+    # Mutabakata alınan yarım kalmış durumlar
+    RECONCILE_STATES = ('pending', 'processing', 'waiting_3d')
+
+    # Banka durum sorgusu sonucu -> işlem durumu (unknown: değişiklik yok)
+    RECONCILE_TRANSITIONS = {
+        'approved': 'success',
+        'declined': 'failed',
+        'not_found': 'failed',
+        'cancelled': 'cancelled',
+        'refunded': 'refunded',
+    }
+
     @api.depends('amount', 'total_amount')
     def _compute_interest_amount(self):
         for record in self:
@@ -110,6 +127,7 @@ class MewsPosTransaction(models.Model):
         if self.state != 'success':
             raise UserError(_('Sadece başarılı işlemler iptal edilebilir! '))
         
+        from odoo.addons.mews_pos.lib.gateways.result import dumps
         from odoo.addons.mews_pos.services.payment_gateway_service import PaymentGatewayService
         gateway = PaymentGatewayService(self.env)
         
@@ -119,7 +137,7 @@ class MewsPosTransaction(models.Model):
             self.write({
                 'state': 'cancelled',
                 'cancelled_at': fields.Datetime.now(),
-                'response_data': json.dumps(result, indent=2, ensure_ascii=False),
+                'response_data': dumps(result),
             })
             return {
                 'type': 'ir.actions.client',
@@ -152,6 +170,221 @@ class MewsPosTransaction(models.Model):
             }
         }
 
+    def action_check_status(self):
+        """Seçili yarım kalmış işlemlerin durumunu bankadan sorgula"""
+        from odoo.addons.mews_pos.lib.bulk_executor import BulkExecutor
+
+        transactions = self.filtered(lambda t: t.state in self.RECONCILE_STATES)
+        if not transactions:
+            raise UserError(_('Sadece bekleyen/işlenen işlemlerin durumu sorgulanabilir!'))
+
+        executor = BulkExecutor(
+            max_workers=8,
+            rate_limits={bank.id: bank.status_rate_limit for bank in transactions.bank_id},
+        )
+        changed = transactions._reconcile_batch(executor)
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Durum Sorgusu'),
+                'message': _('%(checked)s işlem sorgulandı, %(changed)s işlemin durumu güncellendi.') % {
+                    'checked': len(transactions),
+                    'changed': changed,
+                },
+                'type': 'info',
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
+
+    # ------------------------------------------------------------------
+    # Toplu durum mutabakatı
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _cron_reconcile_transactions(self, auto_commit=True):
+        """
+        Yarım kalmış işlemleri bankadan sorgulayıp durumlarını güncelle
+
+        Eski pending/processing/waiting_3d işlemler partiler halinde seçilir,
+        bankalara sınırlı bir thread havuzu ve banka bazlı hız limitiyle
+        eş zamanlı sorulur, sonuçlar toplu yazılır.
+
+        Returns:
+            int: Durumu değişen işlem sayısı
+        """
+        from odoo.addons.mews_pos.lib.bulk_executor import BulkExecutor
+
+        ICP = self.env['ir.config_parameter'].sudo()
+        batch_size = int(ICP.get_param('mews_pos.reconcile_batch_size', 200))
+        stale_minutes = int(ICP.get_param('mews_pos.reconcile_stale_minutes', 30))
+        retry_minutes = int(ICP.get_param('mews_pos.reconcile_retry_minutes', 15))
+        max_attempts = int(ICP.get_param('mews_pos.reconcile_max_attempts', 10))
+        max_workers = int(ICP.get_param('mews_pos.reconcile_workers', 8))
+        time_limit = float(ICP.get_param('mews_pos.reconcile_time_limit', 600))
+
+        banks = self._get_reconcilable_banks()
+        if not banks:
+            return 0
+
+        executor = BulkExecutor(
+            max_workers=max_workers,
+            rate_limits={bank.id: bank.status_rate_limit for bank in banks},
+        )
+
+        started = time.monotonic()
+        last_id = 0
+        changed = 0
+        while time.monotonic() - started < time_limit:
+            now = fields.Datetime.now()
+            batch = self.search([
+                ('id', '>', last_id),
+                ('state', 'in', list(self.RECONCILE_STATES)),
+                ('bank_id', 'in', banks.ids),
+                ('write_date', '<', now - timedelta(minutes=stale_minutes)),
+                ('reconcile_attempts', '<', max_attempts),
+                '|',
+                ('last_reconciled_at', '=', False),
+                ('last_reconciled_at', '<', now - timedelta(minutes=retry_minutes)),
+            ], order='id', limit=batch_size)
+            if not batch:
+                break
+
+            last_id = batch[-1].id
+            changed += batch._reconcile_batch(executor)
+            if auto_commit:
+                self.env.cr.commit()
+
+        _logger.info(
+            f"Mutabakat tamamlandı: {changed} işlem güncellendi "
+            f"({time.monotonic() - started:.1f} sn)"
+        )
+        return changed
+
+    @api.model
+    def _get_reconcilable_banks(self):
+        """Durum sorgusunu destekleyen aktif bankalar"""
+        from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+        from odoo.addons.mews_pos.services.payment_gateway_service import PaymentGatewayService
+
+        service = PaymentGatewayService(self.env)
+        banks = self.env['mews.pos.bank']
+        for bank in self.env['mews.pos.bank'].search([]):
+            try:
+                if service._create_gateway(bank, GatewayFactory).supports('status'):
+                    banks |= bank
+            except Exception as e:
+                _logger.warning(f"Mutabakat için gateway oluşturulamadı: {bank.name} ({str(e)})")
+        return banks
+
+    def _reconcile_batch(self, executor):
+        """Parti içindeki işlemleri bankalardan eş zamanlı sorgula ve sonuçları yaz"""
+        from odoo.addons.mews_pos.services.payment_gateway_service import PaymentGatewayService
+
+        service = PaymentGatewayService(self.env)
+        jobs = []
+        results = {}
+        for transaction in self:
+            try:
+                call = service.prepare_status_call(transaction)
+            except Exception as e:
+                results[transaction.id] = (False, e)
+                continue
+            jobs.append((transaction.id, transaction.bank_id.id, call, ()))
+
+        results.update(executor.run(jobs))
+        return self._apply_reconcile_results(results)
+
+    def _apply_reconcile_results(self, results):
+        """
+        Durum sorgusu sonuçlarını toplu yaz
+
+        Args:
+            results (dict): {işlem id: (başarılı, parse_status_response sonucu veya hata)}
+
+        Returns:
+            int: Durumu değişen işlem sayısı
+        """
+        if not results:
+            return 0
+
+        now = fields.Datetime.now()
+        by_state = defaultdict(list)
+        references = []
+        for transaction_id, (ok, value) in results.items():
+            if not ok:
+                _logger.warning(f"Durum sorgulanamadı: işlem {transaction_id} ({str(value)})")
+                continue
+            state = self.RECONCILE_TRANSITIONS.get(value.get('status'))
+            if not state:
+                continue
+            by_state[state].append(transaction_id)
+            references.append((
+                transaction_id,
+                value.get('auth_code') or None,
+                value.get('host_ref_num') or None,
+                value.get('proc_return_code') or value.get('error_code') or None,
+                value.get('error_message') or None,
+            ))
+
+        # Deneme sayacı tüm sorgulananlar için tek sorguda artırılır
+        self.env.cr.execute("""
+            UPDATE mews_pos_transaction
+               SET reconcile_attempts = COALESCE(reconcile_attempts, 0) + 1,
+                   last_reconciled_at = %s
+             WHERE id IN %s
+        """, (now, tuple(results)))
+        self.invalidate_model(['reconcile_attempts', 'last_reconciled_at'])
+
+        state_values = {
+            'success': {'processed_at': now},
+            'failed': {'processed_at': now},
+            'cancelled': {'cancelled_at': now},
+            'refunded': {},
+        }
+        # Referanslar yalnızca hâlâ mutabakat bekleyen işlemlere yazılır; sorgu
+        # sırasında callback vb. ile sonuçlanan işlemlerin durumu da ezilmez
+        updated = self._write_bank_references(references)
+        changed = 0
+        for state, transaction_ids in by_state.items():
+            records = self.browse([tid for tid in transaction_ids if tid in updated])
+            if records:
+                records.write(dict(state_values[state], state=state))
+                changed += len(records)
+        return changed
+
+    def _write_bank_references(self, references, chunk_size=1000):
+        """
+        Banka referanslarını (onay kodu, host ref, yanıt) tek UPDATE ... FROM VALUES ile yaz
+
+        Yalnızca durumu RECONCILE_STATES içinde olan işlemler güncellenir.
+
+        Returns:
+            set: Güncellenen işlem id'leri
+        """
+        updated = set()
+        if not references:
+            return updated
+        self.flush_model(['state', 'auth_code', 'host_ref_num', 'bank_response_code', 'bank_response_message'])
+        for index in range(0, len(references), chunk_size):
+            chunk = references[index:index + chunk_size]
+            self.env.cr.execute(f"""
+                UPDATE mews_pos_transaction AS t
+                   SET auth_code = COALESCE(v.auth_code, t.auth_code),
+                       host_ref_num = COALESCE(v.host_ref_num, t.host_ref_num),
+                       bank_response_code = COALESCE(v.response_code, t.bank_response_code),
+                       bank_response_message = COALESCE(v.message, t.bank_response_message)
+                  FROM (VALUES {', '.join(['(%s::int, %s, %s, %s, %s)'] * len(chunk))})
+                       AS v(id, auth_code, host_ref_num, response_code, message)
+                 WHERE t.id = v.id
+                   AND t.state IN %s
+             RETURNING t.id
+            """, [value for row in chunk for value in row] + [self.RECONCILE_STATES])
+            updated.update(row[0] for row in self.env.cr.fetchall())
+        self.invalidate_model(['auth_code', 'host_ref_num', 'bank_response_code', 'bank_response_message'])
+        return updated
+
     def _detect_card_type(self, card_number):
         """Kart tipini tespit et"""
         if not card_number:
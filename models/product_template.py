@@ -44,26 +44,17 @@ class ProductTemplate(models.Model):
             return []
         
         result = []
-        banks = self.env['mews.pos.bank'].sudo().search([('active', '=', True)], order='sequence')
+        # Aktif bankalar ve etkin oranlar bellekteki taksit oran tablosundan okunur
+        table = self.env['mews.pos.installment.config'].sudo().get_rate_table()
         
-        _logger.info(f"Found {len(banks)} active banks")
+        _logger.info(f"Found {len(table.banks)} active banks")
         
-        for bank in banks:
-            configs = bank.installment_config_ids.filtered(
-                lambda c: c.active and c.min_amount <= amount
-            )
-            
-            if not configs:
-                continue
-            
-            installments = []
-            for config in configs.sorted(key=lambda c: c.installment_count):
-                inst_data = config.calculate_installment(amount)
-                installments.append(inst_data)
+        for bank in table.banks:
+            installments = table.installments(bank.bank_id, amount)
             
             if installments:
                 result.append({
-                    'bank_id': bank.id,
+                    'bank_id': bank.bank_id,
                     'bank_name': bank.name,
                     'bank_code': bank.code,
                     'color': self._get_bank_color(bank.code),
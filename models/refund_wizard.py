@@ -2,7 +2,6 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
-import json
 
 
 class MewsPosRefundWizard(models.TransientModel):
@@ -33,6 +32,7 @@ class MewsPosRefundWizard(models.TransientModel):
         self.ensure_one()
         transaction = self.transaction_id
         
+        from odoo.addons.mews_pos.lib.gateways.result import dumps
         from odoo.addons.mews_pos.services.payment_gateway_service import PaymentGatewayService
         gateway = PaymentGatewayService(self.env)
         
@@ -50,7 +50,7 @@ class MewsPosRefundWizard(models.TransientModel):
                 refund.write({
                     'state': 'success',
                     'refund_ref': result.get('data', {}).get('refund_ref'),
-                    'response_data': json.dumps(result, ensure_ascii=False),
+                    'response_data': dumps(result),
                     'processed_at': fields.Datetime.now(),
                 })
                 
@@ -80,7 +80,7 @@ class MewsPosRefundWizard(models.TransientModel):
                 refund.write({
                     'state': 'failed',
                     'error_message':  result.get('error', 'Bilinmeyen hata'),
-                    'response_data': json.dumps(result, ensure_ascii=False),
+                    'response_data': dumps(result),
                 })
                 
                 raise UserError(_('İade işlemi başarısız:  %s') % result.get('error', 'Bilinmeyen hata'))
@@ -36,13 +36,17 @@ class SaleOrder(models.Model):
 
     @api.depends('amount_total', 'mews_selected_bank_id', 'mews_installment_count')
     def _compute_installment_amounts(self):
+        table = self.env['mews.pos.installment.config'].sudo().get_rate_table()
         for order in self:
             if order.mews_selected_bank_id and order.mews_installment_count > 1:
-                config = order.mews_selected_bank_id.installment_config_ids.filtered(
-                    lambda c: c.installment_count == order.mews_installment_count
-                )
-                if config:
-                    result = config[0].calculate_installment(order.amount_total)
+                result = table.installment(order.mews_selected_bank_id.id, order.mews_installment_count, order.amount_total)
+                if result is None:
+                    # Pasif yapılandırma veya banka: oran tablosunda yok
+                    config = order.mews_selected_bank_id.installment_config_ids.filtered(
+                        lambda c: c.installment_count == order.mews_installment_count
+                    )
+                    result = config[0].calculate_installment(order.amount_total) if config else None
+                if result:
                     order.mews_installment_amount = result['installment_amount']
                     order.mews_total_with_interest = result['total_amount']
                 else:
@@ -67,16 +71,12 @@ class SaleOrder(models.Model):
         # Burada payment.provider yerine direkt bankalardan taksit al
         result = []
         banks = self.env['mews.pos.bank'].search([('active', '=', True)])
+        table = self.env['mews.pos.installment.config'].sudo().get_rate_table()
         
         for bank in banks: 
             bank_installments = []
             
-            configs = bank.installment_config_ids.filtered(
-                lambda c: c.active and c.min_amount <= self.amount_total
-            )
-            
-            for config in configs:
-                inst_data = config.calculate_installment(self.amount_total)
+            for inst_data in table.installments(bank.id, self.amount_total):
                 inst_data['bank_id'] = bank.id
                 inst_data['bank_name'] = bank.name
                 inst_data['bank_code'] = bank.code
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
 import logging
 from odoo import api, models, _
 from odoo.exceptions import UserError
@@ -10,8 +11,15 @@ _logger = logging.getLogger(__name__)
 class PaymentGatewayService:
     """Python Gateway Servisi"""
     
-    def __init__(self, env):
+    def __init__(self, env, budget=None):
+        """
+        Args:
+            env: Odoo environment
+            budget (float): İşlem başına toplam süre bütçesi (saniye).
+                Verilmezse bankanın request_budget değeri kullanılır.
+        """
         self.env = env
+        self.budget = budget
     
     def create_3d_form(self, transaction, card_data):
         """3D Secure form verisi oluştur"""
@@ -23,74 +31,130 @@ class PaymentGatewayService:
         # Gateway oluştur
         gateway = self._create_gateway(bank, GatewayFactory)
         
-        # Sipariş verisi hazırla
-        order_data = {
-            'id': transaction.transaction_id,
-            'amount':  float(transaction.total_amount),
-            'currency':  transaction.currency,
-            'installment':  int(transaction.installment_count),
-            'success_url': transaction._get_callback_url('success'),
-            'fail_url': transaction._get_callback_url('fail'),
-            'lang': 'tr',
-            'ip_address': transaction.ip_address or '127.0.0.1',
-            'email': transaction.order_id.partner_id.email if transaction.order_id else 'test@test.com',
-        }
+        # Sipariş ve kart verisi hazırla
+        order_data = self._build_order_data(transaction, secure=True)
+        card = self._build_card_data(card_data)
         
-        # Kart verisi hazırla
-        card = {
-            'number': card_data.get('number', '').replace(' ', ''),
-            'month': card_data.get('month', '').zfill(2),
-            'year': card_data.get('year', ''),
-            'cvv': card_data.get('cvv', ''),
-            'name': card_data.get('name', '').upper(),
-        }
-        
-        try:
-            # 3D form verisi al
-            form_data = gateway.prepare_3d_request(order_data, card)
+        with self._deadline_scope(bank):
+            try:
+                # 3D form verisi al
+                form_data = gateway.prepare_3d_request(order_data, card)
             
-            _logger.info(f"3D form verisi oluşturuldu: {transaction.transaction_id}")
+                _logger.info(f"3D form verisi oluşturuldu: {transaction.transaction_id}")
             
-            return {
-                'success': True,
-                'data': form_data
-            }
+                return {
+                    'success': True,
+                    'data': form_data
+                }
             
-        except Exception as e: 
-            _logger.error(f"3D form oluşturma hatası: {str(e)}")
-            raise UserError(_("3D form oluşturulamadı: %s") % str(e))
+            except Exception as e: 
+                _logger.error(f"3D form oluşturma hatası: {str(e)}")
+                raise UserError(_("3D form oluşturulamadı: %s") % str(e))
     
+    def verify_3d_callback(self, transaction, callback_data):
+        """
+        3D callback imzasını doğrula (gateway oluşturmadan)
+
+        Bankanın derlenmiş konfigürasyonu ve gateway sınıfının imza şeması
+        kullanılır; imzalı sipariş numarası ve tutar işlemle karşılaştırılır.
+        Reddedilen callback'ler banka bazında sayılır.
+
+        Returns:
+            dict: Geçersizse process_3d_callback hata sonucu; geçerliyse None
+        """
+        from odoo.addons.mews_pos.lib.callback_verifier import CallbackVerifier, CallbackSignatureError
+        from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+
+        bank = transaction.bank_id
+        try:
+            gateway_class = GatewayFactory.load_class(bank.gateway_type)
+            CallbackVerifier.verify(
+                gateway_class.callback_hash_scheme, bank.get_compiled_config(), callback_data,
+                key=(self.env.cr.dbname, bank.id),
+                order_id=transaction.transaction_id,
+                amount=float(transaction.total_amount),
+                order_fields=gateway_class.callback_order_fields,
+                amount_field=gateway_class.callback_amount_field,
+            )
+        except CallbackSignatureError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_type': e.error_type,
+                'data': {'approved': False, 'error_message': str(e)}
+            }
+        except ValueError as e:
+            raise UserError(str(e))
+        return None
+
     def process_3d_callback(self, transaction, callback_data):
         """3D Secure callback işle"""
         from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
         
         bank = transaction.bank_id
+
+        rejected = self.verify_3d_callback(transaction, callback_data)
+        if rejected:
+            return rejected
         
         # Gateway oluştur
         gateway = self._create_gateway(bank, GatewayFactory)
         
-        try:
-            # Callback yanıtını parse et
-            result = gateway.parse_3d_response(callback_data)
+        with self._deadline_scope(bank):
+            try:
+                # Callback yanıtını parse et
+                result = gateway.parse_3d_response(callback_data)
+
+                # İmzasız callback onayını bankaya sor
+                inquiry = self._prepare_3d_inquiry(transaction, gateway, result)
+                if inquiry:
+                    response = gateway.make_request(
+                        inquiry['url'],
+                        inquiry['data'],
+                        inquiry.get('headers')
+                    )
+                    result = self._confirm_3d_result(transaction, result, gateway.parse_status_response(response))
             
-            _logger.info(f"3D callback işlendi: {transaction.transaction_id}, Başarılı: {result.get('approved')}")
+                _logger.info(f"3D callback işlendi: {transaction.transaction_id}, Başarılı: {result.get('approved')}")
             
-            # Yanıtı normalize et
-            normalized = gateway.normalize_response(result)
+                # Yanıtı normalize et
+                normalized = gateway.normalize_response(result)
             
-            return {
-                'success': normalized['success'],
-                'data': normalized
-            }
+                return {
+                    'success': normalized.success,
+                    'data': normalized
+                }
             
-        except Exception as e:
-            _logger.error(f"3D callback işleme hatası: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'data': {'approved': False, 'error_message': str(e)}
-            }
+            except Exception as e:
+                _logger.error(f"3D callback işleme hatası: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'error_type': getattr(e, 'error_type', 'error'),
+                    'data': {'approved': False, 'error_message': str(e)}
+                }
     
+    def _prepare_3d_inquiry(self, transaction, gateway, result):
+        """
+        Onay bildiren imzasız (INQUIRY) callback için durum sorgusunu hazırla
+
+        Returns:
+            GatewayRequest: Sorgu gerekiyorsa istek verisi; gerekmiyorsa None
+        """
+        from odoo.addons.mews_pos.lib.callback_verifier import INQUIRY
+
+        if gateway.callback_hash_scheme != INQUIRY or not result.get('approved'):
+            return None
+        return gateway.prepare_status_request(
+            self._build_reference_data(transaction, float(transaction.total_amount))
+        )
+
+    def _confirm_3d_result(self, transaction, result, status):
+        """Callback sonucunu banka durum sorgusunun sonucuyla teyit et"""
+        from odoo.addons.mews_pos.lib.callback_verifier import CallbackVerifier
+
+        return CallbackVerifier.confirm(result, status, key=(self.env.cr.dbname, transaction.bank_id.id))
+
     def process_non_secure_payment(self, transaction, card_data):
         """Non-Secure ödeme işle"""
         from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
@@ -100,56 +164,43 @@ class PaymentGatewayService:
         # Gateway oluştur
         gateway = self._create_gateway(bank, GatewayFactory)
         
-        # Sipariş verisi
-        order_data = {
-            'id': transaction.transaction_id,
-            'amount': float(transaction.total_amount),
-            'currency': transaction.currency,
-            'installment': int(transaction.installment_count),
-            'ip_address': transaction.ip_address or '127.0.0.1',
-            'email': transaction.order_id.partner_id.email if transaction.order_id else 'test@test.com',
-        }
-        
-        # Kart verisi
-        card = {
-            'number':  card_data.get('number', '').replace(' ', ''),
-            'month': card_data.get('month', '').zfill(2),
-            'year': card_data.get('year', ''),
-            'cvv': card_data.get('cvv', ''),
-            'name': card_data.get('name', '').upper(),
-        }
+        # Sipariş ve kart verisi
+        order_data = self._build_order_data(transaction)
+        card = self._build_card_data(card_data)
         
-        try:
-            # Ödeme isteği hazırla
-            request_data = gateway.prepare_payment_request(order_data, card)
+        with self._deadline_scope(bank):
+            try:
+                # Ödeme isteği hazırla
+                request_data = gateway.prepare_payment_request(order_data, card)
             
-            # İstek gönder
-            response = gateway.make_request(
-                request_data['url'],
-                request_data['data'],
-                request_data.get('headers')
-            )
+                # İstek gönder
+                response = gateway.make_request(
+                    request_data['url'],
+                    request_data['data'],
+                    request_data.get('headers')
+                )
             
-            # Yanıtı parse et
-            result = gateway.parse_payment_response(response)
+                # Yanıtı parse et
+                result = gateway.parse_payment_response(response)
             
-            _logger.info(f"Non-secure ödeme işlendi: {transaction.transaction_id}, Başarılı: {result.get('approved')}")
+                _logger.info(f"Non-secure ödeme işlendi: {transaction.transaction_id}, Başarılı: {result.get('approved')}")
             
-            # Yanıtı normalize et
-            normalized = gateway.normalize_response(result)
+                # Yanıtı normalize et
+                normalized = gateway.normalize_response(result)
             
-            return {
-                'success': normalized['success'],
-                'data': normalized
-            }
+                return {
+                    'success': normalized.success,
+                    'data': normalized
+                }
             
-        except Exception as e:
-            _logger.error(f"Non-secure ödeme hatası: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'data': {'approved': False, 'error_message': str(e)}
-            }
+            except Exception as e:
+                _logger.error(f"Non-secure ödeme hatası: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'error_type': getattr(e, 'error_type', 'error'),
+                    'data': {'approved': False, 'error_message': str(e)}
+                }
     
     def process_cancel(self, transaction):
         """İptal işlemi"""
@@ -160,42 +211,37 @@ class PaymentGatewayService:
         # Gateway oluştur
         gateway = self._create_gateway(bank, GatewayFactory)
         
-        order_data = {
-            'id': transaction.transaction_id,
-            'amount': float(transaction.total_amount),
-            'currency': transaction.currency,
-            'host_ref_num': transaction.host_ref_num,
-            'auth_code': transaction.auth_code,
-            'transaction_id': transaction.bank_order_id,
-        }
+        order_data = self._build_reference_data(transaction, float(transaction.total_amount))
         
-        try:
-            # İptal isteği hazırla
-            request_data = gateway.prepare_cancel_request(order_data)
+        with self._deadline_scope(bank):
+            try:
+                # İptal isteği hazırla
+                request_data = gateway.prepare_cancel_request(order_data)
             
-            # İstek gönder
-            response = gateway.make_request(
-                request_data['url'],
-                request_data['data'],
-                request_data.get('headers')
-            )
+                # İstek gönder
+                response = gateway.make_request(
+                    request_data['url'],
+                    request_data['data'],
+                    request_data.get('headers')
+                )
             
-            # Yanıtı parse et
-            result = gateway.parse_payment_response(response)
+                # Yanıtı parse et
+                result = gateway.normalize_response(gateway.parse_payment_response(response))
             
-            _logger.info(f"İptal işlendi: {transaction.transaction_id}, Başarılı: {result.get('approved')}")
+                _logger.info(f"İptal işlendi: {transaction.transaction_id}, Başarılı: {result.success}")
             
-            return {
-                'success': result.get('approved', False),
-                'data': result
-            }
+                return {
+                    'success': result.success,
+                    'data': result
+                }
             
-        except Exception as e:
-            _logger.error(f"İptal hatası: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            except Exception as e:
+                _logger.error(f"İptal hatası: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'error_type': getattr(e, 'error_type', 'error'),
+                }
     
     def process_refund(self, transaction, amount=None):
         """İade işlemi"""
@@ -208,50 +254,353 @@ class PaymentGatewayService:
         
         refund_amount = amount if amount else float(transaction.total_amount)
         
-        order_data = {
-            'id': transaction.transaction_id,
-            'amount':  refund_amount,
-            'currency': transaction.currency,
-            'host_ref_num': transaction.host_ref_num,
-            'auth_code': transaction.auth_code,
-            'transaction_id': transaction.bank_order_id,
-        }
+        order_data = self._build_reference_data(transaction, refund_amount)
         
-        try:
-            # İade isteği hazırla
-            request_data = gateway.prepare_refund_request(order_data, refund_amount)
+        with self._deadline_scope(bank):
+            try:
+                # İade isteği hazırla
+                request_data = gateway.prepare_refund_request(order_data, refund_amount)
             
-            # İstek gönder
-            response = gateway.make_request(
-                request_data['url'],
-                request_data['data'],
-                request_data.get('headers')
-            )
+                # İstek gönder
+                response = gateway.make_request(
+                    request_data['url'],
+                    request_data['data'],
+                    request_data.get('headers')
+                )
+            
+                # Yanıtı parse et
+                result = gateway.normalize_response(gateway.parse_payment_response(response))
             
-            # Yanıtı parse et
-            result = gateway.parse_payment_response(response)
+                _logger.info(f"İade işlendi: {transaction.transaction_id}, Başarılı: {result.success}")
             
-            _logger.info(f"İade işlendi: {transaction.transaction_id}, Başarılı: {result.get('approved')}")
+                return {
+                    'success': result.success,
+                    'data': result
+                }
             
+            except Exception as e:
+                _logger.error(f"İade hatası: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'error_type': getattr(e, 'error_type', 'error'),
+                }
+    
+    def process_status(self, transaction):
+        """Durum sorgulama"""
+        try:
+            result = self.prepare_status_call(transaction)()
+
+            _logger.info(f"Durum sorgulandı: {transaction.transaction_id}, Durum: {result.get('status')}")
+
             return {
-                'success': result.get('approved', False),
+                'success': True,
                 'data': result
             }
-            
+
         except Exception as e:
-            _logger.error(f"İade hatası: {str(e)}")
+            _logger.error(f"Durum sorgulama hatası: {str(e)}")
             return {
                 'success': False,
-                'error':  str(e)
+                'error': str(e),
+                'error_type': getattr(e, 'error_type', 'error'),
             }
-    
+
+    def prepare_status_call(self, transaction):
+        """Durum sorgusunu ORM'e dokunmadan çalıştırılabilir hale getir"""
+        return self._prepare_reference_call(transaction, 'status')
+
+    def prepare_cancel_call(self, transaction):
+        """İptal isteğini ORM'e dokunmadan çalıştırılabilir hale getir"""
+        return self._prepare_reference_call(transaction, 'cancel')
+
+    def prepare_refund_call(self, transaction, amount=None):
+        """İade isteğini ORM'e dokunmadan çalıştırılabilir hale getir"""
+        return self._prepare_reference_call(transaction, 'refund', amount)
+
+    def _prepare_reference_call(self, transaction, operation, amount=None):
+        """
+        Orijinal işleme referans veren (durum/iptal/iade) çağrıyı hazırla
+
+        Gateway ve istek verisi çağıran thread'de hazırlanır; dönen
+        fonksiyon thread havuzunda güvenle çalıştırılabilir (toplu
+        mutabakat, toplu iade/iptal).
+
+        Returns:
+            callable: Çağrıldığında durum sorgusunda parse edilmiş banka
+                yanıtını, iptal/iadede GatewayResult döndürür
+        """
+        from odoo.addons.mews_pos.lib.deadline import Deadline
+        from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+
+        bank = transaction.bank_id
+        gateway = self._create_gateway(bank, GatewayFactory)
+        amount = amount if amount else float(transaction.total_amount)
+        order_data = self._build_reference_data(transaction, amount)
+
+        if operation == 'status':
+            request_data = gateway.prepare_status_request(order_data)
+            parse = gateway.parse_status_response
+        else:
+            if operation == 'cancel':
+                request_data = gateway.prepare_cancel_request(order_data)
+            else:
+                request_data = gateway.prepare_refund_request(order_data, amount)
+
+            def parse(response):
+                return gateway.normalize_response(gateway.parse_payment_response(response))
+        budget = self.budget or bank.request_budget
+
+        def call():
+            with Deadline.scope(budget):
+                response = gateway.make_request(
+                    request_data['url'],
+                    request_data['data'],
+                    request_data.get('headers')
+                )
+                return parse(response)
+
+        return call
+
+    # ------------------------------------------------------------------
+    # Asenkron API
+    #
+    # Aynı prepare_*/parse_* metotları asyncio transport ile kullanılır.
+    # ORM erişimi çağıran thread'de kalır; yalnızca banka çağrıları
+    # event loop üzerinde eş zamanlı yürür. Toplu işlerde:
+    #
+    #   asyncio.run(gather_limited(
+    #       [service.async_process_refund(tx) for tx in transactions], limit=50))
+    # ------------------------------------------------------------------
+
+    async def async_create_3d_form(self, transaction, card_data):
+        """3D Secure form verisi oluştur (asenkron)"""
+        from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+
+        gateway = self._create_gateway(transaction.bank_id, GatewayFactory)
+        order_data = self._build_order_data(transaction, secure=True)
+        card = self._build_card_data(card_data)
+
+        with self._deadline_scope(transaction.bank_id):
+            try:
+                form_data = await self._async_call(gateway, gateway.prepare_3d_request, order_data, card)
+
+                _logger.info(f"3D form verisi oluşturuldu: {transaction.transaction_id}")
+
+                return {
+                    'success': True,
+                    'data': form_data
+                }
+
+            except Exception as e:
+                _logger.error(f"3D form oluşturma hatası: {str(e)}")
+                raise UserError(_("3D form oluşturulamadı: %s") % str(e))
+
+    async def async_process_3d_callback(self, transaction, callback_data):
+        """3D Secure callback işle (asenkron)"""
+        from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+
+        rejected = self.verify_3d_callback(transaction, callback_data)
+        if rejected:
+            return rejected
+
+        gateway = self._create_gateway(transaction.bank_id, GatewayFactory)
+
+        with self._deadline_scope(transaction.bank_id):
+            try:
+                result = await self._async_call(gateway, gateway.parse_3d_response, callback_data)
+
+                inquiry = self._prepare_3d_inquiry(transaction, gateway, result)
+                if inquiry:
+                    response = await gateway.async_make_request(
+                        inquiry['url'],
+                        inquiry['data'],
+                        inquiry.get('headers')
+                    )
+                    status = await self._async_call(gateway, gateway.parse_status_response, response)
+                    result = self._confirm_3d_result(transaction, result, status)
+
+                _logger.info(f"3D callback işlendi: {transaction.transaction_id}, Başarılı: {result.get('approved')}")
+
+                normalized = gateway.normalize_response(result)
+
+                return {
+                    'success': normalized.success,
+                    'data': normalized
+                }
+
+            except Exception as e:
+                _logger.error(f"3D callback işleme hatası: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'error_type': getattr(e, 'error_type', 'error'),
+                    'data': {'approved': False, 'error_message': str(e)}
+                }
+
+    async def async_process_non_secure_payment(self, transaction, card_data):
+        """Non-Secure ödeme işle (asenkron)"""
+        from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+
+        gateway = self._create_gateway(transaction.bank_id, GatewayFactory)
+        order_data = self._build_order_data(transaction)
+        card = self._build_card_data(card_data)
+
+        with self._deadline_scope(transaction.bank_id):
+            try:
+                request_data = await self._async_call(gateway, gateway.prepare_payment_request, order_data, card)
+                result = await self._async_send(gateway, request_data)
+
+                _logger.info(f"Non-secure ödeme işlendi: {transaction.transaction_id}, Başarılı: {result.get('approved')}")
+
+                normalized = gateway.normalize_response(result)
+
+                return {
+                    'success': normalized.success,
+                    'data': normalized
+                }
+
+            except Exception as e:
+                _logger.error(f"Non-secure ödeme hatası: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'error_type': getattr(e, 'error_type', 'error'),
+                    'data': {'approved': False, 'error_message': str(e)}
+                }
+
+    async def async_process_cancel(self, transaction):
+        """İptal işlemi (asenkron)"""
+        from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+
+        gateway = self._create_gateway(transaction.bank_id, GatewayFactory)
+        order_data = self._build_reference_data(transaction, float(transaction.total_amount))
+
+        with self._deadline_scope(transaction.bank_id):
+            try:
+                request_data = await self._async_call(gateway, gateway.prepare_cancel_request, order_data)
+                result = gateway.normalize_response(await self._async_send(gateway, request_data))
+
+                _logger.info(f"İptal işlendi: {transaction.transaction_id}, Başarılı: {result.success}")
+
+                return {
+                    'success': result.success,
+                    'data': result
+                }
+
+            except Exception as e:
+                _logger.error(f"İptal hatası: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'error_type': getattr(e, 'error_type', 'error'),
+                }
+
+    async def async_process_refund(self, transaction, amount=None):
+        """İade işlemi (asenkron)"""
+        from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+
+        gateway = self._create_gateway(transaction.bank_id, GatewayFactory)
+        refund_amount = amount if amount else float(transaction.total_amount)
+        order_data = self._build_reference_data(transaction, refund_amount)
+
+        with self._deadline_scope(transaction.bank_id):
+            try:
+                request_data = await self._async_call(gateway, gateway.prepare_refund_request, order_data, refund_amount)
+                result = gateway.normalize_response(await self._async_send(gateway, request_data))
+
+                _logger.info(f"İade işlendi: {transaction.transaction_id}, Başarılı: {result.success}")
+
+                return {
+                    'success': result.success,
+                    'data': result
+                }
+
+            except Exception as e:
+                _logger.error(f"İade hatası: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'error_type': getattr(e, 'error_type', 'error'),
+                }
+
+    async def _async_call(self, gateway, method, *args):
+        """prepare/parse metodunu çalıştır; senkron ağ çağrısı yapan gateway'lerde thread kullan"""
+        if getattr(gateway, 'blocking_io', False):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def _async_send(self, gateway, request_data):
+        """Hazırlanan isteği asenkron gönder ve yanıtı parse et"""
+        response = await gateway.async_make_request(
+            request_data['url'],
+            request_data['data'],
+            request_data.get('headers')
+        )
+        return await self._async_call(gateway, gateway.parse_payment_response, response)
+
+    def _build_order_data(self, transaction, secure=False):
+        """Gateway'e gidecek sipariş verisini hazırla"""
+        order_data = {
+            'id': transaction.transaction_id,
+            'amount': float(transaction.total_amount),
+            'currency': transaction.currency,
+            'installment': int(transaction.installment_count),
+            'ip_address': transaction.ip_address or '127.0.0.1',
+            'email': transaction.order_id.partner_id.email if transaction.order_id else 'test@test.com',
+        }
+        if secure:
+            order_data.update({
+                'success_url': transaction._get_callback_url('success'),
+                'fail_url': transaction._get_callback_url('fail'),
+                'lang': 'tr',
+            })
+        return order_data
+
+    def _build_card_data(self, card_data):
+        """Kart verisini gateway formatına çevir"""
+        return {
+            'number': card_data.get('number', '').replace(' ', ''),
+            'month': card_data.get('month', '').zfill(2),
+            'year': card_data.get('year', ''),
+            'cvv': card_data.get('cvv', ''),
+            'name': card_data.get('name', '').upper(),
+        }
+
+    def _build_reference_data(self, transaction, amount):
+        """İptal/iade için orijinal işlem referanslarını hazırla"""
+        return {
+            'id': transaction.transaction_id,
+            'amount': amount,
+            'currency': transaction.currency,
+            'host_ref_num': transaction.host_ref_num,
+            'auth_code': transaction.auth_code,
+            'transaction_id': transaction.bank_order_id,
+        }
+
+    def _deadline_scope(self, bank):
+        """İşlemin banka çağrıları için süre bütçesi kapsamı"""
+        from odoo.addons.mews_pos.lib.deadline import Deadline
+
+        return Deadline.scope(self.budget or bank.request_budget)
+
     def _create_gateway(self, bank, GatewayFactory):
         """Gateway instance oluştur"""
-        config = bank.get_account_config()
         gateway_type = bank.gateway_type
-        
+
         try:
-            gateway = GatewayFactory.create(gateway_type, config)
-            return gateway
+            config = bank.get_compiled_config()
+            # Devre kesici ve limit (veritabanı, banka) başına tekildir; önbellekteki
+            # paylaşılan instance'a yalnızca oluşturulurken atanır
+            breaker = bank._get_circuit_breaker()
+            limiter = bank._get_concurrency_limiter()
+
+            def setup(gateway):
+                gateway.circuit_breaker = breaker
+                gateway.concurrency_limiter = limiter
+
+            return GatewayFactory.create(
+                gateway_type, config, cache_key=(self.env.cr.dbname, bank.id, config.version), setup=setup,
+            )
         except ValueError as e:
             raise UserError(str(e))
\ No newline at end of file
@@ -5,6 +5,8 @@ import json
 import logging
 from odoo import api, models, _
 from odoo. exceptions import UserError
+from odoo.addons.mews_pos.lib.session_pool import SessionPool
+from odoo.addons.mews_pos.lib.deadline import Deadline
 
 _logger = logging. getLogger(__name__)
 
@@ -35,10 +37,11 @@ class PhpGatewayService:
             _logger.info(f"PHP Gateway isteği: {action}")
             _logger.debug(f"Payload: {json.dumps(payload, indent=2)}")
             
-            response = requests.post(
+            session = SessionPool.get_session(self.gateway_url)
+            response = session.post(
                 self. gateway_url,
                 json=payload,
-                timeout=self.timeout,
+                timeout=Deadline.remaining_timeout(self.timeout),
                 headers={'Content-Type': 'application/json'}
             )
             
@@ -0,0 +1,115 @@
+/** @odoo-module **/
+
+// Sürümlü BIN -> banka haritası
+//
+// Sunucu, mews.pos.bin kayıtlarından içerik özetiyle sürümlenen sıkıştırılmış
+// bir harita yayınlar (/mews_pos/bin_map/<sürüm>.json, bir yıl önbelleklenir).
+// Harita sayfa başına bir kez indirilir; banka tespiti tarayıcıda, sunucu
+// indeksiyle (lib/bin_index.py) aynı kurallarla yapılır.
+
+const KEY_DIGITS = 8;
+const MIN_DIGITS = 6;
+const DEFAULT_URL = "/mews_pos/bin_map";
+
+const loading = {};
+
+export class BinMap {
+    /**
+     * @param {Object} data {banks: [[id, ad, kod], ...], segments: [boşluk, uzunluk - 1, banka, ...]}
+     */
+    constructor(data) {
+        this.banks = data.banks.map(([id, name, code]) => ({ id, name, code }));
+        const segments = data.segments;
+        const count = segments.length / 3;
+        this.starts = new Int32Array(count);
+        this.ends = new Int32Array(count);
+        this.owners = new Int32Array(count);
+
+        let next = 0;
+        for (let i = 0; i < count; i++) {
+            const start = next + segments[i * 3];
+            const end = start + segments[i * 3 + 1];
+            this.starts[i] = start;
+            this.ends[i] = end;
+            this.owners[i] = segments[i * 3 + 2];
+            next = end + 1;
+        }
+    }
+
+    // Başlangıcı key'den büyük olmayan son parça (yoksa -1)
+    _segment(key) {
+        let low = 0;
+        let high = this.starts.length - 1;
+        let found = -1;
+        while (low <= high) {
+            const middle = (low + high) >> 1;
+            if (this.starts[middle] <= key) {
+                found = middle;
+                low = middle + 1;
+            } else {
+                high = middle - 1;
+            }
+        }
+        return found;
+    }
+
+    /**
+     * Kart numarasının bankası
+     *
+     * 8 hane varsa en özel kaydın bankası; 6-7 hanede yalnızca olası tüm
+     * kayıtlar aynı bankaya aitse o banka.
+     *
+     * @param {string} cardNumber Kart numarası veya ilk haneleri
+     * @returns {Object|null} {id, name, code}
+     */
+    lookup(cardNumber) {
+        const digits = String(cardNumber || "").replace(/\D/g, "").substring(0, KEY_DIGITS);
+        if (digits.length < MIN_DIGITS) {
+            return null;
+        }
+        const low = parseInt(digits.padEnd(KEY_DIGITS, "0"), 10);
+        const high = parseInt(digits.padEnd(KEY_DIGITS, "9"), 10);
+
+        let position = this._segment(low);
+        if (position < 0 || this.ends[position] < low) {
+            position++;
+        }
+        let owner = -1;
+        for (; position < this.starts.length && this.starts[position] <= high; position++) {
+            if (owner === -1) {
+                owner = this.owners[position];
+            } else if (owner !== this.owners[position]) {
+                return null;
+            }
+        }
+        return owner === -1 ? null : this.banks[owner];
+    }
+}
+
+/**
+ * Haritayı indir (aynı URL için tek istek)
+ *
+ * @param {string} [url] Sürümlü URL; verilmezse güncel sürüme yönlendiren adres
+ * @returns {Promise<BinMap>}
+ */
+export function loadBinMap(url) {
+    url = url || DEFAULT_URL;
+    if (!loading[url]) {
+        loading[url] = fetch(url, { credentials: "same-origin" })
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error(`BIN haritası alınamadı: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then((data) => new BinMap(data))
+            .catch((error) => {
+                delete loading[url];
+                throw error;
+            });
+    }
+    return loading[url];
+}
+
+// Modül olmayan installment_calculator.js için
+window.mewsPosBinMap = { load: loadBinMap };
@@ -17,43 +17,67 @@ function setupCardNumberListener() {
             var cardNumber = $(this).val().replace(/\s/g, '');
             if (cardNumber.length >= 6) {
                 detectBankFromCard(cardNumber);
+            } else {
+                lastDetectedBankKey = null;
             }
         });
     });
 }
 
-// Kart numarasından banka tespiti
+// Banka renkleri (banka koduna göre)
+var bankColors = {
+    yapikredi: '#005eb8',
+    isbank: '#004b93',
+    garanti: '#00a650',
+    akbank: '#f15a29',
+    ziraat: '#e30613',
+    halkbank: '#0a4ea2',
+    vakifbank: '#fdb913',
+    qnb: '#5c2d91',
+    denizbank: '#004a98'
+};
+var defaultBankColor = '#6c757d';
+
+// Son tespit edilen banka (taksitler yalnızca banka değişince yüklenir)
+var lastDetectedBankKey = null;
+
+// Kart numarasından banka tespiti (sunucudaki sürümlü BIN haritasıyla, yerel)
 function detectBankFromCard(cardNumber) {
-    var bin = cardNumber.substring(0, 6);
-    
-    // Banka BIN numaraları
-    var bankBins = {
-        '450634': { id: 1, name: 'Yapı Kredi', code: 'yapikredi', color: '#005eb8' },
-        '454671': { id: 2, name: 'İş Bankası', code: 'isbank', color: '#004b93' },
-        '415514': { id: 3, name: 'Garanti BBVA', code: 'garanti', color: '#00a650' },
-        '540667': { id: 4, name: 'Akbank', code: 'akbank', color: '#f15a29' },
-        '552608': { id: 5, name: 'Maximum', code: 'maximum', color: '#e30613' },
-        '453144': { id: 6, name: 'Bonus', code: 'bonus', color: '#ff5a00' },
-        '546001': { id: 7, name: 'Axess', code: 'axess', color: '#2a388f' }
-    };
-    
-    var detectedBank = null;
-    for (var binPrefix in bankBins) {
-        if (bin.startsWith(binPrefix)) {
-            detectedBank = bankBins[binPrefix];
-            break;
+    var container = document.getElementById('o_payment_installments_container');
+    var mapUrl = container ? container.dataset.binMapUrl : null;
+
+    window.mewsPosBinMap.load(mapUrl).then(function(binMap) {
+        var bank = binMap.lookup(cardNumber.substring(0, 8));
+        var bankKey = bank ? bank.id : 'all';
+
+        if (bank) {
+            showCardInfo({
+                id: bank.id,
+                name: bank.name,
+                code: bank.code,
+                color: bankColors[bank.code] || defaultBankColor
+            }, cardNumber);
+        } else {
+            hideCardInfo();
         }
-    }
-    
-    if (detectedBank) {
-        console.log('Bank detected:', detectedBank.name);
-        showCardInfo(detectedBank, cardNumber);
-        loadInstallmentsForBank(detectedBank.id);
-    } else {
-        console.log('Bank not detected, showing all banks');
+
+        if (bankKey === lastDetectedBankKey) {
+            return;
+        }
+        lastDetectedBankKey = bankKey;
+        if (bank) {
+            loadInstallmentsForBank(bank.id);
+        } else {
+            loadAllInstallments();
+        }
+    }).catch(function(error) {
+        console.error('BIN haritası yüklenemedi:', error);
         hideCardInfo();
-        loadAllInstallments();
-    }
+        if (lastDetectedBankKey !== 'all') {
+            lastDetectedBankKey = 'all';
+            loadAllInstallments();
+        }
+    });
 }
 
 // Kart bilgilerini göster
@@ -2,6 +2,7 @@
 
 import publicWidget from "@web/legacy/js/public/public_widget";
 import { rpc } from "@web/core/network/rpc";
+import { loadBinMap } from "./bin_map";
 
 publicWidget.registry.MewsPosPaymentForm = publicWidget.Widget.extend({
     selector: ".mews-pos-payment-form",
@@ -25,13 +26,20 @@ publicWidget.registry.MewsPosPaymentForm = publicWidget.Widget.extend({
         this.originalAmount = parseFloat(formData.amount) || 0;
         this.amount = this.originalAmount;
         this.categoryIds = formData.categoryIds || "";
-        this.currentBin = null;
+        this.currentKey = null;
+        this.installmentCache = new Map();
         this.selectedInstallmentCount = 1;
         this.selectedTotalAmount = this.originalAmount;
 
         // Odoo payment formunu bul
         this.paymentForm = document.querySelector('form[name="o_payment_submit_form"]');
 
+        // BIN haritası önceden indirilir; yüklenemezse banka sunucuda BIN ile tespit edilir
+        this.binMapPromise = loadBinMap(formData.binMapUrl).catch((error) => {
+            console.warn("Mews POS: BIN haritası yüklenemedi:", error);
+            return null;
+        });
+
         return Promise.resolve();
     },
 
@@ -54,16 +62,12 @@ publicWidget.registry.MewsPosPaymentForm = publicWidget.Widget.extend({
             cardPreview.textContent = visibleValue;
         }
 
-        // BIN değiştiğinde kontrol et
+        // Banka yerel BIN haritasından bulunur; taksitler yalnızca banka değişince yüklenir
         if (value.length >= 6) {
-            const bin = value.substring(0, 6);
-            if (bin !== this.currentBin) {
-                this.currentBin = bin;
-                this._loadInstallments(bin);
-            }
+            this._onBinChange(value.substring(0, 8));
         } else {
             // BIN yeterli değilse taksit seçeneklerini temizle
-            this.currentBin = null;
+            this.currentKey = null;
             this._clearInstallments();
             this.selectedInstallmentCount = 1;
             this.selectedTotalAmount = this.originalAmount;
@@ -161,22 +165,55 @@ publicWidget.registry.MewsPosPaymentForm = publicWidget.Widget.extend({
         if (infoDiv) infoDiv.style.display = 'none';
     },
 
-    async _loadInstallments(bin) {
+    async _onBinChange(digits) {
+        const binMap = await this.binMapPromise;
+        let params;
+        if (binMap) {
+            const bank = binMap.lookup(digits);
+            params = bank ? { bank_id: bank.id } : {};
+        } else {
+            params = { bin_number: digits };
+        }
+
+        // Harita beklenirken kart numarası kısaldıysa veya banka aynıysa yükleme yok
+        const value = this.el.querySelector("#card_number")?.value.replace(/\D/g, "") || "";
+        const key = JSON.stringify(params);
+        if (value.length < 6 || key === this.currentKey) return;
+        this.currentKey = key;
+        this._loadInstallments(params, key);
+    },
+
+    async _loadInstallments(params, key) {
         if (!this.installmentContainer) return;
 
+        // Aynı banka için yanıt sayfa boyunca tekrar kullanılır
+        const cached = this.installmentCache.get(key);
+        if (cached) {
+            this._renderInstallments(cached);
+            return;
+        }
+
         this.installmentContainer.innerHTML = '<span class="text-muted">Taksit seçenekleri yükleniyor...</span>';
 
         try {
             const result = await rpc("/mews_pos/get_payment_installments", {
                 amount: this.amount,
-                bin_number: bin,
                 category_ids: this.categoryIds,
+                ...params,
             });
 
-            this._renderInstallments(result);
+            this.installmentCache.set(key, result);
+            // Yanıt gelene kadar başka bir karta geçildiyse eski sonucu gösterme
+            if (key === this.currentKey) {
+                this._renderInstallments(result);
+            }
         } catch (error) {
             console.error("Mews POS installments error:", error);
-            this.installmentContainer.innerHTML = '<span class="text-danger">Taksit seçenekleri alınamadı.</span>';
+            if (key === this.currentKey) {
+                // Sonraki girişte tekrar denensin
+                this.currentKey = null;
+                this.installmentContainer.innerHTML = '<span class="text-danger">Taksit seçenekleri alınamadı.</span>';
+            }
         }
     },
 
@@ -1,4 +1,15 @@
 # -*- coding: utf-8 -*-
 
 from . import test_installment
-from . import test_transaction
\ No newline at end of file
+from . import test_transaction
+from . import test_gateway_transport
+from . import test_async_transport
+from . import test_reconciliation
+from . import test_mass_action
+from . import test_bank_simulator
+from . import test_benchmarks
+from . import test_xml_utils
+from . import test_callback_verifier
+from . import test_bin_index
+from . import test_bin_import
+from . import test_soap_client
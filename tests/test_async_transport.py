@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from odoo.tests.common import TransactionCase
+from odoo.addons.mews_pos.lib.async_transport import (
+    AsyncHttpTransport, AsyncTimeoutError, AsyncHTTPError, AsyncTransportError, gather_limited,
+)
+from odoo.addons.mews_pos.lib.gateways.payfor_gateway import PayForGateway
+from odoo.addons.mews_pos.lib.deadline import Deadline, DeadlineExceeded
+from odoo.addons.mews_pos.lib.concurrency_limiter import ConcurrencyLimiter
+
+
+class _StubBankHandler(BaseHTTPRequestHandler):
+    """Test için yerel banka taklidi"""
+
+    protocol_version = 'HTTP/1.1'
+
+    # İstek yapan istemci portları (bağlantı yeniden kullanımı testleri için)
+    client_ports = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type='text/plain; charset=utf-8', chunked=False):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i in range(0, len(body), 7):
+                part = body[i:i + 7]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(part), part))
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self.client_ports.append(self.client_address[1])
+        if self.path.startswith('/slow'):
+            time.sleep(1)
+        if self.path == '/close':
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header('Connection', 'close')
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+            return
+        self._send(200, self.path)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+
+        if self.path == '/error':
+            self._send(500, 'Sunucu hatası')
+        elif self.path == '/payfor':
+            approved = form.get('TotalAmount') == '10050'
+            self._send(200, (
+                f"OrderId={form.get('OrderId')}&ProcReturnCode={'00' if approved else '05'}"
+                f"&AuthCode=123456&HostRefNum=999&ErrMsg="
+            ), chunked=True)
+        else:
+            self._send(200, '&'.join(f"{k}={v}" for k, v in sorted(form.items())))
+
+
+class TestAsyncTransport(TransactionCase):
+    """asyncio gateway transport testleri (yerel stub sunucu ile)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubBankHandler)
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def _run(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_post_form(self):
+        """Form verisi gönderilir ve yanıt okunur"""
+        async def scenario():
+            transport = AsyncHttpTransport.for_loop()
+            return await transport.request('POST', self.base_url + '/echo', data={'a': '1', 'b': 'ğ'})
+
+        response = self._run(scenario())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, 'a=1&b=ğ')
+
+    def test_get_params(self):
+        """GET parametreleri query string'e eklenir"""
+        async def scenario():
+            return await AsyncHttpTransport().request('GET', self.base_url + '/status?x=1', data={'y': '2'})
+
+        self.assertEqual(self._run(scenario()).text, '/status?x=1&y=2')
+
+    def test_timeout(self):
+        """Süre aşımında AsyncTimeoutError fırlatılır"""
+        async def scenario():
+            return await AsyncHttpTransport().request('GET', self.base_url + '/slow', timeout=0.2)
+
+        with self.assertRaises(AsyncTimeoutError):
+            self._run(scenario())
+
+    def test_timeout_covers_connection_wait(self):
+        """Host limiti dolunca boş bağlantı beklemek de süre sınırına dahildir"""
+        async def scenario():
+            transport = AsyncHttpTransport()
+            busy = asyncio.ensure_future(transport.request('GET', self.base_url + '/slow', max_connections=1))
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            with self.assertRaises(AsyncTimeoutError):
+                await transport.request('GET', self.base_url + '/status', timeout=0.2, max_connections=1)
+            waited = time.monotonic() - started
+
+            # Farklı limitle gelen çağıran aynı host'ta ilk limite takılmaz
+            response = await transport.request('GET', self.base_url + '/status', timeout=0.5, max_connections=2)
+            await busy
+            return waited, response
+
+        waited, response = self._run(scenario())
+        self.assertLess(waited, 0.6)
+        self.assertEqual(response.text, '/status')
+
+    def test_http_error(self):
+        """5xx yanıtında raise_for_status hata verir"""
+        async def scenario():
+            response = await AsyncHttpTransport().request('POST', self.base_url + '/error', data={})
+            response.raise_for_status()
+
+        with self.assertRaises(AsyncHTTPError):
+            self._run(scenario())
+
+    def test_gateway_prepare_parse_unchanged(self):
+        """Mevcut prepare/parse metotları asenkron transport ile çalışır"""
+        gateway = PayForGateway({
+            'environment': 'test',
+            'merchant_id': '085300000009704',
+            'username': 'QNB_API',
+            'password': 'secret',
+            'payment_api_url': self.base_url + '/payfor',
+        })
+        order = {'id': 'ORDER-1', 'amount': 100.50, 'installment': 1}
+        card = {'number': '4155650100416111', 'month': '01', 'year': '30', 'cvv': '715', 'name': 'TEST'}
+
+        async def scenario():
+            request_data = gateway.prepare_payment_request(order, card)
+            response = await gateway.async_make_request(
+                request_data['url'], request_data['data'], request_data.get('headers')
+            )
+            return gateway.parse_payment_response(response)
+
+        result = self._run(scenario())
+        self.assertTrue(result['approved'])
+        self.assertEqual(result['order_id'], 'ORDER-1')
+        self.assertEqual(result['auth_code'], '123456')
+
+    def test_deadline_limits_async_call(self):
+        """Asenkron çağrı da yalnızca kalan bütçe kadar bekler"""
+        gateway = PayForGateway({'environment': 'test'})
+
+        async def scenario():
+            with Deadline.scope(0.3):
+                return await gateway.async_make_request(self.base_url + '/slow', {}, method='GET')
+
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            self._run(scenario())
+        self.assertLess(time.monotonic() - started, 0.9)
+
+    def test_limiter_queues_async_burst(self):
+        """Asenkron ani yük bankaya max_in_flight ile sınırlı gider"""
+        gateway = PayForGateway({'environment': 'test'})
+        gateway.concurrency_limiter = ConcurrencyLimiter(('async_test', 1), max_in_flight=3, queue_timeout=10)
+
+        async def scenario():
+            return await gather_limited(
+                [gateway.async_make_request(self.base_url + '/echo', {'i': str(i)}) for i in range(20)],
+                limit=20,
+            )
+
+        responses = self._run(scenario())
+        stats = gateway.concurrency_limiter.stats()
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertEqual(stats['acquired'], 20)
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertGreater(stats['max_queue_depth'], 0)
+
+    def test_keep_alive_reuses_connection(self):
+        """Aynı host'a ardışık istekler tek bağlantı üzerinden gider"""
+        _StubBankHandler.client_ports.clear()
+
+        async def scenario():
+            transport = AsyncHttpTransport()
+            for i in range(3):
+                response = await transport.request('GET', self.base_url + f'/status?i={i}')
+                self.assertEqual(response.text, f'/status?i={i}')
+            await transport.close()
+            return transport.stats
+
+        self.assertEqual(self._run(scenario()), {'opened': 1, 'reused': 2})
+        self.assertEqual(len(set(_StubBankHandler.client_ports)), 1)
+
+    def test_connection_close_not_reused(self):
+        """Sunucu Connection: close dediyse bağlantı havuza dönmez"""
+        async def scenario():
+            transport = AsyncHttpTransport()
+            for _ in range(2):
+                self.assertEqual((await transport.request('GET', self.base_url + '/close')).text, 'ok')
+            return transport.stats
+
+        self.assertEqual(self._run(scenario()), {'opened': 2, 'reused': 0})
+
+    def test_header_injection_rejected(self):
+        """CR/LF içeren başlık değeri gönderilmeden reddedilir"""
+        _StubBankHandler.client_ports.clear()
+
+        async def scenario():
+            headers = {'X-Order': 'ORD-1\r\nX-Injected: 1'}
+            return await AsyncHttpTransport().request('GET', self.base_url + '/status', headers=headers)
+
+        with self.assertRaises(AsyncTransportError):
+            self._run(scenario())
+        self.assertEqual(_StubBankHandler.client_ports, [])
+
+    def test_many_concurrent_calls(self):
+        """Yüzlerce çağrı tek thread üzerinde eş zamanlı tamamlanır"""
+        async def scenario():
+            transport = AsyncHttpTransport.for_loop()
+            return await gather_limited(
+                [transport.request('POST', self.base_url + '/echo', data={'i': str(i)}) for i in range(200)],
+                limit=50,
+            )
+
+        responses = self._run(scenario())
+        self.assertEqual(len(responses), 200)
+        self.assertEqual(sorted(r.text for r in responses), sorted(f"i={i}" for i in range(200)))
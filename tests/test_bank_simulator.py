@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+import requests
+
+from odoo.tests.common import TransactionCase
+from odoo.addons.mews_pos.lib.session_pool import SessionPool
+from odoo.addons.mews_pos.lib.gateways.estpos_gateway import EstPosGateway
+from odoo.addons.mews_pos.lib.gateways.garanti_gateway import GarantiGateway
+from odoo.addons.mews_pos.lib.gateways.posnet_gateway import PosNetGateway
+from odoo.addons.mews_pos.lib.gateways.payflex_gateway import PayFlexGateway
+from odoo.addons.mews_pos.lib.gateways.interpos_gateway import InterPosGateway
+from odoo.addons.mews_pos.lib.gateways.tosla_gateway import ToslaGateway
+from odoo.addons.mews_pos.tools.bank_simulator import (
+    BankSimulator, EstProtocol, LatencyModel, Profile, serve,
+)
+
+CARD = {'number': '4546711234567894', 'month': '12', 'year': '30', 'cvv': '000', 'name': 'Test Kart'}
+
+
+class TestBankSimulator(TransactionCase):
+    """Yerel banka simülatörü testleri"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = serve(port=0, seed=1)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        SessionPool.close_all()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.server.simulator.reset()
+        self.server.simulator.profiles.clear()
+
+    def _config(self, protocol, **extra):
+        base = self.server.base_url
+        return dict({
+            'environment': 'test',
+            'client_id': '700655000200',
+            'merchant_id': '6706598320',
+            'terminal_id': '67005551',
+            'username': 'api',
+            'password': 'secret',
+            'store_key': 'TRPS0200',
+            'payment_api_url': f"{base}/{protocol}/api",
+            'gateway_3d_url': f"{base}/{protocol}/3d",
+        }, **extra)
+
+    def _order(self, order_id, amount=100.0):
+        return {
+            'id': order_id,
+            'amount': amount,
+            'installment': 1,
+            'currency': 'TRY',
+            'success_url': 'https://shop.example.com/ok',
+            'fail_url': 'https://shop.example.com/fail',
+        }
+
+    def _send(self, gateway, request):
+        return gateway.make_request(request['url'], request['data'], request.get('headers'))
+
+    def test_api_round_trip(self):
+        """Gateway istekleri simülatörde işlenir ve gateway tarafından onaylı ayrıştırılır"""
+        gateways = {
+            'est': EstPosGateway,
+            'garanti': GarantiGateway,
+            'payflex': PayFlexGateway,
+            'interpos': InterPosGateway,
+            'tosla': ToslaGateway,
+        }
+        for protocol, gateway_class in gateways.items():
+            with self.subTest(protocol=protocol):
+                gateway = gateway_class(self._config(protocol))
+                order = self._order(f"{protocol.upper()}-1")
+                response = self._send(gateway, gateway.prepare_payment_request(order, CARD))
+                self.assertTrue(gateway.parse_payment_response(response)['approved'])
+
+                response = self._send(gateway, gateway.prepare_refund_request(order, 40.0))
+                self.assertTrue(gateway.parse_payment_response(response)['approved'])
+
+    def test_est_status_and_refund_limit(self):
+        """Sipariş durumu iptal/iade sonrası tutarlı döner"""
+        gateway = EstPosGateway(self._config('est'))
+        order = self._order('EST-STATUS')
+        self._send(gateway, gateway.prepare_payment_request(order, CARD))
+
+        response = self._send(gateway, gateway.prepare_refund_request(order, 150.0))
+        self.assertFalse(gateway.parse_payment_response(response)['approved'])
+
+        self._send(gateway, gateway.prepare_refund_request(order))
+        response = self._send(gateway, gateway.prepare_status_request(order))
+        self.assertEqual(gateway.parse_status_response(response)['status'], 'refunded')
+
+        response = self._send(gateway, gateway.prepare_status_request(self._order('EST-NONE')))
+        self.assertEqual(gateway.parse_status_response(response)['status'], 'not_found')
+
+    def test_threed_callback(self):
+        """3D formu mağazaya dönülecek otomatik gönderimli formu üretir"""
+        self.server.simulator.profiles['est'] = Profile(store_key='TRPS0200')
+        gateway = EstPosGateway(self._config('est'))
+        form = gateway.prepare_3d_request(self._order('EST-3D'), CARD)
+
+        response = requests.post(form['gateway_url'], data=form['inputs'], timeout=5)
+        self.assertIn('action="https://shop.example.com/ok"', response.text)
+        self.assertIn('name="mdStatus" value="1"', response.text)
+
+    def test_posnet_oos_flow(self):
+        """PosNet OOS isteği, 3D dönüşü ve provizyon simülatör üzerinden tamamlanır"""
+        self.server.simulator.profiles['posnet'] = Profile(callback='post')
+        gateway = PosNetGateway(self._config('posnet'))
+        form = gateway.prepare_3d_request(self._order('POSNET-1'), CARD)
+
+        with unittest_patch_post() as posted:
+            response = requests.post(form['gateway_url'], data=form['inputs'], timeout=5)
+        callback = json.loads(response.text)['fields']
+        result = gateway.parse_3d_response(callback)
+
+        self.assertTrue(result['approved'])
+        self.assertEqual(result['order_id'], 'POSNET-1')
+        self.assertEqual(posted, [form['inputs']['merchantReturnURL']])
+
+    def test_faults(self):
+        """Hata oranları ve reddetme profili uygulanır"""
+        simulator = BankSimulator({'default': {'decline_rate': 1.0}}, seed=1)
+        status, _type, body = simulator.handle('/tosla/api', json.dumps({'OrderId': 'X'}), 'application/json')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)['ResultStatus'], 'Failed')
+
+        simulator = BankSimulator({'default': {'http_error_rate': 1.0}}, seed=1)
+        self.assertEqual(simulator.handle('/tosla/api', '{}', 'application/json')[0], 503)
+        self.assertEqual(simulator.stats.snapshot()['protocols']['tosla']['api']['http_error']['count'], 1)
+        self.assertEqual(simulator.handle('/unknown/api', '', '')[0], 404)
+
+    def test_latency_model(self):
+        """Gecikme tanımları milisaniyeden saniyeye çevrilir"""
+        self.assertEqual(LatencyModel('fixed:50').sample(), 0.05)
+        self.assertTrue(0.02 <= LatencyModel('uniform:20:80').sample() <= 0.08)
+        with self.assertRaises(ValueError):
+            LatencyModel('gamma:1')
+
+    def test_est_callback_signature(self):
+        """EST ver3 imzası sıralı alanlar ve store key ile üretilir"""
+        params = {'b': 'x|y', 'A': '1', 'encoding': 'utf-8'}
+        plain = '1|x\\|y|KEY'
+        import base64
+        import hashlib
+        expected = base64.b64encode(hashlib.sha512(plain.encode()).digest()).decode()
+        self.assertEqual(EstProtocol.sign(params, 'KEY'), expected)
+
+
+class unittest_patch_post:
+    """Sunucu taraflı callback gönderimini yakalar"""
+
+    def __enter__(self):
+        from unittest.mock import patch
+        self.posted = []
+        self._patch = patch(
+            'odoo.addons.mews_pos.tools.bank_simulator.BankSimulator._post_callback',
+            side_effect=lambda protocol, url, callback, delay: self.posted.append(url),
+            autospec=False,
+        )
+        self._patch.start()
+        return self.posted
+
+    def __exit__(self, *exc):
+        self._patch.stop()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from odoo.addons.mews_pos.tools.benchmarks import harness
+from odoo.addons.mews_pos.tools.benchmarks import gateways as gateway_benchmark
+from odoo.addons.mews_pos.tools.benchmarks import xml_serializer
+from odoo.addons.mews_pos.tools.benchmarks import startup
+from odoo.addons.mews_pos.tools.benchmarks import hashing
+from odoo.addons.mews_pos.tools.benchmarks import installments
+from odoo.addons.mews_pos.tools.benchmarks import bin_index as bin_benchmark
+
+QUICK = {'min_time': 0, 'min_iterations': 3, 'warmup': 1}
+
+
+class TestGatewayBenchmark(TransactionCase):
+    """Gateway benchmark'ı testleri"""
+
+    def test_recorded_responses_approved(self):
+        """Kayıtlı yanıtlar tüm gateway'lerde onaylı işlenir"""
+        cases = gateway_benchmark.build_cases(gateway_benchmark.load_recorded())
+        self.assertEqual(gateway_benchmark.check_cases(cases), [])
+
+    def test_run_reports_all_operations(self):
+        """Her gateway ve işlem için ölçüm ya da atlanma nedeni döner"""
+        results = gateway_benchmark.run(**QUICK)
+
+        self.assertEqual(
+            len(results), len(gateway_benchmark.GATEWAYS) * len(gateway_benchmark.OPERATIONS)
+        )
+        measured = results['garanti.prepare_payment_request']
+        for key in ('ops_per_sec', 'p50_us', 'p99_us', 'alloc_kib', 'alloc_blocks'):
+            self.assertIn(key, measured)
+        self.assertIn('skipped', results['kuveyt.prepare_payment_request'])
+
+    def test_compare_flags_regression(self):
+        """p50 eşikten fazla artarsa gerileme işaretlenir"""
+        baseline = {'results': {'a.op': {'p50_us': 10.0}, 'b.op': {'p50_us': 10.0}}}
+        rows = harness.compare({'a.op': {'p50_us': 11.0}, 'b.op': {'p50_us': 15.0}}, baseline, threshold=0.2)
+        self.assertEqual([row[-1] for row in rows], [False, True])
+
+
+class TestXmlSerializerBenchmark(TransactionCase):
+    """XML serileştirici benchmark'ı testleri"""
+
+    def test_gateway_shapes_verified(self):
+        """Tüm gateway istek şekilleri yakalanır ve çıktılar eşleşir"""
+        shapes = xml_serializer.collect_shapes()
+        labels = {label for label, _data, _root in shapes}
+        for name, calls in xml_serializer.REQUESTS.items():
+            for call in calls:
+                self.assertIn(f"{name}.{call}", labels)
+        self.assertEqual(xml_serializer.verify(shapes), [])
+
+    def test_run_reports_speedup(self):
+        """Her şekil için iki ölçüm ve hızlanma oranı döner"""
+        results = xml_serializer.run(**QUICK)
+        self.assertIn('garanti.prepare_payment_request.dict_to_xml', results)
+        self.assertIn('speedup', results['garanti.prepare_payment_request.render'])
+
+
+class TestHashingBenchmark(TransactionCase):
+    """Gateway hash benchmark'ı testleri"""
+
+    def test_paths_verified(self):
+        """Tüm hash yolları aynı özeti üretir"""
+        self.assertEqual(hashing.verify(hashing.build_cases()), [])
+
+    def test_run_reports_speedup(self):
+        """Önbellekli yollar eski yola göre hızlanma oranıyla raporlanır"""
+        results = hashing.run(**QUICK)
+        self.assertIn('garanti.security_data.full', results)
+        self.assertIn('speedup', results['posnet.mac.cached'])
+
+
+class TestInstallmentBenchmark(TransactionCase):
+    """Taksit motoru benchmark'ı testleri"""
+
+    def test_table_verified(self):
+        """Motor çıktısı taksit formülü ve kısıtlamalarla uyuşur"""
+        self.assertEqual(installments.verify(installments.build_table()), [])
+
+    def test_run_reports_all_cases(self):
+        """Her vaka için ölçüm döner"""
+        results = installments.run(**QUICK)
+        self.assertEqual(set(results), {'build', 'all_banks', 'bin_bank', 'categories', 'response_json'})
+        self.assertIn('p99_us', results['all_banks'])
+
+class TestBinIndexBenchmark(TransactionCase):
+    """BIN indeksi benchmark'ı testleri"""
+
+    def test_index_matches_linear_search(self):
+        """İndeks, en dar aralığı doğrusal aramayla aynı bulur"""
+        from odoo.addons.mews_pos.lib.bin_index import BinIndex
+
+        rows = bin_benchmark.build_rows(2000)
+        self.assertEqual(bin_benchmark.verify(BinIndex.build(rows), rows, samples=400), [])
+
+    def test_run_reports_all_cases(self):
+        """Her vaka için ölçüm döner"""
+        results = bin_benchmark.run(rows=2000, **QUICK)
+        self.assertEqual(set(results), {'build', 'encode_map', 'lookup_8', 'lookup_6', 'lookup_miss'})
+
+class TestStartupBenchmark(TransactionCase):
+    """Worker açılışı benchmark'ı testleri"""
+
+    def test_factory_import_is_light(self):
+        """GatewayFactory içe aktarılınca zeep/cryptography ve gateway'ler yüklenmez"""
+        result = startup.measure_target('gateway_factory', runs=1)
+        self.assertNotIn('skipped', result)
+        self.assertNotIn('zeep', result['heavy'])
+        self.assertNotIn('cryptography', result['heavy'])
+
+        loaded = startup.measure_target('first_gateway', runs=1)
+        self.assertGreater(loaded['modules'], result['modules'])
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import json
+
+from odoo.tests.common import TransactionCase
+from odoo.addons.mews_pos.lib.bin_import import (
+    BinImportError, IssuerMap, detect_format, new_report,
+    normalize_issuer, normalize_row, read_rows, stage_chunks,
+)
+
+
+class TestBinImportParsing(TransactionCase):
+    """BIN dosyası okuma ve doğrulama testleri"""
+
+    BANKS = [
+        {'id': 1, 'name': 'Garanti BBVA', 'code': 'garanti'},
+        {'id': 2, 'name': 'Türkiye İş Bankası', 'code': 'isbank'},
+        {'id': 3, 'name': 'Akbank', 'code': 'akbank'},
+    ]
+
+    CSV = (
+        '﻿BIN;Bank Name;Brand;Description\n'
+        '454671;T. Garanti Bankası A.Ş.;VISA;Bonus Classic\n'
+        '45467112;Türkiye İş Bankası A.Ş.;Visa;Maximum\n'
+        '540061;AKBANK T.A.Ş.;MasterCard;\n'
+        '12ab56;Akbank;Visa;\n'
+        '979200;Bilinmeyen Bank;Troy;\n'
+        '454671;Garanti;Visa;Tekrar\n'
+    )
+
+    def _stage(self, data, fmt, chunk_size=1000):
+        report = new_report()
+        chunks = list(stage_chunks(read_rows(io.BytesIO(data.encode()), fmt), IssuerMap(self.BANKS), report, chunk_size))
+        lines = [row for chunk in chunks for row in csv.reader(io.StringIO(chunk.getvalue()))]
+        return report, chunks, lines
+
+    def test_detect_format(self):
+        """Biçim uzantıdan, yoksa ilk baytlardan belirlenir"""
+        self.assertEqual(detect_format('bins.CSV'), 'csv')
+        self.assertEqual(detect_format('bins.ndjson'), 'jsonl')
+        self.assertEqual(detect_format(None, b'\xef\xbb\xbf [{"bin": 1}]'), 'json')
+        self.assertEqual(detect_format('upload', b'{"bin": "454671"}\n'), 'jsonl')
+        with self.assertRaises(BinImportError):
+            list(read_rows(io.BytesIO(b''), 'xlsx'))
+
+    def test_normalize_row(self):
+        """Sütun adları ve kart şemaları eşlenir; geçersiz BIN reddedilir"""
+        self.assertEqual(
+            normalize_row({'BIN': '5400 61', 'bin_end': '540069', 'Bank': 'Akbank', 'scheme': 'Master Card'}),
+            ('540061', '540069', 'Akbank', 'mastercard', 'Akbank 540061'),
+        )
+        self.assertEqual(normalize_row({'bin': 979200, 'issuer': 'X', 'brand': 'UnionPay'})[3], 'other')
+        self.assertIsNone(normalize_row({'bin': '979200', 'bin_end': '979200', 'issuer': 'X'})[1])
+        for row in ({'bin': '12345', 'issuer': 'X'}, {'bin': '454671'}, ['454671'], {'bin': '540069', 'end': '540061', 'issuer': 'X'}):
+            with self.subTest(row=row), self.assertRaises(ValueError):
+                normalize_row(row)
+
+    def test_issuer_map(self):
+        """Banka adları ekler ve Türkçe karakterlerden bağımsız eşlenir"""
+        self.assertEqual(normalize_issuer('T. Garanti Bankası A.Ş.'), 'tgaranti')
+        issuers = IssuerMap(self.BANKS, aliases={'Maximum Kart': 2})
+        self.assertEqual(issuers.resolve('T. Garanti Bankası A.Ş.'), 1)
+        self.assertEqual(issuers.resolve('TÜRKİYE İŞ BANKASI'), 2)
+        self.assertEqual(issuers.resolve('AKBANK T.A.Ş.'), 3)
+        self.assertEqual(issuers.resolve('maximum kart'), 2)
+        self.assertIsNone(issuers.resolve('Bilinmeyen Bank'))
+
+    def test_stage_csv(self):
+        """Geçersiz, tekrarlanan ve bankası bilinmeyen satırlar raporlanır"""
+        report, _chunks, lines = self._stage(self.CSV, 'csv')
+        self.assertEqual(report['rows'], 6)
+        self.assertEqual(report['staged'], 3)
+        self.assertEqual(report['invalid'], 1)
+        self.assertEqual(report['errors'][0][0], 5)
+        self.assertEqual(report['duplicates'], 1)
+        self.assertEqual(dict(report['unknown_issuers']), {'Bilinmeyen Bank': 1})
+        self.assertEqual(lines[0], ['454671', '', '1', 'visa', 'Bonus Classic'])
+        self.assertEqual(lines[2], ['540061', '', '3', 'mastercard', 'AKBANK T.A.Ş. 540061'])
+        # Bankası bulunamayan BIN tam yenilemede pasife alınmasın diye bank_id boş aktarılır
+        self.assertEqual(lines[3][:3], ['979200', '', ''])
+
+    def test_stage_json_chunks(self):
+        """JSON dizisi ve JSON Lines parçalara bölünür"""
+        rows = [{'bin': str(454600 + i), 'issuer': 'Akbank', 'card_type': 'visa'} for i in range(5)]
+        report, chunks, lines = self._stage(json.dumps({'bins': rows}), 'json', chunk_size=2)
+        self.assertEqual((report['staged'], len(chunks), len(lines)), (5, 3, 5))
+
+        data = '\n'.join(json.dumps(row) for row in rows[:2]) + '\n\n{bozuk\n'
+        report, _chunks, lines = self._stage(data, 'jsonl')
+        self.assertEqual((report['rows'], report['staged'], report['invalid']), (3, 2, 1))
+        self.assertEqual(report['errors'][0][0], 4)
+
+    def test_copy_quoting(self):
+        """Ayırıcı ve tırnak içeren açıklamalar COPY için tırnaklanır; boş alanlar NULL olur"""
+        data = 'bin,issuer,name\n454671,Akbank,"Axess, ""Platinum"""\n'
+        _report, chunks, lines = self._stage(data, 'csv')
+        self.assertEqual(chunks[0].getvalue(), '454671,,3,,"Axess, ""Platinum"""\n')
+        self.assertEqual(lines[0][4], 'Axess, "Platinum"')
+
+
+class TestBinImport(TransactionCase):
+    """mews.pos.bin toplu içe aktarım testleri"""
+
+    def setUp(self):
+        super().setUp()
+        self.bank = self.env['mews.pos.bank'].create({
+            'name': 'Test İçe Aktarım Bankası',
+            'code': 'test_import',
+            'gateway_type': 'estv3_pos',
+            'payment_model': '3d_secure',
+            'environment': 'test',
+        })
+        self.Bin = self.env['mews.pos.bin']
+
+    def _import(self, data, **kwargs):
+        return self.Bin.import_bins(io.BytesIO(data.encode()), fmt='csv', **kwargs)
+
+    def test_upsert_and_refresh(self):
+        """Yeni BIN'ler eklenir, değişenler güncellenir, olmayanlar pasife alınır"""
+        from psycopg2 import IntegrityError
+        from odoo.tools import mute_logger
+
+        report = self._import(
+            'bin,issuer,card_type,name\n'
+            '99887701,Test İçe Aktarım Bankası,visa,A\n'
+            '99887702,test_import,mastercard,B\n'
+        )
+        self.assertEqual((report['inserted'], report['updated']), (2, 0))
+        self.assertEqual(self.Bin.lookup('9988770112345678').bank_id, self.bank.id)
+
+        data = (
+            'bin,issuer,card_type,name\n'
+            '99887701,Test İçe Aktarım Bankası,visa,A\n'
+            '99887703,Test İçe Aktarım Bankası,troy,C\n'
+        )
+        dry = self._import(data, full_refresh=True, dry_run=True)
+        self.assertEqual((dry['inserted'], dry['unchanged']), (1, 1))
+        self.assertTrue(self.Bin.search([('bin_number', '=', '99887702')]).active)
+
+        report = self._import(data, full_refresh=True)
+        self.assertEqual((report['inserted'], report['updated'], report['unchanged']), (1, 0, 1))
+        self.assertEqual(report['deactivated'], dry['deactivated'])
+        self.assertFalse(self.Bin.search([('bin_number', '=', '99887702'), ('active', 'in', (True, False))]).active)
+        self.assertIsNone(self.Bin.lookup('9988770212345678'))
+        self.assertEqual(self.Bin.lookup('9988770312345678').card_type, 'troy')
+
+        # Upsert'in dayandığı benzersizlik kısıtı veritabanında tanımlıdır
+        with self.assertRaises(IntegrityError), mute_logger('odoo.sql_db'), self.env.cr.savepoint():
+            self.Bin.create({'bin_number': '99887701', 'bank_id': self.bank.id})
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from odoo.tests.common import TransactionCase
+from odoo.addons.mews_pos.lib.bin_index import BinIndex, bin_range, encode_bin_map
+
+
+class TestBinIndex(TransactionCase):
+    """Bellek içi BIN indeksi testleri"""
+
+    ROWS = [
+        ('454671', None, 1, 'visa'),
+        ('45467112', None, 2, 'visa'),
+        ('540061', '540069', 3, 'mastercard'),
+        ('65000000', '65009999', 4, 'troy'),
+        ('979200', None, 5, 'troy'),
+        ('97920011', None, 5, 'troy'),
+        ('12ab56', None, 9, 'other'),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.index = BinIndex.build(self.ROWS)
+
+    def test_bin_range(self):
+        """6 haneli BIN 8 haneli aralığa genişler; geçersiz değerler reddedilir"""
+        self.assertEqual(bin_range('454671'), (45467100, 45467199))
+        self.assertEqual(bin_range('540061', '540069'), (54006100, 54006999))
+        for value in (('12345',), ('12ab56',), ('540069', '540061'), ('540061', '54006999')):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                bin_range(*value)
+
+    def test_most_specific_match(self):
+        """8 haneli BIN, içinde bulunduğu 6 haneli BIN'i ezer"""
+        self.assertEqual(self.index.lookup_bank('4546711234567894'), 2)
+        self.assertEqual(self.index.lookup_bank('4546 7199 0000 0000'), 1)
+        self.assertEqual(self.index.lookup('45467112').bin_number, '45467112')
+        self.assertEqual(len(self.index), 6)
+
+    def test_ranges(self):
+        """BIN aralıkları sınırlarıyla eşleşir"""
+        self.assertEqual(self.index.lookup_bank('5400650000000000'), 3)
+        self.assertEqual(self.index.lookup_bank('5400699999999999'), 3)
+        self.assertIsNone(self.index.lookup_bank('5400700000000000'))
+        self.assertEqual(self.index.lookup('6500123412341234').card_type, 'troy')
+
+    def test_partial_card_number(self):
+        """6-7 hanede yalnızca olası kayıtlar tek bankaya aitse sonuç döner"""
+        self.assertIsNone(self.index.lookup_bank('454671'))
+        self.assertEqual(self.index.lookup_bank('4546719'), 1)
+        self.assertEqual(self.index.lookup_bank('979200'), 5)
+        self.assertEqual(self.index.lookup_bank('650012'), 4)
+        self.assertIsNone(self.index.lookup_bank('45467'))
+        self.assertIsNone(self.index.lookup_bank('111111'))
+
+    def test_bank_segments(self):
+        """Aynı bankanın bitişik parçaları birleştirilir"""
+        segments = self.index.bank_segments()
+        self.assertIn((97920000, 97920099, 5), segments)
+        self.assertEqual([segment for segment in segments if segment[2] == 1],
+                         [(45467100, 45467111, 1), (45467113, 45467199, 1)])
+
+    def test_encode_bin_map(self):
+        """Tarayıcı haritası indeksle aynı parçaları taşır; sürüm içerikten türetilir"""
+        banks = [{'id': bank_id, 'name': f'Banka {bank_id}', 'code': f'b{bank_id}'} for bank_id in (5, 1, 2, 3)]
+        version, body = encode_bin_map(self.index, banks)
+        data = json.loads(body)
+        self.assertEqual(data['banks'][0], [1, 'Banka 1', 'b1'])
+
+        decoded = []
+        next_start = 0
+        values = data['segments']
+        for position in range(0, len(values), 3):
+            start = next_start + values[position]
+            end = start + values[position + 1]
+            decoded.append((start, end, data['banks'][values[position + 2]][0]))
+            next_start = end + 1
+        # Listede olmayan bankanın (4) parçaları haritaya alınmaz
+        self.assertEqual(decoded, [segment for segment in self.index.bank_segments() if segment[2] != 4])
+
+        self.assertEqual(encode_bin_map(BinIndex.build(self.ROWS), list(reversed(banks)))[0], version)
+        self.assertNotEqual(encode_bin_map(BinIndex.build(self.ROWS[1:]), banks)[0], version)
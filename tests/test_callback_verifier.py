@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import hashlib
+import hmac
+import json
+from unittest.mock import MagicMock
+
+from odoo.tests.common import TransactionCase
+from odoo.addons.mews_pos.lib.callback_verifier import CallbackVerifier, CallbackSignatureError, INQUIRY, UNSIGNED
+from odoo.addons.mews_pos.lib.gateways.estpos_gateway import EstPosGateway
+from odoo.addons.mews_pos.lib.gateways.garanti_gateway import GarantiGateway
+from odoo.addons.mews_pos.lib.gateways.posnet_gateway import PosNetGateway
+from odoo.addons.mews_pos.lib.gateways.payfor_gateway import PayForGateway
+from odoo.addons.mews_pos.lib.gateways.akbank_gateway import AkbankGateway
+from odoo.addons.mews_pos.lib.gateways.tosla_gateway import ToslaGateway
+from odoo.addons.mews_pos.lib.gateways.payflex_gateway import PayFlexGateway
+from odoo.addons.mews_pos.lib.gateways.base_gateway import BaseGateway
+from odoo.addons.mews_pos.lib.gateways.registry import GatewayRegistry
+from odoo.addons.mews_pos.tools.bank_simulator import EstProtocol
+
+STORE_KEY = 'TRPS0200'
+KEY = ('test_db', 7)
+
+
+class TestCallbackVerifier(TransactionCase):
+    """3D callback imza doğrulaması testleri"""
+
+    def setUp(self):
+        super().setUp()
+        CallbackVerifier.reset()
+        self.addCleanup(CallbackVerifier.reset)
+        self.config = {'store_key': STORE_KEY}
+
+    def _est_callback(self):
+        callback = {
+            'clientid': '700655000200',
+            'oid': 'ORD-1',
+            'amount': '10050',
+            'rnd': '123456',
+            'mdStatus': '1',
+            'Response': 'Approved',
+            'ProcReturnCode': '00',
+            'ErrMsg': 'a|b\\c',
+            'hashAlgorithm': 'ver3',
+        }
+        callback['HASH'] = EstProtocol.sign(callback, STORE_KEY)
+        return callback
+
+    def _garanti_callback(self, sha512=False):
+        callback = {
+            'clientid': '30691298',
+            'oid': 'ORD-1',
+            'authcode': '123456',
+            'procreturncode': '00',
+            'response': 'Approved',
+            'mdstatus': '1',
+            'hashparams': 'clientid:oid:authcode:procreturncode:response:mdstatus:',
+        }
+        values = '30691298ORD-112345600Approved1'
+        callback['hashparamsval'] = values
+        payload = (values + STORE_KEY).encode('utf-8')
+        if sha512:
+            callback['hash'] = hashlib.sha512(payload).hexdigest().upper()
+        else:
+            callback['hash'] = base64.b64encode(hashlib.sha1(payload).digest()).decode()
+        return callback
+
+    def _verify(self, gateway_class, callback, **order):
+        if order:
+            order.setdefault('order_fields', gateway_class.callback_order_fields)
+            order.setdefault('amount_field', gateway_class.callback_amount_field)
+        return CallbackVerifier.verify(gateway_class.callback_hash_scheme, self.config, callback, key=KEY, **order)
+
+    def test_est_ver3_signature(self):
+        """EST ver3 imzası (bank simülatörü) doğrulanır; değiştirilmiş alan reddedilir"""
+        callback = self._est_callback()
+        self.assertTrue(self._verify(EstPosGateway, callback))
+
+        callback['mdStatus'] = '0'
+        with self.assertRaises(CallbackSignatureError) as raised:
+            self._verify(EstPosGateway, callback)
+        self.assertEqual(raised.exception.reason, 'hash_mismatch')
+        self.assertEqual(raised.exception.error_type, 'invalid_signature')
+
+    def test_hashparams_signature(self):
+        """Garanti hashparams imzası (SHA1/base64 ve SHA512/hex) doğrulanır"""
+        self.assertTrue(self._verify(GarantiGateway, self._garanti_callback()))
+        self.assertTrue(self._verify(GarantiGateway, self._garanti_callback(sha512=True)))
+
+        callback = self._garanti_callback()
+        callback['mdstatus'] = '7'
+        with self.assertRaises(CallbackSignatureError) as raised:
+            self._verify(GarantiGateway, callback)
+        self.assertEqual(raised.exception.reason, 'params_mismatch')
+
+    def test_missing_signature_or_key(self):
+        """İmzasız callback ve store key'i olmayan banka reddedilir"""
+        callback = self._est_callback()
+        del callback['HASH']
+        with self.assertRaises(CallbackSignatureError):
+            self._verify(EstPosGateway, callback)
+
+        self.config = {'store_key': None}
+        with self.assertRaises(CallbackSignatureError):
+            self._verify(GarantiGateway, self._garanti_callback())
+
+        self.assertEqual(
+            CallbackVerifier.rejections(KEY), {'missing_signature': 1, 'missing_store_key': 1}
+        )
+
+    def test_rejections_counted_per_bank(self):
+        """Retler banka ve neden bazında sayılır ve metriklere yansır"""
+        callback = self._est_callback()
+        callback['HASH'] = 'forged'
+        for key in (KEY, KEY, ('test_db', 8)):
+            with self.assertRaises(CallbackSignatureError):
+                CallbackVerifier.verify('est', self.config, callback, key=key)
+
+        self.assertEqual(CallbackVerifier.rejections(KEY), {'hash_mismatch': 2})
+        self.assertIn(
+            'mews_pos_callback_rejections_total{db="test_db",bank="7",reason="hash_mismatch"} 2',
+            CallbackVerifier.export_metrics(),
+        )
+
+    def test_payfor_and_akbank_signatures(self):
+        """PayFor ResponseHash ve Akbank HMAC imzası doğrulanır"""
+        callback = {
+            'MerchantID': '085300000009704', 'OrderId': 'ORD-1', 'AuthCode': 'S1234',
+            'ProcReturnCode': '00', '3DStatus': '1', 'ResponseRnd': 'PF1', 'UserCode': 'QNB_API',
+        }
+        values = ''.join(callback.values()) + STORE_KEY
+        callback['ResponseHash'] = base64.b64encode(hashlib.sha1(values.encode()).digest()).decode()
+        self.assertTrue(self._verify(PayForGateway, callback, order_id='ORD-1'))
+
+        akbank = {'orderId': 'ORD-1', 'amount': '100.50', 'status': 'success', 'hashParams': 'orderId+amount+status'}
+        digest = hmac.new(STORE_KEY.encode(), b'ORD-1100.50success', hashlib.sha512).digest()
+        akbank['hash'] = base64.b64encode(digest).decode()
+        self.assertTrue(self._verify(AkbankGateway, akbank, order_id='ORD-1', amount=100.5))
+
+        akbank['status'] = 'failure'
+        with self.assertRaises(CallbackSignatureError):
+            self._verify(AkbankGateway, akbank)
+
+    def test_signed_order_must_match_transaction(self):
+        """Başka sipariş veya tutar için imzalanmış geçerli callback reddedilir"""
+        callback = self._est_callback()
+        self.assertTrue(self._verify(EstPosGateway, callback, order_id='ORD-1', amount=100.5))
+
+        with self.assertRaises(CallbackSignatureError) as raised:
+            self._verify(EstPosGateway, callback, order_id='ORD-2', amount=100.5)
+        self.assertEqual(raised.exception.reason, 'order_mismatch')
+        with self.assertRaises(CallbackSignatureError) as raised:
+            self._verify(EstPosGateway, callback, order_id='ORD-1', amount=250.0)
+        self.assertEqual(raised.exception.reason, 'order_mismatch')
+
+        # Sipariş numarası imzaya dahil değilse işlemle bağlanamaz
+        callback = self._garanti_callback()
+        callback['hashparams'] = 'clientid:authcode:procreturncode:response:mdstatus:'
+        callback['hashparamsval'] = '3069129812345600Approved1'
+        payload = (callback['hashparamsval'] + STORE_KEY).encode()
+        callback['hash'] = base64.b64encode(hashlib.sha1(payload).digest()).decode()
+        with self.assertRaises(CallbackSignatureError) as raised:
+            self._verify(GarantiGateway, callback, order_id='ORD-1')
+        self.assertEqual(raised.exception.reason, 'order_unsigned')
+
+        self.assertEqual(CallbackVerifier.rejections(KEY), {'order_mismatch': 2, 'order_unsigned': 1})
+
+    def test_unsigned_gateway_is_counted(self):
+        """İmzasız muafiyetteki gateway geçer ama sayılır ve metriklere yansır"""
+        self.assertFalse(self._verify(PosNetGateway, {'MerchantPacket': 'x'}))
+        self.assertEqual(CallbackVerifier.rejections(), {})
+        self.assertEqual(CallbackVerifier.unverified(KEY), 1)
+        self.assertIn(
+            'mews_pos_callback_unverified_total{db="test_db",bank="7"} 1', CallbackVerifier.export_metrics(),
+        )
+
+    def test_gateway_without_scheme_rejected(self):
+        """Şema bildirmeyen gateway'in callback'i reddedilir; tüm gateway'ler şema bildirir"""
+        with self.assertRaises(CallbackSignatureError) as raised:
+            self._verify(BaseGateway, {'OrderId': 'ORD-1'})
+        self.assertEqual(raised.exception.reason, 'no_scheme')
+
+        for gateway_type in GatewayRegistry.types():
+            gateway_class = GatewayRegistry.get(gateway_type)
+            self.assertIsNotNone(gateway_class.callback_hash_scheme, gateway_type)
+            # İmzasız muafiyet yalnızca sonucu banka servisinden çözen gateway'lere
+            if gateway_class.callback_hash_scheme == UNSIGNED:
+                self.assertIn(gateway_class.__name__, ('PosNetGateway', 'KuveytPosGateway'), gateway_type)
+            if gateway_class.callback_hash_scheme == INQUIRY:
+                self.assertTrue(gateway_class._implements('status'), gateway_type)
+
+    def _response(self, text):
+        response = MagicMock()
+        response.text = text
+        response.json.side_effect = lambda: json.loads(text)
+        return response
+
+    def test_forged_inquiry_callback_rejected(self):
+        """Sahte Tosla/PayFlex başarı callback'i banka sorgusu onaylamadıkça reddedilir"""
+        cases = (
+            (ToslaGateway, {'OrderId': 'ORD-1', 'ResultCode': '0000', 'ResultStatus': 'Success', 'AuthCode': 'FAKE'},
+             '{"ResultCode": "9999", "ResultStatus": "Fail", "ResultMessage": "Order not found"}',
+             '{"ResultCode": "0000", "ResultStatus": "Success", "AuthCode": "A1", "HostReferenceNumber": "H1"}'),
+            (PayFlexGateway, {'OrderId': 'ORD-1', 'ResultCode': 'Success', 'ResponseCode': '00', 'AuthCode': 'FAKE'},
+             '<PayforResponse><ResultCode>Failed</ResultCode><ResponseCode>99</ResponseCode>'
+             '<ErrorMessage>Kayıt bulunamadı</ErrorMessage></PayforResponse>',
+             '<PayforResponse><ResultCode>Success</ResultCode><ResponseCode>00</ResponseCode>'
+             '<AuthCode>A1</AuthCode><HostRefNum>H1</HostRefNum></PayforResponse>'),
+        )
+        for gateway_class, forged, not_found, approved in cases:
+            self.assertFalse(self._verify(gateway_class, forged))
+            gateway = gateway_class({'environment': 'test'})
+            result = gateway.parse_3d_response(forged)
+            self.assertTrue(result['approved'])
+
+            status = gateway.parse_status_response(self._response(not_found))
+            self.assertEqual(status['status'], 'not_found')
+            rejected = CallbackVerifier.confirm(result, status, key=KEY)
+            self.assertFalse(rejected['approved'])
+            self.assertEqual(rejected['error_code'], 'unconfirmed')
+
+            confirmed = CallbackVerifier.confirm(result, gateway.parse_status_response(self._response(approved)), key=KEY)
+            self.assertTrue(confirmed['approved'])
+            self.assertEqual((confirmed['auth_code'], confirmed['host_ref_num']), ('A1', 'H1'))
+
+        self.assertEqual(CallbackVerifier.rejections(KEY), {'unconfirmed': 2})
+        self.assertEqual(CallbackVerifier.unverified(KEY), 0)
@@ -0,0 +1,790 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from odoo.tests.common import TransactionCase
+from unittest.mock import patch, MagicMock
+from odoo.addons.mews_pos.lib.session_pool import SessionPool
+from odoo.addons.mews_pos.lib.gateways.gateway_factory import GatewayFactory
+from odoo.addons.mews_pos.lib.gateways.registry import GatewayRegistry, register_gateway
+from odoo.addons.mews_pos.lib.gateways.payfor_gateway import PayForGateway
+from odoo.addons.mews_pos.lib.bank_config import BankConfig, BankConfigCache, BankConfigError
+from odoo.addons.mews_pos.lib.crypto_utils import CryptoUtils
+from odoo.addons.mews_pos.lib.gateways.garanti_gateway import GarantiGateway
+from odoo.addons.mews_pos.lib.gateways.result import GatewayRequest, GatewayResult, dumps
+from odoo.addons.mews_pos.lib.circuit_breaker import CircuitBreaker, CircuitOpenError
+from odoo.addons.mews_pos.lib.deadline import Deadline, DeadlineExceeded
+from odoo.addons.mews_pos.lib.concurrency_limiter import ConcurrencyLimiter, LeaseSlotStore, QueueTimeoutError
+
+
+class TestSessionPool(TransactionCase):
+    """Paylaşımlı HTTP oturum havuzu testleri"""
+
+    def tearDown(self):
+        SessionPool.close_all()
+        super().tearDown()
+
+    def test_same_host_reuses_session(self):
+        """Aynı host için aynı oturum döner"""
+        first = SessionPool.get_session('https://bank.example.com/fim/api')
+        second = SessionPool.get_session('https://BANK.example.com/fim/est3Dgate')
+        self.assertIs(first, second)
+
+    def test_different_hosts_get_different_sessions(self):
+        """Farklı host'lar ayrı oturum alır"""
+        first = SessionPool.get_session('https://bank-a.example.com/api')
+        second = SessionPool.get_session('https://bank-b.example.com/api')
+        self.assertIsNot(first, second)
+
+    def test_connection_limit_applied(self):
+        """Banka bağlantı limiti adapter'a uygulanır"""
+        url = 'https://limit.example.com/api'
+        session = SessionPool.get_session(url, pool_maxsize=3)
+        adapter = session.get_adapter(url)
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(SessionPool.stats()['https://limit.example.com']['pool_maxsize'], 3)
+
+    def test_smaller_limit_does_not_remount(self):
+        """Aynı host'u farklı limitlerle kullanan işyerlerinde en büyük limit geçerli olur"""
+        url = 'https://shared.example.com/api'
+        session = SessionPool.get_session(url, pool_maxsize=4)
+        SessionPool.get_session(url, pool_maxsize=8)
+        adapter = session.get_adapter(url)
+
+        for size in (2, 8, 5):
+            self.assertIs(SessionPool.get_session(url, pool_maxsize=size), session)
+            self.assertIs(session.get_adapter(url), adapter)
+        self.assertEqual(adapter._pool_maxsize, 8)
+
+    def test_cookies_not_shared(self):
+        """Paylaşımlı oturum bankanın gönderdiği çerezleri saklamaz"""
+        from email.message import Message
+        from requests import Request
+        from requests.cookies import MockRequest, MockResponse
+
+        url = 'https://cookie.example.com/api'
+        session = SessionPool.get_session(url)
+        headers = Message()
+        headers['Set-Cookie'] = 'JSESSIONID=merchant-a; Path=/'
+        request = MockRequest(Request('POST', url).prepare())
+        session.cookies.extract_cookies(MockResponse(headers), request)
+        self.assertEqual(len(session.cookies), 0)
+
+    def test_keep_alive_disabled(self):
+        """keep_alive kapatıldığında Connection: close gönderilir"""
+        SessionPool.configure('https://close.example.com', keep_alive=False)
+        session = SessionPool.get_session('https://close.example.com/api')
+        self.assertEqual(session.headers['Connection'], 'close')
+
+    def test_unknown_option_rejected(self):
+        """Bilinmeyen ayar hata verir"""
+        with self.assertRaises(ValueError):
+            SessionPool.configure(pool_size=5)
+
+
+class TestGatewayFactoryCache(TransactionCase):
+    """Gateway instance önbelleği testleri"""
+
+    def setUp(self):
+        super().setUp()
+        GatewayFactory.invalidate()
+        patcher = patch.object(GatewayFactory, '_build', side_effect=lambda t, c: MagicMock())
+        self.build = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cache_hit_same_version(self):
+        """Aynı banka ve versiyon için aynı instance döner"""
+        before = GatewayFactory.cache_stats()
+        first = GatewayFactory.create('estv3_pos', {}, cache_key=('db', 1, 'v1'))
+        second = GatewayFactory.create('estv3_pos', {}, cache_key=('db', 1, 'v1'))
+
+        self.assertIs(first, second)
+        self.assertEqual(self.build.call_count, 1)
+        stats = GatewayFactory.cache_stats()
+        self.assertEqual(stats['hits'] - before['hits'], 1)
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+
+    def test_new_version_builds_new_instance(self):
+        """Konfigürasyon versiyonu değişince yeni instance oluşturulur"""
+        first = GatewayFactory.create('estv3_pos', {}, cache_key=('db', 1, 'v1'))
+        second = GatewayFactory.create('estv3_pos', {}, cache_key=('db', 1, 'v2'))
+        self.assertIsNot(first, second)
+
+    def test_databases_do_not_share_instances(self):
+        """Aynı banka id ve versiyon farklı veritabanlarında ayrı instance'tır"""
+        first = GatewayFactory.create('estv3_pos', {}, cache_key=('db1', 1, 'v1'))
+        second = GatewayFactory.create('estv3_pos', {}, cache_key=('db2', 1, 'v1'))
+        self.assertIsNot(first, second)
+
+        GatewayFactory.invalidate([1], dbname='db1')
+        self.assertIs(GatewayFactory.create('estv3_pos', {}, cache_key=('db2', 1, 'v1')), second)
+        self.assertIsNot(GatewayFactory.create('estv3_pos', {}, cache_key=('db1', 1, 'v1')), first)
+
+    def test_setup_runs_once_at_build(self):
+        """Banka bağımlılıkları yalnızca oluşturulurken atanır; önbellekten dönen instance değişmez"""
+        setup = MagicMock()
+        gateway = GatewayFactory.create('estv3_pos', {}, cache_key=('db', 1, 'v1'), setup=setup)
+        GatewayFactory.create('estv3_pos', {}, cache_key=('db', 1, 'v1'), setup=setup)
+        setup.assert_called_once_with(gateway)
+
+    def test_lru_eviction(self):
+        """Önbellek boyutu aşılınca en eski instance düşer"""
+        with patch.object(GatewayFactory, 'CACHE_SIZE', 2):
+            GatewayFactory.create('estv3_pos', {}, cache_key=('db', 1, 'v1'))
+            GatewayFactory.create('estv3_pos', {}, cache_key=('db', 2, 'v1'))
+            GatewayFactory.create('estv3_pos', {}, cache_key=('db', 1, 'v1'))
+            GatewayFactory.create('estv3_pos', {}, cache_key=('db', 3, 'v1'))
+            self.assertEqual(GatewayFactory.cache_stats()['size'], 2)
+
+            GatewayFactory.create('estv3_pos', {}, cache_key=('db', 2, 'v1'))
+            self.assertEqual(self.build.call_count, 4)
+
+    def test_bank_write_invalidates(self):
+        """Banka kaydı güncellenince önbellek temizlenir"""
+        bank = self.env['mews.pos.bank'].create({
+            'name': 'Önbellek Bankası',
+            'code': 'cache_bank',
+            'gateway_type': 'estv3_pos',
+            'payment_model': '3d_secure',
+            'environment': 'test',
+        })
+        GatewayFactory.create('estv3_pos', {}, cache_key=(self.env.cr.dbname, bank.id, 'v1'))
+        bank.write({'merchant_id': '12345'})
+
+        GatewayFactory.create('estv3_pos', {}, cache_key=(self.env.cr.dbname, bank.id, 'v1'))
+        self.assertEqual(self.build.call_count, 2)
+
+
+class TestGatewayLazyLoading(TransactionCase):
+    """Gateway modüllerinin ilk kullanımda yüklenmesi testleri"""
+
+    def test_load_class_cached(self):
+        """Sınıf bir kez çözülür ve aynı nesne döner"""
+        gateway_class = GatewayFactory.load_class('garanti_pos')
+        self.assertEqual(gateway_class.__name__, 'GarantiGateway')
+        self.assertIs(GatewayFactory.load_class('garanti_pos'), gateway_class)
+        self.assertIn('garanti_pos', GatewayFactory.loaded_gateways())
+
+    def test_unknown_type(self):
+        """Bilinmeyen tip ValueError verir"""
+        with self.assertRaises(ValueError):
+            GatewayFactory.load_class('unknown_pos')
+
+    def test_submodule_attribute(self):
+        """gateways paketi alt modülleri talep anında içe aktarır"""
+        from odoo.addons.mews_pos.lib import gateways
+
+        self.assertEqual(gateways.tosla_gateway.ToslaGateway.__name__, 'ToslaGateway')
+        with self.assertRaises(AttributeError):
+            gateways.missing_gateway
+
+
+class TestGatewayRegistry(TransactionCase):
+    """Gateway kayıt defteri testleri"""
+
+    def _forget(self, *gateway_types):
+        for gateway_type in gateway_types:
+            self.addCleanup(GatewayRegistry._specs.pop, gateway_type, None)
+
+    def test_builtin_capabilities(self):
+        """Yetenekler sınıftan türetilir"""
+        self.assertEqual(
+            GatewayRegistry.capabilities('estv3_pos'),
+            {'3d_pay', 'non_secure', 'cancel', 'refund', 'status'},
+        )
+        self.assertNotIn('status', GatewayFactory.capabilities('garanti_pos'))
+        self.assertTrue(GatewayRegistry.supports('posnet', '3d'))
+
+    def test_selection(self):
+        """Seçim listesi kayıt defterinden üretilir; uyumluluk takma adları listelenmez"""
+        selection = dict(GatewayRegistry.selection())
+        self.assertEqual(selection['garanti_pos'], 'Garanti POS')
+        self.assertNotIn('estpos', selection)
+        self.assertTrue(GatewayFactory.is_supported('estpos'))
+
+    def test_decorator_registration(self):
+        """Üçüncü parti sınıf dekoratörle kaydolur ve factory ile oluşturulur"""
+        self._forget('test_bank_pos')
+
+        @register_gateway('test_bank_pos', label='Test Bankası', capabilities=('3d', 'non_secure'))
+        class TestBankGateway(PayForGateway):
+            pass
+
+        self.assertIsInstance(GatewayFactory.create('test_bank_pos', {}), TestBankGateway)
+        self.assertIn(('test_bank_pos', 'Test Bankası'), GatewayRegistry.selection())
+        self.assertEqual(GatewayRegistry.capabilities('test_bank_pos'), {'3d', 'non_secure'})
+
+        with self.assertRaises(ValueError):
+            register_gateway('test_bank_pos')(PayForGateway)
+        with self.assertRaises(ValueError):
+            register_gateway('other_pos', capabilities=('teleport',))
+
+    def test_entry_point(self):
+        """mews_pos.gateways entry point'leri bir kez çözülür, sınıf ilk kullanımda yüklenir"""
+        self._forget('ep_bank_pos')
+        entry_point = MagicMock()
+        entry_point.name = 'ep_bank_pos'
+        entry_point.load.return_value = PayForGateway
+
+        with patch.object(GatewayRegistry, '_entry_points_loaded', False), \
+                patch('importlib.metadata.entry_points', return_value=[entry_point]) as entry_points:
+            self.assertTrue(GatewayFactory.is_supported('ep_bank_pos'))
+            self.assertFalse(entry_point.load.called)
+            self.assertIs(GatewayFactory.load_class('ep_bank_pos'), PayForGateway)
+            GatewayRegistry.types()
+            self.assertEqual(entry_points.call_count, 1)
+
+
+class TestBankConfig(TransactionCase):
+    """Derlenmiş banka konfigürasyonu testleri"""
+
+    VALUES = {
+        'bank_code': 'garanti',
+        'gateway_type': 'garanti_pos',
+        'payment_model': '3d_pay',
+        'environment': 'test',
+        'merchant_id': '7000679',
+        'terminal_id': '30691298',
+        'username': 'PROVAUT',
+        'password': '123qweASD/',
+        'store_key': '12345678',
+        'client_id': False,
+        'payment_api_url': 'https://sanalposprovtest.garanti.com.tr/VPServlet',
+        'gateway_3d_url': 'https://sanalposprovtest.garanti.com.tr/servlet/gt3dengine',
+        'gateway_3d_host_url': False,
+        'max_connections': 10,
+    }
+
+    def setUp(self):
+        super().setUp()
+        BankConfigCache.invalidate()
+
+    def test_mapping_access_and_derived_values(self):
+        """Gateway'lerin sözlük erişimi çalışır; türetilmiş değerler hazırdır"""
+        config = BankConfig(self.VALUES, bank_id=1, write_date='2024-01-01 10:00:00')
+
+        self.assertEqual(config['payment_api_url'], self.VALUES['payment_api_url'])
+        self.assertIsNone(config['client_id'])
+        self.assertIsNone(config.get('wsdl_url'))
+        self.assertTrue(config.test_mode)
+        self.assertEqual(config['terminal_id_padded'], '030691298')
+        self.assertEqual(
+            config.garanti_security_data,
+            CryptoUtils.sha1_hash('123qweASD/' + '030691298').upper(),
+        )
+        self.assertEqual(config.currency_code('USD'), '840')
+        self.assertTrue(config.version.startswith('2024-01-01 10:00:00:'))
+        self.assertEqual(config.to_account_dict()['endpoints']['gateway_3d'], self.VALUES['gateway_3d_url'])
+
+    def test_immutable(self):
+        """Derlenmiş konfigürasyon değiştirilemez"""
+        config = BankConfig(self.VALUES)
+        with self.assertRaises(AttributeError):
+            config.password = 'x'
+        with self.assertRaises(AttributeError):
+            config.extra = 'x'
+        with self.assertRaises(TypeError):
+            config['password'] = 'x'
+
+    def test_validation(self):
+        """Eksik zorunlu alan veya geçersiz değer BankConfigError üretir"""
+        for override in ({'gateway_type': False}, {'environment': 'staging'},
+                         {'payment_api_url': 'ftp://bank'}, {'max_connections': -1}):
+            with self.subTest(override=override), self.assertRaises(BankConfigError):
+                BankConfig(dict(self.VALUES, **override))
+
+    def test_cache_compiles_once_per_write_date(self):
+        """Aynı write_date için tek derleme yapılır; write_date değişince yeniden derlenir"""
+        loader = MagicMock(return_value=self.VALUES)
+        first = BankConfigCache.get(('db', 1), 'v1', loader)
+        second = BankConfigCache.get(('db', 1), 'v1', loader)
+        self.assertIs(first, second)
+        self.assertEqual(loader.call_count, 1)
+
+        third = BankConfigCache.get(('db', 1), 'v2', loader)
+        self.assertIsNot(first, third)
+        self.assertEqual(loader.call_count, 2)
+
+        BankConfigCache.invalidate([('db', 1)])
+        BankConfigCache.get(('db', 1), 'v2', loader)
+        self.assertEqual(loader.call_count, 3)
+
+    def test_gateway_output_unchanged(self):
+        """Gateway, derlenmiş konfigürasyonla sözlükle ürettiği isteğin aynısını üretir"""
+        order = {'id': 'ORD-1', 'amount': 10.0, 'success_url': 'https://shop/ok', 'fail_url': 'https://shop/fail'}
+        card = {'number': '4282209027132016', 'month': '5', 'year': '30', 'cvv': '358', 'name': 'Test'}
+        plain = {key: value or None for key, value in self.VALUES.items()}
+
+        compiled = GarantiGateway(BankConfig(self.VALUES))
+        legacy = GarantiGateway(plain)
+        self.assertEqual(compiled.prepare_3d_request(order, card), legacy.prepare_3d_request(order, card))
+        self.assertEqual(
+            compiled.prepare_payment_request(order, card), legacy.prepare_payment_request(order, card)
+        )
+
+    def test_bank_record_compiles_once(self):
+        """mews.pos.bank kaydı write_date başına bir kez derlenir"""
+        bank = self.env['mews.pos.bank'].create({
+            'name': 'Konfigürasyon Bankası',
+            'code': 'config_bank',
+            'gateway_type': 'garanti_pos',
+            'payment_model': '3d_pay',
+            'environment': 'test',
+            'terminal_id': '30691298',
+            'password': 'secret',
+        })
+        config = bank.get_compiled_config()
+        self.assertIs(bank.get_compiled_config(), config)
+        self.assertEqual(config.terminal_id_padded, '030691298')
+
+        bank.write({'terminal_id': '1234'})
+        self.assertEqual(bank.get_compiled_config().terminal_id_padded, '000001234')
+        self.assertEqual(bank.get_account_config()['terminal_id'], '1234')
+
+
+class TestCryptoKeyCache(TransactionCase):
+    """Kimlik bilgisinden türetilen anahtar önbelleği testleri"""
+
+    def setUp(self):
+        super().setUp()
+        CryptoUtils.invalidate_key_cache()
+        self.addCleanup(CryptoUtils.invalidate_key_cache)
+
+    def test_derived_key_computed_once(self):
+        """Aynı kimlik bilgileri için değer bir kez hesaplanır"""
+        compute = MagicMock(return_value='KEY')
+        self.assertEqual(CryptoUtils.derived_key('test', ('a', 'b'), compute), 'KEY')
+        self.assertEqual(CryptoUtils.derived_key('test', ('a', 'b'), compute), 'KEY')
+        compute.assert_called_once_with('a', 'b')
+
+        CryptoUtils.derived_key('test', ('a', 'c'), compute)
+        self.assertEqual(compute.call_count, 2)
+
+        CryptoUtils.invalidate_key_cache()
+        CryptoUtils.derived_key('test', ('a', 'b'), compute)
+        self.assertEqual(compute.call_count, 3)
+
+    def test_bounded(self):
+        """Önbellek boyutu aşılınca en eski değer düşer"""
+        with patch.object(CryptoUtils, 'KEY_CACHE_SIZE', 2):
+            for part in ('a', 'b', 'c'):
+                CryptoUtils.derived_key('test', (part,), str.upper)
+            self.assertEqual(len(CryptoUtils._key_cache), 2)
+            self.assertNotIn(('test', 'a'), CryptoUtils._key_cache)
+
+    def test_garanti_security_data(self):
+        """SecurityData eski formülle aynıdır"""
+        self.assertEqual(
+            CryptoUtils.garanti_security_data('123qweASD/', '30691298'),
+            CryptoUtils.sha1_hash('123qweASD/' + '030691298').upper(),
+        )
+
+
+class TestGatewayResult(TransactionCase):
+    """GatewayResult / GatewayRequest testleri"""
+
+    PARSED = {
+        'approved': True,
+        'order_id': 'ORD-1',
+        'auth_code': '123456',
+        'host_ref_num': '401012345678',
+        'md_status': '1',
+        'proc_return_code': '00',
+        'error_message': None,
+        'response': 'Approved',
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.gateway = GarantiGateway(dict(TestBankConfig.VALUES))
+
+    def test_legacy_mapping_access(self):
+        """Eski normalize_response anahtarları ve parse alanları okunabilir"""
+        result = self.gateway.normalize_response(self.PARSED)
+
+        self.assertIsInstance(result, GatewayResult)
+        self.assertTrue(result.success)
+        self.assertEqual(result['status'], 'approved')
+        self.assertEqual(result.get('host_ref_num'), '401012345678')
+        self.assertTrue(result.get('approved'))
+        self.assertEqual(result.get('proc_return_code'), '00')
+        self.assertIsNone(result.get('refund_ref'))
+        self.assertIs(result['raw_response'], self.PARSED)
+        self.assertEqual(set(result), set(GatewayResult.KEYS))
+        self.assertFalse(hasattr(result, '__dict__'))
+
+        declined = self.gateway.normalize_response({'approved': False, 'error_code': '05'})
+        self.assertEqual((declined.success, declined.status, declined.error_code), (False, 'declined', '05'))
+
+    def test_serialization(self):
+        """to_json eski json.dumps çıktısıyla aynı veriyi üretir; ham yanıt bir kez serileştirilir"""
+        result = GatewayResult.from_response(dict(self.PARSED, soap_result=object()))
+
+        data = json.loads(result.to_json())
+        self.assertEqual(data['order_id'], 'ORD-1')
+        self.assertEqual(data['raw_response']['proc_return_code'], '00')
+        self.assertIsInstance(data['raw_response']['soap_result'], str)
+
+        with patch('odoo.addons.mews_pos.lib.gateways.result._dumps', wraps=json.dumps) as serialize:
+            result = GatewayResult.from_response(self.PARSED)
+            first, second = result.to_json(), result.to_json()
+        self.assertEqual(first, second)
+        self.assertEqual(json.loads(first), json.loads(json.dumps(result.as_dict())))
+        # Alanlar her çağrıda, ham yanıt yalnızca ilkinde serileştirilir
+        self.assertEqual(serialize.call_count, 3)
+
+    def test_envelope_dumps(self):
+        """Servis zarfı tek çağrıda JSON'a çevrilir"""
+        result = GatewayResult.from_response(self.PARSED)
+        envelope = json.loads(dumps({'success': True, 'data': result}))
+        self.assertTrue(envelope['success'])
+        self.assertEqual(envelope['data']['auth_code'], '123456')
+        self.assertEqual(json.loads(dumps({'data': result}))['data']['status'], 'approved')
+        self.assertEqual(json.loads(dumps({'success': False, 'error': 'x'})), {'success': False, 'error': 'x'})
+
+    def test_gateway_request(self):
+        """prepare_*_request GatewayRequest döndürür; sözlük erişimi korunur"""
+        order = {'id': 'ORD-1', 'amount': 10.0, 'currency': 'TRY', 'installment': 1}
+        card = {'number': '4282209027132016', 'month': '5', 'year': '30', 'cvv': '358', 'name': 'Test'}
+        request = self.gateway.prepare_payment_request(order, card)
+
+        self.assertIsInstance(request, GatewayRequest)
+        self.assertEqual(request['url'], TestBankConfig.VALUES['payment_api_url'])
+        self.assertIs(request['data'], request.data)
+        self.assertEqual(request.get('method'), 'POST')
+        self.assertEqual(dict(request), {
+            'url': request.url, 'data': request.data, 'headers': request.headers, 'method': 'POST',
+        })
+
+
+class TestCircuitBreaker(TransactionCase):
+    """Banka bazlı devre kesici testleri"""
+
+    def _breaker(self, **settings):
+        self.stored = []
+
+        def store(key, state, opened_at):
+            self.stored.append(state)
+            return len(self.stored)
+
+        settings.setdefault('min_requests', 4)
+        return CircuitBreaker(('test', 1), state_store=store, **settings)
+
+    def test_opens_on_error_rate(self):
+        """Hata oranı eşiği aşılınca devre açılır ve istekler reddedilir"""
+        breaker = self._breaker()
+        breaker.record_success(0.1)
+        breaker.record_success(0.1)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.stored, ['open'])
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_slow_calls_count_as_failures(self):
+        """Gecikme eşiğini aşan başarılı çağrılar hata sayılır"""
+        breaker = self._breaker(latency_threshold=1.0)
+        for _ in range(4):
+            breaker.record_success(2.5)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_half_open_probe(self):
+        """Açık kalma süresi dolunca tek deneme isteğine izin verilir"""
+        breaker = self._breaker()
+        for _ in range(4):
+            breaker.record_failure()
+        breaker.opened_at -= breaker.settings['open_duration'] + 1
+
+        breaker.before_request()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+        breaker.record_success(0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.stored, ['open', 'half_open', 'closed'])
+
+    def test_sync_adopts_newer_state_only(self):
+        """Diğer worker'ın durumu yalnızca versiyonu yeniyse alınır"""
+        breaker = self._breaker()
+        breaker.sync('open', 1e12, 5)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        breaker.sync('closed', None, 3)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_gateway_fails_fast_when_open(self):
+        """Devre açıkken gateway bankaya istek göndermez"""
+        gateway = PayForGateway({'environment': 'test'})
+        gateway.circuit_breaker = self._breaker()
+        gateway.circuit_breaker.sync('open', 1e12, 1)
+
+        with patch.object(gateway, 'get_session') as get_session:
+            with self.assertRaises(CircuitOpenError):
+                gateway.make_request('https://bank.example.com/api', {})
+            get_session.assert_not_called()
+
+    def test_transport_errors_recorded(self):
+        """Transport hataları devre kesiciye bildirilir"""
+        import requests
+
+        gateway = PayForGateway({'environment': 'test'})
+        gateway.circuit_breaker = self._breaker(min_requests=2)
+        session = MagicMock()
+        session.post.side_effect = requests.exceptions.ConnectionError('bağlantı reddedildi')
+
+        with patch.object(gateway, 'get_session', return_value=session):
+            for _ in range(2):
+                with self.assertRaises(Exception):
+                    gateway.make_request('https://bank.example.com/api', {})
+
+        self.assertEqual(gateway.circuit_breaker.state, CircuitBreaker.OPEN)
+
+    def _half_open_gateway(self):
+        gateway = PayForGateway({'environment': 'test'})
+        gateway.circuit_breaker = self._breaker()
+        gateway.circuit_breaker.sync('open', 1.0, 1)
+        return gateway
+
+    def test_probe_released_on_unexpected_error(self):
+        """Beklenmeyen hata (limiter/DB veya transport dışı) deneme hakkını sızdırmaz"""
+        gateway = self._half_open_gateway()
+        session = MagicMock()
+        session.post.side_effect = ValueError('beklenmeyen')
+        with patch.object(gateway, 'get_session', return_value=session):
+            with self.assertRaises(ValueError):
+                gateway.make_request('https://bank.example.com/api', {})
+
+        gateway.concurrency_limiter = MagicMock()
+        gateway.concurrency_limiter.acquire.side_effect = RuntimeError('havuz dolu')
+        with self.assertRaises(RuntimeError):
+            gateway.make_request('https://bank.example.com/api', {})
+
+        # Deneme hakkı geri verildiği için yeni deneme alınabilir
+        self.assertEqual(gateway.circuit_breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertIsNotNone(gateway.circuit_breaker.before_request())
+
+    def test_stale_probe_release_ignored(self):
+        """Durum değiştikten sonra bırakılan eski deneme hakkı yeni sayacı düşürmez"""
+        breaker = self._breaker()
+        breaker.sync('open', 1.0, 1)
+        probe = breaker.before_request()
+        breaker.record_failure()
+        breaker.opened_at = 1.0
+
+        breaker.before_request()
+        breaker.release(probe)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_state_store_called_outside_lock(self):
+        """Paylaşımlı depoya yazma devre kesici kilidi tutulmadan yapılır"""
+        locked = []
+
+        def store(key, state, opened_at):
+            free = breaker._lock.acquire(False)
+            if free:
+                breaker._lock.release()
+            locked.append(not free)
+            return 7
+
+        breaker = CircuitBreaker(('test', 3), state_store=store, min_requests=1)
+        breaker.record_failure()
+        breaker.reset()
+        self.assertEqual(locked, [False, False])
+        self.assertEqual(breaker.version, 7)
+
+
+class TestDeadline(TransactionCase):
+    """İstek kapsamlı süre bütçesi testleri"""
+
+    def test_no_scope_keeps_timeout(self):
+        """Bütçe yoksa gateway timeout'u aynen kullanılır"""
+        self.assertIsNone(Deadline.current())
+        self.assertEqual(Deadline.remaining_timeout(30), 30)
+
+    def test_scope_clips_timeout(self):
+        """Her çağrı yalnızca kalan süreyi alır"""
+        with Deadline.scope(5):
+            self.assertLessEqual(Deadline.remaining_timeout(30), 5)
+            self.assertEqual(Deadline.remaining_timeout(2), 2)
+        self.assertIsNone(Deadline.current())
+
+    def test_nested_scope_cannot_extend(self):
+        """İç kapsam dış bütçeyi aşamaz"""
+        with Deadline.scope(2) as outer:
+            with Deadline.scope(60) as inner:
+                self.assertIs(inner, outer)
+            with Deadline.scope(1) as inner:
+                self.assertLessEqual(inner.remaining(), 1)
+
+    def test_exhausted_budget_skips_call(self):
+        """Bütçe tükenmişse banka çağrısı yapılmaz"""
+        gateway = PayForGateway({'environment': 'test'})
+        with patch.object(gateway, 'get_session') as get_session:
+            with Deadline.scope(5) as deadline:
+                deadline.expires_at -= 10
+                with self.assertRaises(DeadlineExceeded) as ctx:
+                    gateway.make_request('https://bank.example.com/api', {})
+            get_session.assert_not_called()
+        self.assertEqual(ctx.exception.error_type, 'deadline_exceeded')
+
+    def test_clipped_timeout_reported_as_deadline(self):
+        """Kısaltılmış timeout aşımı bütçe hatasıdır, banka hatası sayılmaz"""
+        import requests
+
+        gateway = PayForGateway({'environment': 'test'})
+        gateway.circuit_breaker = CircuitBreaker(('test', 2), min_requests=1)
+        session = MagicMock()
+        session.post.side_effect = requests.exceptions.ReadTimeout('read timed out')
+
+        with patch.object(gateway, 'get_session', return_value=session):
+            with Deadline.scope(3):
+                with self.assertRaises(DeadlineExceeded):
+                    gateway.make_request('https://bank.example.com/api', {})
+            self.assertLessEqual(session.post.call_args.kwargs['timeout'], 3)
+            self.assertEqual(gateway.circuit_breaker.snapshot()['failures'], 0)
+
+            with self.assertRaises(Exception) as ctx:
+                gateway.make_request('https://bank.example.com/api', {})
+            self.assertNotIsInstance(ctx.exception, DeadlineExceeded)
+            self.assertEqual(gateway.circuit_breaker.state, CircuitBreaker.OPEN)
+
+
+class TestConcurrencyLimiter(TransactionCase):
+    """Banka bazlı eş zamanlılık limiti testleri"""
+
+    def test_limits_in_flight_calls(self):
+        """Aynı anda en fazla max_in_flight çağrı çalışır, fazlası bekler"""
+        import threading
+        import time
+
+        limiter = ConcurrencyLimiter(('test', 1), max_in_flight=2, queue_timeout=5)
+        lock = threading.Lock()
+        state = {'current': 0, 'peak': 0}
+
+        def call():
+            with limiter.slot():
+                with lock:
+                    state['current'] += 1
+                    state['peak'] = max(state['peak'], state['current'])
+                time.sleep(0.05)
+                with lock:
+                    state['current'] -= 1
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = limiter.stats()
+        self.assertEqual(state['peak'], 2)
+        self.assertEqual(stats['acquired'], 8)
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertGreater(stats['max_queue_depth'], 0)
+        self.assertGreater(stats['wait_max'], 0)
+
+    def test_queue_timeout(self):
+        """Slot süresi içinde boşalmazsa QueueTimeoutError fırlatılır"""
+        limiter = ConcurrencyLimiter(('test', 2), max_in_flight=1)
+        token = limiter.acquire()
+        with self.assertRaises(QueueTimeoutError) as ctx:
+            limiter.acquire(timeout=0.05)
+        limiter.release(token)
+
+        self.assertEqual(ctx.exception.error_type, 'queue_timeout')
+        self.assertEqual(limiter.stats()['timeouts'], 1)
+        self.assertEqual(limiter.stats()['queue_depth'], 0)
+
+    def test_shared_store_denies_slot(self):
+        """Diğer worker'lar slotları doldurduysa yerel boşluk yetmez"""
+        store = MagicMock()
+        store.try_acquire.return_value = None
+        limiter = ConcurrencyLimiter(('test', 3), slot_store=store, max_in_flight=3)
+
+        with self.assertRaises(QueueTimeoutError):
+            limiter.acquire(timeout=0.1)
+        self.assertGreater(store.try_acquire.call_count, 1)
+        self.assertEqual(limiter.stats()['in_flight'], 0)
+
+        store.try_acquire.return_value = ('cursor', 7)
+        token = limiter.acquire(timeout=0.1)
+        limiter.release(token)
+        store.release.assert_called_once_with(('cursor', 7))
+
+    def test_lease_store_uses_short_transactions(self):
+        """Slot kiralama/bırakma ayrı, commit edilip kapatılan kısa transaction'larda yapılır"""
+        cursors = []
+
+        def cursor_factory():
+            cr = MagicMock()
+            cr.fetchone.return_value = (2,)
+            cursors.append(cr)
+            return cr
+
+        store = LeaseSlotStore(cursor_factory, 7, lease=60)
+        slot, holder = store.try_acquire(3)
+        self.assertEqual(slot, 2)
+        # Slot satırlarının hazırlanması + kiralama; ikisi de kapatıldı
+        self.assertEqual(len(cursors), 2)
+        for cr in cursors:
+            cr.commit.assert_called_once()
+            cr.close.assert_called_once()
+        self.assertNotIn('advisory', cursors[1].execute.call_args_list[-1][0][0])
+
+        store.try_acquire(3)
+        self.assertEqual(len(cursors), 3)
+        store.release((slot, holder))
+        self.assertEqual(cursors[-1].execute.call_args[0][1], (7, 2, holder))
+        cursors[-1].close.assert_called_once()
+
+        cursors[-1].fetchone.return_value = None
+        busy = LeaseSlotStore(lambda: cursors[-1], 7)
+        busy._prepared = 3
+        self.assertIsNone(busy.try_acquire(3))
+
+        # Aynı banka için tekrar alınan limit hazırlanmış depoyu korur
+        limiter = ConcurrencyLimiter.get(('lease_db', 7), slot_store=store, max_in_flight=3)
+        self.addCleanup(ConcurrencyLimiter._registry.pop, ('lease_db', 7), None)
+        ConcurrencyLimiter.get(('lease_db', 7), slot_store=LeaseSlotStore(cursor_factory, 7, lease=90))
+        self.assertIs(limiter.slot_store, store)
+        self.assertEqual(store.lease, 90)
+
+    def test_gateway_queue_full(self):
+        """Kuyruk dolu iken gateway bankaya istek göndermez"""
+        gateway = PayForGateway({'environment': 'test'})
+        gateway.concurrency_limiter = ConcurrencyLimiter(('test', 4), max_in_flight=1, queue_timeout=0.05)
+        token = gateway.concurrency_limiter.acquire()
+
+        with patch.object(gateway, 'get_session') as get_session:
+            with self.assertRaises(QueueTimeoutError):
+                gateway.make_request('https://bank.example.com/api', {})
+            get_session.assert_not_called()
+        gateway.concurrency_limiter.release(token)
+
+    def test_gateway_releases_slot(self):
+        """Çağrı hata ile bitse de slot geri verilir"""
+        import requests
+
+        gateway = PayForGateway({'environment': 'test'})
+        gateway.concurrency_limiter = ConcurrencyLimiter(('test', 5), max_in_flight=1)
+        session = MagicMock()
+        session.post.side_effect = requests.exceptions.ConnectionError('bağlantı reddedildi')
+
+        with patch.object(gateway, 'get_session', return_value=session):
+            with self.assertRaises(Exception):
+                gateway.make_request('https://bank.example.com/api', {})
+        self.assertEqual(gateway.concurrency_limiter.stats()['in_flight'], 0)
+
+    def test_export_metrics(self):
+        """Metrikler Prometheus formatında dışa aktarılır"""
+        limiter = ConcurrencyLimiter.get(('metrics_db', 9), max_in_flight=2)
+        with limiter.slot():
+            output = ConcurrencyLimiter.export_metrics()
+
+        self.assertIn('mews_pos_bank_in_flight{db="metrics_db",bank="9"} 1', output)
+        self.assertIn('mews_pos_bank_queue_wait_seconds_count{db="metrics_db",bank="9"} 1', output)
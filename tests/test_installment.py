@@ -1,7 +1,11 @@
 # -*- coding:  utf-8 -*-
 
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
 from odoo.tests.common import TransactionCase
 from odoo.exceptions import ValidationError
+from odoo.addons.mews_pos.lib.installment_engine import RateTable, RateTableCache
 
 
 class TestInstallmentConfig(TransactionCase):
@@ -115,4 +119,114 @@ class TestCategoryRestriction(TransactionCase):
         self.assertIn(4, allowed_counts)
         self.assertNotIn(5, allowed_counts)  # Engelli
         self.assertIn(6, allowed_counts)
-        self.assertNotIn(9, allowed_counts)  # Max aşımı
\ No newline at end of file
+        self.assertNotIn(9, allowed_counts)  # Max aşımı
+
+
+class TestInstallmentEngine(TransactionCase):
+    """Derlenmiş taksit oran tablosu testleri"""
+
+    TODAY = date(2024, 6, 15)
+
+    def setUp(self):
+        super().setUp()
+        RateTableCache.invalidate()
+        self.addCleanup(RateTableCache.invalidate)
+        self.banks = [{'id': 1, 'name': 'Banka A', 'code': 'a'}, {'id': 2, 'name': 'Banka B', 'code': 'b'}]
+        self.configs = [
+            {'bank_id': 1, 'installment_count': 3, 'interest_rate': 1.5, 'min_amount': 100},
+            {'bank_id': 1, 'installment_count': 2, 'interest_rate': 2.0, 'campaign_active': True, 'campaign_rate': 0.0,
+             'campaign_start_date': self.TODAY - timedelta(days=1), 'campaign_end_date': self.TODAY + timedelta(days=1)},
+            {'bank_id': 1, 'installment_count': 6, 'interest_rate': 4.0, 'campaign_active': True, 'campaign_rate': 1.0,
+             'campaign_start_date': self.TODAY - timedelta(days=9), 'campaign_end_date': self.TODAY - timedelta(days=1)},
+            {'bank_id': 2, 'installment_count': 9, 'interest_rate': 9.0, 'min_amount': 5000},
+            {'bank_id': 99, 'installment_count': 2, 'interest_rate': 0.0},
+        ]
+        self.restrictions = [
+            {'bank_id': 1, 'category_id': 10, 'installment_allowed': True,
+             'min_installment': 2, 'max_installment': 6, 'blocked_installments': '3'},
+            {'bank_id': 1, 'category_id': 20, 'installment_allowed': False,
+             'min_installment': 2, 'max_installment': 12, 'blocked_installments': False},
+        ]
+        self.table = RateTable(self.banks, self.configs, self.restrictions, self.TODAY)
+
+    def _counts(self, **kwargs):
+        return {
+            entry['bank']['code']: [row['installment_count'] for row in entry['installments']]
+            for entry in self.table.quote(1000, **kwargs)
+        }
+
+    def test_quote_matches_calculate_installment(self):
+        """Satırlar calculate_installment ile aynı hesaplanır; kampanya penceresi uygulanır"""
+        rows = {row['installment_count']: row for row in self.table.quote(1000)[0]['installments']}
+
+        self.assertEqual(list(rows), [1, 2, 3, 6])
+        self.assertAlmostEqual(rows[3]['total_amount'], 1015, places=2)
+        self.assertAlmostEqual(rows[3]['installment_amount'], 338.33, places=2)
+        self.assertAlmostEqual(rows[3]['interest_amount'], 15, places=2)
+        self.assertEqual((rows[2]['interest_rate'], rows[2]['is_campaign']), (0.0, True))
+        # Süresi geçmiş kampanya normal orana döner
+        self.assertEqual((rows[6]['interest_rate'], rows[6]['is_campaign']), (4.0, False))
+        self.assertEqual(rows[1]['total_amount'], 1000)
+
+    def test_bank_filter_and_min_amount(self):
+        """Banka filtresi, minimum tutar ve ürün üst sınırı uygulanır"""
+        self.assertEqual(self._counts(), {'a': [1, 2, 3, 6], 'b': [1]})
+        self.assertEqual(self._counts(bank_ids=[2, 404]), {'b': [1]})
+        self.assertEqual(self._counts(max_count=3), {'a': [1, 2, 3], 'b': [1]})
+        self.assertEqual(self._counts(max_count=1), {'a': [1], 'b': [1]})
+
+    def test_category_restrictions(self):
+        """Kategori kısıtlamaları kesişir; taksit izni yoksa yalnızca tek çekim kalır"""
+        self.assertEqual(self._counts(bank_ids=[1], category_ids=[10, 30]), {'a': [1, 2, 6]})
+        self.assertEqual(self._counts(bank_ids=[1], category_ids=[10, 20]), {'a': [1]})
+        self.assertEqual(self._counts(bank_ids=[2], category_ids=[10, 20]), {'b': [1]})
+
+    def test_cache_rebuilds_on_version_change(self):
+        """Aynı versiyon için tek derleme yapılır"""
+        loader = MagicMock(side_effect=lambda: RateTable(self.banks, [], [], self.TODAY, version='v1'))
+        first = RateTableCache.get('db', 'v1', loader)
+        self.assertIs(RateTableCache.get('db', 'v1', loader), first)
+        self.assertEqual(loader.call_count, 1)
+
+        RateTableCache.get('db', 'v2', loader)
+        self.assertEqual(loader.call_count, 2)
+        RateTableCache.invalidate(['db'])
+        self.assertEqual(RateTableCache.stats()['size'], 0)
+
+    def test_valid_until_next_campaign_boundary(self):
+        """Tablo ilk kampanya başlangıç/bitiş gününe kadar geçerlidir"""
+        # Süren kampanyanın bitişinin ertesi günü; geçmiş kampanya sınır üretmez
+        self.assertEqual(self.table.valid_until, self.TODAY + timedelta(days=2))
+        self.assertTrue(self.table.is_current(None, self.TODAY + timedelta(days=1)))
+        self.assertFalse(self.table.is_current(None, self.TODAY + timedelta(days=2)))
+        self.assertFalse(self.table.is_current('v2', self.TODAY))
+
+        upcoming = dict(self.configs[0], campaign_active=True, campaign_rate=0.0,
+                        campaign_start_date=self.TODAY + timedelta(days=1),
+                        campaign_end_date=self.TODAY + timedelta(days=5))
+        table = RateTable(self.banks, [upcoming], [], self.TODAY)
+        self.assertEqual(table.valid_until, self.TODAY + timedelta(days=1))
+        self.assertIsNone(RateTable(self.banks, self.configs[3:4], [], self.TODAY).valid_until)
+
+    def test_rate_and_installment_lookup(self):
+        """Etkin oran ve tek taksit satırı tablodan okunur"""
+        self.assertEqual(self.table.rate(1, 2), (0.0, True))
+        self.assertEqual(self.table.rate(1, 6), (4.0, False))
+        self.assertIsNone(self.table.rate(1, 12))
+        self.assertIsNone(self.table.rate(99, 2))
+
+        row = self.table.installment(1, 3, 1000)
+        self.assertEqual(row, self.table.installments(1, 1000)[1])
+        # Minimum tutar tek satır okumasında uygulanmaz
+        self.assertEqual(self.table.installment(2, 9, 100)['total_amount'], 109.0)
+        self.assertEqual(self.table.installments(2, 100), [])
+
+    def test_cache_rebuilds_after_campaign_boundary(self):
+        """Versiyon aynı kalsa da kampanya sınırı geçilince tablo yeniden derlenir"""
+        loader = MagicMock(side_effect=lambda: RateTable(self.banks, self.configs, [], self.TODAY, version='v1'))
+        first = RateTableCache.get('db', 'v1', loader, today=self.TODAY)
+        self.assertIs(RateTableCache.get('db', 'v1', loader, today=self.TODAY + timedelta(days=1)), first)
+        self.assertEqual(loader.call_count, 1)
+
+        RateTableCache.get('db', 'v1', loader, today=first.valid_until)
+        self.assertEqual(loader.call_count, 2)
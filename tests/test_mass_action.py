@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+from unittest.mock import patch, MagicMock
+
+SERVICE = 'odoo.addons.mews_pos.services.payment_gateway_service.PaymentGatewayService'
+
+
+class TestMassAction(TransactionCase):
+    """Toplu iptal/iade testleri"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.bank = cls.env['mews.pos.bank'].create({
+            'name': 'Toplu İşlem Bankası',
+            'code': 'test_bank_mass_action',
+            'gateway_type': 'estv3_pos',
+            'payment_model': '3d_secure',
+            'environment': 'test',
+        })
+        cls.transactions = cls.env['mews.pos.transaction'].create([{
+            'bank_id': cls.bank.id,
+            'amount': 100,
+            'total_amount': 100,
+            'state': 'success',
+        } for _ in range(3)])
+        cls.failed_transaction = cls.env['mews.pos.transaction'].create({
+            'bank_id': cls.bank.id,
+            'amount': 50,
+            'total_amount': 50,
+            'state': 'failed',
+        })
+
+    def _create_action(self, operation='refund'):
+        wizard = self.env['mews.pos.mass.action.wizard'].with_context(
+            active_ids=(self.transactions | self.failed_transaction).ids,
+        ).create({'operation': operation})
+        with patch('odoo.addons.base.models.ir_cron.IrCron._trigger'):
+            result = wizard.action_confirm()
+        return self.env['mews.pos.mass.action'].browse(result['res_id'])
+
+    def test_wizard_skips_ineligible(self):
+        """Uygun olmayan işlemler atlanmış satır olarak eklenir"""
+        action = self._create_action()
+
+        self.assertEqual(action.total_count, 4)
+        skipped = action.line_ids.filtered(lambda l: l.state == 'skipped')
+        self.assertEqual(skipped.transaction_id, self.failed_transaction)
+        self.assertEqual(action.remaining_count, 3)
+
+    def test_refund_batch(self):
+        """İadeler toplu oluşturulur ve işlem tutarları güncellenir"""
+        action = self._create_action()
+        first = self.transactions[0]
+
+        def prepare_refund_call(service, transaction, amount=None):
+            if transaction == first:
+                return MagicMock(return_value={'approved': False, 'error_message': 'Red'})
+            return MagicMock(return_value={'approved': True, 'host_ref_num': 'H1'})
+
+        with patch(f'{SERVICE}.prepare_refund_call', autospec=True, side_effect=prepare_refund_call):
+            self.assertTrue(action._process(auto_commit=False))
+
+        self.assertEqual(action.state, 'done')
+        self.assertEqual(action.done_count, 2)
+        self.assertEqual(action.failed_count, 1)
+        self.assertEqual(first.state, 'success')
+        self.assertEqual(self.transactions[1].state, 'refunded')
+        self.assertEqual(self.transactions[1].refunded_amount, 100)
+        self.assertEqual(self.transactions[1].refund_ids.refund_ref, 'H1')
+        self.assertEqual(first.refund_ids.state, 'failed')
+        self.assertIn(self.bank.name, action.summary_html)
+
+    def test_cancel_batch(self):
+        """Başarılı iptaller işlemi iptal durumuna alır"""
+        action = self._create_action('cancel')
+        call = MagicMock(return_value={'approved': True})
+        with patch(f'{SERVICE}.prepare_cancel_call', return_value=call):
+            action._process(auto_commit=False)
+
+        self.assertEqual(set(self.transactions.mapped('state')), {'cancelled'})
+        self.assertEqual(call.call_count, 3)
+
+    def test_interrupted_lines_not_resent(self):
+        """Yarıda kalan satırlar belirsiz işaretlenir, tekrar gönderilmez"""
+        action = self._create_action()
+        interrupted = action.line_ids.filtered(lambda l: l.state == 'queued')[:1]
+        interrupted.state = 'running'
+        action.state = 'running'
+
+        call = MagicMock(return_value={'approved': True})
+        with patch(f'{SERVICE}.prepare_refund_call', return_value=call), \
+                patch('odoo.addons.base.models.ir_cron.IrCron._trigger'):
+            self.env['mews.pos.mass.action']._cron_process_mass_actions(auto_commit=False)
+
+        self.assertEqual(interrupted.state, 'uncertain')
+        self.assertEqual(call.call_count, 2)
+        self.assertEqual(action.state, 'done')
+        self.assertEqual(action.uncertain_count, 1)
+
+    def test_refund_revalidated_before_send(self):
+        """Sihirbazdan sonra iade edilmiş ya da beklemede iadesi olan işlem tekrar iade edilmez"""
+        action = self._create_action()
+        refunded, pending, fresh = self.transactions
+        refunded.write({'state': 'refunded', 'refunded_amount': 100})
+        self.env['mews.pos.refund'].create({'transaction_id': pending.id, 'amount': 40, 'state': 'pending'})
+
+        call = MagicMock(return_value={'approved': True, 'host_ref_num': 'H2'})
+        with patch(f'{SERVICE}.prepare_refund_call', return_value=call) as prepare:
+            action._process(auto_commit=False)
+
+        self.assertEqual(prepare.call_count, 1)
+        self.assertEqual(prepare.call_args.args[0], fresh)
+        lines = {line.transaction_id: line for line in action.line_ids}
+        self.assertEqual(lines[refunded].state, 'skipped')
+        self.assertEqual(lines[pending].state, 'skipped')
+        self.assertFalse(lines[refunded].refund_id)
+        self.assertEqual(fresh.refund_ids.refund_ref, 'H2')
+        self.assertEqual(fresh.refund_ids.state, 'success')
+        self.assertEqual(refunded.refunded_amount, 100)
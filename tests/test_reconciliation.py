@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+
+from odoo.tests.common import TransactionCase
+from unittest.mock import patch, MagicMock
+from odoo.addons.mews_pos.lib.bulk_executor import BulkExecutor, TokenBucket
+from odoo.addons.mews_pos.lib.gateways.estpos_gateway import EstPosGateway
+from odoo.addons.mews_pos.lib.gateways.payfor_gateway import PayForGateway
+from odoo.addons.mews_pos.lib.gateways.garanti_gateway import GarantiGateway
+
+
+class TestBulkExecutor(TransactionCase):
+    """Toplu çağrı yürütücü testleri"""
+
+    def test_results_and_errors(self):
+        """Sonuçlar ve hatalar anahtar bazında döner"""
+        def job(value):
+            if value == 3:
+                raise ValueError('hatalı')
+            return value * 2
+
+        results = BulkExecutor(max_workers=4).run(
+            (value, 'bank', job, (value,)) for value in range(5)
+        )
+
+        self.assertEqual(results[2], (True, 4))
+        self.assertFalse(results[3][0])
+        self.assertIsInstance(results[3][1], ValueError)
+
+    def test_group_parallelism(self):
+        """Bir bankaya aynı anda en fazla izin verilen kadar iş gider"""
+        lock = threading.Lock()
+        state = {'current': 0, 'peak': 0}
+
+        def job():
+            with lock:
+                state['current'] += 1
+                state['peak'] = max(state['peak'], state['current'])
+            time.sleep(0.02)
+            with lock:
+                state['current'] -= 1
+
+        BulkExecutor(max_workers=8, group_parallelism={'bank': 2}).run(
+            (i, 'bank', job, ()) for i in range(10)
+        )
+        self.assertEqual(state['peak'], 2)
+
+    def test_rate_limit(self):
+        """Banka hız limiti aşılmaz"""
+        bucket = TokenBucket(rate=20, burst=1)
+        started = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.18)
+
+    def test_interleave_groups(self):
+        """İşler bankalar arasında sırayla dağıtılır"""
+        jobs = [(i, 'a', None, ()) for i in range(3)] + [(10, 'b', None, ())]
+        order = [job[0] for job in BulkExecutor._interleave(jobs)]
+        self.assertEqual(order, [0, 10, 1, 2])
+
+
+class TestStatusParsing(TransactionCase):
+    """Durum sorgusu istek/yanıt testleri"""
+
+    def _response(self, text):
+        response = MagicMock()
+        response.text = text
+        return response
+
+    def test_estpos_status(self):
+        """EstPos ORDERSTATUS yanıtı işlem durumuna çevrilir"""
+        gateway = EstPosGateway({
+            'environment': 'test',
+            'client_id': '700655000200',
+            'username': 'ISBANKAPI',
+            'password': 'ISBANK07',
+            'payment_api_url': 'https://entegrasyon.asseco-see.com.tr/fim/api',
+        })
+        request = gateway.prepare_status_request({'id': 'ORDER-1'})
+        self.assertIn('<ORDERSTATUS>QUERY</ORDERSTATUS>', request['data']['DATA'])
+
+        result = gateway.parse_status_response(self._response(
+            '<CC5Response><OrderId>ORDER-1</OrderId><ProcReturnCode>00</ProcReturnCode>'
+            '<Extra><TRANS_STAT>C</TRANS_STAT><AUTH_CODE>P12345</AUTH_CODE>'
+            '<HOST_REF_NUM>123456789</HOST_REF_NUM></Extra></CC5Response>'
+        ))
+        self.assertEqual(result['status'], 'approved')
+        self.assertEqual(result['auth_code'], 'P12345')
+
+        result = gateway.parse_status_response(self._response(
+            '<CC5Response><ProcReturnCode>99</ProcReturnCode>'
+            '<ErrMsg>No record found for ORDER-1</ErrMsg></CC5Response>'
+        ))
+        self.assertEqual(result['status'], 'not_found')
+
+    def test_payfor_status(self):
+        """PayFor OrderInquiry yanıtı işlem durumuna çevrilir"""
+        gateway = PayForGateway({'environment': 'test'})
+        result = gateway.parse_status_response(self._response(
+            'OrderId=ORDER-1&ProcReturnCode=00&AuthCode=123456&HostRefNum=999'
+        ))
+        self.assertEqual(result['status'], 'approved')
+
+        result = gateway.parse_status_response(self._response('ProcReturnCode=96&ErrMsg=Sistem hatası'))
+        self.assertEqual(result['status'], 'unknown')
+
+    def test_supports(self):
+        """Durum sorgusu desteği sınıf bazında tespit edilir"""
+        self.assertTrue(EstPosGateway({}).supports('status'))
+        self.assertFalse(GarantiGateway({}).supports('status'))
+
+
+class TestReconciliation(TransactionCase):
+    """Toplu mutabakat testleri"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.bank = cls.env['mews.pos.bank'].create({
+            'name': 'Mutabakat Bankası',
+            'code': 'test_bank_reconcile',
+            'gateway_type': 'estv3_pos',
+            'payment_model': '3d_secure',
+            'environment': 'test',
+        })
+        cls.transactions = cls.env['mews.pos.transaction'].create([{
+            'bank_id': cls.bank.id,
+            'amount': 100,
+            'total_amount': 100,
+            'state': 'waiting_3d',
+        } for _ in range(4)])
+
+    def test_apply_results(self):
+        """Sonuçlar toplu yazılır, bilinmeyen durumlar dokunulmadan kalır"""
+        approved, declined, unknown, errored = self.transactions
+        changed = self.transactions._apply_reconcile_results({
+            approved.id: (True, {'status': 'approved', 'auth_code': 'A1', 'host_ref_num': 'H1'}),
+            declined.id: (True, {'status': 'not_found', 'error_message': 'No record found'}),
+            unknown.id: (True, {'status': 'unknown'}),
+            errored.id: (False, Exception('timeout')),
+        })
+
+        self.assertEqual(changed, 2)
+        self.assertEqual(approved.state, 'success')
+        self.assertEqual(approved.auth_code, 'A1')
+        self.assertEqual(declined.state, 'failed')
+        self.assertEqual(declined.bank_response_message, 'No record found')
+        self.assertEqual(unknown.state, 'waiting_3d')
+        self.assertEqual(errored.reconcile_attempts, 1)
+        self.assertTrue(errored.last_reconciled_at)
+
+    def test_settled_transaction_not_overwritten(self):
+        """Sorgu sırasında sonuçlanan işlemin durumu ve referansları ezilmez"""
+        settled = self.transactions[0]
+        self.env.cr.execute(
+            "UPDATE mews_pos_transaction SET state = 'cancelled', auth_code = 'CB1' WHERE id = %s", (settled.id,)
+        )
+        settled.invalidate_recordset()
+
+        changed = settled._apply_reconcile_results({
+            settled.id: (True, {'status': 'approved', 'auth_code': 'A1', 'host_ref_num': 'H1'}),
+        })
+
+        self.assertEqual(changed, 0)
+        self.assertEqual(settled.state, 'cancelled')
+        self.assertEqual(settled.auth_code, 'CB1')
+        self.assertFalse(settled.host_ref_num)
+
+    def test_cron_queries_stale_transactions(self):
+        """Cron eski işlemleri bankaya sorar"""
+        self.env.cr.execute(
+            "UPDATE mews_pos_transaction SET write_date = now() - interval '2 hours' WHERE id IN %s",
+            (tuple(self.transactions.ids),)
+        )
+        self.transactions.invalidate_recordset()
+
+        status_call = MagicMock(return_value={'status': 'approved'})
+        with patch(
+            'odoo.addons.mews_pos.services.payment_gateway_service.PaymentGatewayService.prepare_status_call',
+            return_value=status_call,
+        ):
+            changed = self.env['mews.pos.transaction']._cron_reconcile_transactions(auto_commit=False)
+
+        self.assertGreaterEqual(changed, 4)
+        self.assertEqual(set(self.transactions.mapped('state')), {'success'})
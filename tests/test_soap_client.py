@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+from odoo.tests.common import TransactionCase
+from odoo.addons.mews_pos.lib.soap_client import SoapClientFactory, _caching_transport_class
+from odoo.addons.mews_pos.lib.gateways.kuveyt_gateway import KuveytPosGateway
+
+WSDL_URL = KuveytPosGateway.DEFAULT_WSDL_URL
+REMOTE = 'https://soap.example.com/Service?wsdl'
+
+
+class TestSoapClientFactory(TransactionCase):
+    """WSDL disk önbelleği ve derlenmiş SOAP client testleri"""
+
+    def setUp(self):
+        super().setUp()
+        settings = {name: getattr(SoapClientFactory, name) for name in ('cache_dir', 'ttl', 'offline', 'bundle_dir')}
+        self.cache_dir = tempfile.mkdtemp(prefix='mews_pos_wsdl_test')
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        self.addCleanup(lambda: [setattr(SoapClientFactory, name, value) for name, value in settings.items()])
+        self.addCleanup(SoapClientFactory.clear)
+
+        SoapClientFactory.clear()
+        SoapClientFactory.configure(
+            cache_dir=self.cache_dir, ttl=60, offline=False, bundle_dir=SoapClientFactory.DEFAULT_BUNDLE_DIR,
+        )
+        self.transport = _caching_transport_class()(SoapClientFactory)
+
+    def _network(self, **kwargs):
+        return patch('zeep.transports.Transport.load', **kwargs)
+
+    def _expire(self, url):
+        path = os.path.join(self.cache_dir, SoapClientFactory.cache_filename(url))
+        old = time.time() - 120
+        os.utime(path, (old, old))
+
+    def test_manifest_maps_bundled_documents(self):
+        """Kuveyt WSDL ve XSD'si paketle gelir ve manifest ile okunur"""
+        manifest = SoapClientFactory.bundled_manifest()
+        self.assertIn(WSDL_URL, manifest)
+        for url in manifest:
+            self.assertIsNotNone(SoapClientFactory.read_bundled(url), url)
+        self.assertIsNone(SoapClientFactory.read_bundled(REMOTE))
+
+    def test_fresh_copy_served_until_ttl(self):
+        """TTL dolmadan ağa çıkılmaz; dolunca yeniden indirilip önbellek yenilenir"""
+        with self._network(return_value=b'<v1/>') as load:
+            self.assertEqual(self.transport.load(REMOTE), b'<v1/>')
+            self.assertEqual(self.transport.load(REMOTE), b'<v1/>')
+        self.assertEqual(load.call_count, 1)
+
+        self._expire(REMOTE)
+        with self._network(return_value=b'<v2/>') as load:
+            self.assertEqual(self.transport.load(REMOTE), b'<v2/>')
+        load.assert_called_once()
+        self.assertEqual(SoapClientFactory.read_cached(REMOTE)[0], b'<v2/>')
+
+    def test_stale_copy_when_network_down(self):
+        """Banka sunucusu erişilemezse süresi dolmuş kopya kullanılır"""
+        SoapClientFactory.write_cached(REMOTE, b'<stale/>')
+        self._expire(REMOTE)
+        with self._network(side_effect=IOError('bağlantı reddedildi')):
+            self.assertEqual(self.transport.load(REMOTE), b'<stale/>')
+
+        # Önbellek yoksa paket içi kopya, o da yoksa hata
+        with self._network(side_effect=IOError('bağlantı reddedildi')):
+            self.assertEqual(self.transport.load(WSDL_URL), SoapClientFactory.read_bundled(WSDL_URL))
+            with self.assertRaises(IOError):
+                self.transport.load('https://missing.example.com/Service?wsdl')
+
+    def test_offline_mode_never_hits_network(self):
+        """Çevrimdışı modda Kuveyt client'ı paket içi WSDL/XSD'den derlenir"""
+        SoapClientFactory.configure(offline=True)
+        with self._network(side_effect=AssertionError('ağa çıkıldı')):
+            client = SoapClientFactory.get_client(WSDL_URL)
+            with self.assertRaises(IOError):
+                self.transport.load(REMOTE)
+
+        for operation in ('GetResult', 'Sale', 'Reverse', 'PartialRefund'):
+            self.assertTrue(hasattr(client.service, operation), operation)
+
+    def test_client_reused(self):
+        """Aynı WSDL için client bir kez derlenir; gateway'ler onu paylaşır"""
+        SoapClientFactory.configure(offline=True)
+        config = {'environment': 'test', 'payment_api_url': WSDL_URL.split('?')[0]}
+        first = KuveytPosGateway(config)
+        second = KuveytPosGateway(dict(config))
+        self.assertEqual(first.wsdl_url, WSDL_URL)
+
+        with patch('zeep.Client', wraps=__import__('zeep').Client) as compile_client:
+            self.assertIs(first.client, second.client)
+            self.assertIs(SoapClientFactory.get_client(WSDL_URL, timeout=first.timeout), first.client)
+        compile_client.assert_called_once()
+
+    def test_preload_skips_unknown_documents(self):
+        """Önceden derleme yalnızca diskte ya da pakette bulunan WSDL'ler için yapılır"""
+        SoapClientFactory.configure(offline=True)
+        self.assertEqual(SoapClientFactory.preload([WSDL_URL, REMOTE, None]), [WSDL_URL])
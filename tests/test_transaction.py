@@ -67,4 +67,45 @@ class TestTransaction(TransactionCase):
             'total_amount': 1100,
         })
         
-        self.assertEqual(self.transaction.interest_amount, 100)
\ No newline at end of file
+        self.assertEqual(self.transaction.interest_amount, 100)
+    def test_forged_tosla_callback_rejected(self):
+        """İmzasız Tosla başarı callback'i banka durum sorgusu onaylamazsa reddedilir"""
+        from odoo.addons.mews_pos.services.payment_gateway_service import PaymentGatewayService
+
+        bank = self.env['mews.pos.bank'].create({
+            'name': 'Tosla',
+            'code': 'test_bank_tosla',
+            'gateway_type': 'tosla',
+            'payment_model': '3d_pay',
+            'environment': 'test',
+            'merchant_id': '1000000494',
+            'terminal_id': '10000004',
+            'store_key': 'TOSLA-KEY',
+        })
+        transaction = self.env['mews.pos.transaction'].create({
+            'bank_id': bank.id,
+            'amount': 100,
+            'total_amount': 100,
+            'currency': 'TRY',
+        })
+        forged = {
+            'OrderId': transaction.transaction_id,
+            'ResultCode': '0000',
+            'ResultStatus': 'Success',
+            'AuthCode': 'FAKE',
+        }
+        service = PaymentGatewayService(self.env)
+
+        inquiry = MagicMock()
+        inquiry.json.return_value = {'ResultCode': '9999', 'ResultStatus': 'Fail', 'ResultMessage': 'Order not found'}
+        with patch('odoo.addons.mews_pos.lib.gateways.tosla_gateway.ToslaGateway.make_request', return_value=inquiry) as call:
+            result = service.process_3d_callback(transaction, forged)
+
+        self.assertFalse(result['success'])
+        self.assertIn('"TransactionType": "Inquiry"', call.call_args[0][1])
+
+        inquiry.json.return_value = {'ResultCode': '0000', 'ResultStatus': 'Success', 'AuthCode': 'A1'}
+        with patch('odoo.addons.mews_pos.lib.gateways.tosla_gateway.ToslaGateway.make_request', return_value=inquiry):
+            result = service.process_3d_callback(transaction, forged)
+
+        self.assertTrue(result['success'])
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+from lxml import etree
+
+from odoo.tests.common import TransactionCase
+from odoo.addons.mews_pos.lib.xml_utils import (
+    XmlUtils, XmlTemplate, XmlExtractor, SafeXmlParser,
+    XmlResponseTooLarge, XmlContentTypeError, XmlMalformedError,
+)
+
+REQUEST = {
+    'Name': 'PROVAUT',
+    'Password': '123qweASD/',
+    'ClientId': '700655000200',
+    'Type': 'Auth',
+    'OrderId': 'ORD-1',
+    'Total': '100.50',
+    'Extra': None,
+    'BillTo': {'Name': 'Ali & Veli <Ltd>', 'Email': 'a@b.com'},
+    'Empty': {},
+}
+
+
+class TestXmlRender(TransactionCase):
+    """Derlenmiş XML serileştirici testleri"""
+
+    def test_pretty_matches_dict_to_xml(self):
+        """pretty=True çıktısı dict_to_xml ile bayt bayt aynı"""
+        self.assertEqual(
+            XmlUtils.render(REQUEST, 'CC5Request', pretty=True),
+            XmlUtils.dict_to_xml(REQUEST, root_name='CC5Request'),
+        )
+
+    def test_compact_same_tree(self):
+        """Kompakt çıktı boşluksuz ve aynı ağacı üretir"""
+        compact = XmlUtils.render(REQUEST, 'CC5Request')
+        self.assertEqual(compact.count('\n'), 1)
+        self.assertIn('<Name>Ali &amp; Veli &lt;Ltd&gt;</Name>', compact)
+        self.assertIn('<Extra></Extra>', compact)
+        self.assertIn('<Empty/>', compact)
+
+        parser = etree.XMLParser(remove_blank_text=True)
+        reference = etree.fromstring(XmlUtils.dict_to_xml(REQUEST, 'CC5Request').encode('utf-8'), parser)
+        self.assertEqual(
+            etree.tostring(etree.fromstring(compact.encode('utf-8')), method='c14n'),
+            etree.tostring(reference, method='c14n'),
+        )
+
+    def test_template_cached_per_shape(self):
+        """Aynı şekil için şablon bir kez derlenir, değerler her çağrıda okunur"""
+        first = XmlTemplate.for_data(REQUEST, 'CC5Request')
+        second = XmlTemplate.for_data(dict(REQUEST, OrderId='ORD-2'), 'CC5Request')
+        self.assertIs(first, second)
+        self.assertIn('<OrderId>ORD-2</OrderId>', second.render(dict(REQUEST, OrderId='ORD-2')))
+        self.assertIsNot(first, XmlTemplate.for_data(dict(REQUEST, New='1'), 'CC5Request'))
+
+    def test_invalid_input_rejected(self):
+        """Kontrol karakterleri ve geçersiz etiketler dict_to_xml gibi ValueError verir"""
+        with self.assertRaises(ValueError):
+            XmlUtils.render({'Name': 'a\x00b'}, 'Root')
+        with self.assertRaises(ValueError):
+            XmlUtils.render({'bad tag': '1'}, 'Root')
+
+    def test_list_falls_back(self):
+        """Liste içeren veri dict_to_xml ile serileştirilir"""
+        data = {'Item': [{'Id': '1'}, {'Id': '2'}]}
+        self.assertIsNone(XmlTemplate.for_data(data, 'Root'))
+        self.assertEqual(
+            XmlUtils.render(data, 'Root'),
+            "<?xml version='1.0' encoding='utf-8'?>\n<Root><Item><Id>1</Id></Item><Item><Id>2</Id></Item></Root>",
+        )
+
+
+class TestXmlExtract(TransactionCase):
+    """Tanımlı alan çıkarıcı testleri"""
+
+    FIELDS = {
+        'order_id': 'Order/OrderID',
+        'code': 'Transaction/Response/Code',
+        'message': 'Transaction/Response/Message',
+        'auth_code': 'Transaction/AuthCode',
+    }
+
+    BODY = (
+        '<Order><OrderID>ORD-1</OrderID></Order>'
+        '<Transaction><Response><Code> 00 </Code><Message/></Response></Transaction>'
+    )
+
+    def test_extract_fields(self):
+        """Yalnızca tanımlı alanlar okunur; boş eleman '', olmayan alan yok"""
+        data = XmlUtils.extract(f"<GVPSResponse>{self.BODY}</GVPSResponse>".encode(), 'GVPSResponse', self.FIELDS)
+        self.assertEqual(data, {'order_id': 'ORD-1', 'code': '00', 'message': ''})
+
+    def test_extract_wrapped_root(self):
+        """Kökü tekrar saran yanıt da aynı sonucu verir"""
+        xml = f"<?xml version='1.0' encoding='utf-8'?><GVPSResponse><GVPSResponse>{self.BODY}</GVPSResponse></GVPSResponse>"
+        self.assertEqual(XmlUtils.extract(xml, 'GVPSResponse', self.FIELDS)['order_id'], 'ORD-1')
+
+    def test_extract_not_xml(self):
+        """HTML/bozuk yanıt tipli hata verir"""
+        with self.assertRaises(XmlContentTypeError):
+            XmlUtils.extract(b'<html><body><p>Hata<br></body></html>', 'GVPSResponse', self.FIELDS)
+        with self.assertRaises(XmlMalformedError):
+            XmlUtils.extract('', 'GVPSResponse', self.FIELDS)
+
+    def test_extract_response_charset_fallback(self):
+        """Bildirimsiz ISO-8859-9 baytları çözülmüş metinden okunur"""
+        text = '<CC5Response><ErrMsg>Kart sahibi doğrulanamadı</ErrMsg></CC5Response>'
+        response = type('Response', (), {'content': text.encode('iso-8859-9'), 'text': text})()
+        data = XmlUtils.extract(response, 'CC5Response', {'ErrMsg': 'ErrMsg'})
+        self.assertEqual(data['ErrMsg'], 'Kart sahibi doğrulanamadı')
+
+    def test_extractor_cached(self):
+        """Aynı tanım için çıkarıcı bir kez derlenir"""
+        self.assertIs(
+            XmlExtractor.for_spec('GVPSResponse', self.FIELDS),
+            XmlExtractor.for_spec('GVPSResponse', dict(self.FIELDS)),
+        )
+
+    def test_invalid_spec_rejected(self):
+        """Geçersiz etiket veya çakışan yol derlemede reddedilir"""
+        with self.assertRaises(ValueError):
+            XmlExtractor('Root', {'a': 'Bad Tag'})
+        with self.assertRaises(ValueError):
+            XmlExtractor('Root', {'a': 'Order', 'b': 'Order/OrderID'})
+
+
+class Response:
+    """Test için asgari HTTP yanıtı"""
+
+    def __init__(self, content, content_type='text/xml', text=None):
+        self.content = content
+        self.text = text if text is not None else content.decode('utf-8', errors='replace')
+        self.headers = {'Content-Type': content_type, 'Content-Length': str(len(content))}
+
+
+class TestSafeXmlParser(TransactionCase):
+    """Sertleştirilmiş ayrıştırıcı testleri"""
+
+    def test_parse_valid(self):
+        """Geçerli yanıt ayrıştırılır; yorumlar atılır"""
+        root = SafeXmlParser.parse_response(Response(b'<R><!-- x --><A>1</A></R>'))
+        self.assertEqual(root.findtext('A'), '1')
+
+    def test_too_large(self):
+        """Sınırı aşan yanıt ayrıştırılmadan reddedilir"""
+        response = Response(b'<R>' + b'x' * 2048 + b'</R>')
+        with self.assertRaises(XmlResponseTooLarge) as ctx:
+            SafeXmlParser.parse_response(response, max_size=1024)
+        self.assertEqual(ctx.exception.error_type, 'response_too_large')
+
+        # Content-Length başlığı yoksa gövde boyutu kontrol edilir
+        del response.headers['Content-Length']
+        with self.assertRaises(XmlResponseTooLarge):
+            SafeXmlParser.parse_response(response, max_size=1024)
+
+    def test_non_xml_rejected(self):
+        """JSON içerik tipi, HTML bakım sayfası ve düz metin reddedilir"""
+        with self.assertRaises(XmlContentTypeError):
+            SafeXmlParser.parse_response(Response(b'{"a": 1}', 'application/json'))
+        with self.assertRaises(XmlContentTypeError):
+            SafeXmlParser.parse_response(Response(b'<!DOCTYPE html><html><body>Bakim</body></html>', 'text/html'))
+        with self.assertRaises(XmlContentTypeError):
+            SafeXmlParser.parse(b'Service Unavailable')
+
+    def test_xml_labelled_as_html_accepted(self):
+        """text/html ile gelen XML gövdesi kabul edilir"""
+        root = SafeXmlParser.parse_response(Response(b'<CC5Response><A>1</A></CC5Response>', 'text/html'))
+        self.assertEqual(root.tag, 'CC5Response')
+
+    def test_dtd_rejected(self):
+        """DTD/entity içeren yanıt reddedilir"""
+        xml = b'<?xml version="1.0"?><!DOCTYPE R [<!ENTITY e SYSTEM "file:///etc/passwd">]><R>&e;</R>'
+        with self.assertRaises(XmlMalformedError):
+            SafeXmlParser.parse(xml)
+
+    def test_malformed(self):
+        """Bozuk XML malformed_xml olarak sınıflanır; xml_to_dict boş dict döner"""
+        with self.assertRaises(XmlMalformedError) as ctx:
+            SafeXmlParser.parse(b'<R><A>1</R>')
+        self.assertEqual(ctx.exception.error_type, 'malformed_xml')
+        self.assertEqual(XmlUtils.xml_to_dict('<R><A>1</R>'), {})
+
+    def test_parser_per_thread(self):
+        """Her thread kendi ayrıştırıcısını yeniden kullanır"""
+        import threading
+
+        parsers = []
+        thread = threading.Thread(target=lambda: parsers.append(SafeXmlParser.parser()))
+        thread.start()
+        thread.join()
+        self.assertIs(SafeXmlParser.parser(), SafeXmlParser.parser())
+        self.assertIsNot(parsers[0], SafeXmlParser.parser())
+
+
+class TestGatewayResponseRoots(TransactionCase):
+    """Bankaların tek köklü XML yanıtları ödeme parser'larında okunur (regresyon)"""
+
+    CASES = (
+        ('estpos', 'CC5Response',
+         '<OrderId>ORD-1</OrderId><ProcReturnCode>00</ProcReturnCode><AuthCode>A1</AuthCode>'
+         '<HostRefNum>H1</HostRefNum>'),
+        ('garanti', 'GVPSResponse',
+         '<Order><OrderID>ORD-1</OrderID></Order><Transaction><Response><Code>00</Code></Response>'
+         '<AuthCode>A1</AuthCode><RetrefNum>H1</RetrefNum></Transaction>'),
+        ('payflex', 'PayforResponse',
+         '<OrderId>ORD-1</OrderId><ResultCode>Success</ResultCode><ResponseCode>00</ResponseCode>'
+         '<AuthCode>A1</AuthCode><HostRefNum>H1</HostRefNum>'),
+        ('posnet', 'posnetResponse',
+         '<approved>1</approved><orderId>ORD-1</orderId><authCode>A1</authCode><hostlogkey>H1</hostlogkey>'),
+    )
+
+    def _gateway(self, name):
+        from odoo.addons.mews_pos.lib.gateways.estpos_gateway import EstPosGateway
+        from odoo.addons.mews_pos.lib.gateways.garanti_gateway import GarantiGateway
+        from odoo.addons.mews_pos.lib.gateways.payflex_gateway import PayFlexGateway
+        from odoo.addons.mews_pos.lib.gateways.posnet_gateway import PosNetGateway
+
+        classes = {'estpos': EstPosGateway, 'garanti': GarantiGateway, 'payflex': PayFlexGateway, 'posnet': PosNetGateway}
+        return classes[name]({'environment': 'test'})
+
+    def test_single_and_wrapped_root(self):
+        """Tek köklü ve kökü tekrar saran yanıt aynı sonucu verir; sipariş no yanıttan okunur"""
+        for name, root, body in self.CASES:
+            gateway = self._gateway(name)
+            for xml in (f'<{root}>{body}</{root}>', f'<{root}><{root}>{body}</{root}></{root}>'):
+                with self.subTest(gateway=name, xml=xml[:40]):
+                    result = gateway.parse_payment_response(Response(xml.encode()))
+                    self.assertTrue(result['approved'])
+                    self.assertEqual(result['order_id'], 'ORD-1')
+                    self.assertEqual(result['auth_code'], 'A1')
+                    self.assertEqual(result['host_ref_num'], 'H1')
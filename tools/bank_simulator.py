@@ -0,0 +1,933 @@
+# -*- coding: utf-8 -*-
+"""
+Yerel banka simülatörü
+
+lib/gateways altındaki gateway'lerin ürettiği istekleri kabul edip
+ayrıştırdıkları formatta yanıt dönen, tek başına çalışan HTTP sunucusu.
+Gerçek banka test ortamlarına gitmeden ödeme akışının yük testi için
+kullanılır. Odoo'ya ve eklentinin diğer modüllerine bağımlı değildir.
+
+Desteklenen protokoller ve uç noktalar:
+
+    est       /est/api       CC5Request (DATA form alanı)   /est/3d
+    garanti   /garanti/api   GVPSRequest (XML gövde)        /garanti/3d
+    posnet    /posnet/api    posnetRequest (xmldata), OOS   /posnet/3d
+    payflex   /payflex/api   PayforRequest (XML gövde)      /payflex/3d
+    interpos  /interpos/api  form post                      /interpos/3d
+    tosla     /tosla/api     JSON                           /tosla/3d
+
+Yönetim uç noktaları:
+
+    GET  /_stats   Protokol/işlem/sonuç bazında sayaçlar ve süreler (JSON)
+    POST /_reset   Sayaçları ve sipariş kayıtlarını sıfırla
+
+Kullanım:
+
+    python3 tools/bank_simulator.py --port 8090 --latency lognormal:80:0.4 \\
+        --decline-rate 0.05 --http-error-rate 0.01 --callback post
+
+Banka kaydında payment_api_url ve gateway_3d_url alanları ilgili uç
+noktaya (ör. http://127.0.0.1:8090/est/api ve /est/3d) yönlendirilir.
+Protokol bazında ayar için --config ile JSON dosyası verilebilir:
+
+    {"default": {"latency": "normal:60:15"},
+     "garanti": {"latency": "lognormal:250:0.6", "timeout_rate": 0.01}}
+"""
+
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import math
+import random
+import secrets
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from html import escape as html_escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from urllib.request import Request, urlopen
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape as xml_escape
+
+_logger = logging.getLogger(__name__)
+
+
+class LatencyModel:
+    """
+    Yanıt gecikmesi dağılımı
+
+    Tanım 'dağılım:parametreler' biçimindedir, değerler milisaniyedir:
+        fixed:50            Sabit 50 ms
+        uniform:20:80       20-80 ms arası düzgün
+        normal:60:15        Ortalama 60, standart sapma 15
+        lognormal:80:0.4    Medyan 80 ms, sigma 0.4 (uzun kuyruklu)
+        exp:50              Ortalama 50 ms üstel
+    """
+
+    def __init__(self, spec='fixed:0'):
+        self.spec = str(spec)
+        kind, _sep, params = self.spec.partition(':')
+        try:
+            values = [float(value) for value in params.split(':') if value]
+        except ValueError:
+            raise ValueError(f"Geçersiz gecikme tanımı: {spec}")
+
+        samplers = {
+            'fixed': (1, lambda rng, v: v[0]),
+            'uniform': (2, lambda rng, v: rng.uniform(v[0], v[1])),
+            'normal': (2, lambda rng, v: rng.gauss(v[0], v[1])),
+            'lognormal': (2, lambda rng, v: rng.lognormvariate(math.log(max(v[0], 1e-6)), v[1])),
+            'exp': (1, lambda rng, v: rng.expovariate(1.0 / v[0]) if v[0] > 0 else 0.0),
+        }
+        if kind not in samplers or len(values) != samplers[kind][0]:
+            raise ValueError(f"Geçersiz gecikme tanımı: {spec}")
+        self._sampler = samplers[kind][1]
+        self._values = values
+
+    def sample(self, rng=random):
+        """Saniye cinsinden gecikme"""
+        return max(0.0, self._sampler(rng, self._values)) / 1000.0
+
+
+class Profile:
+    """Bir protokol için gecikme, hata oranları ve 3D geri dönüş ayarları"""
+
+    FIELDS = {
+        'latency': 'fixed:0',
+        'decline_rate': 0.0,
+        'http_error_rate': 0.0,
+        'timeout_rate': 0.0,
+        'timeout_hang': 60.0,
+        'callback': 'form',
+        'callback_latency': 'fixed:0',
+        'store_key': '',
+    }
+
+    def __init__(self, **settings):
+        unknown = set(settings) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Bilinmeyen simülatör ayarı: {', '.join(sorted(unknown))}")
+        values = dict(self.FIELDS, **settings)
+        if values['callback'] not in ('form', 'post'):
+            raise ValueError(f"Geçersiz callback modu: {values['callback']}")
+
+        self.latency = LatencyModel(values['latency'])
+        self.callback_latency = LatencyModel(values['callback_latency'])
+        self.decline_rate = float(values['decline_rate'])
+        self.http_error_rate = float(values['http_error_rate'])
+        self.timeout_rate = float(values['timeout_rate'])
+        self.timeout_hang = float(values['timeout_hang'])
+        self.callback = values['callback']
+        self.store_key = values['store_key']
+        self.settings = values
+
+    def roll(self, rng=random):
+        """Bu istek için sonuç: ok / decline / http_error / timeout"""
+        value = rng.random()
+        for outcome, rate in (
+            ('timeout', self.timeout_rate),
+            ('http_error', self.http_error_rate),
+            ('decline', self.decline_rate),
+        ):
+            if value < rate:
+                return outcome
+            value -= rate
+        return 'ok'
+
+
+class OrderStore:
+    """Sipariş bazlı durum (iptal/iade/sorgu tutarlılığı için), sınırlı boyutlu"""
+
+    def __init__(self, max_size=200000):
+        self.max_size = max_size
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+        self._refs = itertools.count(100000001)
+
+    def next_ref(self):
+        with self._lock:
+            return str(next(self._refs))
+
+    def put(self, protocol, order_id, **values):
+        with self._lock:
+            key = (protocol, order_id)
+            order = self._orders.setdefault(key, {})
+            order.update(values)
+            self._orders.move_to_end(key)
+            while len(self._orders) > self.max_size:
+                self._orders.popitem(last=False)
+            return order
+
+    def get(self, protocol, order_id):
+        with self._lock:
+            order = self._orders.get((protocol, order_id))
+            return dict(order) if order else None
+
+    def clear(self):
+        with self._lock:
+            self._orders.clear()
+
+
+class Stats:
+    """Protokol/işlem/sonuç bazında sayaç ve süre özetleri"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._started = time.time()
+            self._data = defaultdict(lambda: {'count': 0, 'seconds': 0.0, 'max': 0.0})
+
+    def record(self, protocol, operation, outcome, seconds):
+        with self._lock:
+            entry = self._data[(protocol, operation, outcome)]
+            entry['count'] += 1
+            entry['seconds'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.time() - self._started
+            result = {'uptime': round(uptime, 3), 'protocols': {}}
+            for (protocol, operation, outcome), entry in sorted(self._data.items()):
+                result['protocols'].setdefault(protocol, {}).setdefault(operation, {})[outcome] = {
+                    'count': entry['count'],
+                    'rps': round(entry['count'] / uptime, 2) if uptime else 0.0,
+                    'avg_ms': round(entry['seconds'] / entry['count'] * 1000, 3),
+                    'max_ms': round(entry['max'] * 1000, 3),
+                }
+            return result
+
+
+class SimulatedFault(Exception):
+    """Profil gereği HTTP hatası veya askıda kalma üretildi"""
+
+
+def _auth_code():
+    return f"{secrets.randbelow(1000000):06d}"
+
+
+def _xml(root, values):
+    """Düz/iç içe dict'ten kompakt XML yanıtı üret"""
+    def build(data):
+        parts = []
+        for key, value in data.items():
+            if isinstance(value, dict):
+                parts.append(f"<{key}>{build(value)}</{key}>")
+            else:
+                parts.append(f"<{key}>{xml_escape('' if value is None else str(value))}</{key}>")
+        return ''.join(parts)
+    return f'<?xml version="1.0" encoding="UTF-8"?><{root}>{build(values)}</{root}>'
+
+
+def _xml_fields(text):
+    """XML isteğini {etiket: metin} ve kök elemana ayrıştır (iç içe etiketler düzleşir)"""
+    root = ElementTree.fromstring(text.encode('utf-8') if isinstance(text, str) else text)
+    # Gateway'ler kökü kendi adıyla bir kez daha sarar (<CC5Request><CC5Request>...)
+    if len(root) == 1 and root[0].tag == root.tag:
+        root = root[0]
+    fields = {}
+    for element in root.iter():
+        if element is not root and len(element) == 0:
+            fields.setdefault(element.tag, (element.text or '').strip())
+    return root, fields
+
+
+class Protocol:
+    """Protokol simülatörü tabanı"""
+
+    name = None
+
+    def __init__(self, store):
+        self.store = store
+
+    def api(self, body, fields, content_type, outcome):
+        """
+        Sunucudan sunucuya API isteği
+
+        Returns:
+            tuple: (işlem adı, content-type, yanıt gövdesi)
+        """
+        raise NotImplementedError
+
+    def threed(self, fields, outcome):
+        """
+        3D formu karşılığında mağazaya dönülecek callback
+
+        Returns:
+            tuple: (callback URL, callback alanları)
+        """
+        raise NotImplementedError
+
+    def _sale(self, order_id, amount):
+        ref = self.store.next_ref()
+        return self.store.put(
+            self.name, order_id, amount=amount, refunded=0.0, status='approved',
+            auth_code=_auth_code(), host_ref=ref, rrn=f"{ref}01", trans_id=f"T{ref}",
+        )
+
+    def _reference(self, order_id, operation, amount=None):
+        """İptal/iade: sipariş yoksa ya da durum uygun değilse hata mesajı döner"""
+        order = self.store.get(self.name, order_id)
+        if not order:
+            return None, f"No record found for {order_id}"
+        if order['status'] == 'cancelled':
+            return None, 'İşlem daha önce iptal edilmiş'
+        if operation == 'cancel':
+            return self.store.put(self.name, order_id, status='cancelled'), None
+        amount = order['amount'] if amount is None else amount
+        if order['refunded'] + amount > order['amount'] + 0.005:
+            return None, 'İade tutarı işlem tutarını aşıyor'
+        refunded = order['refunded'] + amount
+        status = 'refunded' if refunded >= order['amount'] - 0.005 else 'approved'
+        return self.store.put(self.name, order_id, refunded=refunded, status=status,
+                              host_ref=self.store.next_ref()), None
+
+
+class EstProtocol(Protocol):
+    """Asseco EST (CC5Request/CC5Response)"""
+
+    name = 'est'
+
+    TRANS_STAT = {'approved': 'C', 'cancelled': 'V', 'refunded': 'R'}
+
+    def api(self, body, fields, content_type, outcome):
+        _root, data = _xml_fields(fields.get('DATA') or body)
+        order_id = data.get('OrderId', '')
+
+        if data.get('ORDERSTATUS') == 'QUERY':
+            order = self.store.get(self.name, order_id)
+            if not order:
+                return 'status', 'text/xml', _xml('CC5Response', {
+                    'OrderId': order_id, 'Response': 'Error', 'ProcReturnCode': '99',
+                    'ErrMsg': f"No record found for {order_id}",
+                })
+            return 'status', 'text/xml', _xml('CC5Response', {
+                'OrderId': order_id, 'Response': 'Approved', 'ProcReturnCode': '00',
+                'Extra': {
+                    'TRANS_STAT': self.TRANS_STAT.get(order['status'], 'D'),
+                    'AUTH_CODE': order['auth_code'],
+                    'HOST_REF_NUM': order['host_ref'],
+                },
+            })
+
+        operation = {'Auth': 'payment', 'Void': 'cancel', 'Credit': 'refund'}.get(data.get('Type'), 'payment')
+        if outcome == 'decline':
+            return operation, 'text/xml', _xml('CC5Response', {
+                'OrderId': order_id, 'Response': 'Declined', 'ProcReturnCode': '05',
+                'ErrCode': 'CORE-2008', 'ErrMsg': 'Red-Onaylanmadı',
+            })
+
+        amount = int(data['Total']) / 100.0 if data.get('Total') else None
+        if operation == 'payment':
+            order, error = self._sale(order_id, amount or 0.0), None
+        else:
+            order, error = self._reference(order_id, operation, amount)
+        if error:
+            return operation, 'text/xml', _xml('CC5Response', {
+                'OrderId': order_id, 'Response': 'Error', 'ProcReturnCode': '99', 'ErrMsg': error,
+            })
+        return operation, 'text/xml', _xml('CC5Response', {
+            'OrderId': order_id, 'Response': 'Approved', 'ProcReturnCode': '00',
+            'AuthCode': order['auth_code'], 'HostRefNum': order['host_ref'], 'TransId': order['trans_id'],
+        })
+
+    def threed(self, fields, outcome):
+        order_id = fields.get('oid', '')
+        amount = int(fields.get('amount') or 0) / 100.0
+        approved = outcome == 'ok'
+        callback = {
+            'clientid': fields.get('clientid', ''),
+            'oid': order_id,
+            'amount': fields.get('amount', ''),
+            'rnd': fields.get('rnd', ''),
+            'mdStatus': '1' if approved else '0',
+            'Response': 'Approved' if approved else 'Declined',
+            'ProcReturnCode': '00' if approved else '05',
+            'eci': '05',
+            'cavv': base64.b64encode(secrets.token_bytes(20)).decode(),
+            'xid': base64.b64encode(order_id.encode()[:20].ljust(20, b'0')).decode(),
+        }
+        if approved:
+            order = self._sale(order_id, amount)
+            callback.update(AuthCode=order['auth_code'], HostRefNum=order['host_ref'], TransId=order['trans_id'])
+        else:
+            callback.update(ErrMsg='Red-Onaylanmadı', mdErrorMsg='Not authenticated')
+        return fields.get('okUrl' if approved else 'failUrl'), callback
+
+    @staticmethod
+    def sign(params, store_key):
+        """hashAlgorithm=ver3 callback imzası (alfabetik sıralı değerler + store key, SHA-512)"""
+        def esc(value):
+            return str(value).replace('\\', '\\\\').replace('|', '\\|')
+        keys = sorted((k for k in params if k.lower() not in ('hash', 'encoding')), key=str.lower)
+        plain = '|'.join([esc(params[k]) for k in keys] + [esc(store_key)])
+        return base64.b64encode(hashlib.sha512(plain.encode('utf-8')).digest()).decode()
+
+
+class GarantiProtocol(Protocol):
+    """Garanti BBVA (GVPSRequest/GVPSResponse)"""
+
+    name = 'garanti'
+
+    def api(self, body, fields, content_type, outcome):
+        root, data = _xml_fields(body)
+        transaction = root.find('Transaction')
+        trans_type = transaction.findtext('Type', 'sales') if transaction is not None else 'sales'
+        order_id = root.findtext('Order/OrderID', '')
+        operation = {'sales': 'payment', 'void': 'cancel', 'refund': 'refund'}.get(trans_type, 'payment')
+
+        if outcome == 'decline':
+            return operation, 'application/xml', self._response(order_id, '05', 'Declined', 'RED-ONAYLANMADI')
+
+        amount = int(data['Amount']) / 100.0 if data.get('Amount') else None
+        if operation == 'payment':
+            order, error = self._sale(order_id, amount or 0.0), None
+        else:
+            order, error = self._reference(order_id, operation, None if operation == 'cancel' else amount)
+        if error:
+            return operation, 'application/xml', self._response(order_id, '99', 'Error', error)
+        return operation, 'application/xml', self._response(order_id, '00', 'Approved', '', order)
+
+    def _response(self, order_id, code, message, error, order=None):
+        order = order or {}
+        return _xml('GVPSResponse', {
+            'Mode': '',
+            'Order': {'OrderID': order_id, 'GroupID': ''},
+            'Transaction': {
+                'Response': {'Source': 'HOST', 'Code': code, 'ReasonCode': code,
+                             'Message': message, 'ErrorMsg': error},
+                'RetrefNum': order.get('host_ref', ''),
+                'AuthCode': order.get('auth_code', ''),
+                'RRN': order.get('rrn', ''),
+                'ProvDate': time.strftime('%Y%m%d %H:%M:%S'),
+            },
+        })
+
+    def threed(self, fields, outcome):
+        order_id = fields.get('orderid', '')
+        approved = outcome == 'ok'
+        callback = {
+            'orderid': order_id,
+            'mdstatus': '1' if approved else '0',
+            'txnstatus': 'Y' if approved else 'N',
+            'procreturncode': '00' if approved else '05',
+            'responsecode': '00' if approved else '05',
+            'responsemessage': 'Approved' if approved else 'Declined',
+            'txnamount': fields.get('txnamount', ''),
+            'eci': '02',
+            'cavv': base64.b64encode(secrets.token_bytes(20)).decode(),
+            'xid': base64.b64encode(secrets.token_bytes(20)).decode(),
+        }
+        if approved:
+            order = self._sale(order_id, int(fields.get('txnamount') or 0) / 100.0)
+            callback.update(authcode=order['auth_code'], hostrefnum=order['host_ref'], rrn=order['rrn'])
+        else:
+            callback['errmsg'] = 'RED-ONAYLANMADI'
+        return fields.get('successurl' if approved else 'errorurl'), callback
+
+
+class PosNetProtocol(Protocol):
+    """YapıKredi PosNet (posnetRequest/posnetResponse), OOS akışı dahil"""
+
+    name = 'posnet'
+
+    def __init__(self, store):
+        super().__init__(store)
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+
+    def api(self, body, fields, content_type, outcome):
+        root, data = _xml_fields(fields.get('xmldata') or body)
+        children = {child.tag for child in root}
+
+        if 'oosRequestData' in children:
+            if outcome == 'decline':
+                return 'oos', 'text/xml', self._error('0127', 'ORDERID DAHA ONCE KULLANILMIS')
+            token = secrets.token_hex(16).upper()
+            with self._lock:
+                self._pending[token] = (data.get('XID', ''), int(data.get('amount') or 0) / 100.0)
+                while len(self._pending) > 100000:
+                    self._pending.popitem(last=False)
+            return 'oos', 'text/xml', _xml('posnetResponse', {
+                'approved': '1',
+                'oosRequestDataResponse': {'data1': token, 'data2': token[::-1], 'sign': self._digest(token)},
+            })
+
+        if 'oosResolveMerchantData' in children:
+            with self._lock:
+                pending = self._pending.pop(data.get('bankData', ''), None)
+            if pending is None or outcome == 'decline':
+                return 'resolve', 'text/xml', self._error('0148', 'INVALID MID TID IP')
+            order = self._sale(*pending)
+            return 'resolve', 'text/xml', _xml('posnetResponse', {
+                'approved': '1',
+                'oosResolveMerchantDataResponse': {
+                    'xid': pending[0], 'authCode': order['auth_code'], 'hostlogkey': order['host_ref'],
+                },
+            })
+
+        operation = 'cancel' if 'reverse' in children else 'refund' if 'return' in children else 'payment'
+        if outcome == 'decline':
+            return operation, 'text/xml', self._error('0051', 'YETERSIZ BAKIYE')
+        if operation == 'payment':
+            order = self._sale(data.get('orderID', ''), int(data.get('amount') or 0) / 100.0)
+        else:
+            order_id = self._find_by_host_ref(data.get('hostLogKey'))
+            if order_id is None:
+                return operation, 'text/xml', self._error('0148', 'No record found')
+            amount = int(data['amount']) / 100.0 if data.get('amount') else None
+            order, error = self._reference(order_id, operation, amount)
+            if error:
+                return operation, 'text/xml', self._error('0148', error)
+        return operation, 'text/xml', _xml('posnetResponse', {
+            'approved': '1', 'authCode': order['auth_code'], 'hostlogkey': order['host_ref'],
+        })
+
+    def _find_by_host_ref(self, host_ref):
+        """PosNet iptal/iadeleri sipariş yerine hostLogKey ile gelir"""
+        with self.store._lock:
+            for (protocol, order_id), order in reversed(self.store._orders.items()):
+                if protocol == self.name and order.get('host_ref') == host_ref:
+                    return order_id
+        return None
+
+    def _error(self, code, text):
+        return _xml('posnetResponse', {'approved': '0', 'respCode': code, 'respText': text})
+
+    @staticmethod
+    def _digest(token):
+        return base64.b64encode(hashlib.sha256(token.encode()).digest()).decode()
+
+    def threed(self, fields, outcome):
+        token = fields.get('posnetData', '')
+        if outcome != 'ok':
+            with self._lock:
+                self._pending.pop(token, None)
+        # PosNet tek dönüş adresi kullanır; sonuç provizyon (resolve) adımında belli olur
+        return fields.get('merchantReturnURL'), {
+            'MerchantPacket': token,
+            'BankPacket': token,
+            'Sign': self._digest(token),
+            'CCPrefix': '450803',
+            'TranType': 'Sale',
+        }
+
+
+class PayFlexProtocol(Protocol):
+    """Ziraat/Vakıfbank PayFlex (PayforRequest/PayforResponse)"""
+
+    name = 'payflex'
+
+    def api(self, body, fields, content_type, outcome):
+        _root, data = _xml_fields(body)
+        order_id = data.get('OrderId', '')
+        operation = {'Sale': 'payment', 'Void': 'cancel', 'Refund': 'refund'}.get(data.get('TxnType'), 'payment')
+        if outcome == 'decline':
+            return operation, 'application/xml', _xml('PayforResponse', {
+                'OrderId': order_id, 'ResultCode': 'Failure', 'ResponseCode': '05',
+                'ErrorMessage': 'Red - Onaylanmadı',
+            })
+
+        amount = float(data['Amount']) if data.get('Amount') else None
+        if operation == 'payment':
+            order, error = self._sale(order_id, amount or 0.0), None
+        else:
+            order, error = self._reference(order_id, operation, amount)
+        if error:
+            return operation, 'application/xml', _xml('PayforResponse', {
+                'OrderId': order_id, 'ResultCode': 'Failure', 'ResponseCode': '99', 'ErrorMessage': error,
+            })
+        return operation, 'application/xml', _xml('PayforResponse', {
+            'OrderId': order_id, 'ResultCode': 'Success', 'ResponseCode': '00',
+            'AuthCode': order['auth_code'], 'HostRefNum': order['host_ref'], 'Rrn': order['rrn'],
+        })
+
+    def threed(self, fields, outcome):
+        order_id = fields.get('OrderId', '')
+        approved = outcome == 'ok'
+        callback = {
+            'OrderId': order_id,
+            'ResultCode': 'Success' if approved else 'Failure',
+            'ResponseCode': '00' if approved else '05',
+            'Eci': '05',
+            'Cavv': base64.b64encode(secrets.token_bytes(20)).decode(),
+        }
+        if approved:
+            order = self._sale(order_id, float(fields.get('Amount') or 0))
+            callback.update(AuthCode=order['auth_code'], HostRefNum=order['host_ref'], Rrn=order['rrn'])
+        else:
+            callback['ErrorMessage'] = 'Kart doğrulanamadı'
+        return fields.get('SuccessUrl' if approved else 'FailUrl'), callback
+
+
+class InterPosProtocol(Protocol):
+    """Denizbank InterPOS (form post, form-encoded yanıt)"""
+
+    name = 'interpos'
+
+    def api(self, body, fields, content_type, outcome):
+        order_id = fields.get('OrderId', '')
+        operation = {'Auth': 'payment', 'Void': 'cancel', 'Refund': 'refund'}.get(fields.get('TxnType'), 'payment')
+        if outcome == 'decline':
+            return operation, 'text/plain', urlencode({
+                'OrderId': order_id, 'ProcReturnCode': '05', 'ErrMsg': 'Red',
+            })
+
+        amount = float(fields['PurchAmount']) if fields.get('PurchAmount') else None
+        if operation == 'payment':
+            order, error = self._sale(order_id, amount or 0.0), None
+        else:
+            order, error = self._reference(fields.get('OrgOrderId') or order_id, operation, amount)
+        if error:
+            return operation, 'text/plain', urlencode({
+                'OrderId': order_id, 'ProcReturnCode': '99', 'ErrMsg': error,
+            })
+        return operation, 'text/plain', urlencode({
+            'OrderId': order_id, 'ProcReturnCode': '00', 'AuthCode': order['auth_code'],
+            'HostRefNum': order['host_ref'], 'RetrefNum': order['rrn'], 'TransId': order['trans_id'],
+        })
+
+    def threed(self, fields, outcome):
+        order_id = fields.get('OrderId', '')
+        approved = outcome == 'ok'
+        callback = {
+            'OrderId': order_id,
+            'TRANSTAT': 'Success' if approved else 'Fail',
+            'ProcReturnCode': '00' if approved else '05',
+        }
+        if approved:
+            order = self._sale(order_id, float(fields.get('PurchAmount') or 0))
+            callback.update(AuthCode=order['auth_code'], HostRefNum=order['host_ref'],
+                            RetrefNum=order['rrn'], TransId=order['trans_id'])
+        else:
+            callback['ErrMsg'] = '3D doğrulama başarısız'
+        return fields.get('OkUrl' if approved else 'FailUrl'), callback
+
+
+class ToslaProtocol(Protocol):
+    """Tosla (JSON API)"""
+
+    name = 'tosla'
+
+    def api(self, body, fields, content_type, outcome):
+        data = json.loads(body or '{}')
+        order_id = data.get('OrderId', '')
+        operation = {'Sale': 'payment', 'Void': 'cancel', 'Refund': 'refund'}.get(
+            data.get('TransactionType'), 'payment')
+        if outcome == 'decline':
+            return operation, 'application/json', json.dumps({
+                'OrderId': order_id, 'ResultCode': '9999', 'ResultStatus': 'Failed',
+                'ResultMessage': 'İşlem onaylanmadı',
+            })
+
+        amount = float(data['Amount']) if data.get('Amount') else None
+        if operation == 'payment':
+            order, error = self._sale(order_id, amount or 0.0), None
+        else:
+            order, error = self._reference(order_id, operation, amount)
+        if error:
+            return operation, 'application/json', json.dumps({
+                'OrderId': order_id, 'ResultCode': '9998', 'ResultStatus': 'Failed', 'ResultMessage': error,
+            })
+        return operation, 'application/json', json.dumps({
+            'OrderId': order_id, 'ResultCode': '0000', 'ResultStatus': 'Success', 'ResultMessage': 'Başarılı',
+            'AuthCode': order['auth_code'], 'HostReferenceNumber': order['host_ref'],
+            'Rrn': order['rrn'], 'TransactionId': order['trans_id'],
+        })
+
+    def threed(self, fields, outcome):
+        order_id = fields.get('OrderId', '')
+        approved = outcome == 'ok'
+        callback = {
+            'OrderId': order_id,
+            'ResultCode': '0000' if approved else '9999',
+            'ResultStatus': 'Success' if approved else 'Failed',
+            'ResultMessage': 'Başarılı' if approved else '3D doğrulama başarısız',
+            'Eci': '05',
+            'Cavv': base64.b64encode(secrets.token_bytes(20)).decode(),
+            'Xid': base64.b64encode(secrets.token_bytes(20)).decode(),
+        }
+        if approved:
+            order = self._sale(order_id, float(fields.get('Amount') or 0))
+            callback.update(AuthCode=order['auth_code'], HostReferenceNumber=order['host_ref'],
+                            Rrn=order['rrn'], TransactionId=order['trans_id'])
+        return fields.get('SuccessUrl' if approved else 'ErrorUrl'), callback
+
+
+PROTOCOLS = (EstProtocol, GarantiProtocol, PosNetProtocol, PayFlexProtocol, InterPosProtocol, ToslaProtocol)
+
+
+class BankSimulator:
+    """
+    Protokolleri, profilleri ve sayaçları bir arada tutan simülatör
+
+    HTTP katmanından bağımsızdır; handle() istek gövdesini alıp
+    (durum kodu, content-type, gövde) döndürür.
+    """
+
+    def __init__(self, profiles=None, seed=None, callback_workers=16):
+        """
+        Args:
+            profiles (dict): {'default' | protokol adı: Profile veya ayar dict'i}
+            seed (int): Tekrarlanabilir sonuçlar için rastgele sayı tohumu
+            callback_workers (int): Sunucu taraflı callback gönderimi thread sayısı
+        """
+        profiles = dict(profiles or {})
+        default = profiles.pop('default', None) or {}
+        default_settings = default.settings if isinstance(default, Profile) else default
+        self.default_profile = Profile(**default_settings)
+        self.profiles = {}
+        for name, settings in profiles.items():
+            if isinstance(settings, Profile):
+                self.profiles[name] = settings
+            else:
+                self.profiles[name] = Profile(**dict(default_settings, **settings))
+
+        self.store = OrderStore()
+        self.stats = Stats()
+        self.protocols = {cls.name: cls(self.store) for cls in PROTOCOLS}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._callbacks = ThreadPoolExecutor(max_workers=callback_workers, thread_name_prefix='bank_sim_callback')
+
+    def profile(self, protocol):
+        return self.profiles.get(protocol, self.default_profile)
+
+    def _roll(self, profile):
+        with self._rng_lock:
+            return profile.roll(self._rng), profile.latency.sample(self._rng)
+
+    def reset(self):
+        self.stats.reset()
+        self.store.clear()
+
+    def close(self):
+        self._callbacks.shutdown(wait=False)
+
+    def handle(self, path, body, content_type):
+        """
+        Banka isteğini işle
+
+        Args:
+            path (str): /<protokol>/api veya /<protokol>/3d
+            body (str): İstek gövdesi
+            content_type (str): İstek Content-Type başlığı
+
+        Returns:
+            tuple: (HTTP durum kodu, content-type, yanıt gövdesi)
+
+        Raises:
+            SimulatedFault: timeout profilinde istek askıda bırakılır
+        """
+        parts = [part for part in urlsplit(path).path.split('/') if part]
+        if len(parts) != 2 or parts[0] not in self.protocols or parts[1] not in ('api', '3d'):
+            return 404, 'text/plain', 'Bilinmeyen uç nokta'
+
+        name, kind = parts
+        protocol = self.protocols[name]
+        profile = self.profile(name)
+        fields = self._parse_fields(body, content_type)
+        outcome, latency = self._roll(profile)
+        started = time.monotonic()
+
+        if outcome == 'timeout':
+            self.stats.record(name, kind, 'timeout', profile.timeout_hang)
+            raise SimulatedFault(profile.timeout_hang)
+
+        time.sleep(latency)
+        if outcome == 'http_error':
+            self.stats.record(name, kind, 'http_error', time.monotonic() - started)
+            return 503, 'text/plain', 'Service Unavailable'
+
+        try:
+            if kind == 'api':
+                operation, response_type, response = protocol.api(body, fields, content_type, outcome)
+            else:
+                operation = '3d'
+                response_type, response = self._threed(protocol, profile, fields, outcome)
+        except Exception as e:
+            _logger.warning(f"Simülatör isteği işlenemedi: {name}/{kind} ({str(e)})")
+            self.stats.record(name, kind, 'bad_request', time.monotonic() - started)
+            return 400, 'text/plain', f"Geçersiz istek: {e}"
+
+        self.stats.record(name, operation, outcome, time.monotonic() - started)
+        return 200, response_type, response
+
+    @staticmethod
+    def _parse_fields(body, content_type):
+        content_type = (content_type or '').lower()
+        if 'json' in content_type:
+            try:
+                data = json.loads(body or '{}')
+                return {k: '' if v is None else str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+            except ValueError:
+                return {}
+        if 'x-www-form-urlencoded' in content_type:
+            return dict(parse_qsl(body or '', keep_blank_values=True))
+        return {}
+
+    def _threed(self, protocol, profile, fields, outcome):
+        url, callback = protocol.threed(fields, outcome)
+        if profile.store_key and protocol.name == 'est':
+            callback['hashAlgorithm'] = 'ver3'
+            callback['HASH'] = EstProtocol.sign(callback, profile.store_key)
+        if not url:
+            raise ValueError('Callback adresi yok')
+
+        if profile.callback == 'post':
+            with self._rng_lock:
+                delay = profile.callback_latency.sample(self._rng)
+            self._callbacks.submit(self._post_callback, protocol.name, url, callback, delay)
+            return 'application/json', json.dumps({'callback_url': url, 'fields': callback})
+
+        inputs = ''.join(
+            f'<input type="hidden" name="{html_escape(k)}" value="{html_escape(str(v))}"/>'
+            for k, v in callback.items()
+        )
+        return 'text/html; charset=utf-8', (
+            '<!DOCTYPE html><html><body onload="document.forms[0].submit()">'
+            f'<form method="POST" action="{html_escape(url)}">{inputs}'
+            '<noscript><button type="submit">Devam</button></noscript></form></body></html>'
+        )
+
+    def _post_callback(self, protocol, url, callback, delay):
+        """3D dönüşünü mağazaya sunucu tarafından gönder (tarayıcı yerine)"""
+        time.sleep(delay)
+        started = time.monotonic()
+        request = Request(url, data=urlencode(callback).encode('utf-8'), method='POST',
+                          headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        try:
+            with urlopen(request, timeout=60) as response:
+                response.read()
+                outcome = f"http_{response.status}"
+        except Exception as e:
+            outcome = f"http_{getattr(e, 'code', 'error')}"
+            _logger.warning(f"3D callback gönderilemedi: {url} ({str(e)})")
+        self.stats.record(protocol, 'callback', outcome, time.monotonic() - started)
+
+
+class SimulatorRequestHandler(BaseHTTPRequestHandler):
+    """Keep-alive destekli HTTP/1.1 istek işleyici"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MewsPosBankSimulator/1.0'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8', errors='replace') if length else ''
+        simulator = self.server.simulator
+
+        if self.path == '/_reset':
+            simulator.reset()
+            return self._send(200, 'application/json', '{"reset": true}')
+
+        try:
+            status, content_type, response = simulator.handle(
+                self.path, body, self.headers.get('Content-Type'))
+        except SimulatedFault as fault:
+            # Banka yanıt vermiyor: bağlantıyı süre boyunca açık tut, sonra kapat
+            time.sleep(float(fault.args[0]))
+            self.close_connection = True
+            return
+        self._send(status, content_type, response)
+
+    def do_GET(self):
+        if self.path == '/_stats':
+            return self._send(200, 'application/json', json.dumps(self.server.simulator.stats.snapshot()))
+        self._send(404, 'text/plain', 'Bilinmeyen uç nokta')
+
+    def _send(self, status, content_type, body):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        _logger.debug(f"{self.address_string()} {format % args}")
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    """Simülatör HTTP sunucusu (istek başına thread)"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, simulator):
+        self.simulator = simulator
+        super().__init__(address, SimulatorRequestHandler)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def server_close(self):
+        super().server_close()
+        self.simulator.close()
+
+
+def serve(host='127.0.0.1', port=8090, profiles=None, seed=None):
+    """Simülatörü başlat (arka planda kullanım için server.serve_forever thread'de çalıştırılır)"""
+    return SimulatorServer((host, port), BankSimulator(profiles, seed=seed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mews POS yerel banka simülatörü')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', default='fixed:0', help="Gecikme dağılımı, ör. 'lognormal:80:0.4' (ms)")
+    parser.add_argument('--decline-rate', type=float, default=0.0, help='Bankanın reddettiği istek oranı')
+    parser.add_argument('--http-error-rate', type=float, default=0.0, help='HTTP 503 dönen istek oranı')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='Yanıtsız kalan istek oranı')
+    parser.add_argument('--timeout-hang', type=float, default=60.0, help='Yanıtsız isteklerin bekletildiği süre (sn)')
+    parser.add_argument('--callback', choices=('form', 'post'), default='form',
+                        help='3D dönüşü: form (tarayıcıya otomatik form) veya post (sunucudan gönderim)')
+    parser.add_argument('--callback-latency', default='fixed:0', help='post modunda callback öncesi bekleme (ms)')
+    parser.add_argument('--store-key', default='', help='EST callback HASH imzası için store key')
+    parser.add_argument('--config', help='Protokol bazında ayarlar içeren JSON dosyası')
+    parser.add_argument('--seed', type=int, help='Rastgele sayı tohumu')
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(message)s')
+
+    profiles = {'default': {
+        'latency': args.latency,
+        'decline_rate': args.decline_rate,
+        'http_error_rate': args.http_error_rate,
+        'timeout_rate': args.timeout_rate,
+        'timeout_hang': args.timeout_hang,
+        'callback': args.callback,
+        'callback_latency': args.callback_latency,
+        'store_key': args.store_key,
+    }}
+    if args.config:
+        with open(args.config, encoding='utf-8') as config_file:
+            overrides = json.load(config_file)
+        profiles['default'].update(overrides.pop('default', {}))
+        profiles.update(overrides)
+
+    server = serve(args.host, args.port, profiles, seed=args.seed)
+    _logger.info(f"Banka simülatörü dinleniyor: {server.base_url}")
+    for name in server.simulator.protocols:
+        _logger.info(f"  {name:<9} {server.base_url}/{name}/api  {server.base_url}/{name}/3d")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
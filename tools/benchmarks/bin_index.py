@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+BIN indeksi benchmark'ı
+
+Kart şemalarının yayımladığı boyutta (varsayılan 100.000 kayıt; 6 ve
+8 haneli BIN'ler ve aralıklar karışık) sentetik bir BIN tablosu üzerinde:
+
+    build        İndeksin kayıtlardan oluşturulması (worker başına bir kez;
+                 yalnızca süre ölçülür)
+    lookup_8     8 haneli kart başı (en özel kayıt)
+    lookup_6     6 haneli kart başı (tek banka kontrolü)
+    lookup_miss  Tabloda olmayan BIN
+    encode_map   Tarayıcıya gönderilen sürümlü BIN -> banka haritası
+                 (indeks değiştiğinde bir kez; yalnızca süre ölçülür)
+
+Ölçümden önce indeks sonuçları kayıtlar üzerinde doğrusal aramayla
+doğrulanır.
+
+Eklenti dizininden:
+
+    python3 -m tools.benchmarks.bin_index
+    python3 -m tools.benchmarks.bin_index --rows 300000 --save tools/benchmarks/baselines/bin_index.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from . import harness
+
+ROWS = 100000
+BANKS = 15
+
+
+def build_rows(count=ROWS, seed=42):
+    """
+    Sentetik BIN kayıtları
+
+    Returns:
+        list: (bin_number, bin_end, bank_id, card_type) demetleri
+    """
+    generator = random.Random(seed)
+    rows = []
+    seen = set()
+    while len(rows) < count:
+        kind = generator.random()
+        bank_id = generator.randint(1, BANKS)
+        if kind < 0.6:
+            bin_number = str(generator.randint(40000000, 69999999))
+            bin_end = None
+        elif kind < 0.9:
+            bin_number = str(generator.randint(400000, 699999))
+            bin_end = None
+        else:
+            bin_number = str(generator.randint(400000, 699990))
+            bin_end = str(int(bin_number) + generator.randint(1, 9))
+        if bin_number in seen:
+            continue
+        seen.add(bin_number)
+        rows.append((bin_number, bin_end, bank_id, 'visa' if bin_number[0] == '4' else 'mastercard'))
+    return rows
+
+
+def _linear_lookup(intervals, key):
+    """En dar aralık (doğrulama için referans uygulama)"""
+    best = None
+    for start, end, bank_id in intervals:
+        if start <= key <= end and (best is None or end - start < best[0]):
+            best = (end - start, bank_id)
+    return best[1] if best else None
+
+
+def verify(index, rows, samples=50, seed=7):
+    """İndeks, doğrusal aramayla aynı bankayı bulmalı"""
+    from odoo.addons.mews_pos.lib.bin_index import bin_range
+
+    intervals = [bin_range(bin_number, bin_end) + (bank_id,) for bin_number, bin_end, bank_id, _type in rows]
+    generator = random.Random(seed)
+    keys = [int(generator.choice(rows)[0].ljust(8, '0')) for _ in range(samples // 2)]
+    keys += [generator.randint(40000000, 69999999) for _ in range(samples // 2)]
+    errors = []
+    for key in keys:
+        expected = _linear_lookup(intervals, key)
+        actual = index.lookup_bank(str(key))
+        if actual != expected:
+            errors.append(f"{key}: {actual} != {expected}")
+    return errors
+
+
+def measure_build(func, runs=3):
+    """
+    İndeks/harita oluşturma süresi
+
+    harness.measure her ölçümde ek tracemalloc turları attığından büyük
+    tablolarda yalnızca süre ölçülür.
+    """
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter_ns()
+        func()
+        times.append((time.perf_counter_ns() - started) / 1000)
+    times.sort()
+    return {
+        'ops_per_sec': round(1e6 / times[len(times) // 2], 1),
+        'p50_us': round(times[len(times) // 2], 3),
+        'p99_us': round(times[-1], 3),
+        'iterations': runs,
+    }
+
+
+def run(rows=ROWS, **measure_options):
+    """
+    Benchmark'ı çalıştır
+
+    Returns:
+        dict: {'vaka': ölçüm}
+    """
+    from odoo.addons.mews_pos.lib.bin_index import BinIndex, encode_bin_map
+
+    records = build_rows(rows)
+    index = BinIndex.build(records)
+    errors = verify(index, records)
+    if errors:
+        raise RuntimeError('BIN indeksi uyuşmuyor:\n' + '\n'.join(errors[:20]))
+
+    card_8 = records[0][0].ljust(8, '1') + '12345678'
+    card_6 = next(bin_number for bin_number, _end, _bank, _type in records if len(bin_number) == 6)
+    banks = [{'id': bank_id, 'name': f'Banka {bank_id}', 'code': f'bank_{bank_id}'} for bank_id in range(1, BANKS + 1)]
+    return {
+        'build': measure_build(lambda: BinIndex.build(records)),
+        'encode_map': measure_build(lambda: encode_bin_map(index, banks)),
+        'lookup_8': harness.measure(lambda: index.lookup(card_8), **measure_options),
+        'lookup_6': harness.measure(lambda: index.lookup(card_6), **measure_options),
+        'lookup_miss': harness.measure(lambda: index.lookup('1111111111111111'), **measure_options),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BIN indeksi benchmark\'ı')
+    parser.add_argument('--rows', type=int, default=ROWS, help='Sentetik BIN kaydı sayısı')
+    parser.add_argument('--min-time', type=float, default=0.3, help='Ölçüm başına en az süre (sn)')
+    parser.add_argument('--json', action='store_true', help='Sonuçları JSON olarak yaz')
+    parser.add_argument('--save', metavar='DOSYA', help='Sonuçları baseline olarak kaydet')
+    parser.add_argument('--compare', metavar='DOSYA', help='Baseline ile karşılaştır')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Gerileme eşiği (0.2 = p50 +%%20)')
+    args = parser.parse_args(argv)
+
+    harness.bootstrap()
+    results = run(rows=args.rows, min_time=args.min_time)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print(harness.format_table(results, ('ops_per_sec', 'p50_us', 'p99_us', 'alloc_kib')))
+
+    if args.save:
+        harness.save_baseline(args.save, results)
+        print(f"\nBaseline kaydedildi: {args.save}")
+
+    if args.compare:
+        rows = harness.compare(results, harness.load_baseline(args.compare), args.threshold)
+        print('\n' + harness.format_comparison(rows))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
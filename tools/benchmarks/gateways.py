@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Gateway mikro benchmark'ı
+
+Her gateway sınıfı için checkout yolundaki istek hazırlama ve yanıt
+ayrıştırma maliyetini ölçer. Ağ çağrısı yapılmaz: yanıtlar
+recorded/gateway_responses.json içindeki kayıtlı banka yanıtlarıdır;
+PosNet'in OOS/provizyon çağrıları da bu kayıtlardan döner.
+
+Eklenti dizininden çalıştırılır (Odoo kurulu olmalı, veritabanı gerekmez):
+
+    python3 -m tools.benchmarks.gateways
+    python3 -m tools.benchmarks.gateways --save tools/benchmarks/baselines/gateways.json
+    python3 -m tools.benchmarks.gateways --compare tools/benchmarks/baselines/gateways.json
+
+--compare p50 süresi --threshold oranından fazla artan ölçüm varsa 1
+koduyla çıkar; CI'da gerileme kontrolü olarak kullanılabilir.
+"""
+
+import argparse
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+from . import harness
+
+RECORDED = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recorded', 'gateway_responses.json')
+
+GATEWAYS = {
+    'akbank': 'odoo.addons.mews_pos.lib.gateways.akbank_gateway.AkbankGateway',
+    'estpos': 'odoo.addons.mews_pos.lib.gateways.estpos_gateway.EstPosGateway',
+    'garanti': 'odoo.addons.mews_pos.lib.gateways.garanti_gateway.GarantiGateway',
+    'posnet': 'odoo.addons.mews_pos.lib.gateways.posnet_gateway.PosNetGateway',
+    'payfor': 'odoo.addons.mews_pos.lib.gateways.payfor_gateway.PayForGateway',
+    'payflex': 'odoo.addons.mews_pos.lib.gateways.payflex_gateway.PayFlexGateway',
+    'interpos': 'odoo.addons.mews_pos.lib.gateways.interpos_gateway.InterPosGateway',
+    'kuveyt': 'odoo.addons.mews_pos.lib.gateways.kuveyt_gateway.KuveytPosGateway',
+    'tosla': 'odoo.addons.mews_pos.lib.gateways.tosla_gateway.ToslaGateway',
+}
+
+OPERATIONS = ('prepare_3d_request', 'prepare_payment_request', 'parse_payment_response', 'parse_3d_response')
+
+# Kayıtlı yanıtla ölçülemeyen, çağrı sırasında canlı servis gerektiren işlemler
+SKIPPED = {
+    ('kuveyt', 'prepare_payment_request'): 'SOAP Sale çağrısını hazırlarken gönderir (WSDL ve ağ gerekir)',
+}
+
+CONFIG = {
+    'environment': 'test',
+    'client_id': '700655000200',
+    'merchant_id': '6706598320',
+    'terminal_id': '67005551',
+    'username': 'PROVAUT',
+    'password': '123qweASD/',
+    'store_key': '12345678',
+    'payment_api_url': 'https://bank.example.com/api',
+    'gateway_3d_url': 'https://bank.example.com/3d',
+}
+
+ORDER = {
+    'id': 'BENCH-0001',
+    'amount': 100.50,
+    'installment': 3,
+    'currency': 'TRY',
+    'lang': 'tr',
+    'ip_address': '10.0.0.1',
+    'email': 'musteri@example.com',
+    'success_url': 'https://shop.example.com/mews_pos/callback/success/BENCH-0001',
+    'fail_url': 'https://shop.example.com/mews_pos/callback/fail/BENCH-0001',
+}
+
+CARD = {'number': '4546711234567894', 'month': '12', 'year': '30', 'cvv': '000', 'name': 'TEST KART'}
+
+
+class RecordedResponse:
+    """requests.Response yerine kullanılan kayıtlı banka yanıtı"""
+
+    status_code = 200
+
+    def __init__(self, body, content_type='text/plain'):
+        self.text = body
+        self.content = body.encode('utf-8')
+        self.headers = {'Content-Type': content_type}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        pass
+
+
+def _response(recorded):
+    return RecordedResponse(recorded['body'], recorded.get('content_type', 'text/plain'))
+
+
+def load_recorded(path=RECORDED):
+    with open(path, encoding='utf-8') as recorded_file:
+        return json.load(recorded_file)
+
+
+def _import(path):
+    import importlib
+    module_path, class_name = path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_path), class_name)
+
+
+def create_gateway(name, recorded):
+    """Benchmark konfigürasyonuyla gateway oluştur; ağ çağrıları kayıtlı yanıtlardan döner"""
+    gateway = _import(GATEWAYS[name])(dict(CONFIG))
+
+    replay = recorded[name].get('replay')
+    if replay:
+        responses = [(marker, _response(item)) for marker, item in replay]
+
+        def make_request(url, request_data, headers=None, method='POST'):
+            payload = str(request_data)
+            for marker, response in responses:
+                if marker in payload:
+                    return response
+            raise LookupError(f"Kayıtlı yanıt yok: {payload[:80]}")
+        gateway.make_request = make_request
+
+    return gateway
+
+
+def build_cases(recorded, gateways=None):
+    """
+    Ölçülecek (ad, çağrı) listesini üret
+
+    Returns:
+        list: ('gateway.işlem', callable veya atlanma nedeni) demetleri
+    """
+    cases = []
+    for name in GATEWAYS:
+        if gateways and name not in gateways:
+            continue
+        data = recorded[name]
+        gateway = create_gateway(name, recorded)
+
+        if 'soap_result' in data:
+            payment_response = {'soap_result': SimpleNamespace(**data['soap_result'])}
+        else:
+            payment_response = _response(data['payment'])
+        callback = dict(data['callback'])
+
+        calls = {
+            'prepare_3d_request': lambda g=gateway: g.prepare_3d_request(ORDER, CARD),
+            'prepare_payment_request': lambda g=gateway: g.prepare_payment_request(ORDER, CARD),
+            'parse_payment_response': lambda g=gateway, r=payment_response: g.parse_payment_response(r),
+            'parse_3d_response': lambda g=gateway, c=callback: g.parse_3d_response(c),
+        }
+        for operation in OPERATIONS:
+            reason = SKIPPED.get((name, operation))
+            cases.append((f"{name}.{operation}", reason if reason else calls[operation]))
+    return cases
+
+
+def check_cases(cases):
+    """Kayıtlı yanıtların onaylı ayrıştırıldığını doğrula (ölçülen yol gerçek başarı yolu olmalı)"""
+    errors = []
+    for name, call in cases:
+        if isinstance(call, str):
+            continue
+        try:
+            result = call()
+        except Exception as e:
+            errors.append(f"{name}: {type(e).__name__}: {e}")
+            continue
+        if name.endswith('.parse_payment_response') and not result.get('approved'):
+            errors.append(f"{name}: kayıtlı yanıt onaylı ayrıştırılmadı ({result.get('error_message')})")
+    return errors
+
+
+def run(gateways=None, operations=None, **measure_options):
+    """
+    Benchmark'ı çalıştır
+
+    Returns:
+        dict: {'gateway.işlem': ölçüm sonucu veya {'skipped': neden}}
+    """
+    cases = build_cases(load_recorded(), gateways)
+    errors = check_cases(cases)
+    if errors:
+        raise RuntimeError('Kayıtlı yanıtlar işlenemedi:\n' + '\n'.join(errors))
+
+    results = {}
+    for name, call in cases:
+        if operations and name.split('.', 1)[1] not in operations:
+            continue
+        if isinstance(call, str):
+            results[name] = {'skipped': call}
+        else:
+            results[name] = harness.measure(call, **measure_options)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gateway istek hazırlama/yanıt ayrıştırma benchmark\'ı')
+    parser.add_argument('--gateway', action='append', choices=sorted(GATEWAYS), help='Sadece bu gateway(ler)')
+    parser.add_argument('--operation', action='append', choices=OPERATIONS, help='Sadece bu işlem(ler)')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Ölçüm başına en az süre (sn)')
+    parser.add_argument('--json', action='store_true', help='Sonuçları JSON olarak yaz')
+    parser.add_argument('--save', metavar='DOSYA', help='Sonuçları baseline olarak kaydet')
+    parser.add_argument('--compare', metavar='DOSYA', help='Baseline ile karşılaştır')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Gerileme eşiği (0.2 = p50 +%%20)')
+    args = parser.parse_args(argv)
+
+    harness.bootstrap()
+    results = run(args.gateway, args.operation, min_time=args.min_time)
+
+    print(json.dumps(results, indent=2, sort_keys=True) if args.json else harness.format_table(results))
+
+    if args.save:
+        harness.save_baseline(args.save, results)
+        print(f"\nBaseline kaydedildi: {args.save}")
+
+    if args.compare:
+        rows = harness.compare(results, harness.load_baseline(args.compare), args.threshold)
+        print('\n' + harness.format_comparison(rows))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
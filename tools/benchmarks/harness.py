@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Mikro benchmark altyapısı
+
+Ölçüm, baseline kaydı ve karşılaştırma tüm benchmark betikleri için
+ortaktır. Her ölçüm için:
+
+    ops_per_sec   Toplam süreye göre saniyedeki çağrı
+    p50_us/p99_us Çağrı başına süre yüzdelikleri (mikrosaniye)
+    alloc_kib     Tek çağrının geçici bellek tepe değeri (tracemalloc)
+    alloc_blocks  Çağrı başına ayrılan ve çağrı sonunda hâlâ canlı blok
+
+Baseline dosyası JSON'dur; compare() p50 değeri eşiği aşan ölçümleri
+gerileme olarak işaretler.
+"""
+
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def bootstrap():
+    """
+    Eklentiyi veritabanı olmadan odoo.addons.mews_pos olarak içe aktarılabilir yap
+
+    Odoo kurulu olmalıdır; eklenti dizininin üst klasörü addons yoluna
+    eklenir (odoo-bin'in --addons-path ile yaptığı gibi).
+    """
+    try:
+        import odoo.addons
+    except ImportError:
+        raise SystemExit("Odoo bulunamadı: benchmark Odoo kurulu bir ortamda (veritabanı gerekmez) çalıştırılmalı")
+
+    parent = os.path.dirname(ADDON_DIR)
+    if parent not in list(odoo.addons.__path__):
+        odoo.addons.__path__.append(parent)
+
+
+def measure(func, min_time=0.5, min_iterations=200, max_iterations=200000, warmup=20):
+    """
+    Fonksiyonu tekrar tekrar çağırıp süre ve bellek istatistiklerini ölç
+
+    Args:
+        func (callable): Argümansız çağrılacak fonksiyon
+        min_time (float): Zamanlama için en az süre (saniye)
+        min_iterations (int): En az çağrı sayısı
+        max_iterations (int): En fazla çağrı sayısı
+        warmup (int): Ölçüm öncesi ısınma çağrısı
+
+    Returns:
+        dict: ops_per_sec, p50_us, p99_us, mean_us, iterations, alloc_kib, alloc_blocks
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    clock = time.perf_counter_ns
+    gc_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        started = clock()
+        deadline = started + int(min_time * 1e9)
+        while len(samples) < max_iterations:
+            before = clock()
+            func()
+            samples.append(clock() - before)
+            if len(samples) >= min_iterations and before >= deadline:
+                break
+        total = clock() - started
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    samples.sort()
+    count = len(samples)
+    alloc_kib, alloc_blocks = _allocations(func)
+    return {
+        'ops_per_sec': round(count / (total / 1e9), 1),
+        'p50_us': round(samples[count // 2] / 1000, 3),
+        'p99_us': round(samples[min(count - 1, int(count * 0.99))] / 1000, 3),
+        'mean_us': round(sum(samples) / count / 1000, 3),
+        'iterations': count,
+        'alloc_kib': alloc_kib,
+        'alloc_blocks': alloc_blocks,
+    }
+
+
+def _allocations(func, rounds=50):
+    """tracemalloc ile çağrı başına geçici bellek tepe değeri ve kalıcı blok sayısı"""
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(rounds):
+            tracemalloc.reset_peak()
+            current, _peak = tracemalloc.get_traced_memory()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+
+        gc.collect()
+        before = sys.getallocatedblocks()
+        for _ in range(rounds):
+            func()
+        gc.collect()
+        blocks = (sys.getallocatedblocks() - before) / rounds
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    peaks.sort()
+    return round(peaks[len(peaks) // 2] / 1024, 2), round(max(blocks, 0.0), 1)
+
+
+def environment():
+    """Baseline'ın hangi ortamda alındığını gösteren bilgiler"""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ADDON_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+    except Exception:
+        revision = ''
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'revision': revision,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def save_baseline(path, results):
+    """Sonuçları baseline dosyasına yaz"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump({'environment': environment(), 'results': results}, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def compare(results, baseline, threshold=0.2, metric='p50_us'):
+    """
+    Sonuçları baseline ile karşılaştır
+
+    Args:
+        results (dict): {ölçüm adı: measure() sonucu}
+        baseline (dict): load_baseline() çıktısı
+        threshold (float): Gerileme sayılacak oransal artış (0.2 = %20)
+        metric (str): Karşılaştırılacak süre metriği
+
+    Returns:
+        list: (ad, baseline değeri, yeni değer, değişim oranı, gerileme mi) demetleri
+    """
+    rows = []
+    previous = baseline.get('results', {})
+    for name, result in sorted(results.items()):
+        if name not in previous or metric not in result:
+            continue
+        old, new = previous[name][metric], result[metric]
+        change = (new - old) / old if old else 0.0
+        rows.append((name, old, new, change, change > threshold))
+    return rows
+
+
+def format_table(results, columns=('ops_per_sec', 'p50_us', 'p99_us', 'alloc_kib', 'alloc_blocks')):
+    """Sonuçları hizalı metin tablosu olarak döndür"""
+    names = sorted(results)
+    width = max([len('ölçüm')] + [len(name) for name in names])
+    lines = [f"{'ölçüm':<{width}}  " + '  '.join(f'{column:>12}' for column in columns)]
+    for name in names:
+        result = results[name]
+        if 'skipped' in result:
+            lines.append(f"{name:<{width}}  atlandı: {result['skipped']}")
+            continue
+        lines.append(f"{name:<{width}}  " + '  '.join(f'{result.get(column, ""):>12}' for column in columns))
+    return '\n'.join(lines)
+
+
+def format_comparison(rows):
+    lines = []
+    for name, old, new, change, regressed in rows:
+        flag = '  GERİLEME' if regressed else ''
+        lines.append(f"{name:<48} {old:>10.3f} -> {new:>10.3f} us  {change * 100:+7.1f}%{flag}")
+    return '\n'.join(lines)
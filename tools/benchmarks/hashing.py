@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Gateway hash hesaplama benchmark'ı
+
+Her gateway'in istek başına hesapladığı hash için yolları karşılaştırır:
+
+    full      Eski yol: kimlik bilgisinden türetilen değerler (Garanti
+              SecurityData, PosNet MAC) her istekte yeniden hesaplanır;
+              istek hash'leri metnin tamamı hash'lenerek üretilir
+    cached    CryptoUtils.derived_key önbelleği: türetilmiş değer kimlik
+              bilgisi başına bir kez hesaplanır (gateway'lerin kullandığı yol)
+    prefixed  Statik önek (üye işyeri/terminal no) ile beslenmiş hashlib
+              nesnesinin her istekte .copy() edilmesi. Önekler bir hash
+              bloğundan (64/128 bayt) kısa olduğundan sıkıştırma işi
+              kazanılmaz; karşılaştırma için ölçülür, gateway'lerde kullanılmaz
+
+Ölçümden önce tüm yolların aynı özeti ürettiği doğrulanır.
+
+Eklenti dizininden:
+
+    python3 -m tools.benchmarks.hashing
+    python3 -m tools.benchmarks.hashing --save tools/benchmarks/baselines/hashing.json
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+
+from . import harness
+from . import gateways as gateway_benchmark
+
+_PREFIXED = {}
+
+
+def _full(algorithm, text):
+    return hashlib.new(algorithm, text.encode('utf-8')).hexdigest()
+
+
+def _prefixed(algorithm, prefix, text):
+    """HASH(prefix + text): önekle beslenmiş nesneyi kopyalayarak"""
+    base = _PREFIXED.get((algorithm, prefix))
+    if base is None:
+        base = _PREFIXED[(algorithm, prefix)] = hashlib.new(algorithm, prefix.encode('utf-8'))
+    digest = base.copy()
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _cases(CryptoUtils, gateways):
+    """
+    {'gateway.hash': {yol: fonksiyon}}; fonksiyonlar (config, order) alır
+    """
+    garanti, posnet = gateways['garanti'], gateways['posnet']
+
+    def security_data_full(c):
+        return _full('sha1', c['password'] + str(c['terminal_id']).zfill(9)).upper()
+
+    def amount(o):
+        return f"{o['amount']:.2f}"
+
+    def garanti_3d(c, o, security_data):
+        return CryptoUtils.create_3d_hash_garanti(
+            str(c['terminal_id']).zfill(9), o['id'], amount(o), o['success_url'], o['fail_url'],
+            'sales', o['installment'], c['store_key'], security_data,
+        )
+
+    def garanti_rest(c, o):
+        return (f"{o['id']}{amount(o)}{o['success_url']}{o['fail_url']}sales{o['installment']}"
+                f"{c['store_key']}{garanti._security_data()}")
+
+    def estpos_rest(o, c):
+        return f"{o['id']}{amount(o)}{o['success_url']}{o['fail_url']}Auth{o['installment']}123456{c['store_key']}"
+
+    def payfor_rest(o, c):
+        return f"{amount(o)}{o['id']}{o['success_url']}{o['fail_url']}123456{c['store_key']}"
+
+    return {
+        'garanti.security_data': {
+            'full': lambda c, o: security_data_full(c),
+            'cached': lambda c, o: garanti._security_data(),
+        },
+        'garanti.3d_hash': {
+            'full': lambda c, o: garanti_3d(c, o, security_data_full(c)),
+            'cached': lambda c, o: garanti_3d(c, o, garanti._security_data()),
+            'prefixed': lambda c, o: _prefixed('sha1', garanti._terminal_id(), garanti_rest(c, o)).upper(),
+        },
+        'posnet.mac': {
+            'full': lambda c, o: CryptoUtils.base64_encode(_full('sha256', f"{c['client_id']};{c['terminal_id']}")),
+            'cached': lambda c, o: posnet._create_mac(c),
+        },
+        'posnet.3d_hash': {
+            'full': lambda c, o: CryptoUtils.create_3d_hash_posnet(
+                c['merchant_id'], c['terminal_id'], '4546711234567894', amount(o), 'TL', 'PACK', c['store_key'],
+            ),
+            'prefixed': lambda c, o: _prefixed(
+                'sha256', f"{c['merchant_id']};{c['terminal_id']};",
+                f"4546711234567894;{amount(o)};TL;PACK;{c['store_key']}",
+            ).upper(),
+        },
+        'akbank.hash': {
+            'full': lambda c, o: CryptoUtils.create_hash_akbank(
+                c['merchant_id'], c['terminal_id'], o['id'], o['amount'], o['currency'],
+                o['installment'], c['store_key'],
+            ),
+            'prefixed': lambda c, o: _prefixed(
+                'sha256', f"{c['merchant_id']}{c['terminal_id']}",
+                f"{o['id']}{o['amount']}{o['currency']}{o['installment']}{c['store_key']}",
+            ),
+        },
+        'estpos.3d_hash': {
+            'full': lambda c, o: CryptoUtils.create_3d_hash_estpos(
+                c['client_id'], o['id'], amount(o), o['success_url'], o['fail_url'], 'Auth',
+                o['installment'], '123456', c['store_key'],
+            ),
+            'prefixed': lambda c, o: _prefixed('sha512', c['client_id'], estpos_rest(o, c)),
+        },
+        'payfor.3d_hash': {
+            'full': lambda c, o: CryptoUtils.create_3d_hash_payfor(
+                c['merchant_id'], c['terminal_id'], amount(o), o['id'], o['success_url'],
+                o['fail_url'], '123456', c['store_key'],
+            ),
+            'prefixed': lambda c, o: _prefixed(
+                'sha512', f"{c['merchant_id']}{c['terminal_id']}", payfor_rest(o, c),
+            ).upper(),
+        },
+        'payflex.hash': {
+            'full': lambda c, o: gateways['payflex']._create_hash(
+                c['merchant_id'], c['terminal_id'], o['id'], o['amount'], c['password'],
+            ),
+            'prefixed': lambda c, o: _prefixed(
+                'sha256', f"{c['merchant_id']}{c['terminal_id']}", f"{o['id']}{o['amount']:.2f}{c['password']}",
+            ).upper(),
+        },
+    }
+
+
+def build_cases():
+    """
+    Gateway'leri benchmark konfigürasyonuyla oluştur ve hash vakalarını döndür
+
+    Returns:
+        dict: {'gateway.hash': {yol: fonksiyon}}; fonksiyonlar argümansızdır
+    """
+    from odoo.addons.mews_pos.lib.crypto_utils import CryptoUtils
+
+    recorded = gateway_benchmark.load_recorded()
+    gateways = {
+        name: gateway_benchmark.create_gateway(name, recorded)
+        for name in ('garanti', 'posnet', 'payflex')
+    }
+    config, order = dict(gateway_benchmark.CONFIG), gateway_benchmark.ORDER
+
+    return {
+        name: {path: (lambda func=func: func(config, order)) for path, func in paths.items()}
+        for name, paths in _cases(CryptoUtils, gateways).items()
+    }
+
+
+def verify(cases):
+    """Tüm yollar 'full' ile aynı özeti üretmeli"""
+    errors = []
+    for name, paths in sorted(cases.items()):
+        expected = paths['full']()
+        errors.extend(f"{name}.{path}: özet farklı" for path, func in sorted(paths.items()) if func() != expected)
+    return errors
+
+
+def run(**measure_options):
+    """
+    Benchmark'ı çalıştır
+
+    Returns:
+        dict: {'gateway.hash.yol': ölçüm}; 'full' dışındaki ölçümler ona göre 'speedup' içerir
+    """
+    cases = build_cases()
+    errors = verify(cases)
+    if errors:
+        raise RuntimeError('Hash çıktıları uyuşmuyor:\n' + '\n'.join(errors))
+
+    results = {}
+    for name, paths in cases.items():
+        baseline = results[f"{name}.full"] = harness.measure(paths['full'], **measure_options)
+        for path, func in paths.items():
+            if path == 'full':
+                continue
+            result = harness.measure(func, **measure_options)
+            result['speedup'] = round(baseline['p50_us'] / result['p50_us'], 2) if result['p50_us'] else 0.0
+            results[f"{name}.{path}"] = result
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gateway hash hesaplama benchmark\'ı')
+    parser.add_argument('--min-time', type=float, default=0.3, help='Ölçüm başına en az süre (sn)')
+    parser.add_argument('--json', action='store_true', help='Sonuçları JSON olarak yaz')
+    parser.add_argument('--save', metavar='DOSYA', help='Sonuçları baseline olarak kaydet')
+    parser.add_argument('--compare', metavar='DOSYA', help='Baseline ile karşılaştır')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Gerileme eşiği (0.2 = p50 +%%20)')
+    args = parser.parse_args(argv)
+
+    harness.bootstrap()
+    results = run(min_time=args.min_time)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print(harness.format_table(results, ('ops_per_sec', 'p50_us', 'p99_us', 'alloc_kib', 'speedup')))
+
+    if args.save:
+        harness.save_baseline(args.save, results)
+        print(f"\nBaseline kaydedildi: {args.save}")
+
+    if args.compare:
+        rows = harness.compare(results, harness.load_baseline(args.compare), args.threshold)
+        print('\n' + harness.format_comparison(rows))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Taksit motoru benchmark'ı
+
+/mews_pos/get_payment_installments her kart numarası tuş vuruşunda
+çağrılır. 15 banka x 12 taksit sayısından oluşan sentetik bir oran
+tablosu (kampanyalı satırlar ve kategori kısıtlamalarıyla) üzerinde:
+
+    build          Tablonun derlenmesi (gün veya kayıt değişikliğinde bir kez)
+    all_banks      BIN bilinmezken tüm bankaların seçenekleri
+    bin_bank       BIN ile tespit edilen tek banka
+    categories     Kısıtlamalı kategorilerden oluşan sepet
+    response_json  all_banks + endpoint'in JSON yanıtı
+
+Ölçümden önce motorun çıktısı calculate_installment formülüyle
+satır satır doğrulanır.
+
+Eklenti dizininden:
+
+    python3 -m tools.benchmarks.installments
+    python3 -m tools.benchmarks.installments --save tools/benchmarks/baselines/installments.json
+"""
+
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+
+from . import harness
+
+BANKS = 15
+COUNTS = tuple(range(2, 14))
+CATEGORIES = (11, 12, 13)
+AMOUNT = 1249.90
+TODAY = date(2024, 6, 15)
+
+
+def build_inputs():
+    """
+    Sentetik banka, taksit yapılandırması ve kısıtlama kayıtları
+
+    Returns:
+        tuple: (banks, configs, restrictions) RateTable girdileri
+    """
+    banks = [{'id': bank_id, 'name': f'Banka {bank_id}', 'code': f'bank_{bank_id}'} for bank_id in range(1, BANKS + 1)]
+    configs = []
+    restrictions = []
+    for bank in banks:
+        for count in COUNTS:
+            configs.append({
+                'bank_id': bank['id'],
+                'installment_count': count,
+                'interest_rate': round(count * 1.35 + bank['id'] * 0.1, 2),
+                'min_amount': 100.0 if count > 6 else 0.0,
+                'campaign_active': count in (2, 3),
+                'campaign_rate': 0.0,
+                'campaign_start_date': TODAY - timedelta(days=7),
+                'campaign_end_date': TODAY + timedelta(days=7),
+            })
+        for category_id in CATEGORIES[:2]:
+            restrictions.append({
+                'bank_id': bank['id'],
+                'category_id': category_id,
+                'installment_allowed': True,
+                'min_installment': 2,
+                'max_installment': 9 if category_id == CATEGORIES[0] else 12,
+                'blocked_installments': '5,7',
+            })
+    return banks, configs, restrictions
+
+
+def build_table():
+    from odoo.addons.mews_pos.lib.installment_engine import RateTable
+
+    banks, configs, restrictions = build_inputs()
+    return RateTable(banks, configs, restrictions, TODAY)
+
+
+def verify(table):
+    """Motor çıktısı calculate_installment formülüyle aynı olmalı"""
+    from odoo.addons.mews_pos.lib.installment_engine import effective_rate
+
+    _banks, configs, _restrictions = build_inputs()
+    expected = {}
+    for config in configs:
+        rate, _campaign = effective_rate(config, TODAY)
+        total = AMOUNT * (1 + rate / 100) if rate > 0 else AMOUNT
+        expected[(config['bank_id'], config['installment_count'])] = (
+            round(total / config['installment_count'], 2), round(total, 2), rate,
+        )
+
+    errors = []
+    quoted = table.quote(AMOUNT)
+    if len(quoted) != BANKS:
+        errors.append(f"banka sayısı: {len(quoted)} != {BANKS}")
+    for entry in quoted:
+        rows = entry['installments']
+        if len(rows) != len(COUNTS) + 1:
+            errors.append(f"{entry['bank']['code']}: {len(rows)} satır")
+        for row in rows[1:]:
+            key = (entry['bank']['id'], row['installment_count'])
+            actual = (row['installment_amount'], row['total_amount'], row['interest_rate'])
+            if actual != expected[key]:
+                errors.append(f"{key}: {actual} != {expected[key]}")
+
+    allowed = {row['installment_count'] for row in table.quote(AMOUNT, bank_ids=[1], category_ids=CATEGORIES)[0]['installments']}
+    if allowed != {1, 2, 3, 4, 6, 8, 9}:
+        errors.append(f"kategori kısıtlaması: {sorted(allowed)}")
+    return errors
+
+
+def run(**measure_options):
+    """
+    Benchmark'ı çalıştır
+
+    Returns:
+        dict: {'vaka': ölçüm}
+    """
+    table = build_table()
+    errors = verify(table)
+    if errors:
+        raise RuntimeError('Taksit çıktıları uyuşmuyor:\n' + '\n'.join(errors))
+
+    cases = {
+        'build': build_table,
+        'all_banks': lambda: table.quote(AMOUNT),
+        'bin_bank': lambda: table.quote(AMOUNT, bank_ids=[7]),
+        'categories': lambda: table.quote(AMOUNT, category_ids=CATEGORIES),
+        'response_json': lambda: json.dumps({'result': {'installments': table.quote(AMOUNT)}}, ensure_ascii=False),
+    }
+    return {name: harness.measure(func, **measure_options) for name, func in cases.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Taksit motoru benchmark\'ı')
+    parser.add_argument('--min-time', type=float, default=0.3, help='Ölçüm başına en az süre (sn)')
+    parser.add_argument('--json', action='store_true', help='Sonuçları JSON olarak yaz')
+    parser.add_argument('--save', metavar='DOSYA', help='Sonuçları baseline olarak kaydet')
+    parser.add_argument('--compare', metavar='DOSYA', help='Baseline ile karşılaştır')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Gerileme eşiği (0.2 = p50 +%%20)')
+    args = parser.parse_args(argv)
+
+    harness.bootstrap()
+    results = run(min_time=args.min_time)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print(harness.format_table(results, ('ops_per_sec', 'p50_us', 'p99_us', 'alloc_kib')))
+
+    if args.save:
+        harness.save_baseline(args.save, results)
+        print(f"\nBaseline kaydedildi: {args.save}")
+
+    if args.compare:
+        rows = harness.compare(results, harness.load_baseline(args.compare), args.threshold)
+        print('\n' + harness.format_comparison(rows))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Worker açılışı import benchmark'ı
+
+Her ölçüm temiz bir Python sürecinde yapılır: Odoo içe aktarıldıktan
+sonra hedef içe aktarılır; süre, RSS artışı, yüklenen modül sayısı ve
+ağır bağımlılıkların (zeep, cryptography, lxml) yüklenip yüklenmediği
+raporlanır.
+
+    addon           Her worker'ın ödediği maliyet (odoo.addons.mews_pos)
+    gateway_factory GatewayFactory modülü (gateway'ler yüklenmeden)
+    first_gateway   İlk banka isteği: tek gateway sınıfının yüklenmesi
+    all_gateways    Tüm gateway'ler; eski, eager yüklemenin her worker'a
+                    açılışta yüklediği küme
+
+Eklenti dizininden:
+
+    python3 -m tools.benchmarks.startup
+    python3 -m tools.benchmarks.startup --runs 15 --save tools/benchmarks/baselines/startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from . import harness
+
+TARGETS = ('addon', 'gateway_factory', 'first_gateway', 'all_gateways')
+
+HEAVY_MODULES = ('zeep', 'cryptography', 'lxml')
+
+FIRST_GATEWAY = 'garanti_pos'
+
+
+def _rss_kib():
+    """Sürecin anlık RSS değeri (KiB)"""
+    try:
+        with open('/proc/self/status', encoding='ascii') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _load(target):
+    import importlib
+
+    if target == 'addon':
+        importlib.import_module('odoo.addons.mews_pos')
+        return
+    factory = importlib.import_module('odoo.addons.mews_pos.lib.gateways.gateway_factory').GatewayFactory
+    if target == 'first_gateway':
+        factory.load_class(FIRST_GATEWAY)
+    elif target == 'all_gateways':
+        for gateway_type in factory.get_supported_gateways():
+            factory.load_class(gateway_type)
+
+
+def child(target):
+    """Tek ölçüm (alt süreç): sonucu JSON olarak stdout'a yaz"""
+    harness.bootstrap()
+    import odoo  # noqa: F401  Odoo'nun kendi maliyeti ölçüme dahil edilmez
+
+    heavy_before = {name for name in HEAVY_MODULES if name in sys.modules}
+    modules_before = len(sys.modules)
+    rss_before = _rss_kib()
+    started = time.perf_counter_ns()
+    _load(target)
+    elapsed = time.perf_counter_ns() - started
+    rss_after = _rss_kib()
+
+    print(json.dumps({
+        'us': elapsed / 1000,
+        'rss_kib': rss_after - rss_before,
+        'modules': len(sys.modules) - modules_before,
+        'heavy': sorted(name for name in HEAVY_MODULES if name in sys.modules and name not in heavy_before),
+    }))
+
+
+def measure_target(target, runs=7):
+    """
+    Hedefi `runs` kez ayrı süreçlerde ölç
+
+    Returns:
+        dict: p50_us, p99_us (en kötü), rss_kib, modules, heavy; başarısızsa {'skipped': neden}
+    """
+    samples = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, '-m', 'tools.benchmarks.startup', '--child', target],
+            cwd=harness.ADDON_DIR, capture_output=True, text=True, timeout=120,
+        )
+        if process.returncode != 0:
+            lines = (process.stderr or process.stdout).strip().splitlines()
+            return {'skipped': lines[-1] if lines else f'çıkış kodu {process.returncode}'}
+        samples.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    times = sorted(sample['us'] for sample in samples)
+    return {
+        'p50_us': round(statistics.median(times), 1),
+        'p99_us': round(times[-1], 1),
+        'rss_kib': int(statistics.median(sample['rss_kib'] for sample in samples)),
+        'modules': samples[-1]['modules'],
+        'heavy': ','.join(samples[-1]['heavy']) or '-',
+        'iterations': runs,
+    }
+
+
+def run(targets=None, runs=7):
+    """Hedefleri ölç: {hedef: sonuç}"""
+    return {target: measure_target(target, runs) for target in (targets or TARGETS)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Worker açılışı import süresi ve bellek benchmark\'ı')
+    parser.add_argument('--target', action='append', choices=TARGETS, help='Sadece bu hedef(ler)')
+    parser.add_argument('--runs', type=int, default=7, help='Hedef başına süreç sayısı')
+    parser.add_argument('--json', action='store_true', help='Sonuçları JSON olarak yaz')
+    parser.add_argument('--save', metavar='DOSYA', help='Sonuçları baseline olarak kaydet')
+    parser.add_argument('--compare', metavar='DOSYA', help='Baseline ile karşılaştır')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Gerileme eşiği (0.2 = p50 +%%20)')
+    parser.add_argument('--child', choices=TARGETS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child)
+        return 0
+
+    results = run(args.target, args.runs)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print(harness.format_table(results, ('p50_us', 'p99_us', 'rss_kib', 'modules', 'heavy')))
+
+    if args.save:
+        harness.save_baseline(args.save, results)
+        print(f"\nBaseline kaydedildi: {args.save}")
+
+    if args.compare:
+        rows = harness.compare(results, harness.load_baseline(args.compare), args.threshold)
+        print('\n' + harness.format_comparison(rows))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
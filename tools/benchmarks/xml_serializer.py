@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+XML serileştirici benchmark'ı
+
+Gateway'lerin gerçekten ürettiği istek şekilleri (EST CC5Request,
+Garanti GVPSRequest, PosNet posnetRequest, PayFlex PayforRequest) için
+XmlUtils.dict_to_xml ile derlenmiş şablon serileştiriciyi
+(XmlUtils.render) karşılaştırır. Şekiller gateway'lerin prepare_*
+metotları çalıştırılırken yakalanır; her şekil için çıktıların aynı
+ağacı ürettiği ölçümden önce doğrulanır.
+
+Eklenti dizininden:
+
+    python3 -m tools.benchmarks.xml_serializer
+    python3 -m tools.benchmarks.xml_serializer --save tools/benchmarks/baselines/xml.json
+"""
+
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+
+from lxml import etree
+
+from . import harness
+from . import gateways as gateway_benchmark
+
+# (gateway, yakalanacak çağrılar)
+REQUESTS = {
+    'estpos': ('prepare_payment_request', 'prepare_cancel_request', 'prepare_refund_request', 'prepare_status_request'),
+    'garanti': ('prepare_payment_request', 'prepare_cancel_request', 'prepare_refund_request'),
+    'posnet': ('prepare_3d_request', 'prepare_payment_request', 'prepare_cancel_request',
+               'prepare_refund_request', 'parse_3d_response'),
+    'payflex': ('prepare_payment_request', 'prepare_cancel_request', 'prepare_refund_request'),
+}
+
+
+@contextmanager
+def _capture(XmlUtils, captured, label):
+    """Gateway'in XmlUtils.render çağrılarını (veri, kök) olarak kaydet"""
+    original = XmlUtils.__dict__['render']
+
+    def render(data, root_name='root', pretty=False):
+        captured.append((label, data, root_name))
+        return original.__func__(data, root_name, pretty)
+
+    XmlUtils.render = staticmethod(render)
+    try:
+        yield
+    finally:
+        XmlUtils.render = original
+
+
+def collect_shapes():
+    """
+    Gateway'lerin ürettiği istek verilerini topla
+
+    Returns:
+        list: ('gateway.çağrı', veri, kök adı) demetleri
+    """
+    from odoo.addons.mews_pos.lib.xml_utils import XmlUtils
+
+    recorded = gateway_benchmark.load_recorded()
+    order = dict(gateway_benchmark.ORDER, host_ref_num='412312345678', auth_code='123456')
+    card = gateway_benchmark.CARD
+    callback = recorded['posnet']['callback']
+
+    captured = []
+    for name, calls in REQUESTS.items():
+        gateway = gateway_benchmark.create_gateway(name, recorded)
+        arguments = {
+            'prepare_3d_request': (order, card),
+            'prepare_payment_request': (order, card),
+            'prepare_cancel_request': (order,),
+            'prepare_refund_request': (order, 50.25),
+            'prepare_status_request': (order,),
+            'parse_3d_response': (callback,),
+        }
+        for call in calls:
+            with _capture(XmlUtils, captured, f"{name}.{call}"):
+                getattr(gateway, call)(*arguments[call])
+    return captured
+
+
+def _canonical(xml):
+    parser = etree.XMLParser(remove_blank_text=True)
+    return etree.tostring(etree.fromstring(xml.encode('utf-8'), parser), method='c14n')
+
+
+def verify(shapes):
+    """Derlenmiş çıktı dict_to_xml ile aynı ağacı, pretty modda aynı baytları üretmeli"""
+    from odoo.addons.mews_pos.lib.xml_utils import XmlUtils
+
+    errors = []
+    for label, data, root_name in shapes:
+        reference = XmlUtils.dict_to_xml(data, root_name=root_name)
+        if XmlUtils.render(data, root_name, pretty=True) != reference:
+            errors.append(f"{label}: pretty çıktı farklı")
+        if _canonical(XmlUtils.render(data, root_name)) != _canonical(reference):
+            errors.append(f"{label}: kompakt çıktının ağacı farklı")
+    return errors
+
+
+def run(**measure_options):
+    """
+    Benchmark'ı çalıştır
+
+    Returns:
+        dict: {'gateway.çağrı.yöntem': ölçüm}; '.render' ölçümleri
+            dict_to_xml'e göre 'speedup' ve bayt boyutlarını da içerir
+    """
+    from odoo.addons.mews_pos.lib.xml_utils import XmlUtils
+
+    shapes = collect_shapes()
+    errors = verify(shapes)
+    if errors:
+        raise RuntimeError('Serileştirici çıktıları uyuşmuyor:\n' + '\n'.join(errors))
+
+    results = {}
+    seen = set()
+    for label, data, root_name in shapes:
+        if label in seen:
+            continue
+        seen.add(label)
+        baseline = harness.measure(lambda: XmlUtils.dict_to_xml(data, root_name=root_name), **measure_options)
+        compiled = harness.measure(lambda: XmlUtils.render(data, root_name), **measure_options)
+        compiled['speedup'] = round(baseline['p50_us'] / compiled['p50_us'], 2) if compiled['p50_us'] else 0.0
+        compiled['bytes'] = len(XmlUtils.render(data, root_name).encode('utf-8'))
+        baseline['bytes'] = len(XmlUtils.dict_to_xml(data, root_name=root_name).encode('utf-8'))
+        results[f"{label}.dict_to_xml"] = baseline
+        results[f"{label}.render"] = compiled
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='dict_to_xml / derlenmiş XML şablonu benchmark\'ı')
+    parser.add_argument('--min-time', type=float, default=0.3, help='Ölçüm başına en az süre (sn)')
+    parser.add_argument('--json', action='store_true', help='Sonuçları JSON olarak yaz')
+    parser.add_argument('--save', metavar='DOSYA', help='Sonuçları baseline olarak kaydet')
+    parser.add_argument('--compare', metavar='DOSYA', help='Baseline ile karşılaştır')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Gerileme eşiği (0.2 = p50 +%%20)')
+    args = parser.parse_args(argv)
+
+    harness.bootstrap()
+    results = run(min_time=args.min_time)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print(harness.format_table(results, ('ops_per_sec', 'p50_us', 'p99_us', 'alloc_kib', 'bytes', 'speedup')))
+
+    if args.save:
+        harness.save_baseline(args.save, results)
+        print(f"\nBaseline kaydedildi: {args.save}")
+
+    if args.compare:
+        rows = harness.compare(results, harness.load_baseline(args.compare), args.threshold)
+        print('\n' + harness.format_comparison(rows))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+BIN tablosu içe aktarımı (komut satırı)
+
+mews.pos.bin.import_bins'i Odoo sunucusunu başlatmadan, doğrudan bir
+veritabanı üzerinde çalıştırır. Kart şemalarının/BKM'nin yayımladığı
+CSV, JSON veya JSON Lines dosyaları desteklenir.
+
+    python3 -m tools.bin_import -c /etc/odoo/odoo.conf -d prod bins.csv --dry-run
+    python3 -m tools.bin_import -c /etc/odoo/odoo.conf -d prod bins.csv --full-refresh
+
+Odoo'nun içe aktarılabilir olması gerekir (odoo-bin ile aynı ortam).
+Zamanlanmış yenileme için 'Mews POS: BIN Tablosu İçe Aktarımı' görevi ve
+mews_pos.bin_import_path parametresi kullanılabilir.
+"""
+
+import argparse
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BIN tablosu içe aktarımı')
+    parser.add_argument('path', help='BIN dosyası (CSV, JSON veya JSON Lines)')
+    parser.add_argument('-c', '--config', help='Odoo yapılandırma dosyası')
+    parser.add_argument('-d', '--database', required=True, help='Veritabanı')
+    parser.add_argument('--format', choices=('csv', 'json', 'jsonl'), help='Boşsa dosya adından belirlenir')
+    parser.add_argument('--full-refresh', action='store_true', help='Dosyada olmayan aktif BIN\'leri pasife al')
+    parser.add_argument('--dry-run', action='store_true', help='Yazmadan yalnızca farkları raporla')
+    parser.add_argument('--chunk-size', type=int, help='COPY parçası başına satır')
+    args = parser.parse_args(argv)
+
+    from odoo import api
+    from odoo.modules.registry import Registry
+    from odoo.tools import config
+    from odoo.addons.mews_pos.lib.bin_import import BinImportError, format_report
+
+    config.parse_config(['-c', args.config] if args.config else [])
+    registry = Registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, api.SUPERUSER_ID, {})
+        try:
+            with open(args.path, 'rb') as stream:
+                report = env['mews.pos.bin'].import_bins(
+                    stream,
+                    fmt=args.format,
+                    filename=args.path,
+                    full_refresh=args.full_refresh,
+                    dry_run=args.dry_run,
+                    chunk_size=args.chunk_size,
+                )
+        except (OSError, BinImportError) as e:
+            print(f"BIN dosyası okunamadı: {e}", file=sys.stderr)
+            return 1
+    print(format_report(report, max_items=50))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
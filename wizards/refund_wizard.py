@@ -56,6 +56,7 @@ class MewsPosRefundWizard(models.TransientModel):
         
         transaction = self.transaction_id
         
+        from odoo.addons.mews_pos.lib.gateways.result import dumps
         from odoo.addons.mews_pos.services.payment_gateway_service import PaymentGatewayService
         gateway = PaymentGatewayService(self.env)
         
@@ -74,7 +75,7 @@ class MewsPosRefundWizard(models.TransientModel):
                 refund.write({
                     'state': 'success',
                     'refund_ref': result.get('data', {}).get('refund_ref'),
-                    'response_data': str(result),
+                    'response_data': dumps(result),
                     'processed_at': fields.Datetime.now(),
                 })
                 
@@ -105,7 +106,7 @@ class MewsPosRefundWizard(models.TransientModel):
                 refund.write({
                     'state': 'failed',
                     'error_message': result.get('error', 'Bilinmeyen hata'),
-                    'response_data': str(result),
+                    'response_data': dumps(result),
                 })
                 
                 raise UserError(_('İade işlemi başarısız:  %s') % result.get('error', 'Bilinmeyen hata'))